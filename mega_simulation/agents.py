@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Agent-Based Device Simulator
+Device-level counterpart of the closed-form engine (``compute_token_economics``,
+``compute_user_income``). Every phone is an agent carrying its own state:
+
+  model            uint8    row of the fleet model table (``fleet.py``)
+  region           uint8    key index into ``REGIONS``
+  propensity       uint8    chance of being online on a given night (/255)
+  battery_health   float32  remaining battery capacity (1.0 = new)
+  earnings         float32  cumulative net USD paid to the owner
+  reputation       uint8    verification score; < REPUTATION_FLOOR = benched
+
+That is 12 bytes per device in structure-of-arrays buffers, so one billion
+phones fit in ~12 GB. A smaller sample can stand in for the full population,
+with every agent reweighted by ``total_devices / sample_size``. Nightly
+steps are fully vectorized and run in fixed-size chunks, which keeps
+temporaries bounded however large the population is.
+
+``reconcile`` compares the aggregates with the closed-form engine. With no
+faults the two must agree up to sampling noise, which is the correctness
+check for the agent mode.
+
+Run with:
+    python mega_simulation/agents.py --devices 1000000000 --sample 5000000 --nights 30
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.data import (
+    REGIONS, Region, H100_TOPS, DEVICE_EXTRA_WATT, NIGHTLY_HOURS,
+    BATTERY_CYCLE_PER_NIGHT_PCT, BATTERY_TOTAL_CYCLES,
+)
+from mega_simulation.engine import compute_token_economics, compute_user_income
+from mega_simulation.fleet import ModelTable, build_model_table
+from mega_simulation.results import CategoryResults
+
+DEFAULT_CHUNK: int = 1 << 22                # Agents per vectorized block
+BATTERY_FADE_AT_END_OF_LIFE: float = 0.20   # Capacity lost over BATTERY_TOTAL_CYCLES
+REPUTATION_START: int = 200
+REPUTATION_FLOOR: int = 128                 # Below this a device is benched (unpaid)
+REPUTATION_GAIN: int = 1                    # Per verified (or probation) night
+REPUTATION_PENALTY: int = 64                # Per failed verification
+
+
+def blocks(n: int, chunk: int) -> Iterator[slice]:
+    """Consecutive ``chunk``-sized slices covering ``range(n)``."""
+    for lo in range(0, n, chunk):
+        yield slice(lo, min(lo + chunk, n))
+
+
+def draw_weights(models: ModelTable, regions: Mapping[str, Region]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sampling probabilities: models by installed base, regions by smartphone users."""
+    users = np.array([r.population_millions * r.smartphone_penetration for r in regions.values()])
+    return models.installed / models.installed.sum(), users / users.sum()
+
+
+def draw_block(
+    rng: np.random.Generator,
+    n: int,
+    uptime: float,
+    concentration: float,
+    model_p: np.ndarray,
+    region_p: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Model, region and quantized propensity for ``n`` new agents."""
+    model = rng.choice(model_p.size, n, p=model_p).astype(np.uint8)
+    region = rng.choice(region_p.size, n, p=region_p).astype(np.uint8)
+    p = rng.beta(uptime * concentration, (1 - uptime) * concentration, n)
+    # Stochastic rounding keeps E[propensity / 255] equal to p.
+    propensity = np.floor(p * 255 + rng.random(n)).astype(np.uint8)
+    return model, region, propensity
+
+
+@dataclass
+class AgentPopulation:
+    """Structure-of-arrays device state, optionally a reweighted sample."""
+    model: np.ndarray
+    region: np.ndarray
+    propensity: np.ndarray
+    battery_health: np.ndarray
+    earnings: np.ndarray
+    reputation: np.ndarray
+    weight: float                           # Real devices represented by each agent
+    models: ModelTable
+    regions: List[str]
+
+    @property
+    def size(self) -> int:
+        return self.model.size
+
+    @property
+    def represented(self) -> float:
+        """Number of real devices the population stands for."""
+        return self.size * self.weight
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.model, self.region, self.propensity,
+                                      self.battery_health, self.earnings, self.reputation))
+
+    @classmethod
+    def create(
+        cls,
+        total_devices: int,
+        uptime: float,
+        sample_size: Optional[int] = None,
+        models: Optional[ModelTable] = None,
+        regions: Mapping[str, Region] = REGIONS,
+        concentration: float = 4.0,
+        seed: int = 0,
+        chunk: int = DEFAULT_CHUNK,
+    ) -> "AgentPopulation":
+        """Draw a population.
+
+        Args:
+            total_devices: Real devices in the network.
+            uptime: Mean nightly online probability; per-device propensities
+                follow a Beta distribution with this mean.
+            sample_size: Agents to simulate (default: one per device).
+            models: Model table to draw devices from, weighted by installed
+                base (default: all companies, ``fleet.build_model_table``).
+            regions: Regions, weighted by smartphone users.
+            concentration: Beta a + b; lower means more heterogeneous owners.
+            seed: RNG seed.
+            chunk: Agents generated per block.
+        """
+        if not 0.0 < uptime < 1.0:
+            raise ValueError(f"uptime must be in (0, 1), got {uptime}")
+        models = models if models is not None else build_model_table()
+        if len(models) > 256:
+            raise ValueError(f"{len(models)} models do not fit a uint8 index")
+        n = int(sample_size or total_devices)
+        model_p, region_p = draw_weights(models, regions)
+
+        model = np.empty(n, dtype=np.uint8)
+        region = np.empty(n, dtype=np.uint8)
+        propensity = np.empty(n, dtype=np.uint8)
+        for block, sl in enumerate(blocks(n, chunk)):
+            rng = np.random.default_rng([seed, block])
+            model[sl], region[sl], propensity[sl] = draw_block(
+                rng, sl.stop - sl.start, uptime, concentration, model_p, region_p)
+        return cls(
+            model=model, region=region, propensity=propensity,
+            battery_health=np.ones(n, dtype=np.float32),
+            earnings=np.zeros(n, dtype=np.float32),
+            reputation=np.full(n, REPUTATION_START, dtype=np.uint8),
+            weight=total_devices / n,
+            models=models,
+            regions=list(regions),
+        )
+
+
+@dataclass
+class AgentRun:
+    """Weighted network totals of a multi-night run."""
+    nights: int
+    token_price: float
+    platform_cut: float
+    active: np.ndarray              # Online devices per night
+    paid: np.ndarray                # Online and neither benched nor failed
+    failures: np.ndarray
+    online_tops: np.ndarray         # Peak TOPS online per night
+    region_paid_nights: np.ndarray
+    region_net: np.ndarray          # Owner net earnings per region (USD)
+    seconds: float = 0.0
+
+    @property
+    def gpu_hours(self) -> np.ndarray:
+        return self.paid * NIGHTLY_HOURS
+
+    @property
+    def gross(self) -> np.ndarray:
+        """Token flow per night (USD)."""
+        return self.gpu_hours * self.token_price
+
+    @classmethod
+    def empty(cls, nights: int, token_price: float, platform_cut: float, regions: int) -> "AgentRun":
+        return cls(nights=nights, token_price=token_price, platform_cut=platform_cut,
+                   active=np.zeros(nights), paid=np.zeros(nights), failures=np.zeros(nights),
+                   online_tops=np.zeros(nights),
+                   region_paid_nights=np.zeros(regions), region_net=np.zeros(regions))
+
+    def add(self, part: Dict[str, np.ndarray], weight: float) -> None:
+        """Accumulate one block's unweighted sums (from ``run_block``)."""
+        for name, values in part.items():
+            getattr(self, name)[...] += values * weight
+
+
+def _step_night(
+    pop: AgentPopulation,
+    sl: slice,
+    rng: np.random.Generator,
+    payout: np.float32,
+    faulty_pct: float,
+    electricity_kwh: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Advance one block of agents by one night; returns (online, paid, failed, net)."""
+    n = sl.stop - sl.start
+    online = rng.random(n, dtype=np.float32) * 255 < pop.propensity[sl]
+    rep = pop.reputation[sl]
+    benched = rep < REPUTATION_FLOOR
+    failed = online & ~benched
+    if faulty_pct > 0:
+        failed &= rng.random(n, dtype=np.float32) < faulty_pct / 100.0
+    else:
+        failed[:] = False
+    paid = online & ~benched & ~failed
+
+    net = np.where(paid, payout, np.float32(0)) - np.where(online, electricity_kwh[pop.region[sl]], np.float32(0))
+    pop.earnings[sl] += net
+
+    gain = online & ~failed
+    pop.reputation[sl] = np.where(
+        failed, np.maximum(rep.astype(np.int16) - REPUTATION_PENALTY, 0),
+        np.minimum(rep.astype(np.int16) + REPUTATION_GAIN * gain, 255)).astype(np.uint8)
+    fade = BATTERY_FADE_AT_END_OF_LIFE * BATTERY_CYCLE_PER_NIGHT_PCT / 100.0 / BATTERY_TOTAL_CYCLES
+    pop.battery_health[sl] -= np.float32(fade) * online
+    return online, paid, failed, net
+
+
+def run_block(
+    pop: AgentPopulation,
+    sl: slice,
+    rng: np.random.Generator,
+    nights: int,
+    token_price: float,
+    platform_cut: float,
+    faulty_pct: float,
+) -> Dict[str, np.ndarray]:
+    """Run one block of agents through every night; returns unweighted sums.
+
+    Agents never interact, so a block can go through the whole run before
+    the next one starts. That keeps it cache- and page-resident, and lets
+    independent blocks run in separate processes.
+    """
+    cost = np.array([REGIONS[k].electricity_cost_kwh for k in pop.regions])
+    electricity_kwh = (DEVICE_EXTRA_WATT * NIGHTLY_HOURS / 1000.0 * cost).astype(np.float32)
+    payout = np.float32(NIGHTLY_HOURS * token_price * (1 - platform_cut))
+    region = pop.region[sl]
+    tops = pop.models.tops[pop.model[sl]]
+    out = {
+        "active": np.zeros(nights), "paid": np.zeros(nights), "failures": np.zeros(nights),
+        "online_tops": np.zeros(nights),
+        "region_paid_nights": np.zeros(cost.size), "region_net": np.zeros(cost.size),
+    }
+    for night in range(nights):
+        online, paid, failed, net = _step_night(pop, sl, rng, payout, faulty_pct, electricity_kwh)
+        out["active"][night] = online.sum()
+        out["paid"][night] = paid.sum()
+        out["failures"][night] = failed.sum()
+        out["online_tops"][night] = tops @ online
+        out["region_paid_nights"] += np.bincount(region, weights=paid, minlength=cost.size)
+        out["region_net"] += np.bincount(region, weights=net, minlength=cost.size)
+    return out
+
+
+def simulate_agents(
+    pop: AgentPopulation,
+    nights: int = 30,
+    token_price: float = 0.20,
+    platform_cut: float = 0.15,
+    faulty_pct: float = 0.0,
+    seed: int = 1,
+    chunk: int = DEFAULT_CHUNK,
+) -> AgentRun:
+    """Run the population for ``nights`` nights, updating agent state in place.
+
+    Args:
+        pop: Population from ``AgentPopulation.create``.
+        nights: Nights to simulate.
+        token_price: USD per GPU-hour (1 token = 1 GPU-hour).
+        platform_cut: NHP's fee; owners receive the rest minus electricity.
+        faulty_pct: % of paid nights whose result fails verification.
+        seed: RNG seed; block ``i`` draws from ``default_rng([seed, i])``.
+        chunk: Agents per vectorized block.
+
+    Returns:
+        AgentRun with weighted per-night totals and per-region earnings.
+    """
+    run = AgentRun.empty(nights, token_price, platform_cut, len(pop.regions))
+    start = time.time()
+    for block, sl in enumerate(blocks(pop.size, chunk)):
+        rng = np.random.default_rng([seed, block])
+        run.add(run_block(pop, sl, rng, nights, token_price, platform_cut, faulty_pct), pop.weight)
+    run.seconds = time.time() - start
+    return run
+
+
+def reconcile(pop: AgentPopulation, run: AgentRun, uptime: float) -> CategoryResults:
+    """Agent aggregates next to the closed-form engine, metric by metric.
+
+    Network totals are compared with ``compute_token_economics`` (scaled from
+    30 nights to ``run.nights``). Each region's net earnings per paid night
+    × 30 are compared with ``compute_user_income`` at the after-fee price.
+    Fleet TOPS online is compared with the installed-base mix times uptime.
+    """
+    closed = compute_token_economics(int(round(pop.represented)), uptime, run.token_price, run.platform_cut)
+    month = run.nights / 30.0
+    flow = run.gross.sum()
+    mix_tops = float(pop.models.tops @ (pop.models.installed / pop.models.installed.sum()))
+    rows = [
+        ("active_devices", run.active.mean(), closed["active_devices"]),
+        ("gpu_hours", run.gpu_hours.sum(), closed["monthly_gpu_hours"] * month),
+        ("token_flow", flow, closed["total_monthly_flow"] * month),
+        ("platform_revenue", flow * run.platform_cut, closed["platform_revenue_monthly"] * month),
+        ("user_payouts", flow * (1 - run.platform_cut), closed["user_payouts_monthly"] * month),
+        ("h100_equivalent", run.online_tops.mean() / H100_TOPS,
+         pop.represented * uptime * mix_tops / H100_TOPS),
+    ]
+    for i, key in enumerate(pop.regions):
+        if run.region_paid_nights[i] > 0:
+            income = compute_user_income(REGIONS[key], run.token_price * (1 - run.platform_cut))
+            rows.append((f"monthly_net_{key}", run.region_net[i] / run.region_paid_nights[i] * 30,
+                         income["monthly_net"]))
+    metric, agents, closed_form = zip(*rows)
+    agents, closed_form = np.array(agents), np.array(closed_form)
+    diff = np.divide(agents - closed_form, np.abs(closed_form),
+                     out=np.zeros_like(agents), where=closed_form != 0) * 100
+    return CategoryResults("reconciliation", {
+        "metric": np.array(metric), "agents": agents, "closed_form": closed_form, "diff_pct": diff,
+    })
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Agent-based device simulation with closed-form reconciliation.")
+    parser.add_argument("--devices", type=float, default=1e9, help="real devices in the network")
+    parser.add_argument("--sample", type=float, default=5e6,
+                        help="agents to simulate (0 = one agent per device)")
+    parser.add_argument("--nights", type=int, default=30)
+    parser.add_argument("--uptime", type=float, default=0.25)
+    parser.add_argument("--token-price", type=float, default=0.20, help="USD per GPU-hour")
+    parser.add_argument("--platform-cut", type=float, default=0.15)
+    parser.add_argument("--faulty-pct", type=float, default=0.0,
+                        help="% of results failing verification (breaks reconciliation on purpose)")
+    parser.add_argument("--tolerance-pct", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Simulate the population and print the reconciliation table."""
+    args = parse_args(argv)
+    devices = int(args.devices)
+    sample = int(args.sample) or devices
+
+    print("=" * 60)
+    print("  NHP AGENT-BASED SIMULATION — محاكاة على مستوى الجهاز")
+    print("=" * 60)
+    start = time.time()
+    pop = AgentPopulation.create(devices, args.uptime, sample, seed=args.seed, chunk=args.chunk_size)
+    print(f"  {pop.size:,} agents × {pop.weight:,.1f} = {pop.represented:,.0f} devices | "
+          f"{pop.nbytes / 1e9:.2f} GB state ({pop.nbytes / pop.size:.0f} B/agent) | built in {time.time() - start:.1f}s")
+
+    run = simulate_agents(pop, args.nights, args.token_price, args.platform_cut, args.faulty_pct,
+                          seed=args.seed + 1, chunk=args.chunk_size)
+    rate = pop.size * args.nights / max(run.seconds, 1e-9)
+    print(f"  {args.nights} nights in {run.seconds:.1f}s ({rate / 1e6:,.0f}M agent-nights/s)")
+    print(f"  Mean battery health {pop.battery_health.mean():.4f} | "
+          f"benched {np.mean(pop.reputation < REPUTATION_FLOOR) * 100:.2f}% | "
+          f"median owner earnings ${np.median(pop.earnings):.2f}")
+
+    table = reconcile(pop, run, args.uptime)
+    print(f"\n  {'Metric':<26} {'Agents':>16} {'Closed form':>16} {'Diff':>8}")
+    ok = True
+    for r in table:
+        within = abs(r["diff_pct"]) <= args.tolerance_pct
+        ok &= within
+        print(f"  {r['metric']:<26} {r['agents']:>16,.2f} {r['closed_form']:>16,.2f} "
+              f"{r['diff_pct']:>+7.3f}% {'✅' if within else '❌'}")
+    print(f"\n  {'✅ Reconciled' if ok else '❌ Not reconciled'} within ±{args.tolerance_pct}%")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Global Device Availability Model
+Share of each region's phones that are idle on a charger, at minute (or
+coarser) resolution over a full calendar year:
+
+  • exact UTC offsets, including fractional ones (UTC+5:30),
+  • daylight-saving rules (EU, US, southern-hemisphere AU),
+  • a per-region charging curve: plug-in and unplug times are normally
+    distributed around the region's night window,
+  • later nights before days off, with per-region weekends.
+
+The result is a compact ``time × region`` float32 matrix
+(``AvailabilityMatrix``). It is cached on disk under a key derived from
+the region definitions and this module's code, so capacity and
+scheduling models can read it without recomputing.
+
+Run with:
+    python mega_simulation/availability.py --year 2026 --step 1
+"""
+import argparse
+import calendar
+import math
+import os
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.chart_cache import Fingerprint
+
+MINUTES_PER_DAY: int = 1440
+DEFAULT_CACHE_DIR: str = "output/.availability"
+_EPOCH_WEEKDAY: int = 3  # 1970-01-01 was a Thursday (Monday = 0)
+
+
+@dataclass
+class ChargingProfile:
+    """Overnight charging behaviour (local clock hours)."""
+    plug_in_h: float                # Mean plug-in time, evening
+    unplug_h: float                 # Mean unplug time, morning
+    plug_in_sd_h: float = 1.0
+    unplug_sd_h: float = 0.75
+    nightly_pct: float = 85.0       # % of devices charging on a given night
+    daytime_pct: float = 3.0        # % idle on a charger outside the night
+    weekend_shift_h: float = 1.0    # Later plug-in and unplug before a day off
+
+
+@dataclass
+class RegionAvailability:
+    """One region of the global fleet."""
+    name: str
+    utc_offset_h: float             # Standard-time offset (may be fractional)
+    devices_m: float                # Participating devices (millions)
+    charging: ChargingProfile
+    dst: Optional[str] = None       # "eu", "us", "au" or None
+    days_off: Tuple[int, ...] = (5, 6)  # Weekend days (Monday = 0)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CALENDAR
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _sunday(year: int, month: int, n: int) -> datetime:
+    """``n``-th Sunday of a month (``n = -1`` for the last one)."""
+    days = [d for d in range(1, calendar.monthrange(year, month)[1] + 1)
+            if calendar.weekday(year, month, d) == calendar.SUNDAY]
+    return datetime(year, month, days[n])
+
+
+def dst_window(rule: str, year: int, utc_offset_h: float) -> Tuple[np.datetime64, np.datetime64]:
+    """UTC instants when daylight time starts and ends in ``year``.
+
+    For the southern-hemisphere rule the window wraps the new year: daylight
+    time is active before ``end`` (April) and from ``start`` (October).
+    """
+    local = timedelta(hours=utc_offset_h)
+    if rule == "eu":    # last Sunday Mar / Oct, 01:00 UTC
+        start = _sunday(year, 3, -1) + timedelta(hours=1)
+        end = _sunday(year, 10, -1) + timedelta(hours=1)
+    elif rule == "us":  # 2nd Sunday Mar 02:00 standard, 1st Sunday Nov 02:00 daylight
+        start = _sunday(year, 3, 1) + timedelta(hours=2) - local
+        end = _sunday(year, 11, 0) + timedelta(hours=1) - local
+    elif rule == "au":  # 1st Sunday Oct 02:00 standard, 1st Sunday Apr 03:00 daylight
+        start = _sunday(year, 10, 0) + timedelta(hours=2) - local
+        end = _sunday(year, 4, 0) + timedelta(hours=2) - local
+    else:
+        raise ValueError(f"Unknown DST rule '{rule}' (expected 'eu', 'us' or 'au')")
+    return np.datetime64(start, "m"), np.datetime64(end, "m")
+
+
+def utc_offset_minutes(region: RegionAvailability, times: np.ndarray) -> np.ndarray:
+    """Local offset in minutes for every UTC instant in ``times``."""
+    base = int(round(region.utc_offset_h * 60))
+    offset = np.full(times.shape, base, dtype=np.int64)
+    if region.dst is None:
+        return offset
+    years = times.astype("datetime64[Y]").astype(int) + 1970
+    for year in np.unique(years):
+        start, end = dst_window(region.dst, int(year), region.utc_offset_h)
+        in_year = years == year
+        if start < end:
+            active = (times >= start) & (times < end)
+        else:
+            active = (times < end) | (times >= start)
+        offset[in_year & active] += 60
+    return offset
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CHARGING CURVES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _normal_cdf(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.vectorize(math.erf)(x / math.sqrt(2.0)))
+
+
+def charging_curves(profile: ChargingProfile) -> np.ndarray:
+    """Available share by minute since local noon: ``(2, 1440)`` for regular / pre-day-off nights.
+
+    The night runs from noon to noon, so plug-in and unplug never wrap.
+    """
+    hours = np.arange(MINUTES_PER_DAY) / 60.0
+    curves = np.empty((2, MINUTES_PER_DAY), dtype=np.float32)
+    for i, shift in enumerate((0.0, profile.weekend_shift_h)):
+        plug = (profile.plug_in_h + shift - 12.0) % 24.0
+        unplug = (profile.unplug_h + shift - 12.0) % 24.0
+        on_charger = (_normal_cdf((hours - plug) / profile.plug_in_sd_h)
+                      - _normal_cdf((hours - unplug) / profile.unplug_sd_h))
+        share = profile.nightly_pct * np.clip(on_charger, 0.0, 1.0) + profile.daytime_pct
+        curves[i] = np.minimum(share / 100.0, 1.0)
+    return curves
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MATRIX
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class AvailabilityMatrix:
+    """Available share of each region's devices over time.
+
+    Args:
+        start: First time slot (UTC, minute precision).
+        step_minutes: Slot length.
+        regions: Region names (column order).
+        devices_m: Devices per region (millions).
+        fraction: ``(slots, regions)`` float32 share available.
+    """
+    start: np.datetime64
+    step_minutes: int
+    regions: Tuple[str, ...]
+    devices_m: np.ndarray
+    fraction: np.ndarray = field(repr=False)
+
+    def __len__(self) -> int:
+        return self.fraction.shape[0]
+
+    def times(self) -> np.ndarray:
+        """UTC start of every slot."""
+        return self.start + np.arange(len(self)) * np.timedelta64(self.step_minutes, "m")
+
+    def slot(self, when: Any) -> int:
+        """Index of the slot containing a UTC instant."""
+        delta = (np.datetime64(when, "m") - self.start).astype(np.int64)
+        return int(delta // self.step_minutes) % len(self)
+
+    def available_m(self) -> np.ndarray:
+        """``(slots, regions)`` available devices (millions)."""
+        return self.fraction * self.devices_m.astype(np.float32)
+
+    def total_m(self) -> np.ndarray:
+        """Available devices across all regions per slot (millions)."""
+        return self.fraction @ self.devices_m.astype(np.float32)
+
+    def by_utc_hour(self) -> np.ndarray:
+        """``(24, regions)`` mean available devices per UTC hour of day."""
+        hour = (np.arange(len(self)) * self.step_minutes
+                + (self.start - self.start.astype("datetime64[D]")).astype(int)) // 60 % 24
+        sums = np.zeros((24, len(self.regions)))
+        np.add.at(sums, hour, self.available_m())
+        return sums / np.bincount(hour, minlength=24)[:, None]
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(path, start=self.start.astype(np.int64), step_minutes=self.step_minutes,
+                            regions=np.asarray(self.regions), devices_m=self.devices_m,
+                            fraction=self.fraction)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "AvailabilityMatrix":
+        with np.load(path) as data:
+            return cls(np.datetime64(int(data["start"]), "m"), int(data["step_minutes"]),
+                       tuple(str(r) for r in data["regions"]), data["devices_m"], data["fraction"])
+
+
+def build_availability(
+    regions: Sequence[RegionAvailability],
+    year: int,
+    step_minutes: int = 1,
+) -> AvailabilityMatrix:
+    """Compute the availability matrix for one calendar year (UTC).
+
+    Args:
+        regions: Regions (matrix columns).
+        year: Calendar year.
+        step_minutes: Slot length; each slot is sampled at its start.
+
+    Returns:
+        The ``time × region`` matrix.
+    """
+    start = np.datetime64(f"{year}-01-01T00:00", "m")
+    end = np.datetime64(f"{year + 1}-01-01T00:00", "m")
+    times = np.arange(start, end, np.timedelta64(step_minutes, "m"))
+    utc_minutes = times.astype(np.int64)
+
+    fraction = np.empty((times.size, len(regions)), dtype=np.float32)
+    for j, region in enumerate(regions):
+        since_noon = utc_minutes + utc_offset_minutes(region, times) - MINUTES_PER_DAY // 2
+        night_of = since_noon // MINUTES_PER_DAY
+        # The night before a day off behaves like a weekend night
+        next_day = (night_of + 1 + _EPOCH_WEEKDAY) % 7
+        day_off = np.isin(next_day, region.days_off).astype(np.intp)
+        fraction[:, j] = charging_curves(region.charging)[day_off, since_noon % MINUTES_PER_DAY]
+
+    return AvailabilityMatrix(start, step_minutes, tuple(r.name for r in regions),
+                              np.asarray([r.devices_m for r in regions], dtype=float), fraction)
+
+
+def availability_matrix(
+    regions: Sequence[RegionAvailability],
+    year: int,
+    step_minutes: int = 1,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+) -> AvailabilityMatrix:
+    """Cached ``build_availability``.
+
+    The cache key covers the regions, year, step and the code of
+    ``build_availability`` (with everything it calls), so edits to either
+    invalidate stale matrices. ``cache_dir=None`` disables the cache.
+    """
+    if cache_dir is None:
+        return build_availability(regions, year, step_minutes)
+    key = Fingerprint().update_function(build_availability).update([list(regions), year, step_minutes])
+    path = os.path.join(cache_dir, f"availability_{year}_{step_minutes}m_{key.hexdigest()[:16]}.npz")
+    if os.path.exists(path):
+        return AvailabilityMatrix.load(path)
+    matrix = build_availability(regions, year, step_minutes)
+    matrix.save(path)
+    return matrix
+
+
+def timezone_availability(
+    timezones: Sequence[Dict[str, Any]],
+    **charging: Any,
+) -> List[RegionAvailability]:
+    """Regions from ``TIMEZONE_REGIONS``-style dicts.
+
+    The dicts' ``night_start`` / ``night_end`` become the mean plug-in and
+    unplug times. Optional ``dst`` and ``days_off`` keys set the calendar,
+    and extra keyword arguments override ``ChargingProfile`` defaults.
+    """
+    return [
+        RegionAvailability(
+            tz["name"], tz["utc"], tz["devices_m"],
+            ChargingProfile(tz["night_start"], tz["night_end"], **charging),
+            dst=tz.get("dst"), days_off=tuple(tz.get("days_off", (5, 6))),
+        )
+        for tz in timezones
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Build the global device availability matrix.")
+    parser.add_argument("--year", type=int, default=datetime.now().year)
+    parser.add_argument("--step", type=int, default=1, help="slot length in minutes")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Build (or load) the matrix for the Phase 7 regions and summarize it."""
+    from mega_simulation.visionary_scenarios import TIMEZONE_REGIONS
+
+    args = parse_args(argv)
+    matrix = availability_matrix(timezone_availability(TIMEZONE_REGIONS), args.year, args.step, args.cache_dir)
+    total = matrix.total_m()
+    print("=" * 60)
+    print("  NHP GLOBAL AVAILABILITY — التوفر العالمي")
+    print(f"  {args.year} | {len(matrix):,} slots × {len(matrix.regions)} regions "
+          f"| {matrix.fraction.nbytes / 1e6:.1f} MB")
+    print("=" * 60)
+    print(f"  Min / mean / max available: {total.min():.0f}M / {total.mean():.0f}M / {total.max():.0f}M")
+    worst = matrix.times()[int(total.argmin())]
+    print(f"  Lowest availability at:     {worst} UTC")
+    for name, peak in zip(matrix.regions, matrix.available_m().max(axis=0)):
+        print(f"  {name:16s} peak {peak:7.0f}M")
+
+
+if __name__ == "__main__":
+    main()
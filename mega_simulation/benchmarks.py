@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Benchmarks
+Standalone benchmark harness. Run with:
+    python mega_simulation/benchmarks.py [--groups startup parity engine sweep stages]
+        [--sizes 1e3 1e4 1e5 1e6 1e7] [--json out.json] [--compare base.json]
+
+Groups:
+    startup  each case runs in a fresh interpreter and is timed from its
+             first import to its last statement, keeping the best of
+             ``--repeats`` runs. A case fails when it exceeds its time budget
+             (scaled by ``--budget-scale`` for slower machines) or loads a
+             forbidden module. For the numbers-only entry points that module
+             is matplotlib, which alone costs several times the whole
+             compute stack to import.
+    parity   every registry × variant combination through both the scalar
+             ``engine.py`` and the batch ``vectorized.py`` functions; a
+             case fails when any column differs.
+    engine   every ``compute_*`` function: the scalar ``engine.py`` version
+             per call, and the ``vectorized.py`` batch at each grid size.
+    sweep    ``run_sweep`` over a region × token-price grid of each size.
+    stages   ``run_all_categories``, ``generate_all_charts``,
+             ``generate_mega_report``, ``save_csv_export`` and
+             ``generate_company_reports.main`` (in a scratch directory).
+
+Timings are the best of ``--repeats`` (``timeit`` auto-ranging for fast
+calls). ``--json`` stores every result with the commit and environment,
+and ``--compare`` diffs the run against such a file. The exit status is 1
+when a startup or parity case fails or a benchmark is slower than ``--threshold``
+× its baseline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+from dataclasses import dataclass, is_dataclass
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+GROUPS: Tuple[str, ...] = ("startup", "parity", "engine", "sweep", "stages")
+DEFAULT_SIZES: Tuple[int, ...] = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+REGRESSION_THRESHOLD: float = 1.25
+
+# Compute-only modules with a chart layer: importing them must stay cheap.
+PHASE_MODULES: Tuple[str, ...] = (
+    "settlement_comparison", "developer_ecosystem", "network_security_compliance",
+    "visionary_scenarios", "critique_scenarios", "regional_markets", "complete_coverage",
+    "generate_company_reports",
+)
+
+
+@dataclass(frozen=True)
+class StartupCase:
+    """One cold-start measurement.
+
+    Args:
+        name: Label in the results table.
+        code: Python statements timed in a fresh interpreter (cwd is a
+            scratch directory, the project root is importable).
+        budget_s: Allowed wall time before scaling.
+        forbidden: Modules that must not be loaded when ``code`` finishes.
+    """
+    name: str
+    code: str
+    budget_s: float
+    forbidden: Tuple[str, ...] = ("matplotlib",)
+
+
+STARTUP_CASES: List[StartupCase] = [
+    StartupCase("import engine", "import mega_simulation.engine", 0.25),
+    StartupCase("import scenarios", "import mega_simulation.scenarios", 0.5),
+    StartupCase("import run", "import mega_simulation.run", 0.6),
+    StartupCase("import phase modules",
+                "; ".join(f"import mega_simulation.{m}" for m in PHASE_MODULES), 0.8),
+    StartupCase("run.py --no-charts",
+                "from mega_simulation.run import main; main(['--no-charts', '--export', 'csv'])", 3.0),
+]
+
+# Timed in the child: the case code plus a report of which forbidden modules loaded.
+_CHILD = """\
+import sys, time, json, io, contextlib
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    exec({code!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed,
+                  "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def time_startup(case: StartupCase, repeats: int = 5) -> Dict[str, Any]:
+    """Best-of-``repeats`` cold-start time of one case.
+
+    Returns:
+        Dict with ``seconds`` (best run), ``runs`` (all runs), ``loaded``
+        (forbidden modules seen in any run) and ``error`` (last stderr
+        line of a failed child, else ``None``).
+    """
+    script = _CHILD.format(root=PROJECT_ROOT, code=case.code, forbidden=case.forbidden)
+    runs: List[float] = []
+    loaded: set = set()
+    with tempfile.TemporaryDirectory(prefix="nhp-bench-") as scratch:
+        for _ in range(repeats):
+            proc = subprocess.run([sys.executable, "-c", script], cwd=scratch,
+                                  capture_output=True, text=True, check=False)
+            if proc.returncode != 0:
+                error = (proc.stderr.strip().splitlines() or [f"exit status {proc.returncode}"])[-1]
+                return {"seconds": float("inf"), "runs": runs, "loaded": sorted(loaded), "error": error}
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            runs.append(result["seconds"])
+            loaded.update(result["loaded"])
+    return {"seconds": min(runs), "runs": runs, "loaded": sorted(loaded), "error": None}
+
+
+def run_startup(
+    cases: List[StartupCase] = STARTUP_CASES,
+    repeats: int = 5,
+    budget_scale: float = 1.0,
+) -> List[Dict[str, Any]]:
+    """Time every startup case and check it against its budget.
+
+    Returns:
+        One row per case: name, seconds, budget_s, loaded, error, ok.
+    """
+    rows = []
+    for case in cases:
+        result = time_startup(case, repeats)
+        budget = case.budget_s * budget_scale
+        rows.append({
+            "name": case.name,
+            "seconds": result["seconds"],
+            "budget_s": budget,
+            "loaded": result["loaded"],
+            "error": result["error"],
+            "ok": result["seconds"] <= budget and not result["loaded"],
+        })
+    return rows
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# IN-PROCESS BENCHMARKS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def time_call(func: Callable[[], Any], repeats: int = 5, max_seconds: float = 10.0) -> float:
+    """Best seconds per call over up to ``repeats`` timings.
+
+    Fast calls are looped (``timeit`` auto-ranging); slow ones stop
+    repeating once ``max_seconds`` have been spent.
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    runs = [elapsed]
+    while len(runs) < repeats and sum(runs) < max_seconds:
+        runs.append(timer.timeit(number))
+    return min(runs) / number
+
+
+def _result(group: str, name: str, size: int, seconds: float) -> Dict[str, Any]:
+    return {"group": group, "name": name, "size": size, "seconds": seconds,
+            "ns_per_row": seconds / size * 1e9 if size else None}
+
+
+def tiled_args(rows: Sequence[Tuple[Any, ...]], size: int) -> List[Any]:
+    """Batch columns of ``size`` rows, cycling through ``rows``.
+
+    Registry columns become a ``RecordArray`` gathered by index, as the
+    sweep engine builds them, so only the compute itself is timed.
+    """
+    from mega_simulation.vectorized import RecordArray
+
+    idx = np.arange(size) % len(rows)
+    columns: List[Any] = []
+    for values in zip(*rows):
+        if is_dataclass(values[0]):
+            columns.append(RecordArray.from_records(values).take(idx))
+        elif isinstance(values[0], list):
+            columns.append([values[i] for i in idx])
+        else:
+            columns.append(np.asarray(values)[idx])
+    return columns
+
+
+def run_parity() -> List[Dict[str, Any]]:
+    """Scalar ↔ batch parity of every ``compute_*`` function (``vectorized.parity_cases``)."""
+    from mega_simulation.vectorized import check_parity, parity_cases
+
+    return [{"name": name, "rows": len(rows), "problems": check_parity(name, scalar_fn, batch_fn, rows)}
+            for name, scalar_fn, batch_fn, rows in parity_cases()]
+
+
+def bench_engine(sizes: Sequence[int], repeats: int = 5) -> List[Dict[str, Any]]:
+    """Scalar engine per call and batch engine per grid size, for every ``compute_*``.
+
+    Grids larger than ``DEFAULT_CHUNK_SIZE`` are evaluated in chunks of
+    that size, as the sweep engine does, so memory stays bounded.
+    """
+    from mega_simulation.sweep import DEFAULT_CHUNK_SIZE
+    from mega_simulation.vectorized import parity_cases
+
+    results = []
+    for name, scalar_fn, batch_fn, rows in parity_cases():
+        per_call = time_call(lambda: [scalar_fn(*args) for args in rows], repeats) / len(rows)
+        results.append(_result("engine", f"{name} (scalar)", 1, per_call))
+        for size in sizes:
+            full, rest = divmod(size, min(size, DEFAULT_CHUNK_SIZE))
+            chunk = tiled_args(rows, min(size, DEFAULT_CHUNK_SIZE))
+            tail = tiled_args(rows, rest) if rest else None
+
+            def run(chunk=chunk, tail=tail) -> None:
+                for _ in range(full):
+                    batch_fn(*chunk)
+                if tail is not None:
+                    batch_fn(*tail)
+
+            results.append(_result("engine", f"{name} (batch)", size, time_call(run, repeats)))
+    return results
+
+
+def bench_sweep(sizes: Sequence[int], repeats: int = 5) -> List[Dict[str, Any]]:
+    """``run_sweep`` over the C-XL grid (10 regions × size/10 token prices)."""
+    from mega_simulation.sinks import xl_income_sweep
+    from mega_simulation.sweep import run_sweep
+
+    results = []
+    for size in sizes:
+        sweep = xl_income_sweep(max(size // 10, 1))
+        results.append(_result("sweep", "run_sweep C-XL", sweep.size,
+                               time_call(lambda: run_sweep(sweep), repeats)))
+    return results
+
+
+def bench_stages(repeats: int = 1) -> List[Dict[str, Any]]:
+    """Phase 2 / Phase 3 stages, writing into a scratch directory."""
+    from mega_simulation import generate_company_reports
+    from mega_simulation.charts import generate_all_charts
+    from mega_simulation.report import generate_mega_report, save_csv_export
+    from mega_simulation.scenarios import run_all_categories
+
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="nhp-bench-") as scratch, \
+            contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(scratch)
+        try:
+            store = run_all_categories()
+            n = store.total_scenarios
+            charts_dir = os.path.join(scratch, "charts")
+            chart_paths = generate_all_charts(store, charts_dir, cache=False)
+            stages = [
+                ("run_all_categories", n, lambda: run_all_categories()),
+                ("generate_all_charts", n, lambda: generate_all_charts(store, charts_dir, cache=False)),
+                ("generate_mega_report", n, lambda: generate_mega_report(store, n, chart_paths)),
+                ("save_csv_export", n, lambda: save_csv_export(store, scratch)),
+                ("generate_company_reports.main", 0, lambda: generate_company_reports.main(["--no-cache"])),
+            ]
+            for name, size, func in stages:
+                timer = timeit.Timer(func)
+                results.append(_result("stages", name, size, min(timer.repeat(repeat=repeats, number=1))))
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# JSON RESULTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def environment() -> Dict[str, Any]:
+    """Commit and machine description stored next to the results."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    cwd=PROJECT_ROOT, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(path: str, results: List[Dict[str, Any]]) -> str:
+    """Write ``{"environment": ..., "results": [...]}`` as JSON."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2, default=str)
+    return path
+
+
+def compare_results(
+    baseline: List[Dict[str, Any]],
+    current: List[Dict[str, Any]],
+    threshold: float = REGRESSION_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Match results by (group, name, size) and compute the slowdown ratio.
+
+    Returns:
+        One row per benchmark present in both runs, with ``ratio``
+        (current / baseline seconds) and ``regression`` (ratio > threshold).
+    """
+    base = {(r["group"], r["name"], r["size"]): r["seconds"] for r in baseline}
+    rows = []
+    for r in current:
+        before = base.get((r["group"], r["name"], r["size"]))
+        if before is None or not before or r["seconds"] is None:
+            continue
+        ratio = r["seconds"] / before
+        rows.append({**r, "baseline_seconds": before, "ratio": ratio, "regression": ratio > threshold})
+    return rows
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="NHP mega simulation benchmarks.")
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--sizes", nargs="+", type=float, default=list(DEFAULT_SIZES),
+                        help="grid sizes for the engine and sweep groups")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per benchmark (best is kept)")
+    parser.add_argument("--stage-repeats", type=int, default=1, help="timed runs per stage")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply every startup budget (e.g. 2 on slow CI machines)")
+    parser.add_argument("--json", default=None, help="write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="baseline JSON from an earlier --json run")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown ratio vs --compare that counts as a regression")
+    return parser.parse_args(argv)
+
+
+def _fmt_seconds(seconds: float) -> str:
+    if seconds == float("inf"):
+        return "failed"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the selected benchmark groups; returns the process exit status."""
+    args = parse_args(argv)
+    sizes = [int(n) for n in args.sizes]
+    print("=" * 60)
+    print("  NHP BENCHMARKS — قياس الأداء")
+    print(f"  {', '.join(args.groups)} | sizes {', '.join(f'{n:,}' for n in sizes)} | best of {args.repeats}")
+    print("=" * 60)
+
+    results: List[Dict[str, Any]] = []
+    failed: List[str] = []
+    if "startup" in args.groups:
+        print("\n  Startup (cold interpreter):")
+        for r in run_startup(repeats=args.repeats, budget_scale=args.budget_scale):
+            status = "✅" if r["ok"] else "❌"
+            note = f"  loaded {', '.join(r['loaded'])}" if r["loaded"] else ""
+            if r["error"]:
+                note = f"  {r['error']}"
+            print(f"  {status} {r['name']:<30} {_fmt_seconds(r['seconds']):>10}  "
+                  f"(budget {_fmt_seconds(r['budget_s'])}){note}")
+            results.append({**_result("startup", r["name"], 0, r["seconds"]), "ok": r["ok"]})
+            if not r["ok"]:
+                failed.append(r["name"])
+
+    if "parity" in args.groups:
+        print("\n  Parity (vectorized.py ↔ engine.py):")
+        for r in run_parity():
+            status = "✅" if not r["problems"] else "❌"
+            print(f"  {status} {r['name']:<30} {r['rows']:>6,} rows")
+            for problem in r["problems"][:5]:
+                print(f"       {problem}")
+            if r["problems"]:
+                failed.append(f"parity {r['name']}")
+
+    sections = [("engine", "Engine (scalar per call, batch per grid)", lambda: bench_engine(sizes, args.repeats)),
+                ("sweep", "Sweep", lambda: bench_sweep(sizes, args.repeats)),
+                ("stages", "Stages", lambda: bench_stages(args.stage_repeats))]
+    for group, title, run in sections:
+        if group not in args.groups:
+            continue
+        print(f"\n  {title}:")
+        for r in run():
+            per_row = f"{r['ns_per_row']:>10,.1f} ns/row" if r["size"] > 1 else ""
+            size = f"{r['size']:>12,}" if r["size"] else " " * 12
+            print(f"    {r['name']:<32} {size} {_fmt_seconds(r['seconds']):>10} {per_row}")
+            results.append(r)
+
+    if args.json:
+        print(f"\n  ✅ Results saved: {save_results(args.json, results)}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        rows = compare_results(baseline, results, args.threshold)
+        print(f"\n  Compared with {args.compare} ({len(rows)} matching benchmarks):")
+        for r in rows:
+            mark = "❌" if r["regression"] else "  "
+            print(f"  {mark} {r['group']:<7} {r['name']:<32} {r['size']:>12,} "
+                  f"{_fmt_seconds(r['baseline_seconds']):>10} → {_fmt_seconds(r['seconds']):>10}  ×{r['ratio']:.2f}")
+        failed.extend(f"{r['name']} @ {r['size']:,}" for r in rows if r["regression"])
+
+    if failed:
+        print(f"\n  ❌ Failed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+NHP Mega Simulation — Content-Addressed Chart Cache
+Every rendered chart is recorded in a small manifest next to the PNGs
+(``<out_dir>/.chart_cache.json``) under a SHA-256 key built from:
+
+  • the chart function's bytecode and the package helpers it calls, by
+    name or as attributes (``results.value(...)``, ``module.func(...)``),
+  • the module-level data it reads (constants, registries),
+  • its arguments (result columns, profiles, lists of dicts),
+  • the chart style settings, render profile and matplotlib version.
+
+When the key of a job matches the manifest and the file is still on disk,
+the render is skipped and the existing path is reused.
+"""
+import hashlib
+import inspect
+import json
+import os
+import threading
+import types
+from dataclasses import fields, is_dataclass
+from typing import Dict, Any, List, Optional, Set
+
+import numpy as np
+
+MANIFEST_NAME: str = ".chart_cache.json"
+PACKAGE: str = "mega_simulation"
+
+
+# ═══════════════════════════════════════════════════════════════
+# FINGERPRINTING
+# ═══════════════════════════════════════════════════════════════
+
+def _module_stem(func: types.FunctionType) -> str:
+    """Module name without package, stable between ``-m``/script runs."""
+    module = func.__module__
+    if module == "__main__":
+        module = os.path.splitext(os.path.basename(func.__globals__.get("__file__", "")))[0]
+    return module.rsplit(".", 1)[-1]
+
+
+def job_id(func: types.FunctionType) -> str:
+    """Manifest entry name for a chart function, e.g. ``charts._chart_a``."""
+    return f"{_module_stem(func)}.{func.__qualname__}"
+
+
+def is_package_object(obj: Any) -> bool:
+    """Functions defined in this package (or a script run as ``__main__``)."""
+    module = getattr(obj, "__module__", "") or ""
+    return module == "__main__" or module.split(".")[0] == PACKAGE
+
+
+def _is_package_namespace(obj: Any) -> bool:
+    """Package classes and modules, whose attributes code can call."""
+    if isinstance(obj, types.ModuleType):
+        return obj.__name__ == "__main__" or obj.__name__.split(".")[0] == PACKAGE
+    return isinstance(obj, type) and is_package_object(obj)
+
+
+def _attribute_function(namespace: Any, name: str) -> Optional[types.FunctionType]:
+    """The package function behind ``namespace.name`` (method, property, ...), if any."""
+    try:
+        attr = inspect.getattr_static(namespace, name)
+    except AttributeError:
+        return None
+    if isinstance(attr, (staticmethod, classmethod)):
+        attr = attr.__func__
+    elif isinstance(attr, property):
+        attr = attr.fget
+    if isinstance(attr, types.FunctionType) and is_package_object(attr):
+        return attr
+    return None
+
+
+class Fingerprint:
+    """Incremental, type-tagged SHA-256 over Python/NumPy values.
+
+    Functions are followed into the package code they can reach: helpers
+    read as globals, and methods or module functions reached through an
+    attribute (``results.value``, ``module.func``) of a package class or
+    module seen so far — a global, or the type of a value fed to
+    ``update``. Attribute names are matched by name alone, so a match may
+    include code that never runs, which only costs a spurious cache miss.
+    """
+
+    def __init__(self) -> None:
+        self._h = hashlib.sha256()
+        self._seen_code: Set[int] = set()
+        self._namespaces: List[Any] = []
+        self._seen_namespaces: Set[int] = set()
+        self._attr_names: Dict[str, None] = {}
+
+    def hexdigest(self) -> str:
+        return self._h.hexdigest()
+
+    def _tag(self, tag: str, payload: bytes = b"") -> None:
+        self._h.update(tag.encode())
+        self._h.update(len(payload).to_bytes(8, "little"))
+        self._h.update(payload)
+
+    def update(self, obj: Any) -> "Fingerprint":
+        """Feed one value (recursively)."""
+        if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes)):
+            self._tag(type(obj).__name__, repr(obj).encode())
+        elif isinstance(obj, np.generic):
+            self._tag("np." + obj.dtype.str, obj.tobytes())
+        elif isinstance(obj, np.ndarray):
+            self._tag("ndarray", f"{obj.dtype.str}{obj.shape}".encode())
+            if obj.dtype.hasobject:
+                self.update(obj.tolist())
+            else:
+                self._h.update(np.ascontiguousarray(obj).tobytes())
+        elif hasattr(obj, "fingerprint") and callable(obj.fingerprint) and not isinstance(obj, type):
+            self._tag("fingerprint", obj.fingerprint().encode())
+            self._add_namespace(type(obj))
+        elif isinstance(obj, dict):
+            self._tag("dict", str(len(obj)).encode())
+            for k, v in obj.items():
+                self.update(k)
+                self.update(v)
+        elif isinstance(obj, (list, tuple)):
+            self._tag(type(obj).__name__, str(len(obj)).encode())
+            for v in obj:
+                self.update(v)
+        elif isinstance(obj, (set, frozenset)):
+            self._tag("set", str(len(obj)).encode())
+            for v in sorted(obj, key=repr):
+                self.update(v)
+        elif is_dataclass(obj) and not isinstance(obj, type):
+            self._tag("dataclass", type(obj).__qualname__.encode())
+            self._add_namespace(type(obj))
+            for f in fields(obj):
+                self.update(f.name)
+                self.update(getattr(obj, f.name))
+        elif isinstance(obj, types.FunctionType):
+            self.update_function(obj)
+        elif isinstance(obj, (types.ModuleType, type, types.BuiltinFunctionType)):
+            self._tag("ref", getattr(obj, "__qualname__", getattr(obj, "__name__", "")).encode())
+        elif callable(obj):
+            self._tag("callable", type(obj).__qualname__.encode())
+        else:
+            self._tag("object", type(obj).__qualname__.encode())
+            self._add_namespace(type(obj))
+            self.update(dict(vars(obj)) if hasattr(obj, "__dict__") else repr(obj))
+        return self
+
+    def _add_namespace(self, namespace: Any) -> None:
+        """Follow attribute calls into a package class (and its bases) or module."""
+        candidates = namespace.__mro__ if isinstance(namespace, type) else (namespace,)
+        for ns in candidates:
+            if id(ns) in self._seen_namespaces or not _is_package_namespace(ns):
+                continue
+            self._seen_namespaces.add(id(ns))
+            self._namespaces.append(ns)
+            if isinstance(ns, type):
+                # Protocol methods run without their name in any code
+                # (``results[i]``, ``len(store)``, ``for row in results``)
+                for name, attr in list(vars(ns).items()):
+                    if name.startswith("__") and isinstance(attr, types.FunctionType):
+                        self.update_function(attr)
+            for name in list(self._attr_names):
+                self._update_attribute(ns, name)
+
+    def _update_attribute(self, namespace: Any, name: str) -> None:
+        func = _attribute_function(namespace, name)
+        if func is not None:
+            self.update_function(func)
+
+    def _update_code(self, code: types.CodeType, func_globals: Dict[str, Any]) -> None:
+        self._tag("code", code.co_code)
+        self.update(code.co_names)
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                self._update_code(const, func_globals)
+            else:
+                self.update(const)
+        # Globals the code reads: package helpers by code, data by value.
+        for name in code.co_names:
+            if name not in func_globals:
+                continue
+            value = func_globals[name]
+            if isinstance(value, types.FunctionType):
+                if is_package_object(value):
+                    self.update_function(value)
+                else:
+                    self._tag("ref", name.encode())
+            elif isinstance(value, (types.ModuleType, type)) or callable(value):
+                self._tag("ref", name.encode())
+                if isinstance(value, (types.ModuleType, type)):
+                    self._add_namespace(value)
+            else:
+                self.update(name)
+                self.update(value)
+        # Names used as attributes, resolved against every package class and
+        # module seen so far (and against those seen later, in _add_namespace)
+        for name in code.co_names:
+            if name in self._attr_names:
+                continue
+            self._attr_names[name] = None
+            for ns in list(self._namespaces):
+                self._update_attribute(ns, name)
+
+    def update_function(self, func: types.FunctionType) -> "Fingerprint":
+        """Feed a function's code, defaults and the globals it reads."""
+        if id(func.__code__) in self._seen_code:
+            self._tag("seen", func.__qualname__.encode())
+            return self
+        self._seen_code.add(id(func.__code__))
+        self._tag("function", func.__qualname__.encode())
+        self.update(func.__defaults__)
+        self._update_code(func.__code__, func.__globals__)
+        return self
+
+
+# ═══════════════════════════════════════════════════════════════
+# MANIFEST
+# ═══════════════════════════════════════════════════════════════
+
+class ChartCache:
+    """Per-output-directory manifests of ``job id -> {key, path}``.
+
+    Safe to share between threads (one cache serves every module of a
+    ``run_all.py`` run).
+    """
+
+    def __init__(self) -> None:
+        self._manifests: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _manifest(self, out_dir: str) -> Dict[str, Dict[str, str]]:
+        if out_dir not in self._manifests:
+            path = os.path.join(out_dir, MANIFEST_NAME)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._manifests[out_dir] = json.load(f)
+            except (OSError, ValueError):
+                self._manifests[out_dir] = {}
+        return self._manifests[out_dir]
+
+    def lookup(self, out_dir: str, name: str, key: str) -> Optional[str]:
+        """Cached path if ``key`` matches and the file still exists."""
+        with self._lock:
+            entry = self._manifest(out_dir).get(name)
+        if entry and entry.get("key") == key and os.path.exists(entry.get("path", "")):
+            return entry["path"]
+        return None
+
+    def store(self, out_dir: str, name: str, key: str, path: str) -> None:
+        with self._lock:
+            self._manifest(out_dir)[name] = {"key": key, "path": path}
+            self._dirty.add(out_dir)
+
+    def save(self) -> None:
+        """Write every manifest that changed."""
+        with self._lock:
+            for out_dir in sorted(self._dirty):
+                path = os.path.join(out_dir, MANIFEST_NAME)
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(self._manifests[out_dir], f, indent=1, sort_keys=True)
+            self._dirty.clear()
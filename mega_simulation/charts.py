@@ -2,20 +2,37 @@
 NHP Mega Simulation — Chart Generator
 Produces summary charts for key categories of the mega simulation.
 """
-from typing import Dict, Any, List
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 import os
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
 import numpy as np
 
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
 from mega_simulation.data import VARIANT_COLORS, VARIANT_NAMES
+from mega_simulation.render import ChartJob, asset_dir, pyplot, render_charts, save_figure
+from mega_simulation.results import CategoryResults, ResultStore
 
 
-CHART_DPI: int = 300
 WATERMARK: str = "NHP Mega Simulation v2.0"
+CHARTS_DIR: str = "assets/mega"             # Published location (see render.asset_dir)
+
+# Chart inputs per category: key columns and the value columns each chart
+# reads. One row per distinct key is all a chart needs, so streamed sweeps
+# reduce to these with ``sinks.DistinctSink``.
+CHART_DATA: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "A": (("manufacturer", "variant"), ("h100_equivalent",)),
+    "B": (("manufacturer", "cloud_short", "variant"), ("annual_savings",)),
+    "C": (("region", "variant"), ("monthly_net", "income_pct_of_avg")),
+    "D": (("manufacturer", "variant"), ("annual_savings",)),
+    "E": (("manufacturer", "variant"), ("co2_saved_net",)),
+    "F": (("alliance", "variant"), ("h100_equivalent",)),
+    "G": (("task_name", "variant"), ("feasibility_score",)),
+    "I": (("region", "variant"), ("nhp_devices",)),
+    "J": (("scale_label", "variant"), ("platform_revenue_monthly",)),
+    "K": (("competitor", "variant"), ("power_ratio",)),
+}
 
 
 def _ensure_dir(path: str) -> None:
@@ -23,7 +40,7 @@ def _ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-def _watermark(ax: plt.Axes) -> None:
+def _watermark(ax: "Axes") -> None:
     """Add watermark."""
     ax.text(0.99, 0.01, WATERMARK, transform=ax.transAxes,
             fontsize=7, color="gray", alpha=0.4, ha="right", va="bottom")
@@ -37,64 +54,75 @@ def _fmt_money(val: float) -> str:
     return f"${val:.2f}"
 
 
+def _ranked(results: CategoryResults, key: str, field: str) -> List[str]:
+    """Distinct ``key`` values ordered by their best ``field`` (descending)."""
+    keys, inverse = np.unique(results.column(key), return_inverse=True)
+    best = np.full(len(keys), -np.inf)
+    np.maximum.at(best, inverse, results.column(field))
+    return [str(k) for k in keys[np.argsort(-best, kind="stable")]]
+
+
 def generate_all_charts(
-    all_results: Dict[str, List[Dict[str, Any]]],
-    output_dir: str = "assets/mega",
+    all_results: ResultStore,
+    output_dir: Optional[str] = None,
+    workers: Optional[int] = 1,
+    cache: bool = True,
 ) -> List[str]:
     """Generate summary charts for all major categories.
 
     Args:
-        all_results: Dict of category -> list of results.
-        output_dir: Where to save charts.
+        all_results: Columnar results per category.
+        output_dir: Where to save charts (default: ``assets/mega`` for the
+            active render profile, see ``asset_dir``).
+        workers: Render processes; 1 renders in-process, ``None``/0 uses all cores.
+        cache: Reuse charts whose inputs are unchanged since the last run.
 
     Returns:
         List of saved file paths.
     """
+    output_dir = output_dir or asset_dir(CHARTS_DIR)
     _ensure_dir(output_dir)
-    plt.style.use("seaborn-v0_8-darkgrid")
-    plt.rcParams["font.family"] = "DejaVu Sans"
-    plt.rcParams["font.size"] = 10
-
-    saved: List[str] = []
-
-    # ── Chart A: Computing Power per Manufacturer ────────────
-    saved.append(_chart_a(all_results["A"], output_dir))
-    # ── Chart B: Cloud Cost Comparison ───────────────────────
-    saved.append(_chart_b_summary(all_results["B"], output_dir))
-    # ── Chart C: User Income by Region ───────────────────────
-    saved.append(_chart_c(all_results["C"], output_dir))
-    # ── Chart D: Manufacturer Savings ────────────────────────
-    saved.append(_chart_d(all_results["D"], output_dir))
-    # ── Chart E: Environmental ───────────────────────────────
-    saved.append(_chart_e(all_results["E"], output_dir))
-    # ── Chart F: Network Alliances ───────────────────────────
-    saved.append(_chart_f(all_results["F"], output_dir))
-    # ── Chart G: Task Feasibility ────────────────────────────
-    saved.append(_chart_g(all_results["G"], output_dir))
-    # ── Chart I: Market Size ─────────────────────────────────
-    saved.append(_chart_i(all_results["I"], output_dir))
-    # ── Chart J: Token Economics ─────────────────────────────
-    saved.append(_chart_j(all_results["J"], output_dir))
-    # ── Chart K: Competitive ─────────────────────────────────
-    saved.append(_chart_k(all_results["K"], output_dir))
-
-    return saved
-
-
-def _chart_a(results: List[Dict[str, Any]], out: str) -> str:
+    return render_charts(chart_jobs(all_results, output_dir), workers, cache)
+
+
+def chart_jobs(all_results: ResultStore, output_dir: Optional[str] = None) -> List[ChartJob]:
+    """One render job per summary chart, in report order."""
+    output_dir = output_dir or asset_dir(CHARTS_DIR)
+    return [
+        # ── Chart A: Computing Power per Manufacturer ────────
+        ChartJob(_chart_a, (all_results["A"], output_dir)),
+        # ── Chart B: Cloud Cost Comparison ───────────────────
+        ChartJob(_chart_b_summary, (all_results["B"], output_dir)),
+        # ── Chart C: User Income by Region ───────────────────
+        ChartJob(_chart_c, (all_results["C"], output_dir)),
+        # ── Chart D: Manufacturer Savings ────────────────────
+        ChartJob(_chart_d, (all_results["D"], output_dir)),
+        # ── Chart E: Environmental ───────────────────────────
+        ChartJob(_chart_e, (all_results["E"], output_dir)),
+        # ── Chart F: Network Alliances ───────────────────────
+        ChartJob(_chart_f, (all_results["F"], output_dir)),
+        # ── Chart G: Task Feasibility ────────────────────────
+        ChartJob(_chart_g, (all_results["G"], output_dir)),
+        # ── Chart I: Market Size ─────────────────────────────
+        ChartJob(_chart_i, (all_results["I"], output_dir)),
+        # ── Chart J: Token Economics ─────────────────────────
+        ChartJob(_chart_j, (all_results["J"], output_dir)),
+        # ── Chart K: Competitive ─────────────────────────────
+        ChartJob(_chart_k, (all_results["K"], output_dir)),
+    ]
+
+
+def _chart_a(results: CategoryResults, out: str) -> str:
     """Computing power — grouped bars per manufacturer."""
+    plt = pyplot()
+    from matplotlib import ticker
     fig, ax = plt.subplots(figsize=(14, 7))
-    mfgs = sorted(set(r["manufacturer"] for r in results),
-                  key=lambda m: -max(r["h100_equivalent"] for r in results if r["manufacturer"] == m))
+    mfgs = _ranked(results, "manufacturer", "h100_equivalent")
     x = np.arange(len(mfgs))
     width = 0.2
 
     for i, variant in enumerate(VARIANT_NAMES):
-        vals = []
-        for m in mfgs:
-            v = next((r["h100_equivalent"] for r in results
-                      if r["manufacturer"] == m and r["variant"] == variant), 0)
-            vals.append(v)
+        vals = [results.value("h100_equivalent", manufacturer=m, variant=variant) for m in mfgs]
         bars = ax.bar(x + i * width, vals, width, label=variant, color=VARIANT_COLORS[i], edgecolor="white")
 
     ax.set_xticks(x + width * 1.5)
@@ -106,27 +134,25 @@ def _chart_a(results: List[Dict[str, Any]], out: str) -> str:
     _watermark(ax)
     plt.tight_layout()
     path = os.path.join(out, "A_computing_power.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
-def _chart_b_summary(results: List[Dict[str, Any]], out: str) -> str:
+def _chart_b_summary(results: CategoryResults, out: str) -> str:
     """Cloud cost comparison — moderate variant, all mfg × cloud."""
-    mod = [r for r in results if r["variant"] == "Moderate"]
+    plt = pyplot()
+    from matplotlib import ticker
+    mod = results.where(variant="Moderate")
     fig, ax = plt.subplots(figsize=(14, 7))
 
-    mfgs = sorted(set(r["manufacturer"] for r in mod))
-    clouds = sorted(set(r["cloud_short"] for r in mod))
+    mfgs = sorted(mod.unique("manufacturer"))
+    clouds = sorted(mod.unique("cloud_short"))
     x = np.arange(len(mfgs))
     width = 0.12
 
     for j, cloud in enumerate(clouds):
-        vals = []
-        for m in mfgs:
-            v = next((r["annual_savings"] for r in mod
-                      if r["manufacturer"] == m and r["cloud_short"] == cloud), 0)
-            vals.append(v)
+        vals = [mod.value("annual_savings", manufacturer=m, cloud=cloud) for m in mfgs]
         ax.bar(x + j * width, vals, width, label=cloud, edgecolor="white")
 
     ax.set_xticks(x + width * len(clouds) / 2)
@@ -138,19 +164,20 @@ def _chart_b_summary(results: List[Dict[str, Any]], out: str) -> str:
     _watermark(ax)
     plt.tight_layout()
     path = os.path.join(out, "B_cloud_comparison.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
-def _chart_c(results: List[Dict[str, Any]], out: str) -> str:
+def _chart_c(results: CategoryResults, out: str) -> str:
     """User income by region — moderate variant bar chart."""
-    mod = [r for r in results if r["variant"] == "Moderate"]
+    plt = pyplot()
+    mod = results.where(variant="Moderate")
     fig, ax = plt.subplots(figsize=(12, 6))
 
-    regions = [r["region"] for r in mod]
-    incomes = [r["monthly_net"] for r in mod]
-    pcts = [r["income_pct_of_avg"] for r in mod]
+    regions = mod.column("region").tolist()
+    incomes = mod.column("monthly_net").tolist()
+    pcts = mod.column("income_pct_of_avg").tolist()
 
     bars = ax.bar(regions, incomes, color="#3498DB", edgecolor="white")
     for bar, pct in zip(bars, pcts):
@@ -163,22 +190,22 @@ def _chart_c(results: List[Dict[str, Any]], out: str) -> str:
     _watermark(ax)
     plt.tight_layout()
     path = os.path.join(out, "C_user_income_regions.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
-def _chart_d(results: List[Dict[str, Any]], out: str) -> str:
+def _chart_d(results: CategoryResults, out: str) -> str:
     """Manufacturer savings (AWS) — grouped bars."""
+    plt = pyplot()
+    from matplotlib import ticker
     fig, ax = plt.subplots(figsize=(14, 7))
-    mfgs = sorted(set(r["manufacturer"] for r in results),
-                  key=lambda m: -max(r["annual_savings"] for r in results if r["manufacturer"] == m))
+    mfgs = _ranked(results, "manufacturer", "annual_savings")
     x = np.arange(len(mfgs))
     width = 0.2
 
     for i, variant in enumerate(VARIANT_NAMES):
-        vals = [next((r["annual_savings"] for r in results
-                      if r["manufacturer"] == m and r["variant"] == variant), 0) for m in mfgs]
+        vals = [results.value("annual_savings", manufacturer=m, variant=variant) for m in mfgs]
         ax.bar(x + i*width, vals, width, label=variant, color=VARIANT_COLORS[i], edgecolor="white")
 
     ax.set_xticks(x + width*1.5)
@@ -190,22 +217,22 @@ def _chart_d(results: List[Dict[str, Any]], out: str) -> str:
     _watermark(ax)
     plt.tight_layout()
     path = os.path.join(out, "D_manufacturer_savings.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
-def _chart_e(results: List[Dict[str, Any]], out: str) -> str:
+def _chart_e(results: CategoryResults, out: str) -> str:
     """Environmental impact — net CO2 per manufacturer."""
+    plt = pyplot()
+    from matplotlib import ticker
     fig, ax = plt.subplots(figsize=(14, 7))
-    mfgs = sorted(set(r["manufacturer"] for r in results),
-                  key=lambda m: -max(r["co2_saved_net"] for r in results if r["manufacturer"] == m))
+    mfgs = _ranked(results, "manufacturer", "co2_saved_net")
     x = np.arange(len(mfgs))
     width = 0.2
 
     for i, variant in enumerate(VARIANT_NAMES):
-        vals = [next((r["co2_saved_net"] for r in results
-                      if r["manufacturer"] == m and r["variant"] == variant), 0) for m in mfgs]
+        vals = [results.value("co2_saved_net", manufacturer=m, variant=variant) for m in mfgs]
         ax.bar(x + i*width, vals, width, label=variant, color=VARIANT_COLORS[i], edgecolor="white")
 
     ax.set_xticks(x + width*1.5)
@@ -217,17 +244,18 @@ def _chart_e(results: List[Dict[str, Any]], out: str) -> str:
     _watermark(ax)
     plt.tight_layout()
     path = os.path.join(out, "E_environmental.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
-def _chart_f(results: List[Dict[str, Any]], out: str) -> str:
+def _chart_f(results: CategoryResults, out: str) -> str:
     """Network alliances — moderate variant comparison."""
-    mod = [r for r in results if r["variant"] == "Moderate"]
+    plt = pyplot()
+    mod = results.where(variant="Moderate")
     fig, ax = plt.subplots(figsize=(12, 6))
-    alliances = [r["alliance"] for r in mod]
-    vals = [r["h100_equivalent"] for r in mod]
+    alliances = mod.column("alliance").tolist()
+    vals = mod.column("h100_equivalent").tolist()
 
     bars = ax.barh(alliances, vals, color="#3498DB", edgecolor="white")
     for bar, val in zip(bars, vals):
@@ -239,17 +267,18 @@ def _chart_f(results: List[Dict[str, Any]], out: str) -> str:
     _watermark(ax)
     plt.tight_layout()
     path = os.path.join(out, "F_network_alliances.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
-def _chart_g(results: List[Dict[str, Any]], out: str) -> str:
+def _chart_g(results: CategoryResults, out: str) -> str:
     """Task feasibility — heatmap-style."""
-    mod = [r for r in results if r["variant"] == "Moderate"]
+    plt = pyplot()
+    mod = results.where(variant="Moderate")
     fig, ax = plt.subplots(figsize=(10, 5))
-    tasks = [r["task_name"] for r in mod]
-    scores = [r["feasibility_score"] for r in mod]
+    tasks = mod.column("task_name").tolist()
+    scores = mod.column("feasibility_score").tolist()
 
     colors_list = ["#E74C3C" if s < 40 else "#E67E22" if s < 60 else "#2ECC71" for s in scores]
     bars = ax.barh(tasks, scores, color=colors_list, edgecolor="white")
@@ -263,17 +292,19 @@ def _chart_g(results: List[Dict[str, Any]], out: str) -> str:
     _watermark(ax)
     plt.tight_layout()
     path = os.path.join(out, "G_task_feasibility.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
-def _chart_i(results: List[Dict[str, Any]], out: str) -> str:
+def _chart_i(results: CategoryResults, out: str) -> str:
     """Market size — moderate variant."""
-    mod = [r for r in results if r["variant"] == "Moderate"]
+    plt = pyplot()
+    from matplotlib import ticker
+    mod = results.where(variant="Moderate")
     fig, ax = plt.subplots(figsize=(12, 6))
-    regions = [r["region"] for r in mod]
-    devices = [r["nhp_devices"] for r in mod]
+    regions = mod.column("region").tolist()
+    devices = mod.column("nhp_devices").tolist()
 
     bars = ax.bar(regions, devices, color="#2ECC71", edgecolor="white")
     for bar, val in zip(bars, devices):
@@ -287,17 +318,19 @@ def _chart_i(results: List[Dict[str, Any]], out: str) -> str:
     _watermark(ax)
     plt.tight_layout()
     path = os.path.join(out, "I_market_size.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
-def _chart_j(results: List[Dict[str, Any]], out: str) -> str:
+def _chart_j(results: CategoryResults, out: str) -> str:
     """Token economics — moderate variant across scales."""
-    mod = [r for r in results if r["variant"] == "Moderate"]
+    plt = pyplot()
+    from matplotlib import ticker
+    mod = results.where(variant="Moderate")
     fig, ax = plt.subplots(figsize=(12, 6))
-    labels = [r["scale_label"] for r in mod]
-    revenues = [r["platform_revenue_monthly"] for r in mod]
+    labels = mod.column("scale_label").tolist()
+    revenues = mod.column("platform_revenue_monthly").tolist()
 
     bars = ax.bar(labels, revenues, color="#3498DB", edgecolor="white")
     for bar, val in zip(bars, revenues):
@@ -310,17 +343,18 @@ def _chart_j(results: List[Dict[str, Any]], out: str) -> str:
     _watermark(ax)
     plt.tight_layout()
     path = os.path.join(out, "J_token_economics.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
-def _chart_k(results: List[Dict[str, Any]], out: str) -> str:
+def _chart_k(results: CategoryResults, out: str) -> str:
     """Competitive — moderate variant power ratio."""
-    mod = [r for r in results if r["variant"] == "Moderate"]
+    plt = pyplot()
+    mod = results.where(variant="Moderate")
     fig, ax = plt.subplots(figsize=(10, 5))
-    comps = [r["competitor"] for r in mod]
-    ratios = [min(r["power_ratio"], 100) for r in mod]
+    comps = mod.column("competitor").tolist()
+    ratios = np.minimum(mod.column("power_ratio"), 100).tolist()
 
     bars = ax.barh(comps, ratios, color="#2ECC71", edgecolor="white")
     for bar, val in zip(bars, ratios):
@@ -334,6 +368,6 @@ def _chart_k(results: List[Dict[str, Any]], out: str) -> str:
     _watermark(ax)
     plt.tight_layout()
     path = os.path.join(out, "K_competitive.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
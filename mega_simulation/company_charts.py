@@ -1,16 +1,19 @@
 """
 NHP Phase 3 — Per-Company Chart Generator
 Produces dedicated charts for each manufacturer's deep-dive report.
+
+Every chart has the same layout for all companies, so each one is a
+``figure_template`` (built once per process) plus a function that computes
+the company's numbers and updates the template's bars, labels and titles.
 """
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
 import numpy as np
 
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
 from mega_simulation.data import (
     CLOUD_PROVIDERS, REGIONS, VARIANT_NAMES, VARIANT_COLORS,
     VARIANT_EMOJIS, UPTIME_VARIANTS, COVERAGE_VARIANTS,
@@ -19,8 +22,8 @@ from mega_simulation.data import (
     CO2_PER_KWH_KG, DC_CO2_TONS_YEAR, CO2_PER_CAR_TONS, SIMULATION_YEARS,
 )
 from mega_simulation.company_profiles import CompanyProfile
+from mega_simulation.render import ChartJob, FigureTemplate, figure_template, pyplot, render_charts, update_bars
 
-CHART_DPI: int = 300
 WATERMARK: str = "NHP Protocol v2.0"
 
 
@@ -31,7 +34,7 @@ def _fmt(val: float) -> str:
     return f"${val:.2f}"
 
 
-def _wm(ax: plt.Axes) -> None:
+def _wm(ax: "Axes") -> None:
     ax.text(0.99, 0.01, WATERMARK, transform=ax.transAxes,
             fontsize=7, color="gray", alpha=0.4, ha="right", va="bottom")
 
@@ -40,6 +43,8 @@ def generate_company_charts(
     key: str,
     profile: CompanyProfile,
     output_dir: str,
+    workers: Optional[int] = 1,
+    cache: bool = True,
 ) -> List[str]:
     """Generate all charts for a single company.
 
@@ -47,33 +52,56 @@ def generate_company_charts(
         key: Company key (e.g. 'samsung').
         profile: Company profile data.
         output_dir: Directory to save charts.
+        workers: Render processes; 1 renders in-process, ``None``/0 uses all cores.
+        cache: Reuse charts whose inputs are unchanged since the last run.
 
     Returns:
         List of saved chart file paths.
     """
     os.makedirs(output_dir, exist_ok=True)
-    plt.style.use("seaborn-v0_8-darkgrid")
-    plt.rcParams["font.family"] = "DejaVu Sans"
-    plt.rcParams["font.size"] = 10
+    return render_charts(company_chart_jobs(key, profile, output_dir), workers, cache)
+
+
+def company_chart_jobs(key: str, profile: CompanyProfile, output_dir: str) -> List[ChartJob]:
+    """One render job per company chart, so several companies can share a pool."""
+    return [
+        ChartJob(chart, (key, profile, output_dir))
+        for chart in (
+            _chart_fleet_power,
+            _chart_cloud_savings,
+            _chart_user_income,
+            _chart_environmental,
+            _chart_network_growth,
+            _chart_breakeven,
+        )
+    ]
+
+
+def _bar_labels(ax: "Axes", bars: Any, fontsize: int = 9) -> List[Any]:
+    """One empty bold value label per bar, placed by ``update_bars``."""
+    return [ax.text(bar.get_x() + bar.get_width()/2, 0, "", ha="center", fontsize=fontsize, fontweight="bold")
+            for bar in bars]
 
-    saved: List[str] = []
-    saved.append(_chart_fleet_power(key, profile, output_dir))
-    saved.append(_chart_cloud_savings(key, profile, output_dir))
-    saved.append(_chart_user_income(key, profile, output_dir))
-    saved.append(_chart_environmental(key, profile, output_dir))
-    saved.append(_chart_network_growth(key, profile, output_dir))
-    saved.append(_chart_breakeven(key, profile, output_dir))
-    return saved
+
+def _fleet_power_template() -> FigureTemplate:
+    plt = pyplot()
+    from matplotlib import ticker
+    fig, ax = plt.subplots(figsize=(10, 6))
+    bars = ax.bar(VARIANT_NAMES, [1.0] * len(VARIANT_NAMES), color=VARIANT_COLORS, edgecolor="white", width=0.6)
+    ax.set_ylabel("H100 Equivalents")
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda v, _: f"{v:,.0f}"))
+    _wm(ax)
+    return FigureTemplate(fig, (ax,), {"bars": bars, "labels": _bar_labels(ax, bars)})
 
 
 def _chart_fleet_power(key: str, p: CompanyProfile, out: str) -> str:
     """Chart 1: Fleet computing power — H100 equivalents per variant."""
-    fig, ax = plt.subplots(figsize=(10, 6))
+    t = figure_template("fleet_power", _fleet_power_template)
+    ax, = t.axes
 
     avg_fl = sum(d.tops for d in p.flagship_models) / len(p.flagship_models) if p.flagship_models else 0
     avg_mr = sum(d.tops for d in p.midrange_models) / len(p.midrange_models) if p.midrange_models else 0
 
-    variants = VARIANT_NAMES
     h100_vals = []
     active_vals = []
     for uptime in UPTIME_VARIANTS:
@@ -85,62 +113,60 @@ def _chart_fleet_power(key: str, p: CompanyProfile, out: str) -> str:
         h100_vals.append(tops / H100_TOPS)
         active_vals.append(active)
 
-    bars = ax.bar(variants, h100_vals, color=VARIANT_COLORS, edgecolor="white", width=0.6)
-    for bar, val, act in zip(bars, h100_vals, active_vals):
-        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(h100_vals)*0.02,
-                f"{val:,.0f}\n({act/1e6:.1f}M active)",
-                ha="center", fontsize=9, fontweight="bold")
-
+    update_bars(t["bars"], t["labels"], h100_vals,
+                [f"{val:,.0f}\n({act/1e6:.1f}M active)" for val, act in zip(h100_vals, active_vals)],
+                max(h100_vals)*0.02)
     ax.set_title(f"{p.name} — Fleet Computing Power (H100 Equivalents)", fontsize=14, fontweight="bold")
-    ax.set_ylabel("H100 Equivalents")
-    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda v, _: f"{v:,.0f}"))
+    return t.save(os.path.join(out, f"{key}_01_fleet_power.png"))
+
+
+def _cloud_savings_template() -> FigureTemplate:
+    plt = pyplot()
+    from matplotlib import ticker
+    fig, ax = plt.subplots(figsize=(12, 6))
+    cloud_names = [f"{cloud.name}\n({cloud.gpu_model})" for cloud in CLOUD_PROVIDERS.values()]
+    colors = plt.cm.Set2(np.linspace(0, 1, len(cloud_names)))
+    bars = ax.bar(cloud_names, [1.0] * len(cloud_names), color=colors, edgecolor="white")
+    ax.set_ylabel("Annual Savings (USD)")
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda v, _: _fmt(v)))
     _wm(ax)
-    plt.tight_layout()
-    path = os.path.join(out, f"{key}_01_fleet_power.png")
-    fig.savefig(path, dpi=CHART_DPI)
-    plt.close(fig)
-    return path
+    return FigureTemplate(fig, (ax,), {"bars": bars, "labels": _bar_labels(ax, bars)})
 
 
 def _chart_cloud_savings(key: str, p: CompanyProfile, out: str) -> str:
     """Chart 2: Cost savings vs all cloud providers (moderate variant)."""
-    fig, ax = plt.subplots(figsize=(12, 6))
+    t = figure_template("cloud_savings", _cloud_savings_template)
+    ax, = t.axes
 
     total_daily_requests = sum(s.daily_requests_estimate for s in p.ai_services)
     total_daily_gpu_hr = (total_daily_requests * GPU_REQUEST_TIME_SEC) / 3600.0
     coverage = COVERAGE_VARIANTS[1]  # Moderate
 
-    cloud_names = []
     savings = []
     for ck, cloud in CLOUD_PROVIDERS.items():
         per_gpu_hr = cloud.hourly_cost / cloud.gpus_per_instance
         annual_cost = total_daily_gpu_hr * per_gpu_hr * 365
         annual_savings = annual_cost * coverage
-        cloud_names.append(f"{cloud.name}\n({cloud.gpu_model})")
         savings.append(annual_savings)
 
-    colors = plt.cm.Set2(np.linspace(0, 1, len(cloud_names)))
-    bars = ax.bar(cloud_names, savings, color=colors, edgecolor="white")
-    for bar, val in zip(bars, savings):
-        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(savings)*0.02,
-                _fmt(val), ha="center", fontsize=9, fontweight="bold")
-
+    update_bars(t["bars"], t["labels"], savings, [_fmt(val) for val in savings], max(savings)*0.02)
     ax.set_title(f"{p.name} — Annual Savings: NHP vs Cloud Providers (40% Coverage)",
                 fontsize=13, fontweight="bold")
-    ax.set_ylabel("Annual Savings (USD)")
-    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda v, _: _fmt(v)))
+    return t.save(os.path.join(out, f"{key}_02_cloud_savings.png"))
+
+
+def _user_income_template(n_markets: int) -> FigureTemplate:
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    bars = ax.bar(range(n_markets), [1.0] * n_markets, color="#3498DB", edgecolor="white")
+    ax.set_xticks(range(n_markets))
+    ax.set_ylabel("Monthly Net Income (USD)")
     _wm(ax)
-    plt.tight_layout()
-    path = os.path.join(out, f"{key}_02_cloud_savings.png")
-    fig.savefig(path, dpi=CHART_DPI)
-    plt.close(fig)
-    return path
+    return FigureTemplate(fig, (ax,), {"bars": bars, "labels": _bar_labels(ax, bars)})
 
 
 def _chart_user_income(key: str, p: CompanyProfile, out: str) -> str:
     """Chart 3: User monthly income in primary markets (moderate)."""
-    fig, ax = plt.subplots(figsize=(12, 6))
-
     token_price = TOKEN_PRICE_VARIANTS[1]  # Moderate
     markets = []
     incomes = []
@@ -166,26 +192,36 @@ def _chart_user_income(key: str, p: CompanyProfile, out: str) -> str:
         incomes.append(monthly_net)
         pcts.append(pct)
 
-    bars = ax.bar(markets, incomes, color="#3498DB", edgecolor="white")
-    for bar, val, pct in zip(bars, incomes, pcts):
-        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(incomes)*0.03,
-                f"${val:.2f}\n({pct:.1f}% of avg)",
-                ha="center", fontsize=9, fontweight="bold")
-
+    # Market names differ per company: one template per bar count, labelled here
+    t = figure_template(("user_income", len(markets)), lambda: _user_income_template(len(markets)))
+    ax, = t.axes
+    ax.set_xticklabels(markets)
+    update_bars(t["bars"], t["labels"], incomes,
+                [f"${val:.2f}\n({pct:.1f}% of avg)" for val, pct in zip(incomes, pcts)],
+                max(incomes)*0.03)
     ax.set_title(f"{p.name} — User Monthly Income by Market ($0.20/GPU-hr)",
                 fontsize=13, fontweight="bold")
-    ax.set_ylabel("Monthly Net Income (USD)")
-    _wm(ax)
-    plt.tight_layout()
-    path = os.path.join(out, f"{key}_03_user_income.png")
-    fig.savefig(path, dpi=CHART_DPI)
-    plt.close(fig)
-    return path
+    return t.save(os.path.join(out, f"{key}_03_user_income.png"))
+
+
+def _environmental_template() -> FigureTemplate:
+    plt = pyplot()
+    from matplotlib import ticker
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    artists: Dict[str, Any] = {}
+    for name, ax, title in (("co2", ax1, "Net CO₂ Saved (tons/year)"), ("cars", ax2, "Equivalent Cars Removed")):
+        bars = ax.bar(VARIANT_NAMES, [1.0] * len(VARIANT_NAMES), color=VARIANT_COLORS, edgecolor="white")
+        artists[f"{name}_bars"] = bars
+        artists[f"{name}_labels"] = _bar_labels(ax, bars)
+        ax.set_title(title, fontsize=12, fontweight="bold")
+        ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda v, _: f"{v:,.0f}"))
+        _wm(ax)
+    return FigureTemplate(fig, (ax1, ax2), artists)
 
 
 def _chart_environmental(key: str, p: CompanyProfile, out: str) -> str:
     """Chart 4: Environmental impact — CO2 saved per variant."""
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    t = figure_template("environmental", _environmental_template)
 
     co2_vals = []
     cars_vals = []
@@ -199,67 +235,87 @@ def _chart_environmental(key: str, p: CompanyProfile, out: str) -> str:
         co2_vals.append(net)
         cars_vals.append(int(net / CO2_PER_CAR_TONS))
 
-    ax1.bar(VARIANT_NAMES, co2_vals, color=VARIANT_COLORS, edgecolor="white")
-    for i, val in enumerate(co2_vals):
-        ax1.text(i, val + max(co2_vals)*0.02, f"{val:,.0f}",
-                ha="center", fontsize=9, fontweight="bold")
-    ax1.set_title("Net CO₂ Saved (tons/year)", fontsize=12, fontweight="bold")
-    ax1.yaxis.set_major_formatter(ticker.FuncFormatter(lambda v, _: f"{v:,.0f}"))
-    _wm(ax1)
+    update_bars(t["co2_bars"], t["co2_labels"], co2_vals,
+                [f"{val:,.0f}" for val in co2_vals], max(co2_vals)*0.02)
+    update_bars(t["cars_bars"], t["cars_labels"], cars_vals,
+                [f"{val:,.0f}" for val in cars_vals], max(cars_vals)*0.02)
 
-    ax2.bar(VARIANT_NAMES, cars_vals, color=VARIANT_COLORS, edgecolor="white")
-    for i, val in enumerate(cars_vals):
-        ax2.text(i, val + max(cars_vals)*0.02, f"{val:,.0f}",
-                ha="center", fontsize=9, fontweight="bold")
-    ax2.set_title("Equivalent Cars Removed", fontsize=12, fontweight="bold")
-    ax2.yaxis.set_major_formatter(ticker.FuncFormatter(lambda v, _: f"{v:,.0f}"))
-    _wm(ax2)
+    t.fig.suptitle(f"{p.name} — Environmental Impact", fontsize=14, fontweight="bold", y=1.02)
+    return t.save(os.path.join(out, f"{key}_04_environmental.png"), bbox_inches="tight")
 
-    fig.suptitle(f"{p.name} — Environmental Impact", fontsize=14, fontweight="bold", y=1.02)
-    plt.tight_layout()
-    path = os.path.join(out, f"{key}_04_environmental.png")
-    fig.savefig(path, dpi=CHART_DPI, bbox_inches="tight")
-    plt.close(fig)
-    return path
+
+def _network_growth_template() -> FigureTemplate:
+    plt = pyplot()
+    from matplotlib import ticker
+    fig, ax = plt.subplots(figsize=(12, 6))
+    years = list(range(1, SIMULATION_YEARS + 1))
+    lines = []
+    ends = []
+    for i, (vname, growth) in enumerate(zip(VARIANT_NAMES, GROWTH_VARIANTS)):
+        line, = ax.plot(years, [1.0] * len(years), marker="o", linewidth=2.5,
+                        color=VARIANT_COLORS[i], label=f"{vname} ({growth*100:.0f}%/yr)",
+                        markersize=8)
+        lines.append(line)
+        ends.append(ax.text(years[-1] + 0.1, 0, "",
+                            fontsize=9, fontweight="bold", color=VARIANT_COLORS[i], va="center"))
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Devices")
+    ax.set_xticks(years)
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda v, _: f"{v/1e6:.1f}M"))
+    ax.legend(loc="upper left")
+    _wm(ax)
+    return FigureTemplate(fig, (ax,), {"lines": lines, "ends": ends})
 
 
 def _chart_network_growth(key: str, p: CompanyProfile, out: str) -> str:
     """Chart 5: Network growth projection — 5 years."""
-    fig, ax = plt.subplots(figsize=(12, 6))
+    t = figure_template("network_growth", _network_growth_template)
+    ax, = t.axes
 
     base = p.annual_phone_sales_millions * 1_000_000 * 0.05
     max_devices = p.total_active_devices_millions * 1_000_000
     years = list(range(1, SIMULATION_YEARS + 1))
 
-    for i, (vname, growth) in enumerate(zip(VARIANT_NAMES, GROWTH_VARIANTS)):
+    for line, end, growth in zip(t["lines"], t["ends"], GROWTH_VARIANTS):
         projections = []
         current = float(base)
         for y in range(SIMULATION_YEARS):
             current = min(current * (1 + growth), max_devices)
             projections.append(current)
-        ax.plot(years, projections, marker="o", linewidth=2.5,
-                color=VARIANT_COLORS[i], label=f"{vname} ({growth*100:.0f}%/yr)",
-                markersize=8)
-        ax.text(years[-1] + 0.1, projections[-1], f"{projections[-1]/1e6:.1f}M",
-                fontsize=9, fontweight="bold", color=VARIANT_COLORS[i], va="center")
+        line.set_ydata(projections)
+        end.set_position((years[-1] + 0.1, projections[-1]))
+        end.set_text(f"{projections[-1]/1e6:.1f}M")
 
     ax.set_title(f"{p.name} — NHP Network Growth (5 Years)", fontsize=14, fontweight="bold")
-    ax.set_xlabel("Year")
-    ax.set_ylabel("Devices")
-    ax.set_xticks(years)
-    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda v, _: f"{v/1e6:.1f}M"))
-    ax.legend(loc="upper left")
-    _wm(ax)
-    plt.tight_layout()
-    path = os.path.join(out, f"{key}_05_network_growth.png")
-    fig.savefig(path, dpi=CHART_DPI)
-    plt.close(fig)
-    return path
+    return t.save(os.path.join(out, f"{key}_05_network_growth.png"))
+
+
+def _breakeven_template() -> FigureTemplate:
+    plt = pyplot()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+
+    bars1 = ax1.bar(VARIANT_NAMES, [1.0] * len(VARIANT_NAMES), color=VARIANT_COLORS, edgecolor="white")
+    labels1 = _bar_labels(ax1, bars1, fontsize=10)
+    ax1.set_title("Breakeven (months)", fontsize=12, fontweight="bold")
+    ax1.set_ylabel("Months")
+    ax1.axhline(y=12, color="green", linewidth=1, linestyle="--", alpha=0.5, label="1 year")
+    ax1.axhline(y=24, color="orange", linewidth=1, linestyle="--", alpha=0.5, label="2 years")
+    ax1.legend(fontsize=8)
+    _wm(ax1)
+
+    bars2 = ax2.bar(VARIANT_NAMES, [1.0] * len(VARIANT_NAMES), color=VARIANT_COLORS, edgecolor="white")
+    labels2 = _bar_labels(ax2, bars2, fontsize=10)
+    ax2.set_title("5-Year ROI (%)", fontsize=12, fontweight="bold")
+    ax2.set_ylabel("ROI %")
+    ax2.axhline(y=0, color="red", linewidth=1, linestyle="--", alpha=0.5)
+    _wm(ax2)
+    return FigureTemplate(fig, (ax1, ax2), {"breakeven_bars": bars1, "breakeven_labels": labels1,
+                                            "roi_bars": bars2, "roi_labels": labels2})
 
 
 def _chart_breakeven(key: str, p: CompanyProfile, out: str) -> str:
     """Chart 6: Breakeven & 5yr ROI analysis."""
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    t = figure_template("breakeven", _breakeven_template)
 
     total_daily_requests = sum(s.daily_requests_estimate for s in p.ai_services)
     total_daily_gpu_hr = (total_daily_requests * GPU_REQUEST_TIME_SEC) / 3600.0
@@ -285,30 +341,10 @@ def _chart_breakeven(key: str, p: CompanyProfile, out: str) -> str:
         breakevens.append(min(be, 60))
         rois.append(roi)
 
-    bars1 = ax1.bar(VARIANT_NAMES, breakevens, color=VARIANT_COLORS, edgecolor="white")
-    for bar, val in zip(bars1, breakevens):
-        label = f"{val:.0f} mo" if val < 60 else "60+ mo"
-        ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1,
-                label, ha="center", fontsize=10, fontweight="bold")
-    ax1.set_title("Breakeven (months)", fontsize=12, fontweight="bold")
-    ax1.set_ylabel("Months")
-    ax1.axhline(y=12, color="green", linewidth=1, linestyle="--", alpha=0.5, label="1 year")
-    ax1.axhline(y=24, color="orange", linewidth=1, linestyle="--", alpha=0.5, label="2 years")
-    ax1.legend(fontsize=8)
-    _wm(ax1)
-
-    bars2 = ax2.bar(VARIANT_NAMES, rois, color=VARIANT_COLORS, edgecolor="white")
-    for bar, val in zip(bars2, rois):
-        ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(max(rois), 1)*0.02,
-                f"{val:.0f}%", ha="center", fontsize=10, fontweight="bold")
-    ax2.set_title("5-Year ROI (%)", fontsize=12, fontweight="bold")
-    ax2.set_ylabel("ROI %")
-    ax2.axhline(y=0, color="red", linewidth=1, linestyle="--", alpha=0.5)
-    _wm(ax2)
+    update_bars(t["breakeven_bars"], t["breakeven_labels"], breakevens,
+                [f"{val:.0f} mo" if val < 60 else "60+ mo" for val in breakevens], 1)
+    update_bars(t["roi_bars"], t["roi_labels"], rois,
+                [f"{val:.0f}%" for val in rois], max(max(rois), 1)*0.02)
 
-    fig.suptitle(f"{p.name} — Breakeven & ROI Analysis (vs AWS)", fontsize=14, fontweight="bold", y=1.02)
-    plt.tight_layout()
-    path = os.path.join(out, f"{key}_06_breakeven_roi.png")
-    fig.savefig(path, dpi=CHART_DPI, bbox_inches="tight")
-    plt.close(fig)
-    return path
+    t.fig.suptitle(f"{p.name} — Breakeven & ROI Analysis (vs AWS)", fontsize=14, fontweight="bold", y=1.02)
+    return t.save(os.path.join(out, f"{key}_06_breakeven_roi.png"), bbox_inches="tight")
@@ -3,18 +3,19 @@
 NHP Phases 10-16 — Complete Coverage Simulation
 7 remaining categories in one comprehensive module.
 
-Run: python mega_simulation/complete_coverage.py
+Run: python mega_simulation/complete_coverage.py [--render-profile draft|web|print]
 """
-import sys, os, time
+import argparse, sys, os, time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from datetime import datetime
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
 
-CHART_DPI = 300
+from mega_simulation.render import (
+    ChartJob, add_profile_argument, asset_dir, pyplot, render_charts, report_path, save_figure,
+    set_render_profile,
+)
+
 
 def _wm(ax):
     ax.text(0.99, 0.01, "NHP Protocol v2.0", transform=ax.transAxes,
@@ -272,12 +273,21 @@ RISKS = [
 # CHARTS
 # ═══════════════════════════════════════════════════════
 
-def generate_charts(out_dir):
+def generate_charts(out_dir, workers=1):
     os.makedirs(out_dir, exist_ok=True)
-    plt.style.use("seaborn-v0_8-darkgrid")
-    saved = []
-
-    # 1. AI Task Feasibility
+    return render_charts([
+        ChartJob(_chart_ai_tasks, (out_dir,)),
+        ChartJob(_chart_adoption, (out_dir,)),
+        ChartJob(_chart_revenue, (out_dir,)),
+        ChartJob(_chart_latency, (out_dir,)),
+        ChartJob(_chart_sdg, (out_dir,)),
+        ChartJob(_chart_risk_matrix, (out_dir,)),
+    ], workers)
+
+
+def _chart_ai_tasks(out_dir):
+    """Chart 1: AI Task Feasibility."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(14, 7))
     tasks = [t["task"][:20] for t in AI_TASKS]
     quality = [t["quality_vs_cloud_pct"] for t in AI_TASKS]
@@ -291,9 +301,13 @@ def generate_charts(out_dir):
     ax.set_title("AI Task Feasibility on NHP (Quality vs Cloud)", fontsize=14, fontweight="bold")
     ax.set_xlabel("% of Cloud Quality"); ax.legend(); _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "cov_01_ai_tasks.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # 2. Adoption models
+
+def _chart_adoption(out_dir):
+    """Chart 2: Adoption models."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
     models = [a["model"][:20] for a in ADOPTION_MODELS]
     conv = [a["conversion_pct"] for a in ADOPTION_MODELS]
@@ -308,9 +322,13 @@ def generate_charts(out_dir):
     ax.set_title("User Adoption: Conversion & Retention by Distribution Model", fontsize=13, fontweight="bold")
     ax.legend(); _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "cov_02_adoption.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # 3. Revenue projections
+def _chart_revenue(out_dir):
+    """Chart 3: Revenue projections."""
+    plt = pyplot()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
     years = [r["year"] for r in REVENUE_YEARS]
     devices = [r["devices_m"] for r in REVENUE_YEARS]
@@ -332,9 +350,13 @@ def generate_charts(out_dir):
     fig.suptitle("NHP 5-Year Revenue Projection (Conservative)", fontsize=14, fontweight="bold", y=1.02)
     plt.tight_layout()
     p_path = os.path.join(out_dir, "cov_03_revenue.png")
-    fig.savefig(p_path, dpi=CHART_DPI, bbox_inches="tight"); plt.close(fig); saved.append(p_path)
+    save_figure(fig, p_path, bbox_inches="tight"); plt.close(fig)
+    return p_path
 
-    # 4. Latency breakdown
+
+def _chart_latency(out_dir):
+    """Chart 4: Latency breakdown."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(14, 6))
     ltasks = [l["task"][:20] for l in LATENCY_BY_TASK]
     compute = [l["compute_ms"] for l in LATENCY_BY_TASK]
@@ -350,9 +372,13 @@ def generate_charts(out_dir):
     ax.set_title("End-to-End Latency Breakdown by AI Task", fontsize=13, fontweight="bold")
     ax.set_ylabel("Milliseconds"); ax.set_yscale("log"); ax.legend(); _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "cov_04_latency.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # 5. UN SDG alignment
+def _chart_sdg(out_dir):
+    """Chart 5: UN SDG alignment."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(10, 6))
     sdgs = [f"SDG {s['sdg']}: {s['name'][:25]}" for s in UN_SDG_ALIGNMENT]
     scores = [s["nhp_score"] for s in UN_SDG_ALIGNMENT]
@@ -365,9 +391,13 @@ def generate_charts(out_dir):
     ax.set_title("NHP Alignment with UN Sustainable Development Goals", fontsize=13, fontweight="bold")
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "cov_05_sdg.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # 6. Risk Matrix
+
+def _chart_risk_matrix(out_dir):
+    """Chart 6: Risk Matrix."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 7))
     prob_map = {"Very Low": 1, "Low": 2, "Medium": 3, "High": 4}
     imp_map = {"Low": 1, "Medium": 2, "High": 3, "Critical": 4}
@@ -388,9 +418,8 @@ def generate_charts(out_dir):
     ax.set_xlim(0.5, 4.5); ax.set_ylim(0.5, 4.5)
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "cov_06_risk_matrix.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
-
-    return saved
+    save_figure(fig, p); plt.close(fig)
+    return p
 
 
 # ═══════════════════════════════════════════════════════
@@ -406,7 +435,7 @@ def generate_report(charts, total):
 
     # Phase 10
     L.append("## Phase 10: AI Task Decomposition / تحليل مهام AI\n")
-    L.append(f"![AI Tasks](../../assets/coverage/{os.path.basename(charts[0])})\n")
+    L.append(f"![AI Tasks](../../{charts[0]})\n")
     L.append("| Task | Model | Size | Min TOPS | Quality vs Cloud | NHP Fit | Reason |")
     L.append("|---|---|---|---|---|---|---|")
     for t in AI_TASKS:
@@ -416,7 +445,7 @@ def generate_report(charts, total):
 
     # Phase 11
     L.append("## Phase 11: User Adoption Models / نماذج التبني\n")
-    L.append(f"![Adoption](../../assets/coverage/{os.path.basename(charts[1])})\n")
+    L.append(f"![Adoption](../../{charts[1]})\n")
     L.append("| Model | Conversion | Retention | Play Store Risk | Example |")
     L.append("|---|---|---|---|---|")
     for a in ADOPTION_MODELS:
@@ -434,7 +463,7 @@ def generate_report(charts, total):
 
     # Phase 13
     L.append("## Phase 13: Revenue Projection / توقعات الإيرادات\n")
-    L.append(f"![Revenue](../../assets/coverage/{os.path.basename(charts[2])})\n")
+    L.append(f"![Revenue](../../{charts[2]})\n")
     L.append("| Year | Devices | User Income | Platform Rev | User Payouts | Total |")
     L.append("|---|---|---|---|---|---|")
     for r in REVENUE_YEARS:
@@ -445,7 +474,7 @@ def generate_report(charts, total):
 
     # Phase 14
     L.append("## Phase 14: Technical Architecture / البنية التقنية\n")
-    L.append(f"![Latency](../../assets/coverage/{os.path.basename(charts[3])})\n")
+    L.append(f"![Latency](../../{charts[3]})\n")
     L.append("### Data Flow / مسار البيانات\n")
     for s in ARCHITECTURE_FLOW:
         L.append(f"**{s['step']}.** `{s['component']}` → {s['detail']}")
@@ -453,7 +482,7 @@ def generate_report(charts, total):
 
     # Phase 15
     L.append("## Phase 15: Social Impact & ESG / الأثر الاجتماعي\n")
-    L.append(f"![SDG](../../assets/coverage/{os.path.basename(charts[4])})\n")
+    L.append(f"![SDG](../../{charts[4]})\n")
     L.append("| SDG | Name | NHP Score | Impact |")
     L.append("|---|---|---|---|")
     for s in UN_SDG_ALIGNMENT:
@@ -462,7 +491,7 @@ def generate_report(charts, total):
 
     # Phase 16
     L.append("## Phase 16: Risk Matrix / مصفوفة المخاطر\n")
-    L.append(f"![Risks](../../assets/coverage/{os.path.basename(charts[5])})\n")
+    L.append(f"![Risks](../../{charts[5]})\n")
     L.append("| Category | Risk | Probability | Impact | Mitigation |")
     L.append("|---|---|---|---|---|")
     for r in RISKS:
@@ -476,7 +505,10 @@ def generate_report(charts, total):
 # MAIN
 # ═══════════════════════════════════════════════════════
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NHP Phases 10-16 — Complete Coverage Simulation")
+    add_profile_argument(parser)
+    set_render_profile(parser.parse_args(argv).render_profile)
     print("=" * 60)
     print("  NHP Phases 10-16 — Complete Coverage")
     print("=" * 60, "\n")
@@ -495,14 +527,15 @@ def main():
     print(f"  Phase 16 (Risks): {len(RISKS)} risks")
     print(f"  TOTAL: {total} scenarios\n")
 
-    charts = generate_charts("assets/coverage")
+    charts = generate_charts(asset_dir("assets/coverage"))
     for c in charts: print(f"  ✅ {c}")
 
     report = generate_report(charts, total)
-    os.makedirs("output", exist_ok=True)
-    with open("output/complete_coverage.md", "w", encoding="utf-8") as f:
+    path = report_path("output/complete_coverage.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
         f.write(report)
-    print(f"\n  ✅ output/complete_coverage.md")
+    print(f"\n  ✅ {path}")
 
     elapsed = time.time() - start
     print(f"\n{'='*60}")
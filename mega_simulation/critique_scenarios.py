@@ -15,21 +15,22 @@ Addresses every challenge raised in external review with hard data.
  9. 📉 Worst-Case Stress Test — Everything goes wrong
 10. 🆚 Honest Competitor Comparison — Real numbers, no hype
 
-Run: python mega_simulation/critique_scenarios.py
+Run: python mega_simulation/critique_scenarios.py [--render-profile draft|web|print]
 """
-import sys, os, time
+import argparse, sys, os, time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from typing import Dict, Any, List
 from datetime import datetime
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker
 import numpy as np
 
-CHART_DPI = 300
+from mega_simulation.render import (
+    ChartJob, add_profile_argument, asset_dir, pyplot, render_charts, report_path, save_figure,
+    set_render_profile,
+)
+from mega_simulation.thermal import simulate_profiles
+
 NIGHTLY_HOURS = 7
 DEVICE_EXTRA_WATT = 2.5
 
@@ -101,40 +102,43 @@ def simulate_pricing():
 
 THERMAL_SCENARIOS = [
     {"phone": "Flagship (S24 Ultra)", "tops": 34, "tdp_watt": 5.0,
-     "throttle_temp_c": 42, "ambient_c": 25, "max_sustained_tops": 24,
-     "throttle_pct": 30, "cooling": "Vapor Chamber"},
+     "throttle_temp_c": 42, "ambient_c": 25, "max_sustained_tops": 24, "cooling": "Vapor Chamber"},
     {"phone": "Mid-Range (Redmi Note 13)", "tops": 12, "tdp_watt": 3.0,
-     "throttle_temp_c": 40, "ambient_c": 30, "max_sustained_tops": 10,
-     "throttle_pct": 17, "cooling": "Graphite Sheet"},
+     "throttle_temp_c": 40, "ambient_c": 30, "max_sustained_tops": 10, "cooling": "Graphite Sheet"},
     {"phone": "Budget (Redmi 12)", "tops": 6, "tdp_watt": 2.0,
-     "throttle_temp_c": 38, "ambient_c": 30, "max_sustained_tops": 5,
-     "throttle_pct": 17, "cooling": "None"},
+     "throttle_temp_c": 38, "ambient_c": 30, "max_sustained_tops": 5, "cooling": "None"},
     {"phone": "Flagship (Hot Climate)", "tops": 34, "tdp_watt": 5.0,
-     "throttle_temp_c": 42, "ambient_c": 35, "max_sustained_tops": 20,
-     "throttle_pct": 41, "cooling": "Vapor Chamber"},
+     "throttle_temp_c": 42, "ambient_c": 35, "max_sustained_tops": 20, "cooling": "Vapor Chamber"},
     {"phone": "Old Phone (S21, 2021)", "tops": 15, "tdp_watt": 4.0,
-     "throttle_temp_c": 40, "ambient_c": 28, "max_sustained_tops": 10,
-     "throttle_pct": 33, "cooling": "Heat Pipe"},
+     "throttle_temp_c": 40, "ambient_c": 28, "max_sustained_tops": 10, "cooling": "Heat Pipe"},
 ]
 
-def simulate_thermal():
-    results = []
-    for t in THERMAL_SCENARIOS:
-        effective_tops = t["max_sustained_tops"]
-        efficiency = effective_tops / t["tops"] * 100
-        heat_generated = t["tdp_watt"] * NIGHTLY_HOURS  # Wh
-        temp_rise = t["tdp_watt"] * 3  # Rough: 3°C per watt
-        final_temp = t["ambient_c"] + temp_rise
-        safe = final_temp < t["throttle_temp_c"] + 5  # 5°C margin
-
-        # NHP adaptive: reduce load to keep temp < throttle
-        nhp_load_pct = min(100, (t["throttle_temp_c"] - t["ambient_c"]) / temp_rise * 100) if temp_rise > 0 else 100
-        effective_hrs = NIGHTLY_HOURS * (nhp_load_pct / 100)
+THERMAL_AMBIENTS_C = np.round(np.arange(15.0, 40.01, 0.1), 1)   # Climate sweep
+
 
+def simulate_thermal(ambients=THERMAL_AMBIENTS_C):
+    """Nightly heat balance per device class (see ``thermal.py``).
+
+    Each class runs at its own ambient, and again across the ``ambients``
+    sweep, in one vectorized integration per call.
+    """
+    nominal = simulate_profiles(THERMAL_SCENARIOS, hours=NIGHTLY_HOURS)
+    sweep = simulate_profiles(THERMAL_SCENARIOS, ambients, hours=NIGHTLY_HOURS)
+    results = []
+    for i, t in enumerate(THERMAL_SCENARIOS):
+        efficiency = float(nominal.efficiency[i]) * 100
         results.append({
-            **t, "effective_tops": effective_tops, "efficiency_pct": efficiency,
-            "final_temp_c": final_temp, "safe": safe,
-            "nhp_load_pct": nhp_load_pct, "effective_hrs": effective_hrs,
+            **t, "effective_tops": round(float(nominal.sustained_tops[i]), 1),
+            "efficiency_pct": efficiency, "loss_pct": 100 - efficiency,
+            "tops_hours": float(nominal.tops_hours[i]),
+            "peak_temp_c": float(nominal.peak_temp_c[i]),
+            "final_temp_c": float(nominal.final_temp_c[i]),
+            "safe": nominal.peak_temp_c[i] < t["throttle_temp_c"] + 5,  # 5°C margin
+            "throttled_h": float(nominal.throttled_h[i]),
+            "nhp_load_pct": float(nominal.mean_duty[i]) * 100,
+            "effective_hrs": float(nominal.tops_hours[i]) / t["tops"],  # Full-power equivalent
+            "ambient_sweep_c": ambients,
+            "sustained_by_ambient": sweep.sustained_tops[i],
         })
     return results
 
@@ -301,12 +305,21 @@ WORST_CASE = {
 # CHARTS
 # ═══════════════════════════════════════════════════════
 
-def generate_charts(pricing, thermal, india, flow, npu, out_dir):
+def generate_charts(pricing, thermal, india, flow, npu, out_dir, workers=1):
     os.makedirs(out_dir, exist_ok=True)
-    plt.style.use("seaborn-v0_8-darkgrid")
-    saved = []
-
-    # 1. Realistic pricing — user monthly income
+    return render_charts([
+        ChartJob(_chart_realistic_pricing, (pricing, out_dir)),
+        ChartJob(_chart_thermal, (thermal, out_dir)),
+        ChartJob(_chart_india, (india, out_dir)),
+        ChartJob(_chart_payment_flow, (flow, out_dir)),
+        ChartJob(_chart_npu_vs_gpu, (npu, out_dir)),
+        ChartJob(_chart_worst_case, (out_dir,)),
+    ], workers)
+
+
+def _chart_realistic_pricing(pricing, out_dir):
+    """Chart 1: Realistic pricing — user monthly income."""
+    plt = pyplot()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
     labels = [p["label"][:15] for p in pricing]
     monthly = [p["monthly_usd"] for p in pricing]
@@ -332,10 +345,14 @@ def generate_charts(pricing, thermal, india, flow, npu, out_dir):
     fig.suptitle("Realistic Pricing: What Users Actually Earn", fontsize=14, fontweight="bold", y=1.02)
     plt.tight_layout()
     p = os.path.join(out_dir, "crit_01_realistic_pricing.png")
-    fig.savefig(p, dpi=CHART_DPI, bbox_inches="tight"); plt.close(fig); saved.append(p)
+    save_figure(fig, p, bbox_inches="tight"); plt.close(fig)
+    return p
 
-    # 2. Thermal constraints
-    fig, ax = plt.subplots(figsize=(12, 6))
+
+def _chart_thermal(thermal, out_dir):
+    """Chart 2: Thermal constraints."""
+    plt = pyplot()
+    fig, (ax, ax2) = plt.subplots(1, 2, figsize=(16, 6), gridspec_kw={"width_ratios": [1.2, 1]})
     phones = [t["phone"][:20] for t in thermal]
     peak = [t["tops"] for t in thermal]
     sustained = [t["effective_tops"] for t in thermal]
@@ -343,16 +360,32 @@ def generate_charts(pricing, thermal, india, flow, npu, out_dir):
     ax.bar(x - 0.2, peak, 0.35, label="Peak TOPS", color="#E74C3C", edgecolor="white", alpha=0.7)
     ax.bar(x + 0.2, sustained, 0.35, label="Sustained TOPS (7h)", color="#2ECC71", edgecolor="white")
     for i in range(len(phones)):
-        loss = thermal[i]["throttle_pct"]
-        ax.text(i, max(peak[i], sustained[i]) + 0.5, f"-{loss}%",
+        loss = thermal[i]["loss_pct"]
+        ax.text(i, max(peak[i], sustained[i]) + 0.5, f"-{loss:.0f}%",
                 ha="center", fontsize=9, fontweight="bold", color="#C0392B")
     ax.set_xticks(x); ax.set_xticklabels(phones, rotation=20, ha="right", fontsize=9)
-    ax.set_title("Thermal Throttling: Peak vs Sustained Performance (7 hours)", fontsize=13, fontweight="bold")
-    ax.set_ylabel("TOPS"); ax.legend(); _wm(ax); plt.tight_layout()
+    ax.set_title("Peak vs Sustained Performance (7 hours)", fontsize=12, fontweight="bold")
+    ax.set_ylabel("TOPS"); ax.legend(); _wm(ax)
+
+    for t in thermal:
+        if t["phone"] == "Flagship (Hot Climate)":
+            continue  # Same device as the S24 Ultra row
+        ax2.plot(t["ambient_sweep_c"], t["sustained_by_ambient"], linewidth=2, label=t["phone"])
+    ax2.set_title("Sustained TOPS vs Room Temperature", fontsize=12, fontweight="bold")
+    ax2.set_xlabel("Ambient (°C)"); ax2.set_ylabel("Sustained TOPS (7h average)")
+    ax2.legend(fontsize=8); ax2.grid(alpha=0.3); _wm(ax2)
+
+    fig.suptitle("Thermal Throttling: Time-Stepped Heat Balance With Adaptive Duty Cycle",
+                 fontsize=13, fontweight="bold")
+    plt.tight_layout()
     p = os.path.join(out_dir, "crit_02_thermal.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # 3. India market
+def _chart_india(india, out_dir):
+    """Chart 3: India market."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
     adopt_labels = [s["label"] for s in india]
     payouts = [s["total_monthly_payouts"]/1e6 for s in india]
@@ -368,9 +401,13 @@ def generate_charts(pricing, thermal, india, flow, npu, out_dir):
     ax.set_title("India Market: Monthly Revenue at $10/user (Conservative)", fontsize=13, fontweight="bold")
     ax.set_ylabel("USD (Millions)"); ax.legend(); _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "crit_03_india.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # 4. Payment flow
+
+def _chart_payment_flow(flow, out_dir):
+    """Chart 4: Payment flow."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
     dev_labels = [f"${f['dev_monthly_spend']:,}/mo" for f in flow]
     platform_rev = [f["net_platform_profit"] for f in flow]
@@ -385,9 +422,13 @@ def generate_charts(pricing, thermal, india, flow, npu, out_dir):
     ax.set_title("Payment Flow: Developer Spend → Platform + Users", fontsize=13, fontweight="bold")
     ax.set_ylabel("USD / Month"); ax.legend(); _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "crit_04_payment_flow.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # 5. NPU vs GPU efficiency
+def _chart_npu_vs_gpu(npu, out_dir):
+    """Chart 5: NPU vs GPU efficiency."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
     chips = [n["chip"][:18] for n in npu]
     gpu_eff = [n["gpu_tops_per_watt"] for n in npu]
@@ -404,9 +445,13 @@ def generate_charts(pricing, thermal, india, flow, npu, out_dir):
                 fontsize=12, fontweight="bold")
     ax.set_ylabel("TOPS / Watt"); ax.legend(); _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "crit_05_npu_vs_gpu.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # 6. Worst case
+
+def _chart_worst_case(out_dir):
+    """Chart 6: Worst case."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(10, 7))
     labels = ["Normal\nAssumptions", "Worst Case\n(Everything Wrong)"]
     normal = {
@@ -426,9 +471,8 @@ def generate_charts(pricing, thermal, india, flow, npu, out_dir):
     ax.set_title("Stress Test: Normal vs Absolute Worst Case", fontsize=14, fontweight="bold")
     ax.legend(); _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "crit_06_worst_case.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
-
-    return saved
+    save_figure(fig, p); plt.close(fig)
+    return p
 
 
 # ═══════════════════════════════════════════════════════
@@ -445,7 +489,7 @@ def generate_report(pricing, thermal, india, flow, npu, charts, total):
 
     # 1. Pricing
     L.append("## 💰 1. Realistic Pricing — What Users ACTUALLY Earn\n")
-    L.append(f"![Pricing](../../assets/critique/{os.path.basename(charts[0])})\n")
+    L.append(f"![Pricing](../../{charts[0]})\n")
     L.append("**Critique:** \"$42/month is unrealistic. Salad.com pays $5-15.\"\n")
     L.append("**Honest answer:** It depends on market demand. Here are all scenarios:\n")
     L.append("| Scenario | GPU-hr Price | Monthly USD | Monthly INR | % of India Avg Income | Viable? |")
@@ -457,19 +501,29 @@ def generate_report(pricing, thermal, india, flow, npu, charts, total):
 
     # 2. Thermal
     L.append("## 🌡️ 2. Thermal Constraints — Real Performance After Throttling\n")
-    L.append(f"![Thermal](../../assets/critique/{os.path.basename(charts[1])})\n")
+    L.append(f"![Thermal](../../{charts[1]})\n")
     L.append("**Critique:** \"GPU will overheat and damage the phone.\"\n")
     L.append("**Honest answer:** Yes, throttling happens. NHP accounts for it:\n")
-    L.append("| Phone | Peak TOPS | Sustained TOPS | Throttle Loss | Final Temp | Safe? |")
-    L.append("|---|---|---|---|---|---|")
+    L.append("| Phone | Peak TOPS | Sustained TOPS | TOPS-h / Night | NHP Load | Throttle Loss | Peak Temp | Safe? |")
+    L.append("|---|---|---|---|---|---|---|---|")
     for t in thermal:
         safe = "✅" if t["safe"] else "⚠️"
-        L.append(f"| {t['phone']} | {t['tops']} | **{t['effective_tops']}** | -{t['throttle_pct']}% | {t['final_temp_c']:.0f}°C | {safe} |")
-    L.append(f"\n**Key insight:** NHP uses **NPU (not GPU)** which generates 40% less heat. And NHP dynamically reduces load to stay under thermal limits. The simulation already accounts for 17-41% throttling.\n")
+        L.append(f"| {t['phone']} | {t['tops']} | **{t['effective_tops']}** | {t['tops_hours']:.0f} | {t['nhp_load_pct']:.0f}% | -{t['loss_pct']:.0f}% | {t['peak_temp_c']:.0f}°C | {safe} |")
+    shown = (20, 25, 30, 35, 40)
+    L.append("\n**Sustained TOPS by room temperature** (7-hour average, same model):\n")
+    L.append("| Phone | " + " | ".join(f"{a}°C" for a in shown) + " |")
+    L.append("|---|" + "---|" * len(shown))
+    for t in thermal:
+        if t["phone"] == "Flagship (Hot Climate)":
+            continue
+        cells = [t["sustained_by_ambient"][np.searchsorted(t["ambient_sweep_c"], a)] for a in shown]
+        L.append(f"| {t['phone']} | " + " | ".join(f"{v:.1f}" for v in cells) + " |")
+    losses = [t["loss_pct"] for t in thermal]
+    L.append(f"\n**Key insight:** NHP uses **NPU (not GPU)** which generates 40% less heat. And NHP dynamically reduces load (a duty-cycle controller just under the throttle point) to stay under thermal limits. The time-stepped model puts the nightly loss at {min(losses):.0f}-{max(losses):.0f}%, driven mostly by room temperature.\n")
 
     # 3. India
     L.append("## 🇮🇳 3. India-First Market Entry (Conservative $10/month)\n")
-    L.append(f"![India](../../assets/critique/{os.path.basename(charts[2])})\n")
+    L.append(f"![India](../../{charts[2]})\n")
     L.append("| Adoption | Devices | User Payouts/mo | Platform Rev/mo | Annual GDP Impact |")
     L.append("|---|---|---|---|---|")
     for s in india:
@@ -478,7 +532,7 @@ def generate_report(pricing, thermal, india, flow, npu, charts, total):
 
     # 4. Payment Flow
     L.append("## 💸 4. Payment Flow: Who Pays Whom?\n")
-    L.append(f"![Flow](../../assets/critique/{os.path.basename(charts[3])})\n")
+    L.append(f"![Flow](../../{charts[3]})\n")
     L.append("```\nDeveloper pays for compute → NHP Platform takes 15% → User gets 85% - fees\n```\n")
     L.append("| Developer Spends | Users Get | Platform Profit | # Users Served | Platform Margin |")
     L.append("|---|---|---|---|---|")
@@ -488,7 +542,7 @@ def generate_report(pricing, thermal, india, flow, npu, charts, total):
 
     # 5. NPU
     L.append("## 🧠 5. NPU vs GPU — Why NHP Uses NPU (Not GPU)\n")
-    L.append(f"![NPU vs GPU](../../assets/critique/{os.path.basename(charts[4])})\n")
+    L.append(f"![NPU vs GPU](../../{charts[4]})\n")
     L.append("**Critique:** \"Phone GPUs will overheat.\"\n")
     L.append("**Answer:** NHP targets NPU (Neural Processing Unit), NOT GPU:\n")
     L.append("| Chip | GPU TOPS/W | NPU TOPS/W | Efficiency Gain | Heat Reduction |")
@@ -499,7 +553,7 @@ def generate_report(pricing, thermal, india, flow, npu, charts, total):
 
     # 6. Worst Case
     L.append("## 📉 6. Worst-Case Stress Test\n")
-    L.append(f"![Worst Case](../../assets/critique/{os.path.basename(charts[5])})\n")
+    L.append(f"![Worst Case](../../{charts[5]})\n")
     L.append("**What if EVERYTHING goes wrong?**\n")
     L.append("| Factor | Normal | Worst Case |")
     L.append("|---|---|---|")
@@ -529,7 +583,10 @@ def generate_report(pricing, thermal, india, flow, npu, charts, total):
 # MAIN
 # ═══════════════════════════════════════════════════════
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NHP Phase 8 — Critique Response Scenarios")
+    add_profile_argument(parser)
+    set_render_profile(parser.parse_args(argv).render_profile)
     print("=" * 60)
     print("  NHP Phase 8 — Critique Response Scenarios")
     print("  الرد على الانتقادات بالأرقام")
@@ -559,16 +616,17 @@ def main():
     total = len(pricing) + len(thermal) + len(india) + len(flow) + len(npu) + len(COMPETITOR_REAL_DATA) + 1
 
     print(f"\n▶ Generating charts...")
-    charts = generate_charts(pricing, thermal, india, flow, npu, "assets/critique")
+    charts = generate_charts(pricing, thermal, india, flow, npu, asset_dir("assets/critique"))
     for c in charts:
         print(f"  ✅ {c}")
 
     print(f"\n▶ Generating report...")
     report = generate_report(pricing, thermal, india, flow, npu, charts, total)
-    os.makedirs("output", exist_ok=True)
-    with open("output/critique_response.md", "w", encoding="utf-8") as f:
+    path = report_path("output/critique_response.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
         f.write(report)
-    print("  ✅ output/critique_response.md")
+    print(f"  ✅ {path}")
 
     elapsed = time.time() - start
     print(f"\n{'='*60}")
@@ -576,7 +634,7 @@ def main():
     print(f"{'='*60}")
 
     print(f"\n💰 Conservative ($0.08/hr): ${pricing[1]['monthly_usd']:.1f}/mo = ₹{pricing[1]['monthly_inr']:.0f}")
-    print(f"🌡️ Avg thermal loss: {sum(t['throttle_pct'] for t in thermal)/len(thermal):.0f}%")
+    print(f"🌡️ Avg thermal loss: {sum(t['loss_pct'] for t in thermal)/len(thermal):.0f}%")
     print(f"🇮🇳 India 1% adoption: {_n(india[1]['devices'])} devices, {_fmt(india[1]['platform_monthly'])}/mo revenue")
     print(f"🧠 NPU avg efficiency gain: +{sum(n['efficiency_gain_pct'] for n in npu)/len(npu):.0f}% vs GPU")
 
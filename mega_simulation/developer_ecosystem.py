@@ -3,22 +3,22 @@
 NHP Phase 5 — Developer Ecosystem & Token Demand Simulation
 The DEMAND side: developers buying NHP tokens for AI compute.
 
-Run: python mega_simulation/developer_ecosystem.py
+Run: python mega_simulation/developer_ecosystem.py [--render-profile draft|web|print]
 """
-import sys, os, time, math
+import argparse, sys, os, time, math
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from typing import Dict, Any, List
 from dataclasses import dataclass, field
 from datetime import datetime
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
 import numpy as np
 
-CHART_DPI = 300
+from mega_simulation.render import (
+    ChartJob, add_profile_argument, asset_dir, pyplot, render_charts, report_path, save_figure,
+    set_render_profile,
+)
+
 
 # ═══════════════════════════════════════════════════════════════
 # CLOUD API PRICING (real-world 2024-2025 prices)
@@ -275,12 +275,22 @@ def _fmt(v):
     if abs(v) >= 1e3: return f"${v/1e3:.0f}K"
     return f"${v:.2f}"
 
-def generate_dev_charts(dev_results, token_results, demand, out_dir):
+def generate_dev_charts(dev_results, token_results, demand, out_dir, workers=1):
     os.makedirs(out_dir, exist_ok=True)
-    plt.style.use("seaborn-v0_8-darkgrid")
-    saved = []
-
-    # Chart 1: Cloud vs NHP cost per use case
+    return render_charts([
+        ChartJob(_chart_cost_comparison, (dev_results, out_dir)),
+        ChartJob(_chart_annual_savings, (dev_results, out_dir)),
+        ChartJob(_chart_pricing, (out_dir,)),
+        ChartJob(_chart_token_lifecycle, (token_results, out_dir)),
+        ChartJob(_chart_demand_segments, (demand, out_dir)),
+        ChartJob(_chart_fitness, (out_dir,)),
+    ], workers)
+
+
+def _chart_cost_comparison(dev_results, out_dir):
+    """Chart 1: Cloud vs NHP cost per use case."""
+    plt = pyplot()
+    from matplotlib import ticker
     fig, ax = plt.subplots(figsize=(14, 7))
     names = [r["use_case"][:25] for r in dev_results]
     cloud = [r["cloud_monthly"] for r in dev_results]
@@ -300,10 +310,16 @@ def generate_dev_charts(dev_results, token_results, demand, out_dir):
     _wm(ax)
     plt.tight_layout()
     p = os.path.join(out_dir, "dev_01_cost_comparison.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # Chart 2: Annual savings
+def _chart_annual_savings(dev_results, out_dir):
+    """Chart 2: Annual savings."""
+    plt = pyplot()
+    from matplotlib import ticker
     fig, ax = plt.subplots(figsize=(14, 7))
+    names = [r["use_case"][:25] for r in dev_results]
     savings = [r["annual_savings"] for r in dev_results]
     fits = [r["nhp_fit"] for r in dev_results]
     fit_colors = {"Excellent": "#2ECC71", "Good": "#3498DB", "Fair": "#F39C12", "Poor": "#E74C3C"}
@@ -321,9 +337,13 @@ def generate_dev_charts(dev_results, token_results, demand, out_dir):
     _wm(ax)
     plt.tight_layout()
     p = os.path.join(out_dir, "dev_02_annual_savings.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # Chart 3: NHP pricing vs cloud APIs
+def _chart_pricing(out_dir):
+    """Chart 3: NHP pricing vs cloud APIs."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(14, 7))
     tasks = [p.task[:20] for p in NHP_PRICING.values()]
     cloud_p = [p.cloud_avg_price for p in NHP_PRICING.values()]
@@ -342,9 +362,13 @@ def generate_dev_charts(dev_results, token_results, demand, out_dir):
     _wm(ax)
     plt.tight_layout()
     p = os.path.join(out_dir, "dev_03_pricing.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # Chart 4: Token lifecycle (deflationary model)
+
+def _chart_token_lifecycle(token_results, out_dir):
+    """Chart 4: Token lifecycle (deflationary model)."""
+    plt = pyplot()
     defl = [r for r in token_results if r[0]["year"] == 1]  # Get the deflationary model
     defl_data = token_results[1]  # Index 1 = Deflationary
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
@@ -364,9 +388,13 @@ def generate_dev_charts(dev_results, token_results, demand, out_dir):
     fig.suptitle("NHP Token Lifecycle — Deflationary Model (30% Burn)", fontsize=14, fontweight="bold", y=1.02)
     plt.tight_layout()
     p = os.path.join(out_dir, "dev_04_token_lifecycle.png")
-    fig.savefig(p, dpi=CHART_DPI, bbox_inches="tight"); plt.close(fig); saved.append(p)
+    save_figure(fig, p, bbox_inches="tight"); plt.close(fig)
+    return p
+
 
-    # Chart 5: Platform demand by developer segment
+def _chart_demand_segments(demand, out_dir):
+    """Chart 5: Platform demand by developer segment."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(10, 7))
     segs = demand["segments"]
     labels = [s["type"] for s in segs]
@@ -380,10 +408,15 @@ def generate_dev_charts(dev_results, token_results, demand, out_dir):
     _wm(ax)
     plt.tight_layout()
     p = os.path.join(out_dir, "dev_05_demand_segments.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # Chart 6: NHP Fitness by use case
+def _chart_fitness(out_dir):
+    """Chart 6: NHP Fitness by use case."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 7))
+    fit_colors = {"Excellent": "#2ECC71", "Good": "#3498DB", "Fair": "#F39C12", "Poor": "#E74C3C"}
     uc_names = [uc.name[:25] for uc in USE_CASES]
     fit_scores = {"Excellent": 95, "Good": 70, "Fair": 45, "Poor": 15}
     scores = [fit_scores[uc.nhp_fit] for uc in USE_CASES]
@@ -399,9 +432,8 @@ def generate_dev_charts(dev_results, token_results, demand, out_dir):
     _wm(ax)
     plt.tight_layout()
     p = os.path.join(out_dir, "dev_06_fitness.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
-
-    return saved
+    save_figure(fig, p); plt.close(fig)
+    return p
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -419,7 +451,7 @@ def generate_report(dev_results, token_results, demand, charts, total):
 
     # Pricing
     L.append("## 1. NHP Pricing vs Cloud APIs / تسعير NHP مقابل APIs السحابة\n")
-    L.append(f"![Pricing](../../assets/developer/{os.path.basename(charts[2])})\n")
+    L.append(f"![Pricing](../../{charts[2]})\n")
     L.append("| Task | Unit | Cloud Avg | NHP Price | Savings | Quality | Latency |")
     L.append("|---|---|---|---|---|---|---|")
     for p in NHP_PRICING.values():
@@ -428,8 +460,8 @@ def generate_report(dev_results, token_results, demand, charts, total):
 
     # Use Cases
     L.append("## 2. Developer Use Cases / حالات استخدام المطورين\n")
-    L.append(f"![Cost Comparison](../../assets/developer/{os.path.basename(charts[0])})\n")
-    L.append(f"![Annual Savings](../../assets/developer/{os.path.basename(charts[1])})\n")
+    L.append(f"![Cost Comparison](../../{charts[0]})\n")
+    L.append(f"![Annual Savings](../../{charts[1]})\n")
     L.append("| Use Case | Type | Cloud/mo | NHP/mo | Savings | NHP Fit |")
     L.append("|---|---|---|---|---|---|")
     for r in dev_results:
@@ -438,7 +470,7 @@ def generate_report(dev_results, token_results, demand, charts, total):
 
     # Fitness
     L.append("## 3. NHP Fitness Analysis / تحليل ملاءمة NHP\n")
-    L.append(f"![Fitness](../../assets/developer/{os.path.basename(charts[5])})\n")
+    L.append(f"![Fitness](../../{charts[5]})\n")
     for uc in USE_CASES:
         emoji = {"Excellent": "🟢", "Good": "🔵", "Fair": "🟡", "Poor": "🔴"}[uc.nhp_fit]
         L.append(f"### {emoji} {uc.name} ({uc.name_ar})")
@@ -447,7 +479,7 @@ def generate_report(dev_results, token_results, demand, charts, total):
 
     # Token Lifecycle
     L.append("## 4. Token Lifecycle Models / نماذج دورة حياة التوكن\n")
-    L.append(f"![Token Lifecycle](../../assets/developer/{os.path.basename(charts[3])})\n")
+    L.append(f"![Token Lifecycle](../../{charts[3]})\n")
     for i, model in enumerate(TOKEN_MODELS):
         L.append(f"### {model.name} ({model.name_ar})")
         L.append(f"| Year | Supply | Price | Market Cap | Platform Rev | User Payouts |")
@@ -458,7 +490,7 @@ def generate_report(dev_results, token_results, demand, charts, total):
 
     # Demand
     L.append("## 5. Platform Demand Model / نموذج طلب المنصة\n")
-    L.append(f"![Demand](../../assets/developer/{os.path.basename(charts[4])})\n")
+    L.append(f"![Demand](../../{charts[4]})\n")
     L.append(f"**Total Annual Demand: {_fmt(demand['total_annual_demand'])}**\n")
     L.append("| Segment | Developers | Avg Spend/mo | Monthly Total | Annual Total |")
     L.append("|---|---|---|---|---|")
@@ -481,7 +513,10 @@ def generate_report(dev_results, token_results, demand, charts, total):
 # MAIN
 # ═══════════════════════════════════════════════════════════════
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NHP Phase 5 — Developer Ecosystem & Token Demand Simulation")
+    add_profile_argument(parser)
+    set_render_profile(parser.parse_args(argv).render_profile)
     print("=" * 60)
     print("  NHP Phase 5 — Developer Ecosystem & Token Demand")
     print("  نظام المطورين واقتصاد التوكن")
@@ -516,17 +551,18 @@ def main():
 
     # 4. Charts
     print("\n▶ Generating charts...")
-    charts = generate_dev_charts(dev_results, token_results, demand, "assets/developer")
+    charts = generate_dev_charts(dev_results, token_results, demand, asset_dir("assets/developer"))
     for c in charts:
         print(f"  ✅ {c}")
 
     # 5. Report
     print("\n▶ Generating report...")
     report = generate_report(dev_results, token_results, demand, charts, total)
-    os.makedirs("output", exist_ok=True)
-    with open("output/developer_ecosystem.md", "w", encoding="utf-8") as f:
+    path = report_path("output/developer_ecosystem.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
         f.write(report)
-    print("  ✅ output/developer_ecosystem.md")
+    print(f"  ✅ {path}")
 
     elapsed = time.time() - start
     print(f"\n{'='*60}")
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Task Dispatch Discrete-Event Simulator
+Simulates how the coordinator dispatches tasks across a phone fleet and
+derives the network figures (throughput, latency, dropout, success) that
+Phase 6 reports:
+
+  • tasks arrive as a Poisson stream at the offered load,
+  • each task is sent to ``redundancy`` devices picked from the idle pool,
+  • a replica takes network round trip + work / effective device TOPS,
+  • devices drop out when their charging session ends; the coordinator
+    notices after a heartbeat delay and sends a replacement replica,
+  • results are cross-verified: a task succeeds when ``quorum`` matching
+    (non-faulty) results arrive before the deadline.
+
+Events live in a binary heap (``heapq``); the pre-sorted arrival stream is
+merged in without going through the heap. Device state is array-backed
+(one byte of TOPS class plus a float32 session end per device), so a
+shard can hold 10^7+ devices. Very high offered loads are split across
+identical coordinator shards. One shard is simulated and its throughput
+is scaled by the shard count, which bounds the event count per run: the
+shard keeps the fleet's ratio of online devices to offered load, not its
+absolute device count.
+
+Capacity is measured, not assumed: a second, saturated run offers more
+tasks than any fleet could serve and counts what gets verified. An
+offered load above capacity shows up as throughput below the offered
+rate, and the scenario is flagged as overloaded. A simulated window is
+shorter than a task deadline, so an overloaded queue would still drain
+in time once arrivals stop; tasks still waiting for a device when the
+arrival window ends are therefore counted as failures (the backlog an
+endless stream of demand would never work off).
+
+Run with:
+    python mega_simulation/dispatch_sim.py --devices 10000000 --tps 200000
+"""
+import argparse
+import heapq
+import math
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.data import MANUFACTURERS
+
+# Event kinds (heap entries are ``(time, kind, task, device)``)
+DONE: int = 0
+DROP: int = 1
+
+
+@dataclass
+class DispatchConfig:
+    """Inputs of one network load scenario."""
+    name: str
+    name_ar: str
+    total_devices: int
+    offered_tps: float              # Task arrival rate (demand)
+    online_pct: float = 30.0        # % of devices idle, charging and reachable
+    redundancy: int = 3             # Replicas sent per task
+    mean_session_s: float = 15.0    # Mean time a device stays reachable
+    rtt_ms: float = 80.0            # Dispatch + result round trip
+    task_tera_ops: float = 1.0      # Work per task (tera-operations)
+    tops_efficiency: float = 0.30   # Sustained share of peak TOPS on a phone
+    faulty_pct: float = 0.5         # % of replicas returning a wrong result
+    detect_ms: float = 250.0        # Heartbeat delay before a dropout is noticed
+    timeout_ms: float = 5000.0      # Task deadline
+    max_retries: int = 3            # Extra replicas allowed per task
+
+    @property
+    def quorum(self) -> int:
+        """Matching results needed to accept a task (simple majority)."""
+        return self.redundancy // 2 + 1
+
+
+@dataclass
+class DispatchResult:
+    """Measured network behaviour for one scenario."""
+    config: DispatchConfig
+    tasks: int                  # Tasks simulated (one shard)
+    shards: int
+    devices_per_shard: int      # Online devices in the simulated shard
+    throughput_tps: float       # Steady-state verified tasks per second, all shards
+    capacity_tps: float         # The same under saturation: what the fleet can serve
+    success_rate: float         # % of tasks verified before the deadline (backlog counts as failed)
+    backlog_pct: float          # % of tasks still waiting for a device when arrivals end
+    dropout_pct: float          # % of dispatched replicas lost mid-task
+    replicas_per_task: float
+    avg_latency_ms: float
+    p50_latency_ms: float
+    p95_latency_ms: float
+    p99_latency_ms: float
+    events: int
+    wall_s: float
+
+    @property
+    def utilization_pct(self) -> float:
+        """Offered load as a share of capacity (over 100 = saturated)."""
+        return 100.0 * self.config.offered_tps / self.capacity_tps if self.capacity_tps else math.inf
+
+    @property
+    def overloaded(self) -> bool:
+        """Demand exceeds what the fleet can serve."""
+        return self.config.offered_tps > self.capacity_tps
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DEVICE STATE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def tops_classes() -> Tuple[np.ndarray, np.ndarray]:
+    """Peak TOPS per (manufacturer, tier) and its share of the global fleet."""
+    tops: List[float] = []
+    weights: List[float] = []
+    for m in MANUFACTURERS.values():
+        tops += [m.flagship_tops, m.midrange_tops]
+        weights += [m.active_devices * m.flagship_pct, m.active_devices * (1 - m.flagship_pct)]
+    w = np.asarray(weights, dtype=float)
+    return np.asarray(tops, dtype=np.float32), w / w.sum()
+
+
+class _Draws:
+    """Random numbers drawn in blocks and handed out one at a time."""
+
+    def __init__(self, draw: Callable[[int], np.ndarray], block: int = 65_536) -> None:
+        self._draw = draw
+        self._block = block
+        self._buf: List[float] = []
+        self._i = 0
+
+    def __call__(self) -> float:
+        if self._i == len(self._buf):
+            self._buf = self._draw(self._block).tolist()
+            self._i = 0
+        value = self._buf[self._i]
+        self._i += 1
+        return value
+
+
+class DeviceFleet:
+    """Online devices of one shard, stored as compact arrays.
+
+    Devices are independent and identically drawn, so never-used devices are
+    handed out in index order; used ones return to a FIFO idle queue. A
+    device whose session ends is replaced by a newly-available one (the
+    online population stays stationary).
+    """
+
+    def __init__(self, size: int, mean_session_s: float, rng: np.random.Generator) -> None:
+        tops, weights = tops_classes()
+        self.size = size
+        self.tops_class = rng.choice(len(tops), size=size, p=weights).astype(np.uint8)
+        # Residual session of an exponential session is exponential
+        self.session_end = rng.exponential(mean_session_s, size).astype(np.float32)
+        self._tops = tops.tolist()
+        self._session = _Draws(lambda n: rng.exponential(mean_session_s, n))
+        self._idle: deque = deque()
+        self._fresh = 0
+
+    def tops(self, device: int) -> float:
+        return self._tops[self.tops_class[device]]
+
+    def rejoin(self, device: int, now: float) -> None:
+        """Start a new session for a device slot."""
+        self.session_end[device] = now + self._session()
+
+    def acquire(self, now: float) -> int:
+        """An idle online device, or -1 when the shard is fully busy."""
+        if self._idle:
+            device = self._idle.popleft()
+        elif self._fresh < self.size:
+            device = self._fresh
+            self._fresh += 1
+        else:
+            return -1
+        if self.session_end[device] <= now:
+            self.rejoin(device, now)
+        return device
+
+    def release(self, device: int) -> None:
+        self._idle.append(device)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SIMULATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def shard_plan(config: DispatchConfig, window_s: float, max_tasks: int) -> Tuple[int, int, float]:
+    """``(shards, online devices per shard, shard arrival rate)``."""
+    shards = max(1, math.ceil(config.offered_tps * window_s / max_tasks))
+    online = config.total_devices * config.online_pct / 100.0
+    return shards, max(1, int(online / shards)), config.offered_tps / shards
+
+
+def capacity_plan(config: DispatchConfig, window_s: float, max_tasks: int) -> Tuple[int, int, float]:
+    """``shard_plan`` for a saturation run.
+
+    The arrival rate is the fleet's upper bound: every online device
+    returning one replica per round trip. No fleet serves that, so the
+    shard's queue never empties and its completions measure capacity.
+    """
+    online = config.total_devices * config.online_pct / 100.0
+    bound = online / (config.rtt_ms / 1000.0 * config.redundancy)
+    shards = max(1, math.ceil(bound * window_s / max_tasks))
+    return shards, max(1, int(online / shards)), bound / shards
+
+
+@dataclass
+class _ShardRun:
+    """Raw outcome of one simulated shard."""
+    tasks: int
+    completed: np.ndarray       # Verification time of each verified task
+    latency: np.ndarray         # Its latency (s)
+    backlog: int                # Tasks still waiting for a device at the end of the window
+    dispatched: int
+    dropped: int
+    events: int
+
+
+def _simulate_shard(
+    config: DispatchConfig,
+    devices: int,
+    rate: float,
+    window_s: float,
+    rng: np.random.Generator,
+    deadline: bool = True,
+) -> _ShardRun:
+    """Event loop for one shard; ``deadline=False`` counts late verifications too.
+
+    Tasks with a replica still queued for a device at ``window_s`` are the
+    backlog: they are not counted as verified even if they finish later.
+    """
+    fleet = DeviceFleet(devices, config.mean_session_s, rng)
+
+    n = int(rng.poisson(rate * window_s))
+    arrivals = np.sort(rng.uniform(0.0, window_s, n)).tolist()
+    jitter = _Draws(lambda k: rng.lognormal(0.0, 0.3, k))
+    coin = _Draws(lambda k: rng.random(k))
+
+    rtt = config.rtt_ms / 1000.0
+    detect = config.detect_ms / 1000.0
+    timeout = config.timeout_ms / 1000.0 if deadline else math.inf
+    work = config.task_tera_ops / config.tops_efficiency
+    faulty = config.faulty_pct / 100.0
+    quorum = config.quorum
+    budget = config.redundancy + config.max_retries
+
+    good = [0] * n
+    outstanding = [0] * n
+    queued = [0] * n
+    sent = [0] * n
+    resolved = [False] * n
+    latency: List[float] = []
+    completed: List[float] = []
+    waiting: deque = deque()
+    heap: List[tuple] = []
+    backlog: Optional[set] = None
+    stats = {"dispatched": 0, "dropped": 0, "events": 0}
+
+    def start(task: int, device: int, now: float) -> None:
+        stats["dispatched"] += 1
+        outstanding[task] += 1
+        finish = now + rtt + work / fleet.tops(device) * jitter()
+        end = float(fleet.session_end[device])
+        if end < finish:
+            heapq.heappush(heap, (end + detect, DROP, task, device))
+        else:
+            heapq.heappush(heap, (finish, DONE, task, device))
+
+    def request(task: int, count: int, now: float) -> None:
+        for _ in range(count):
+            sent[task] += 1
+            device = fleet.acquire(now)
+            if device < 0:
+                queued[task] += 1
+                waiting.append(task)
+            else:
+                start(task, device, now)
+
+    def top_up(task: int, now: float) -> None:
+        """Send replacements while quorum is still reachable, else fail the task."""
+        need = quorum - good[task] - outstanding[task] - queued[task]
+        if need <= 0:
+            return
+        if sent[task] + need > budget:
+            resolved[task] = True  # quorum unreachable within the retry budget
+            return
+        request(task, need, now)
+
+    def free(device: int, now: float) -> None:
+        while waiting:
+            task = waiting.popleft()
+            queued[task] -= 1
+            if not resolved[task]:
+                start(task, device, now)
+                return
+        fleet.release(device)
+
+    next_arrival = 0
+    while next_arrival < n or heap:
+        if next_arrival < n and (not heap or arrivals[next_arrival] <= heap[0][0]):
+            now = arrivals[next_arrival]
+            request(next_arrival, config.redundancy, now)
+            next_arrival += 1
+            stats["events"] += 1
+            continue
+
+        if backlog is None and heap[0][0] >= window_s:
+            backlog = {t for t in waiting if not resolved[t]}
+        now, kind, task, device = heapq.heappop(heap)
+        stats["events"] += 1
+        outstanding[task] -= 1
+        if kind == DROP:
+            stats["dropped"] += 1
+            fleet.rejoin(device, now)
+        free(device, now)
+        if resolved[task]:
+            continue
+        if kind == DONE and coin() >= faulty:
+            good[task] += 1
+            if good[task] >= quorum:
+                resolved[task] = True
+                elapsed = now - arrivals[task]
+                if elapsed <= timeout and not (backlog and task in backlog):
+                    latency.append(elapsed)
+                    completed.append(now)
+                continue
+        top_up(task, now)
+
+    return _ShardRun(n, np.asarray(completed), np.asarray(latency), len(backlog or ()),
+                     stats["dispatched"], stats["dropped"], stats["events"])
+
+
+def _steady_tps(run: _ShardRun, window_s: float, shards: int) -> float:
+    """Verified tasks per second in the second half of the window, all shards."""
+    steady = np.count_nonzero((run.completed >= window_s / 2) & (run.completed < window_s))
+    return steady / (window_s / 2) * shards
+
+
+def simulate_dispatch(
+    config: DispatchConfig,
+    window_s: float = 2.0,
+    max_tasks: int = 20_000,
+    seed: int = 0,
+) -> DispatchResult:
+    """Run the discrete-event simulation for one scenario.
+
+    Two runs per scenario: one at the offered load (throughput, latency,
+    dropout, success) and one saturated (capacity). The offered run's
+    shard has the same devices-to-load ratio as the whole fleet, so when
+    demand exceeds capacity its queue grows, the measured throughput
+    falls below ``offered_tps`` and the backlog left at the end of the
+    window counts against the success rate.
+
+    Args:
+        config: Scenario inputs.
+        window_s: Length of the arrival window (seconds of simulated demand).
+        max_tasks: Task budget per shard; larger loads add shards.
+        seed: Random seed.
+
+    Returns:
+        Measured throughput and capacity, latency percentiles, dropout and success.
+    """
+    wall = time.time()
+    rng = np.random.default_rng(seed)
+    shards, devices, rate = shard_plan(config, window_s, max_tasks)
+    run = _simulate_shard(config, devices, rate, window_s, rng)
+
+    cap_shards, cap_devices, cap_rate = capacity_plan(config, window_s, max_tasks)
+    saturated = _simulate_shard(config, cap_devices, cap_rate, window_s, rng, deadline=False)
+
+    n = run.tasks
+    lat_ms = run.latency * 1000.0
+    pct = np.percentile(lat_ms, [50, 95, 99]) if lat_ms.size else np.full(3, np.nan)
+    return DispatchResult(
+        config=config,
+        tasks=n,
+        shards=shards,
+        devices_per_shard=devices,
+        throughput_tps=_steady_tps(run, window_s, shards),
+        capacity_tps=_steady_tps(saturated, window_s, cap_shards),
+        success_rate=100.0 * run.latency.size / n if n else 0.0,
+        backlog_pct=100.0 * run.backlog / n if n else 0.0,
+        dropout_pct=100.0 * run.dropped / run.dispatched if run.dispatched else 0.0,
+        replicas_per_task=run.dispatched / n if n else 0.0,
+        avg_latency_ms=float(lat_ms.mean()) if lat_ms.size else float("nan"),
+        p50_latency_ms=float(pct[0]),
+        p95_latency_ms=float(pct[1]),
+        p99_latency_ms=float(pct[2]),
+        events=run.events + saturated.events,
+        wall_s=time.time() - wall,
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    defaults = DispatchConfig("", "", 0, 0.0)
+    parser = argparse.ArgumentParser(description="Discrete-event simulation of NHP task dispatch.")
+    parser.add_argument("--devices", type=int, default=10_000_000, help="total devices")
+    parser.add_argument("--tps", type=float, default=200_000, help="offered load (tasks/s)")
+    parser.add_argument("--online-pct", type=float, default=defaults.online_pct)
+    parser.add_argument("--redundancy", type=int, default=defaults.redundancy)
+    parser.add_argument("--session-s", type=float, default=defaults.mean_session_s)
+    parser.add_argument("--rtt-ms", type=float, default=defaults.rtt_ms)
+    parser.add_argument("--faulty-pct", type=float, default=defaults.faulty_pct)
+    parser.add_argument("--window-s", type=float, default=2.0)
+    parser.add_argument("--max-tasks", type=int, default=1_000_000, help="task budget per shard")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Simulate one load scenario and print the measured figures."""
+    args = parse_args(argv)
+    config = DispatchConfig(
+        "CLI", "", args.devices, args.tps, online_pct=args.online_pct, redundancy=args.redundancy,
+        mean_session_s=args.session_s, rtt_ms=args.rtt_ms, faulty_pct=args.faulty_pct,
+    )
+    r = simulate_dispatch(config, args.window_s, args.max_tasks, args.seed)
+    print("=" * 60)
+    print("  NHP DISPATCH SIMULATION — محاكاة توزيع المهام")
+    print("=" * 60)
+    print(f"  Devices:          {config.total_devices:,} ({r.shards} shard(s) × {r.devices_per_shard:,} online)")
+    print(f"  Tasks simulated:  {r.tasks:,} ({r.events:,} events)")
+    print(f"  Throughput:       {r.throughput_tps:,.0f} tasks/s (offered {config.offered_tps:,.0f})")
+    print(f"  Capacity:         {r.capacity_tps:,.0f} tasks/s ({r.utilization_pct:.0f}% utilized"
+          f"{', OVERLOADED' if r.overloaded else ''})")
+    print(f"  Success rate:     {r.success_rate:.2f}% ({r.backlog_pct:.2f}% left in the backlog)")
+    print(f"  Dropout:          {r.dropout_pct:.2f}% of replicas")
+    print(f"  Replicas / task:  {r.replicas_per_task:.2f}")
+    print(f"  Latency (ms):     avg {r.avg_latency_ms:.0f} | p50 {r.p50_latency_ms:.0f} | "
+          f"p95 {r.p95_latency_ms:.0f} | p99 {r.p99_latency_ms:.0f}")
+    print(f"  Wall time:        {r.wall_s:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+NHP Mega Simulation — Columnar Export
+Typed Parquet datasets in place of the wide, sparse union-of-keys CSV
+(``report.save_csv_export``).
+
+Each category becomes its own dataset with its own schema, partitioned
+Hive-style as ``<root>/category=<c>/variant=<v>/<prefix>-0.parquet``.
+String columns are dictionary-encoded. List columns such as
+``nhp_advantages`` keep their ``list<string>`` type instead of being
+stringified. Rows go straight from NumPy columns into Arrow record batches:
+``ParquetDatasetWriter.write`` takes column blocks and appends row groups
+to one open writer per partition. Monte Carlo draws or sweep chunks can
+therefore be streamed without ever building per-row dicts. ``load_export``
+reads a category back into ``CategoryResults`` in its original row order.
+
+pyarrow is optional. It is imported lazily, and ``save_export(fmt="auto")``
+falls back to the CSV when it is not installed.
+"""
+import importlib.util
+import os
+import shutil
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from mega_simulation.results import CategoryResults, ResultStore
+
+DATASET_DIR: str = "mega_scenarios"
+PARTITION_COLUMN: str = "variant"       # Second partition level, below category
+ROW_COLUMN: str = "_row"                # Original row order within a category
+DEFAULT_BATCH_ROWS: int = 65_536
+EXPORT_FORMATS: Tuple[str, ...] = ("auto", "parquet", "csv")
+
+
+def _require_pyarrow() -> Tuple[Any, Any, Any]:
+    """Import pyarrow lazily with an actionable error."""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+    return pa, ds, pq
+
+
+def has_pyarrow() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _partition_dir(root: str, category: str, variant: Optional[str] = None) -> str:
+    path = os.path.join(root, f"category={quote(str(category), safe='')}")
+    if variant is not None:
+        path = os.path.join(path, f"{PARTITION_COLUMN}={quote(str(variant), safe='')}")
+    return path
+
+
+def clear_category(root: str, category: str) -> None:
+    """Remove one category's dataset (before rewriting it)."""
+    shutil.rmtree(_partition_dir(root, category), ignore_errors=True)
+
+
+def arrow_array(values: Any, length: int) -> Any:
+    """Typed Arrow array for a NumPy column (or a scalar repeated ``length`` times).
+
+    Strings are dictionary-encoded. Object columns holding lists become
+    Arrow list arrays; anything else falls back to dictionary-encoded text.
+    """
+    pa, _, _ = _require_pyarrow()
+    if isinstance(values, str):
+        return pa.DictionaryArray.from_arrays(pa.array(np.zeros(length, dtype=np.int32)), pa.array([values]))
+    col = np.asarray(values)
+    if col.ndim == 0:
+        col = np.broadcast_to(col, (length,))
+    if col.dtype.kind in "biuf":
+        return pa.array(np.ascontiguousarray(col))
+    if col.dtype.kind in "US":
+        return pa.array(col.astype(str).tolist(), type=pa.string()).dictionary_encode()
+    items = col.tolist()
+    try:
+        return pa.array(items)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([str(v) for v in items], type=pa.string()).dictionary_encode()
+
+
+class ParquetDatasetWriter:
+    """Streams column blocks into a category/variant-partitioned Parquet dataset.
+
+    One ``ParquetWriter`` stays open per partition. Every ``write`` call
+    appends a row group, with later blocks cast to the partition's first
+    schema. ``prefix`` keeps file names distinct when several processes
+    write into the same partitions, and ``row_offset`` starts each
+    category's ``_row`` numbering there, so such writers can number
+    disjoint ranges of one category.
+    """
+
+    def __init__(self, root: str, prefix: str = "part", compression: str = "zstd", row_offset: int = 0) -> None:
+        self._pa, _, self._pq = _require_pyarrow()
+        self.root = root
+        self.prefix = prefix
+        self.compression = compression
+        self.row_offset = row_offset
+        self._writers: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._rows: Dict[str, int] = {}
+        self.paths: List[str] = []
+
+    def __enter__(self) -> "ParquetDatasetWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _writer(self, category: str, variant: Optional[str], schema: Any) -> Any:
+        key = (category, variant)
+        if key not in self._writers:
+            directory = _partition_dir(self.root, category, variant)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{self.prefix}-0.parquet")
+            self._writers[key] = self._pq.ParquetWriter(path, schema, compression=self.compression)
+            self.paths.append(path)
+        return self._writers[key]
+
+    def _append(self, category: str, variant: Optional[str], arrays: Dict[str, Any]) -> None:
+        table = self._pa.table(arrays)
+        writer = self._writer(category, variant, table.schema)
+        if table.schema != writer.schema:
+            table = table.cast(writer.schema)
+        writer.write_table(table)
+
+    def write(self, category: str, columns: Mapping[str, Any], variant: Optional[str] = None) -> int:
+        """Append one block of rows.
+
+        Args:
+            category: Category label (first partition level). A
+                ``category`` column, if any, is kept as data.
+            columns: Column name -> NumPy array (all the same length) or a
+                scalar string that is constant over the block.
+            variant: Partition value for the whole block. By default rows
+                are split by their own ``variant`` column, if there is one.
+
+        Returns:
+            Rows written.
+        """
+        arrays = dict(columns)
+        lengths = {len(v) for v in arrays.values() if not isinstance(v, str)}
+        if len(lengths) != 1:
+            raise ValueError(f"Category {category}: block columns have lengths {sorted(lengths)}")
+        n = lengths.pop()
+        offset = self._rows.get(category, self.row_offset)
+        self._rows[category] = offset + n
+        arrays = {ROW_COLUMN: np.arange(offset, offset + n, dtype=np.int64), **arrays}
+
+        split = arrays.pop(PARTITION_COLUMN, None)
+        if variant is not None or split is None or isinstance(split, str):
+            part = variant if variant is not None else split
+            self._append(category, part, {k: arrow_array(v, n) for k, v in arrays.items()})
+            return n
+        values, inverse = np.unique(np.asarray(split).astype(str), return_inverse=True)
+        for i, value in enumerate(values):
+            rows = np.flatnonzero(inverse == i)
+            self._append(category, str(value), {
+                k: arrow_array(v if isinstance(v, str) else np.asarray(v)[rows], rows.size)
+                for k, v in arrays.items()})
+        return n
+
+    def write_results(self, results: CategoryResults, batch_rows: int = DEFAULT_BATCH_ROWS) -> int:
+        """Write a whole category in ``batch_rows`` slices of its columns."""
+        columns = results.columns
+        for start in range(0, len(results), batch_rows):
+            self.write(results.category, {k: v[start:start + batch_rows] for k, v in columns.items()})
+        return len(results)
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+
+def save_parquet_export(
+    all_results: ResultStore,
+    output_dir: str = "output",
+    dataset: str = DATASET_DIR,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> str:
+    """Export every category as a typed, partitioned Parquet dataset.
+
+    Args:
+        all_results: Columnar results per category.
+        output_dir: Output directory.
+        dataset: Dataset directory name inside ``output_dir``.
+        batch_rows: Rows per record batch (row group).
+
+    Returns:
+        Path to the dataset root.
+    """
+    root = os.path.join(output_dir, dataset)
+    with ParquetDatasetWriter(root) as writer:
+        for cat, results in all_results.items():
+            clear_category(root, cat)
+            writer.write_results(results, batch_rows)
+    return root
+
+
+def save_export(all_results: ResultStore, output_dir: str = "output", fmt: str = "auto") -> str:
+    """Write the Phase 2 data export as Parquet or CSV.
+
+    ``auto`` picks Parquet when pyarrow is installed and the CSV otherwise.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose from {', '.join(EXPORT_FORMATS)}")
+    if fmt == "csv" or (fmt == "auto" and not has_pyarrow()):
+        from mega_simulation.report import save_csv_export
+        return save_csv_export(all_results, output_dir)
+    return save_parquet_export(all_results, output_dir)
+
+
+def export_path(output_dir: str = "output", fmt: str = "auto") -> str:
+    """Where ``save_export`` writes for this format."""
+    if fmt == "csv" or (fmt == "auto" and not has_pyarrow()):
+        return os.path.join(output_dir, "mega_scenarios_all.csv")
+    return os.path.join(output_dir, DATASET_DIR)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LOADING
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _to_numpy(column: Any) -> np.ndarray:
+    pa, _, _ = _require_pyarrow()
+    if pa.types.is_dictionary(column.type):
+        # Decode through the (small) dictionary instead of per-row Python strings.
+        chunks = column.chunks if hasattr(column, "chunks") else [column]
+        parts = [np.array(c.dictionary.to_pylist(), dtype=str)[c.indices.to_numpy(zero_copy_only=False)]
+                 for c in chunks]
+        return np.concatenate(parts) if parts else np.array([], dtype=str)
+    column = column.combine_chunks() if hasattr(column, "combine_chunks") else column
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        return np.array(column.to_pylist(), dtype=str)
+    if pa.types.is_list(column.type) or pa.types.is_large_list(column.type):
+        out = np.empty(len(column), dtype=object)
+        out[:] = column.to_pylist()
+        return out
+    return column.to_numpy(zero_copy_only=False)
+
+
+def load_export(
+    root: str,
+    category: str,
+    columns: Optional[Sequence[str]] = None,
+    filter: Any = None,
+) -> CategoryResults:
+    """Read one category of an exported dataset back into ``CategoryResults``.
+
+    Args:
+        root: Dataset root (``save_parquet_export``'s return value).
+        category: Category label.
+        columns: Columns to read (default: all).
+        filter: Optional ``pyarrow.dataset`` expression, e.g.
+            ``pyarrow.dataset.field("variant") == "Moderate"``.
+
+    Returns:
+        The category in its original row order.
+    """
+    _, ds, _ = _require_pyarrow()
+    dataset = ds.dataset(_partition_dir(root, category), format="parquet", partitioning="hive")
+    wanted = None if columns is None else [ROW_COLUMN, *[c for c in columns if c != ROW_COLUMN]]
+    table = dataset.to_table(columns=wanted, filter=filter).sort_by(ROW_COLUMN)
+    out = {name: _to_numpy(table.column(name)) for name in table.column_names if name != ROW_COLUMN}
+    if PARTITION_COLUMN in out and out[PARTITION_COLUMN].dtype.kind in "US":
+        out[PARTITION_COLUMN] = np.array([unquote(v) for v in out[PARTITION_COLUMN]], dtype=str)
+    return CategoryResults(category, out)
+
+
+def load_all_exports(root: str) -> ResultStore:
+    """Every category of an exported dataset."""
+    prefix = "category="
+    categories = sorted(unquote(d[len(prefix):]) for d in os.listdir(root) if d.startswith(prefix))
+    return ResultStore({cat: load_export(root, cat) for cat in categories})
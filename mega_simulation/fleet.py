@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Fleet Composition Engine
+Builds each manufacturer's installed base from the per-model data in
+``company_profiles.COMPANY_PROFILES`` instead of the two-tier
+flagship/midrange average that ``engine.compute_fleet_power`` uses.
+
+Every ``DeviceModel`` of every company becomes one row of a flat table
+(company index, TOPS, RAM, release year, units sold). Units still in use
+follow a geometric attrition curve by age. Devices the profiles do not list
+(older or unlisted models) fill the gap up to
+``total_active_devices_millions`` as a per-company legacy row. Fleet TOPS,
+H100 equivalents and devices eligible for each ``TaskType`` come out of one
+vectorized pass (``np.bincount`` over company × task cells) for all
+companies at once.
+
+Run with:
+    python mega_simulation/fleet.py --year 2026 --attrition 0.25 --uptime 0.25
+"""
+import argparse
+import csv
+import os
+import sys
+from dataclasses import dataclass
+from typing import List, Mapping, Optional
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.company_profiles import COMPANY_PROFILES, CompanyProfile
+from mega_simulation.data import H100_TOPS, MANUFACTURERS, TASK_TYPES, TaskType
+from mega_simulation.results import CategoryResults
+
+FLEET_YEAR: int = 2026
+ANNUAL_ATTRITION: float = 0.25      # Share of a model's remaining units retired each year
+LEGACY_TOPS_SCALE: float = 0.5      # Legacy TOPS relative to the weakest listed model
+LEGACY_AGE_YEARS: int = 2           # Legacy release year before the oldest listed model
+
+TIER_FLAGSHIP, TIER_MIDRANGE, TIER_LEGACY = 0, 1, 2
+
+
+@dataclass
+class ModelTable:
+    """Flat per-model installed base across all companies (one row per model)."""
+    companies: List[str]
+    fleet_year: int
+    name: np.ndarray
+    company: np.ndarray             # Index into ``companies``
+    tier: np.ndarray                # TIER_FLAGSHIP / TIER_MIDRANGE / TIER_LEGACY
+    tops: np.ndarray
+    ram_gb: np.ndarray
+    year: np.ndarray
+    units_sold: np.ndarray          # Devices sold
+    installed: np.ndarray           # Devices still in use in the fleet year
+
+    def __len__(self) -> int:
+        return self.name.size
+
+
+def build_model_table(
+    profiles: Mapping[str, CompanyProfile] = COMPANY_PROFILES,
+    year: int = FLEET_YEAR,
+    attrition: float = ANNUAL_ATTRITION,
+) -> ModelTable:
+    """Join every company's device models into one installed-base table.
+
+    Args:
+        profiles: Company profiles keyed by manufacturer key.
+        year: Fleet year; a model of release year ``y`` keeps
+            ``(1 - attrition) ** (year - y)`` of its units, and a model
+            released after ``year`` has none installed.
+        attrition: Annual retirement rate.
+
+    Returns:
+        ModelTable including one legacy row per company that tops the
+        listed models up to ``total_active_devices_millions``. A company
+        that lists no models has no rows, so it has no installed base.
+    """
+    if not 0.0 <= attrition < 1.0:
+        raise ValueError(f"attrition must be in [0, 1), got {attrition}")
+    companies = list(profiles)
+    rows = []
+    for c, profile in enumerate(profiles.values()):
+        for tier, models in ((TIER_FLAGSHIP, profile.flagship_models), (TIER_MIDRANGE, profile.midrange_models)):
+            rows.extend((m.name, c, tier, m.tops, m.ram_gb, m.year, m.units_sold_millions * 1e6) for m in models)
+    name, company, tier, tops, ram, release, sold = (
+        np.array(col, dtype=dtype) for col, dtype in
+        zip(list(zip(*rows)) or [()] * 7, (str, np.int64, np.int64, float, np.int64, np.int64, float)))
+    released = release <= year
+    installed = np.where(released, sold * (1.0 - attrition) ** np.maximum(year - release, 0), 0.0)
+
+    # Legacy rows: whatever the listed models do not cover, capped so the
+    # listed units never exceed the company's active base.
+    active = np.array([p.total_active_devices_millions * 1e6 for p in profiles.values()])
+    listed = np.bincount(company, weights=installed, minlength=len(companies))
+    scale = np.minimum(1.0, np.divide(active, listed, out=np.ones_like(active), where=listed > 0))
+    installed = installed * scale[company]
+    legacy = np.maximum(active - listed * scale, 0.0)
+
+    # Legacy specs follow the weakest and oldest released model (every
+    # listed model for a company with none released yet). Companies
+    # without listed models get no legacy row: there are no specs to copy.
+    c_idx = np.flatnonzero(np.bincount(company, minlength=len(companies)) > 0)
+    has_released = np.bincount(company, weights=released, minlength=len(companies)) > 0
+    basis = released | ~has_released[company]
+    weakest = np.full(len(companies), np.inf)
+    np.minimum.at(weakest, company[basis], tops[basis])
+    min_ram = np.full(len(companies), np.inf)
+    np.minimum.at(min_ram, company[basis], ram[basis])
+    oldest = np.full(len(companies), year)
+    np.minimum.at(oldest, company[basis], release[basis])
+
+    return ModelTable(
+        companies=companies,
+        fleet_year=year,
+        name=np.concatenate([name, [f"{profiles[companies[c]].name} (legacy)" for c in c_idx]]),
+        company=np.concatenate([company, c_idx]),
+        tier=np.concatenate([tier, np.full(c_idx.size, TIER_LEGACY)]),
+        tops=np.concatenate([tops, weakest[c_idx] * LEGACY_TOPS_SCALE]),
+        ram_gb=np.concatenate([ram, min_ram[c_idx]]).astype(np.int64),
+        year=np.concatenate([release, oldest[c_idx] - LEGACY_AGE_YEARS]),
+        units_sold=np.concatenate([sold, np.zeros(c_idx.size)]),
+        installed=np.concatenate([installed, legacy[c_idx]]),
+    )
+
+
+def compute_fleet_composition(
+    table: ModelTable,
+    uptime: float = 0.25,
+    tasks: Mapping[str, TaskType] = TASK_TYPES,
+    min_ram_gb: float = 0.0,
+) -> CategoryResults:
+    """Fleet power and per-task eligibility for every company in one pass.
+
+    Args:
+        table: Installed base from ``build_model_table``.
+        uptime: Fraction of devices active.
+        tasks: Task types; a device is eligible when its TOPS reaches
+            ``min_tops_required``.
+        min_ram_gb: Extra RAM floor applied to every task.
+
+    Returns:
+        CategoryResults("fleet") with one row per company; a company with
+        no active devices gets zero averages and shares.
+    """
+    n = len(table.companies)
+    active = table.installed * uptime
+    eligible = ((table.tops[None, :] >= np.array([t.min_tops_required for t in tasks.values()])[:, None])
+                & (table.ram_gb[None, :] >= min_ram_gb))
+    # One bincount over (task, company) cells gives every eligibility count.
+    cells = (np.arange(len(tasks))[:, None] * n + table.company[None, :]).ravel()
+    eligible_active = np.bincount(cells, weights=(eligible * active).ravel(),
+                                  minlength=len(tasks) * n).reshape(len(tasks), n)
+
+    def per_company(values: np.ndarray) -> np.ndarray:
+        return np.bincount(table.company, weights=values, minlength=n)
+
+    def per_device(total: np.ndarray, devices: np.ndarray) -> np.ndarray:
+        return np.divide(total, devices, out=np.zeros(n), where=devices > 0)
+
+    installed = per_company(table.installed)
+    active_total = per_company(active)
+    total_tops = per_company(active * table.tops)
+    columns = {
+        "manufacturer": np.array(table.companies),
+        "installed_devices": installed,
+        "active_devices": active_total,
+        "legacy_pct": per_device(per_company(np.where(table.tier == TIER_LEGACY, table.installed, 0.0)),
+                                 installed) * 100,
+        "avg_tops": per_device(total_tops, active_total),
+        "avg_ram_gb": per_device(per_company(active * table.ram_gb), active_total),
+        "avg_age_years": np.where(active_total > 0,
+                                  table.fleet_year - per_device(per_company(active * table.year), active_total), 0.0),
+        "total_tops": total_tops,
+        "h100_equivalent": total_tops / H100_TOPS,
+    }
+    for key, row in zip(tasks, eligible_active):
+        columns[f"eligible_{key}"] = row
+    return CategoryResults("fleet", columns)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Per-model fleet composition for every manufacturer.")
+    parser.add_argument("--year", type=int, default=FLEET_YEAR)
+    parser.add_argument("--attrition", type=float, default=ANNUAL_ATTRITION, help="annual retirement rate")
+    parser.add_argument("--uptime", type=float, default=0.25, help="fraction of devices active")
+    parser.add_argument("--min-ram-gb", type=float, default=0.0)
+    parser.add_argument("--csv", default=None, help="write the per-company table to this CSV")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print fleet composition next to the two-tier engine estimate."""
+    from mega_simulation.engine import compute_fleet_power
+
+    args = parse_args(argv)
+    table = build_model_table(year=args.year, attrition=args.attrition)
+    fleet = compute_fleet_composition(table, args.uptime, min_ram_gb=args.min_ram_gb)
+
+    print("=" * 60)
+    print("  NHP FLEET COMPOSITION — تركيبة الأسطول")
+    print(f"  {args.year} | {len(table)} model rows | attrition {args.attrition:.0%}/yr | uptime {args.uptime:.0%}")
+    print("=" * 60)
+    print(f"  {'Company':<9} {'Active':>8} {'Legacy':>7} {'Avg TOPS':>9} {'H100 eq':>9} {'Two-tier':>9}")
+    for r in fleet:
+        mfg = MANUFACTURERS.get(r["manufacturer"])
+        two_tier = compute_fleet_power(mfg, args.uptime)["h100_equivalent"] if mfg else float("nan")
+        print(f"  {r['manufacturer']:<9} {r['active_devices'] / 1e6:>7.1f}M {r['legacy_pct']:>6.1f}% "
+              f"{r['avg_tops']:>9.1f} {r['h100_equivalent']:>9,.0f} {two_tier:>9,.0f}")
+    print("\n  Eligible active devices per task:")
+    for key, task in TASK_TYPES.items():
+        total = fleet.column(f"eligible_{key}").sum()
+        print(f"    {task.name:<28} ≥{task.min_tops_required:>4.0f} TOPS  {total / 1e6:>8.1f}M")
+    if args.csv:
+        os.makedirs(os.path.dirname(args.csv) or ".", exist_ok=True)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(fleet.schema))
+            writer.writeheader()
+            writer.writerows(fleet)
+        print(f"\n  ✅ CSV saved: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
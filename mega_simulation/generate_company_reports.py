@@ -4,18 +4,21 @@ NHP Phase 3 — Per-Company Deep Dive Report Generator
 Generates a dedicated markdown report for each manufacturer,
 covering technical, operational, financial, and strategic analysis.
 
-Run: python mega_simulation/generate_company_reports.py
+Run: python mega_simulation/generate_company_reports.py [--workers N] [--no-cache] [--no-charts]
+                                                        [--render-profile draft|web|print]
 """
+import argparse
 import sys
 import os
 import time
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from mega_simulation.company_profiles import COMPANY_PROFILES, CompanyProfile
-from mega_simulation.company_charts import generate_company_charts
+from mega_simulation.company_charts import company_chart_jobs
+from mega_simulation.render import add_profile_argument, asset_dir, render_charts, report_path, set_render_profile
 from mega_simulation.data import (
     MANUFACTURERS, CLOUD_PROVIDERS, REGIONS,
     VARIANT_NAMES, VARIANT_EMOJIS, UPTIME_VARIANTS,
@@ -439,29 +442,56 @@ def _get_company_risks(key: str, profile: CompanyProfile) -> List[Dict[str, str]
     return risks
 
 
-def main() -> None:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Generate the per-company reports.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="chart render processes (1 = serial, 0 = one per CPU core)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-render every chart even if its inputs are unchanged")
+    parser.add_argument("--no-charts", action="store_true",
+                        help="reports only: skip the charts (matplotlib is never imported)")
+    add_profile_argument(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Generate all per-company reports."""
+    args = parse_args(argv)
+    set_render_profile(args.render_profile)
     print("=" * 60)
     print("  NHP Phase 3 — Per-Company Deep Dive Reports")
     print("=" * 60)
     print()
 
     start = time.time()
-    out_dir = "output/company_reports"
+    out_dir = report_path("output/company_reports")
     os.makedirs(out_dir, exist_ok=True)
 
     total_scenarios = 0
 
+    # Render every company's charts on one pool, then slice per company
+    company_charts: Dict[str, List[str]] = {key: [] for key in COMPANY_PROFILES}
+    if not args.no_charts:
+        print("▶ Rendering company charts...")
+        jobs = {}
+        for key, profile in COMPANY_PROFILES.items():
+            chart_out = asset_dir(f"assets/company/{key}")
+            os.makedirs(chart_out, exist_ok=True)
+            jobs[key] = company_chart_jobs(key, profile, chart_out)
+        rendered = iter(render_charts([j for js in jobs.values() for j in js], args.workers,
+                                      cache=not args.no_cache))
+        company_charts = {key: [next(rendered) for _ in js] for key, js in jobs.items()}
+        print()
+
     for key, profile in COMPANY_PROFILES.items():
         print(f"▶ Generating report for {profile.name}...")
 
-        # Generate charts
-        chart_out = f"assets/company/{key}"
-        chart_paths = generate_company_charts(key, profile, chart_out)
+        chart_paths = company_charts[key]
         print(f"  📊 {len(chart_paths)} charts generated")
 
         # Generate report with chart directory reference
-        report = generate_company_report(key, profile)
+        report = generate_company_report(key, profile, os.path.relpath(asset_dir(f"assets/company/{key}"), out_dir))
 
         # Count approximate scenarios in this report
         # 4 variants × (computing + 7 clouds × savings + markets × income + environmental + growth + breakeven)
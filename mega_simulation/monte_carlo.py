@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Monte Carlo Uncertainty Engine
+Replaces the four hand-picked variants (Optimistic → Catastrophic) with
+draws from parameter distributions. Every category reuses its sweep
+declaration from ``scenarios.py``: the non-variant axes (manufacturer, cloud,
+region, ...) define the scenarios, and each variant-linked parameter
+(uptime, coverage, token price, overhead, ...) is sampled instead of taken
+from ``*_VARIANTS``. Regional electricity prices are scaled by a sampled
+``electricity_scale`` factor.
+
+Draws are evaluated in vectorized chunks through the batch engine and folded
+into streaming summaries (``sketch.py``), so 10^6–10^7 draws per scenario
+run in bounded memory and come back as percentiles.
+
+Run with:
+    python mega_simulation/monte_carlo.py --categories B,C --draws 1000000 \\
+        --set "uptime=triangular(0.03, 0.25, 0.40)" --workers 0
+"""
+import argparse
+import ast
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.data import (
+    VARIANT_NAMES, UPTIME_VARIANTS, COVERAGE_VARIANTS, TOKEN_PRICE_VARIANTS, OVERHEAD_VARIANTS,
+)
+from mega_simulation.export import ParquetDatasetWriter, clear_category, load_export, save_parquet_export
+from mega_simulation.results import CategoryResults, ResultStore
+from mega_simulation.scenarios import CATEGORY_SWEEPS
+from mega_simulation.sketch import DEFAULT_PERCENTILES, StreamingSummary, percentile_label
+from mega_simulation.sweep import Axis, Sweep, DEFAULT_CHUNK_SIZE, resolve_workers, take_rows
+from mega_simulation.vectorized import RecordArray
+
+MODERATE: int = VARIANT_NAMES.index("Moderate")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DISTRIBUTIONS
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class Fixed:
+    """Always ``value``."""
+    value: float
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return np.full(n, float(self.value))
+
+
+@dataclass
+class Uniform:
+    """Uniform on ``[low, high)``."""
+    low: float
+    high: float
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return rng.uniform(self.low, self.high, n)
+
+
+@dataclass
+class Triangular:
+    """Triangular with the given ``low``, ``mode`` and ``high``."""
+    low: float
+    mode: float
+    high: float
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return rng.triangular(self.low, self.mode, self.high, n)
+
+
+@dataclass
+class Normal:
+    """Normal, clipped to ``[low, high]``."""
+    mean: float
+    sd: float
+    low: float = -np.inf
+    high: float = np.inf
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return np.clip(rng.normal(self.mean, self.sd, n), self.low, self.high)
+
+
+@dataclass
+class LogNormal:
+    """Log-normal with the given median and log-space sigma."""
+    median: float
+    sigma: float
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return rng.lognormal(np.log(self.median), self.sigma, n)
+
+
+@dataclass
+class Beta:
+    """Beta(alpha, beta) rescaled to ``[low, high]``."""
+    alpha: float
+    beta: float
+    low: float = 0.0
+    high: float = 1.0
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return self.low + (self.high - self.low) * rng.beta(self.alpha, self.beta, n)
+
+
+@dataclass
+class Discrete:
+    """One of ``values`` with optional ``weights``."""
+    values: Tuple[float, ...]
+    weights: Optional[Tuple[float, ...]] = None
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        p = None
+        if self.weights is not None:
+            p = np.asarray(self.weights, dtype=float)
+            p = p / p.sum()
+        return rng.choice(np.asarray(self.values, dtype=float), size=n, p=p)
+
+
+Distribution = Any  # any object with sample(rng, n) -> ndarray
+
+DISTRIBUTIONS: Dict[str, type] = {
+    "fixed": Fixed, "uniform": Uniform, "triangular": Triangular, "normal": Normal,
+    "lognormal": LogNormal, "beta": Beta, "discrete": Discrete,
+}
+
+
+def parse_distribution(spec: str) -> Distribution:
+    """Parse e.g. ``'triangular(0.03, 0.25, 0.4)'`` or a bare number (Fixed)."""
+    spec = spec.strip()
+    try:
+        return Fixed(float(spec))
+    except ValueError:
+        pass
+    name, _, rest = spec.partition("(")
+    cls = DISTRIBUTIONS.get(name.strip().lower())
+    if cls is None or not rest.endswith(")"):
+        raise ValueError(f"Unknown distribution '{spec}' (expected one of {sorted(DISTRIBUTIONS)})")
+    args = ast.literal_eval(f"({rest[:-1]},)") if rest[:-1].strip() else ()
+    return cls(*args)
+
+
+def _variant_range(values: Sequence[float]) -> Triangular:
+    """Triangular spanning the variant extremes, peaking at Moderate."""
+    return Triangular(min(values), values[MODERATE], max(values))
+
+
+# Defaults for the headline uncertain inputs; any other variant-linked
+# parameter stays at its Moderate value unless a distribution is given.
+DEFAULT_DISTRIBUTIONS: Dict[str, Distribution] = {
+    "uptime": _variant_range(UPTIME_VARIANTS),
+    "coverage": _variant_range(COVERAGE_VARIANTS),
+    "token_price": _variant_range(TOKEN_PRICE_VARIANTS),
+    "overhead": _variant_range(OVERHEAD_VARIANTS),
+    "electricity_scale": Triangular(0.8, 1.0, 1.5),
+}
+
+# Sampled multipliers applied to a registry field of every record column
+RECORD_SCALES: Dict[str, str] = {
+    "electricity_scale": "electricity_cost_kwh",
+}
+
+# Headline metric per category for console output
+HEADLINE_METRICS: Dict[str, str] = {
+    "A": "h100_equivalent", "B": "annual_savings", "C": "monthly_net",
+    "D": "annual_savings", "E": "co2_saved_net", "F": "h100_equivalent",
+    "G": "feasibility_score", "H": "life_reduction_months", "I": "annual_platform_revenue",
+    "J": "platform_revenue_monthly", "K": "power_ratio", "L": "breakeven_months",
+    "M": "expected_loss",
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCENARIO EVALUATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _split_axes(sweep: Sweep) -> Tuple[List[Axis], Optional[Axis]]:
+    scenario_axes = [a for a in sweep.axes if a.name != "variant"]
+    variant = next((a for a in sweep.axes if a.name == "variant"), None)
+    return scenario_axes, variant
+
+
+def resolve_distributions(
+    category: str,
+    distributions: Optional[Dict[str, Distribution]] = None,
+) -> Dict[str, Distribution]:
+    """Distribution for every uncertain parameter of a category.
+
+    Variant-linked parameters use, in order: the caller's distribution,
+    ``DEFAULT_DISTRIBUTIONS``, or ``Fixed`` at the Moderate value.
+    ``electricity_scale`` applies when a scenario axis carries regions.
+    """
+    distributions = distributions or {}
+    sweep = CATEGORY_SWEEPS[category]()
+    scenario_axes, variant = _split_axes(sweep)
+    resolved: Dict[str, Distribution] = {}
+    for name, values in (variant.linked.items() if variant else []):
+        resolved[name] = distributions.get(name, DEFAULT_DISTRIBUTIONS.get(name, Fixed(values[MODERATE])))
+    for scale, field_name in RECORD_SCALES.items():
+        columns = [col for a in scenario_axes for col in a.columns().values()]
+        if any(isinstance(col, RecordArray) and hasattr(col, field_name) for col in columns):
+            resolved[scale] = distributions.get(scale, DEFAULT_DISTRIBUTIONS[scale])
+    return resolved
+
+
+def _scenario_count(category: str) -> int:
+    scenario_axes, _ = _split_axes(CATEGORY_SWEEPS[category]())
+    return int(np.prod([len(a) for a in scenario_axes], dtype=np.int64))
+
+
+def _indicator_summary(prior: int, chunk_size: int) -> StreamingSummary:
+    """0/1 summary for a string value first seen after ``prior`` draws (all 0 until now)."""
+    summary = StreamingSummary()
+    for done in range(0, prior, chunk_size):
+        summary.add(np.zeros(min(chunk_size, prior - done)))
+    return summary
+
+
+def _evaluate_scenario(task: Tuple[Any, ...]) -> Tuple[Dict[str, Any], Dict[str, StreamingSummary]]:
+    """Stream ``draws`` samples of one scenario into per-metric summaries.
+
+    Process-pool entry point (module-level so it pickles).
+    """
+    category, index, draws, dists, seed, chunk_size, metrics, draws_dir = task
+    sweep = CATEGORY_SWEEPS[category]()
+    scenario_axes, _ = _split_axes(sweep)
+    positions = np.unravel_index(index, tuple(len(a) for a in scenario_axes))
+
+    # Scenario inputs as length-1 columns; draws broadcast against them
+    base: Dict[str, Any] = dict(sweep.constants)
+    for axis, pos in zip(scenario_axes, positions):
+        for key, col in axis.columns().items():
+            base[key] = take_rows(col, np.array([pos]))
+
+    labels: Dict[str, Any] = {}
+    for axis in scenario_axes:
+        for key in axis.emit:
+            labels[key] = base[key][0].item() if hasattr(base[key][0], "item") else base[key][0]
+
+    summaries: Dict[str, StreamingSummary] = {}
+    levels: Dict[str, Dict[str, StreamingSummary]] = {}  # string output -> value -> indicator
+    writer = (ParquetDatasetWriter(draws_dir, prefix=f"scenario-{index}", row_offset=index * draws)
+              if draws_dir else None)
+    for c, start in enumerate(range(0, draws, chunk_size)):
+        n = min(chunk_size, draws - start)
+        rng = np.random.default_rng([seed, ord(category), index, c])
+        grid = dict(base)
+        for name, dist in dists.items():
+            grid[name] = dist.sample(rng, n)
+        for scale, field_name in RECORD_SCALES.items():
+            if scale in grid:
+                for key, value in base.items():
+                    if isinstance(value, RecordArray) and hasattr(value, field_name):
+                        grid[key] = value.replace(**{field_name: getattr(value, field_name) * grid[scale]})
+        if sweep.prepare is not None:
+            grid.update(sweep.prepare(grid))
+
+        columns = sweep.compute(
+            *[grid[name] for name in sweep.args],
+            **{kw: grid[name] for kw, name in sweep.kwargs.items()},
+        )
+        block: Dict[str, Any] = {}
+        strings: Dict[str, np.ndarray] = {}
+        for name, col in columns.items():
+            col = np.asarray(col)
+            if col.dtype.kind in "iuf":
+                if metrics is None or name in metrics:
+                    block[name] = np.broadcast_to(col, (n,))
+                    summaries.setdefault(name, StreamingSummary()).add(block[name])
+            elif col.dtype.kind in "US":
+                strings[name] = np.broadcast_to(col, (n,))
+                seen = levels.setdefault(name, {})
+                for value in np.unique(strings[name]).tolist():
+                    if value not in seen:
+                        seen[value] = _indicator_summary(start, chunk_size)
+                for value, summary in seen.items():
+                    summary.add(strings[name] == value)
+        if writer is not None:
+            inputs = {f"in_{name}": grid[name] for name in dists}
+            position = {"scenario": np.full(n, index, dtype=np.int64),
+                        "draw": np.arange(start, start + n, dtype=np.int64)}
+            writer.write(category, {**position, **{k: str(v) for k, v in labels.items()},
+                                    **inputs, **strings, **block})
+    if writer is not None:
+        writer.close()
+
+    # String outputs (e.g. M's severity) are a label when every draw agrees,
+    # otherwise one metric per value, "name=value", whose mean is the share
+    # of draws taking it
+    for name, seen in levels.items():
+        if len(seen) == 1:
+            labels.setdefault(name, next(iter(seen)))
+        elif metrics is None or name in metrics:
+            for value in sorted(seen):
+                summaries[f"{name}={value}"] = seen[value]
+    return labels, summaries
+
+
+def run_monte_carlo(
+    category: str,
+    draws: int = 1_000_000,
+    distributions: Optional[Dict[str, Distribution]] = None,
+    seed: int = 0,
+    metrics: Optional[Sequence[str]] = None,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+    draws_dir: Optional[str] = None,
+) -> CategoryResults:
+    """Monte Carlo percentiles for every scenario of one category.
+
+    Args:
+        category: Category letter (A–M).
+        draws: Samples per scenario.
+        distributions: Parameter name -> distribution (overrides defaults).
+        seed: Base seed; results are reproducible per (seed, scenario, chunk).
+        metrics: Output columns to summarize (default: every numeric column,
+            and every string column whose value varies between draws).
+        percentiles: Percentiles to report.
+        chunk_size: Draws evaluated per vectorized batch (memory bound).
+        workers: Scenarios evaluated in parallel; ``None``/0 uses all cores.
+        draws_dir: Also stream every raw draw (``scenario`` and ``draw``
+            indices, sampled inputs as ``in_*`` plus metrics) into a Parquet
+            dataset here (``export.py``), chunk by chunk from the workers;
+            needs pyarrow. Rows reload in (scenario, draw) order.
+
+    Returns:
+        Long-format results: one row per (scenario, metric) with draws,
+        mean, std, min, percentile columns and max. A string output that
+        varies between draws gives one ``name=value`` metric per value,
+        whose mean is the share of draws taking that value.
+    """
+    dists = resolve_distributions(category, distributions)
+    metric_set = set(metrics) if metrics is not None else None
+    if draws_dir:
+        clear_category(draws_dir, category)
+    tasks = [(category, i, draws, dists, seed, chunk_size, metric_set, draws_dir)
+             for i in range(_scenario_count(category))]
+
+    workers = min(resolve_workers(workers), len(tasks))
+    if workers <= 1:
+        outcomes = [_evaluate_scenario(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_evaluate_scenario, tasks))
+
+    rows: List[Dict[str, Any]] = []
+    for labels, summaries in outcomes:
+        for metric, summary in summaries.items():
+            rows.append({"category": category, **labels, "metric": metric,
+                         **summary.as_row(percentiles)})
+    return CategoryResults.from_records(category, rows)
+
+
+def verify_draws(draws_dir: str, category: str, draws: int) -> int:
+    """Check that a category's raw draws reload complete and in (scenario, draw) order.
+
+    Returns:
+        Rows checked.
+    """
+    loaded = load_export(draws_dir, category, columns=["scenario", "draw"])
+    scenarios = _scenario_count(category)
+    expected = (np.repeat(np.arange(scenarios), draws), np.tile(np.arange(draws), scenarios))
+    if not (np.array_equal(loaded.column("scenario"), expected[0])
+            and np.array_equal(loaded.column("draw"), expected[1])):
+        raise ValueError(f"Category {category}: raw draws in {draws_dir} do not reload in "
+                         f"(scenario, draw) order ({len(loaded):,} rows, expected {expected[0].size:,})")
+    return len(loaded)
+
+
+def run_all_monte_carlo(categories: Sequence[str], **kwargs: Any) -> ResultStore:
+    """Run ``run_monte_carlo`` for several categories."""
+    return ResultStore({cat: run_monte_carlo(cat, **kwargs) for cat in categories})
+
+
+def save_monte_carlo_csv(store: ResultStore, path: str) -> str:
+    """Write every category's percentile table to one CSV."""
+    keys: List[str] = []
+    for results in store.values():
+        keys.extend(k for k in results.schema if k not in keys)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=keys)
+        writer.writeheader()
+        for results in store.values():
+            writer.writerows(results)
+    return path
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Monte Carlo uncertainty run over the NHP categories.")
+    parser.add_argument("--categories", default=",".join(CATEGORY_SWEEPS),
+                        help="comma-separated category letters (default: all)")
+    parser.add_argument("--draws", type=int, default=1_000_000, help="samples per scenario")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=DIST",
+                        help="parameter distribution, e.g. 'coverage=uniform(0.05, 0.7)'")
+    parser.add_argument("--metrics", default=None, help="comma-separated output columns to summarize")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="process-pool size (1 = serial, 0 = one per CPU core)")
+    parser.add_argument("--csv", default=None, help="write the percentile table to this CSV")
+    parser.add_argument("--parquet", default=None,
+                        help="write the percentile table as a Parquet dataset under this directory")
+    parser.add_argument("--draws-parquet", default=None,
+                        help="stream every raw draw into a Parquet dataset under this directory")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the Monte Carlo engine and print headline percentiles."""
+    args = parse_args(argv)
+    distributions: Dict[str, Distribution] = {}
+    for item in args.set:
+        name, _, spec = item.partition("=")
+        distributions[name.strip()] = parse_distribution(spec)
+    categories = [c.strip().upper() for c in args.categories.split(",") if c.strip()]
+    metrics = [m.strip() for m in args.metrics.split(",")] if args.metrics else None
+
+    print("=" * 60)
+    print("  NHP MONTE CARLO — محاكاة مونت كارلو")
+    print(f"  {args.draws:,} draws per scenario | categories {', '.join(categories)}")
+    print("=" * 60)
+    start_time = time.time()
+
+    store = run_all_monte_carlo(
+        categories, draws=args.draws, distributions=distributions, seed=args.seed,
+        metrics=metrics, chunk_size=args.chunk_size, workers=args.workers,
+        draws_dir=args.draws_parquet,
+    )
+
+    p_lo, p_mid, p_hi = (percentile_label(p) for p in (5, 50, 95))
+    for cat, results in store.items():
+        headline = HEADLINE_METRICS.get(cat)
+        rows = results.where(metric=headline) if headline in results.unique("metric") else results
+        print(f"\n▶ Category {cat} — {headline or 'all metrics'} (P5 / P50 / P95)")
+        for r in rows:
+            label = " | ".join(str(v) for k, v in r.items()
+                               if k not in ("category", "metric") and isinstance(v, str))
+            print(f"  {label[:48]:48s} {r[p_lo]:>14,.2f} {r[p_mid]:>14,.2f} {r[p_hi]:>14,.2f}")
+
+    if args.csv:
+        print(f"\n  ✅ CSV saved: {save_monte_carlo_csv(store, args.csv)}")
+    if args.parquet:
+        root = save_parquet_export(store, args.parquet, dataset="monte_carlo")
+        print(f"  ✅ Parquet saved: {root}")
+    if args.draws_parquet:
+        rows = sum(verify_draws(args.draws_parquet, c, args.draws) for c in categories)
+        print(f"  ✅ Raw draws streamed to: {args.draws_parquet} ({rows:,} rows, order verified)")
+    total_draws = sum(args.draws * _scenario_count(c) for c in categories)
+    print(f"\n  {total_draws:,} draws | {time.time() - start_time:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,23 @@
 NHP Phase 6 — Network Performance, TEE Security & Legal Compliance
 Technical deep-dive proving NHP's reliability, security, and legal viability.
 
-Run: python mega_simulation/network_security_compliance.py
+Run: python mega_simulation/network_security_compliance.py [--render-profile draft|web|print]
 """
-import sys, os, time
+import argparse, sys, os, time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from typing import Dict, Any, List
 from dataclasses import dataclass
 from datetime import datetime
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
 import numpy as np
 
-CHART_DPI = 300
+from mega_simulation.dispatch_sim import DispatchConfig, simulate_dispatch
+from mega_simulation.render import (
+    ChartJob, add_profile_argument, asset_dir, pyplot, render_charts, report_path, save_figure,
+    set_render_profile,
+)
+
 
 # ═══════════════════════════════════════════════════════
 # TEE SECURITY ARCHITECTURE
@@ -117,23 +118,77 @@ class NetworkScenario:
     name: str
     name_ar: str
     total_devices: int
-    dropout_pct: float      # % of devices disconnecting mid-task
+    dropout_pct: float      # % of dispatched replicas lost mid-task
     avg_latency_ms: float   # Average task latency
     redundancy_factor: int  # Tasks sent to N devices
-    success_rate: float     # % of tasks completed successfully
-    throughput_tps: float   # Tasks per second
-
-NETWORK_SCENARIOS: List[NetworkScenario] = [
-    NetworkScenario("Low Load (100K devices)", "حمل منخفض (100K جهاز)", 100_000, 5, 200, 3, 99.5, 50_000),
-    NetworkScenario("Medium Load (1M devices)", "حمل متوسط (1M جهاز)", 1_000_000, 8, 350, 3, 99.2, 400_000),
-    NetworkScenario("High Load (10M devices)", "حمل عالي (10M جهاز)", 10_000_000, 10, 500, 3, 98.8, 3_000_000),
-    NetworkScenario("Massive (100M devices)", "ضخم (100M جهاز)", 100_000_000, 12, 800, 2, 98.0, 20_000_000),
-    NetworkScenario("Peak (Night, 50M active)", "ذروة (ليلاً، 50M نشط)", 50_000_000, 3, 150, 3, 99.7, 15_000_000),
-    NetworkScenario("Worst Case (High Dropout)", "أسوأ حالة (انقطاع عالي)", 5_000_000, 25, 1200, 5, 95.0, 500_000),
-    NetworkScenario("Regional (India Only)", "إقليمي (الهند فقط)", 20_000_000, 7, 300, 3, 99.0, 5_000_000),
-    NetworkScenario("Regional (EU Only)", "إقليمي (أوروبا فقط)", 15_000_000, 4, 100, 3, 99.5, 4_000_000),
+    success_rate: float     # % of tasks completed successfully (backlog counts as failed)
+    throughput_tps: float   # Verified tasks per second
+    p95_latency_ms: float   # 95th percentile task latency
+    p99_latency_ms: float   # 99th percentile task latency
+    offered_tps: float      # Task demand
+    capacity_tps: float     # Verified tasks per second under saturation
+    shards: int             # Coordinator shards (one is simulated)
+    devices_per_shard: int  # Online devices in the simulated shard
+    backlog_pct: float      # % of tasks still queued when the arrival window ends
+    overloaded: bool        # Offered load above capacity
+
+# Load scenarios simulated by dispatch_sim.py; the figures reported in
+# NetworkScenario are measured, not assumed. The offered loads are the
+# TPS targets of the original hand-written table; a scenario whose fleet
+# cannot serve its target reports throughput below it, a backlog and an
+# overload flag.
+NETWORK_LOADS: List[DispatchConfig] = [
+    DispatchConfig("Low Load (100K devices)", "حمل منخفض (100K جهاز)", 100_000, 50_000,
+                   mean_session_s=20, rtt_ms=60),
+    DispatchConfig("Medium Load (1M devices)", "حمل متوسط (1M جهاز)", 1_000_000, 400_000,
+                   mean_session_s=15, rtt_ms=80),
+    DispatchConfig("High Load (10M devices)", "حمل عالي (10M جهاز)", 10_000_000, 3_000_000,
+                   mean_session_s=12, rtt_ms=100),
+    DispatchConfig("Massive (100M devices)", "ضخم (100M جهاز)", 100_000_000, 20_000_000,
+                   redundancy=2, mean_session_s=10, rtt_ms=150),
+    DispatchConfig("Peak (Night, 50M active)", "ذروة (ليلاً، 50M نشط)", 50_000_000, 15_000_000,
+                   online_pct=60, mean_session_s=40, rtt_ms=50),
+    DispatchConfig("Worst Case (High Dropout)", "أسوأ حالة (انقطاع عالي)", 5_000_000, 500_000,
+                   redundancy=5, mean_session_s=2.5, rtt_ms=200, max_retries=5, timeout_ms=1000),
+    DispatchConfig("Regional (India Only)", "إقليمي (الهند فقط)", 20_000_000, 5_000_000,
+                   mean_session_s=15, rtt_ms=90),
+    DispatchConfig("Regional (EU Only)", "إقليمي (أوروبا فقط)", 15_000_000, 4_000_000,
+                   mean_session_s=25, rtt_ms=40),
 ]
 
+
+def measure_network_scenarios(
+    loads: List[DispatchConfig] = NETWORK_LOADS,
+    max_tasks: int = 20_000,
+    seed: int = 0,
+) -> List[NetworkScenario]:
+    """Run the dispatch simulator for every load and round the results.
+
+    Each load is simulated as one of ``shards`` identical coordinator
+    shards of ``max_tasks`` tasks, with the fleet's online devices split
+    evenly between them (see ``dispatch_sim.py``).
+    """
+    scenarios = []
+    for i, load in enumerate(loads):
+        r = simulate_dispatch(load, max_tasks=max_tasks, seed=seed + i)
+        scenarios.append(NetworkScenario(
+            load.name, load.name_ar, load.total_devices,
+            dropout_pct=round(r.dropout_pct, 1),
+            avg_latency_ms=round(r.avg_latency_ms),
+            redundancy_factor=load.redundancy,
+            success_rate=round(r.success_rate, 1),
+            throughput_tps=round(r.throughput_tps, -3),
+            p95_latency_ms=round(r.p95_latency_ms),
+            p99_latency_ms=round(r.p99_latency_ms),
+            offered_tps=load.offered_tps,
+            capacity_tps=round(r.capacity_tps, -3),
+            shards=r.shards,
+            devices_per_shard=r.devices_per_shard,
+            backlog_pct=round(r.backlog_pct, 1),
+            overloaded=r.overloaded,
+        ))
+    return scenarios
+
 # ═══════════════════════════════════════════════════════
 # LEGAL COMPLIANCE
 # ═══════════════════════════════════════════════════════
@@ -203,12 +258,20 @@ def _fmt(v):
     if abs(v) >= 1e3: return f"{v/1e3:.0f}K"
     return f"{v:.0f}"
 
-def generate_charts(out_dir):
+def generate_charts(scenarios, out_dir, workers=1):
     os.makedirs(out_dir, exist_ok=True)
-    plt.style.use("seaborn-v0_8-darkgrid")
-    saved = []
-
-    # Chart 1: TEE Security Layers
+    return render_charts([
+        ChartJob(_chart_tee_security, (out_dir,)),
+        ChartJob(_chart_network_performance, (scenarios, out_dir)),
+        ChartJob(_chart_compliance, (out_dir,)),
+        ChartJob(_chart_attacks, (out_dir,)),
+        ChartJob(_chart_throughput, (scenarios, out_dir)),
+    ], workers)
+
+
+def _chart_tee_security(out_dir):
+    """Chart 1: TEE Security Layers."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 7))
     names = [t.name[:25] for t in TEE_LAYERS]
     scores = [t.attack_resistance for t in TEE_LAYERS]
@@ -225,32 +288,41 @@ def generate_charts(out_dir):
     ax.legend(handles=[Patch(fc=c, label=l) for l, c in tc.items()], loc="lower right")
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "nsc_01_tee_security.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # Chart 2: Network Performance
+def _chart_network_performance(scenarios, out_dir):
+    """Chart 2: Network Performance."""
+    plt = pyplot()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-    ns_names = [n.name.split("(")[0].strip()[:15] for n in NETWORK_SCENARIOS]
-    latencies = [n.avg_latency_ms for n in NETWORK_SCENARIOS]
-    success = [n.success_rate for n in NETWORK_SCENARIOS]
+    ns_names = [n.name.split("(")[0].strip()[:15] for n in scenarios]
+    latencies = [n.avg_latency_ms for n in scenarios]
+    success = [n.success_rate for n in scenarios]
     ax1.bar(ns_names, latencies, color="#E67E22", edgecolor="white")
     for i, v in enumerate(latencies):
         ax1.text(i, v + 20, f"{v}ms", ha="center", fontsize=9, fontweight="bold")
     ax1.set_title("Average Latency (ms)", fontsize=12, fontweight="bold")
     ax1.set_xticklabels(ns_names, rotation=35, ha="right", fontsize=8)
     _wm(ax1)
-    ax2.bar(ns_names, success, color="#2ECC71", edgecolor="white")
+    ax2.bar(ns_names, success, color=["#E74C3C" if n.overloaded else "#2ECC71" for n in scenarios],
+            edgecolor="white")
     for i, v in enumerate(success):
-        ax2.text(i, v + 0.1, f"{v}%", ha="center", fontsize=9, fontweight="bold")
-    ax2.set_ylim(93, 100.5)
-    ax2.set_title("Task Success Rate (%)", fontsize=12, fontweight="bold")
+        ax2.text(i, v + 0.5, f"{v}%", ha="center", fontsize=9, fontweight="bold")
+    ax2.set_ylim(min(90.0, min(success) - 5), 103)
+    ax2.set_title("Task Success Rate (%, red = overloaded)", fontsize=12, fontweight="bold")
     ax2.set_xticklabels(ns_names, rotation=35, ha="right", fontsize=8)
     _wm(ax2)
     fig.suptitle("NHP Network Performance by Scale", fontsize=14, fontweight="bold", y=1.02)
     plt.tight_layout()
     p = os.path.join(out_dir, "nsc_02_network_performance.png")
-    fig.savefig(p, dpi=CHART_DPI, bbox_inches="tight"); plt.close(fig); saved.append(p)
+    save_figure(fig, p, bbox_inches="tight"); plt.close(fig)
+    return p
+
 
-    # Chart 3: Compliance Matrix
+def _chart_compliance(out_dir):
+    """Chart 3: Compliance Matrix."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 7))
     reg_names = [r.name for r in REGULATIONS]
     comp_map = {"Compliant": 3, "Partially": 2, "Needs Work": 1, "Non-Compliant": 0}
@@ -267,9 +339,13 @@ def generate_charts(out_dir):
     ax.set_title("NHP Legal Compliance Status by Regulation", fontsize=13, fontweight="bold")
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "nsc_03_compliance.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # Chart 4: Attack defense
+
+def _chart_attacks(out_dir):
+    """Chart 4: Attack defense."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 7))
     atk_names = [a.name for a in ATTACKS]
     sev_map = {"Critical": 3, "High": 2, "Medium": 1, "Low": 0}
@@ -287,14 +363,24 @@ def generate_charts(out_dir):
     ax.set_title("NHP Attack Scenarios — Severity & Mitigation Status", fontsize=13, fontweight="bold")
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "nsc_04_attacks.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # Chart 5: Network throughput
+def _chart_throughput(scenarios, out_dir):
+    """Chart 5: Network throughput."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
-    devices = [n.total_devices for n in NETWORK_SCENARIOS]
-    tps = [n.throughput_tps for n in NETWORK_SCENARIOS]
-    ax.scatter(devices, tps, s=200, c="#3498DB", edgecolors="white", linewidths=2, zorder=5)
-    for n in NETWORK_SCENARIOS:
+    devices = [n.total_devices for n in scenarios]
+    tps = [n.throughput_tps for n in scenarios]
+    ax.scatter(devices, [n.capacity_tps for n in scenarios], s=120, marker="_", c="#E74C3C",
+               linewidths=3, zorder=4, label="Capacity (saturated)")
+    ax.scatter(devices, [n.offered_tps for n in scenarios], s=80, facecolors="none", edgecolors="#7F8C8D",
+               linewidths=1.5, zorder=4, label="Offered load")
+    ax.scatter(devices, tps, s=200, c="#3498DB", edgecolors="white", linewidths=2, zorder=5,
+               label="Measured throughput")
+    ax.legend(loc="upper left", fontsize=9)
+    for n in scenarios:
         ax.annotate(n.name.split("(")[0].strip()[:15], (n.total_devices, n.throughput_tps),
                    textcoords="offset points", xytext=(10, 5), fontsize=8, fontweight="bold")
     ax.set_xscale("log"); ax.set_yscale("log")
@@ -302,16 +388,15 @@ def generate_charts(out_dir):
     ax.set_title("NHP Network Throughput vs Scale", fontsize=13, fontweight="bold")
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "nsc_05_throughput.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
-
-    return saved
+    save_figure(fig, p); plt.close(fig)
+    return p
 
 
 # ═══════════════════════════════════════════════════════
 # REPORT
 # ═══════════════════════════════════════════════════════
 
-def generate_report(charts, total):
+def generate_report(scenarios, charts, total):
     now = datetime.now().strftime("%d.%m.%Y — %H:%M")
     L = []
     L.append("# NHP Network, Security & Compliance Deep Dive")
@@ -320,7 +405,7 @@ def generate_report(charts, total):
 
     # TEE
     L.append("## 1. TEE Security Architecture / بنية أمان TEE\n")
-    L.append(f"![TEE Security](../../assets/nsc/{os.path.basename(charts[0])})\n")
+    L.append(f"![TEE Security](../../{charts[0]})\n")
     L.append("| Layer | Type | Resistance | Isolation | Attestation | Description |")
     L.append("|---|---|---|---|---|---|")
     for t in TEE_LAYERS:
@@ -331,7 +416,7 @@ def generate_report(charts, total):
 
     # Attacks
     L.append("## 2. Attack Scenarios & Defenses / سيناريوهات الهجوم والدفاع\n")
-    L.append(f"![Attacks](../../assets/nsc/{os.path.basename(charts[3])})\n")
+    L.append(f"![Attacks](../../{charts[3]})\n")
     for a in ATTACKS:
         emoji = {"Critical": "🔴", "High": "🟠", "Medium": "🟡"}[a.severity]
         L.append(f"### {emoji} {a.name} ({a.name_ar})")
@@ -342,17 +427,29 @@ def generate_report(charts, total):
 
     # Network
     L.append("## 3. Network Performance / أداء الشبكة\n")
-    L.append(f"![Network](../../assets/nsc/{os.path.basename(charts[1])})\n")
-    L.append(f"![Throughput](../../assets/nsc/{os.path.basename(charts[4])})\n")
-    L.append("| Scenario | Devices | Latency | Dropout | Success | TPS |")
-    L.append("|---|---|---|---|---|---|")
-    for n in NETWORK_SCENARIOS:
-        L.append(f"| {n.name} | {_fmt(n.total_devices)} | {n.avg_latency_ms}ms | {n.dropout_pct}% | {n.success_rate}% | {_fmt(n.throughput_tps)} |")
+    L.append(f"![Network](../../{charts[1]})\n")
+    L.append(f"![Throughput](../../{charts[4]})\n")
+    L.append("*Measured by the task-dispatch discrete-event simulator (dispatch_sim.py). Each load runs as "
+             "identical coordinator shards; one shard is simulated (Shards column) and scaled up. "
+             "Capacity is measured in a separate saturated run. Tasks still queued for a device when the "
+             "simulated arrival window ends (Backlog) count as failed: under overload that queue only grows.*\n")
+    L.append("| Scenario | Devices | Latency | P95 / P99 | Dropout | Redundancy | Success | Backlog "
+             "| Offered TPS | TPS | Capacity | Shards |")
+    L.append("|---|---|---|---|---|---|---|---|---|---|---|---|")
+    for n in scenarios:
+        capacity = f"{_fmt(n.capacity_tps)} ⚠️ overload" if n.overloaded else _fmt(n.capacity_tps)
+        L.append(f"| {n.name} | {_fmt(n.total_devices)} | {n.avg_latency_ms}ms | {n.p95_latency_ms} / {n.p99_latency_ms}ms "
+                 f"| {n.dropout_pct}% | {n.redundancy_factor}× | {n.success_rate}% | {n.backlog_pct}% "
+                 f"| {_fmt(n.offered_tps)} | {_fmt(n.throughput_tps)} | {capacity} | {n.shards:,} × {_fmt(n.devices_per_shard)} |")
+    overloaded = [n.name for n in scenarios if n.overloaded]
+    if overloaded:
+        L.append(f"\n⚠️ **Overloaded:** {', '.join(overloaded)}: offered load exceeds measured capacity; "
+                 "more online devices (or less redundancy) are needed to meet the target.")
     L.append("")
 
     # Compliance
     L.append("## 4. Legal Compliance / الامتثال القانوني\n")
-    L.append(f"![Compliance](../../assets/nsc/{os.path.basename(charts[2])})\n")
+    L.append(f"![Compliance](../../{charts[2]})\n")
     for r in REGULATIONS:
         emoji = {"Compliant": "🟢", "Partially": "🟡", "Needs Work": "🔴"}[r.nhp_compliance]
         L.append(f"### {emoji} {r.name} ({r.name_ar}) — {r.region}")
@@ -370,31 +467,42 @@ def generate_report(charts, total):
 # MAIN
 # ═══════════════════════════════════════════════════════
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NHP Phase 6 — Network Performance, TEE Security & Legal Compliance")
+    add_profile_argument(parser)
+    set_render_profile(parser.parse_args(argv).render_profile)
     print("=" * 60)
     print("  NHP Phase 6 — Network, Security & Compliance")
     print("=" * 60, "\n")
 
     start = time.time()
-    total = len(TEE_LAYERS) + len(ATTACKS) + len(NETWORK_SCENARIOS) + len(REGULATIONS)
+    total = len(TEE_LAYERS) + len(ATTACKS) + len(NETWORK_LOADS) + len(REGULATIONS)
 
     print(f"▶ Analysis items: {total}")
     print(f"  TEE layers: {len(TEE_LAYERS)}")
     print(f"  Attack scenarios: {len(ATTACKS)}")
-    print(f"  Network scenarios: {len(NETWORK_SCENARIOS)}")
+    print(f"  Network scenarios: {len(NETWORK_LOADS)}")
     print(f"  Regulations: {len(REGULATIONS)}")
 
+    print("\n▶ Simulating task dispatch...")
+    scenarios = measure_network_scenarios()
+    for n in scenarios:
+        print(f"  {n.name:28s} {n.avg_latency_ms:>5}ms  {n.success_rate:>5}%  {_fmt(n.throughput_tps):>6} TPS"
+              f"  (offered {_fmt(n.offered_tps)}, capacity {_fmt(n.capacity_tps)})"
+              f"{'  ⚠️ OVERLOADED' if n.overloaded else ''}")
+
     print("\n▶ Generating charts...")
-    charts = generate_charts("assets/nsc")
+    charts = generate_charts(scenarios, asset_dir("assets/nsc"))
     for c in charts:
         print(f"  ✅ {c}")
 
     print("\n▶ Generating report...")
-    report = generate_report(charts, total)
-    os.makedirs("output", exist_ok=True)
-    with open("output/network_security_compliance.md", "w", encoding="utf-8") as f:
+    report = generate_report(scenarios, charts, total)
+    path = report_path("output/network_security_compliance.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
         f.write(report)
-    print("  ✅ output/network_security_compliance.md")
+    print(f"  ✅ {path}")
 
     elapsed = time.time() - start
     print(f"\n{'='*60}")
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Incremental Pipeline
+Runs Phase 2 as a dependency graph and recomputes only what changed:
+
+    data constants ──► category sweeps ──► charts
+                                      ├──► report sections ──► report
+                                      └──► data export (Parquet or CSV)
+
+Dependencies are discovered from the code: a category depends on every
+module-level constant or registry its sweep declaration and batch compute
+functions read (followed transitively through package helpers). Category
+results, report sections and node keys are persisted under
+``output/.pipeline`` between runs; charts use the content-addressed chart
+cache. Editing e.g. ``GPU_REQUEST_TIME_SEC`` then re-runs only the categories
+that read it, their charts and report sections, and the data export.
+
+Run with: python mega_simulation/pipeline.py [--workers N] [--plan] [--graph] [--force] [--export FMT] [--no-charts]
+                                             [--render-profile draft|web|print]
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+import types
+from typing import Dict, Any, List, Optional, Set
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.chart_cache import Fingerprint, is_package_object
+from mega_simulation.charts import chart_jobs, generate_all_charts
+from mega_simulation.render import add_profile_argument, report_path, set_render_profile
+from mega_simulation.report import (
+    REPORT_SECTIONS, generate_mega_report, report_section, save_mega_report, save_csv_export,
+)
+from mega_simulation.export import EXPORT_FORMATS, export_path, save_export, save_parquet_export
+from mega_simulation.results import CategoryResults, ResultStore
+from mega_simulation.scenarios import CATEGORY_SWEEPS
+from mega_simulation.sweep import evaluate_chunk, run_sweeps
+
+STATE_DIR: str = "output/.pipeline"
+STATE_FILE: str = "state.json"
+
+
+# ═══════════════════════════════════════════════════════════════
+# DEPENDENCY DISCOVERY
+# ═══════════════════════════════════════════════════════════════
+
+def _code_names(code: types.CodeType) -> Set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def data_reads(func: types.FunctionType, _seen: Optional[Set[int]] = None) -> Dict[str, Any]:
+    """Module-level data a function reads, directly or through package helpers.
+
+    Args:
+        func: Function to inspect (e.g. ``sweep_b`` or a batch compute function).
+
+    Returns:
+        Dict of global name -> current value, for every non-callable global
+        (constants, dataclass registries, variant lists) reachable from ``func``.
+    """
+    seen = _seen if _seen is not None else set()
+    if id(func) in seen:
+        return {}
+    seen.add(id(func))
+    reads: Dict[str, Any] = {}
+    for name in sorted(_code_names(func.__code__)):
+        if name not in func.__globals__:
+            continue
+        value = func.__globals__[name]
+        if isinstance(value, types.FunctionType):
+            if is_package_object(value):
+                reads.update(data_reads(value, seen))
+        elif not (isinstance(value, (types.ModuleType, type)) or callable(value)):
+            reads[name] = value
+    return reads
+
+
+def _digest(value: Any) -> str:
+    return Fingerprint().update(value).hexdigest()
+
+
+def category_inputs(category: str) -> Dict[str, str]:
+    """Digest of every constant category ``category`` depends on."""
+    return {name: _digest(value) for name, value in data_reads(CATEGORY_SWEEPS[category]).items()}
+
+
+def category_key(category: str) -> str:
+    """Node key: declaration + compute code + the data they read + sweep engine."""
+    fp = Fingerprint().update_function(CATEGORY_SWEEPS[category])
+    fp.update_function(evaluate_chunk)
+    return fp.hexdigest()
+
+
+def build_graph() -> Dict[str, List[str]]:
+    """Edges ``node -> downstream nodes`` of the Phase 2 pipeline."""
+    graph: Dict[str, Set[str]] = {}
+    for cat, declare in CATEGORY_SWEEPS.items():
+        node = f"category:{cat}"
+        for name in data_reads(declare):
+            graph.setdefault(f"data:{name}", set()).add(node)
+        graph.setdefault(node, set()).update({f"section:{cat}", "export"})
+        graph.setdefault(f"section:{cat}", set()).add("report")
+    empty = ResultStore({cat: CategoryResults(cat, {}) for cat in CATEGORY_SWEEPS})
+    for job in chart_jobs(empty):
+        graph[f"category:{job.args[0].category}"].add(f"chart:{job.name}")
+    return {node: sorted(children) for node, children in sorted(graph.items())}
+
+
+def downstream(graph: Dict[str, List[str]], roots: List[str]) -> List[str]:
+    """All nodes reachable from ``roots`` (excluding the roots)."""
+    found: Set[str] = set()
+    stack = list(roots)
+    while stack:
+        for child in graph.get(stack.pop(), []):
+            if child not in found:
+                found.add(child)
+                stack.append(child)
+    return sorted(found)
+
+
+# ═══════════════════════════════════════════════════════════════
+# PERSISTED STATE
+# ═══════════════════════════════════════════════════════════════
+
+class PipelineState:
+    """Node keys plus cached category results and report sections on disk."""
+
+    def __init__(self, state_dir: str = STATE_DIR) -> None:
+        self.state_dir = state_dir
+        try:
+            with open(os.path.join(state_dir, STATE_FILE), encoding="utf-8") as f:
+                self.nodes: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            self.nodes = {}
+
+    def artifact(self, name: str) -> str:
+        """Path of a persisted artifact inside the state directory."""
+        return os.path.join(self.state_dir, name)
+
+    def is_fresh(self, node: str, key: str, artifact: Optional[str] = None) -> bool:
+        if self.nodes.get(node, {}).get("key") != key:
+            return False
+        return artifact is None or os.path.exists(artifact)
+
+    def load_category(self, category: str) -> CategoryResults:
+        with open(self.artifact(f"category_{category}.pkl"), "rb") as f:
+            return CategoryResults(category, pickle.load(f))
+
+    def save_category(self, category: str, results: CategoryResults) -> None:
+        with open(self.artifact(f"category_{category}.pkl"), "wb") as f:
+            pickle.dump(results.columns, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load_section(self, category: str) -> List[str]:
+        with open(self.artifact(f"section_{category}.md"), encoding="utf-8") as f:
+            return f.read().split("\n")
+
+    def save_section(self, category: str, lines: List[str]) -> None:
+        with open(self.artifact(f"section_{category}.md"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+    def mark(self, node: str, key: str, **extra: Any) -> None:
+        self.nodes[node] = {"key": key, **extra}
+
+    def save(self) -> None:
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(self.artifact(STATE_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.nodes, f, indent=1, sort_keys=True)
+
+
+def changed_inputs(state: PipelineState, category: str, inputs: Dict[str, str]) -> List[str]:
+    """Constants whose digest differs from the last successful run."""
+    node = state.nodes.get(f"category:{category}")
+    if node is None:
+        return ["no cached result"]
+    previous = node.get("inputs", {})
+    return sorted(name for name in set(inputs) | set(previous)
+                  if inputs.get(name) != previous.get(name))
+
+
+# ═══════════════════════════════════════════════════════════════
+# RUNNER
+# ═══════════════════════════════════════════════════════════════
+
+def plan(state: PipelineState) -> Dict[str, List[str]]:
+    """Stale categories mapped to the changed constants that explain them."""
+    stale: Dict[str, List[str]] = {}
+    for cat in CATEGORY_SWEEPS:
+        pkl = state.artifact(f"category_{cat}.pkl")
+        if not state.is_fresh(f"category:{cat}", category_key(cat), pkl):
+            stale[cat] = changed_inputs(state, cat, category_inputs(cat)) or ["code"]
+    return stale
+
+
+def run_pipeline(
+    state_dir: str = STATE_DIR,
+    workers: Optional[int] = 1,
+    force: bool = False,
+    output_dir: str = "output",
+    export: str = "auto",
+    charts: bool = True,
+) -> Dict[str, Any]:
+    """Run Phase 2, recomputing only nodes whose inputs changed.
+
+    Args:
+        state_dir: Where node keys and intermediate results are persisted.
+        workers: Process count for sweeps and chart rendering.
+        force: Ignore persisted state and recompute everything.
+        output_dir: Report / data export directory.
+        export: Data export format (see ``export.save_export``).
+        charts: Render the charts; ``False`` never imports matplotlib and
+            leaves the saved report (which lists the charts) untouched.
+
+    Returns:
+        Summary with the recomputed categories, sections and output paths
+        (``report`` is ``None`` when the report was not written).
+    """
+    state = PipelineState(state_dir)
+    if force:
+        state.nodes = {}
+    os.makedirs(state_dir, exist_ok=True)
+
+    # ── Categories ───────────────────────────────────────────
+    stale = plan(state)
+    fresh = run_sweeps({cat: CATEGORY_SWEEPS[cat]() for cat in stale}, workers=workers)
+    categories: Dict[str, CategoryResults] = {}
+    for cat in CATEGORY_SWEEPS:
+        if cat in fresh:
+            categories[cat] = fresh[cat]
+            state.save_category(cat, fresh[cat])
+            state.mark(f"category:{cat}", category_key(cat), inputs=category_inputs(cat))
+        else:
+            categories[cat] = state.load_category(cat)
+    all_results = ResultStore(categories)
+
+    # ── Charts (content-addressed cache) ─────────────────────
+    chart_paths = generate_all_charts(all_results, workers=workers) if charts else []
+
+    # ── Report sections ──────────────────────────────────────
+    sections: Dict[str, List[str]] = {}
+    rebuilt: List[str] = []
+    for cat, results in all_results.items():
+        key = Fingerprint().update(state.nodes[f"category:{cat}"]["key"]) \
+            .update_function(REPORT_SECTIONS[cat]).hexdigest()
+        if state.is_fresh(f"section:{cat}", key, state.artifact(f"section_{cat}.md")):
+            sections[cat] = state.load_section(cat)
+        else:
+            sections[cat] = report_section(cat, results)
+            state.save_section(cat, sections[cat])
+            state.mark(f"section:{cat}", key)
+            rebuilt.append(cat)
+    saved_report = None
+    if charts:
+        report_text = generate_mega_report(all_results, all_results.total_scenarios,
+                                           chart_paths, sections=sections)
+        saved_report = save_mega_report(report_text, report_path(output_dir))
+
+    # ── Data export ──────────────────────────────────────────
+    data_path = export_path(output_dir, export)
+    fmt = "csv" if data_path.endswith(".csv") else "parquet"
+    export_key = Fingerprint().update([state.nodes[f"category:{c}"]["key"] for c in all_results]) \
+        .update(fmt).update_function(save_export).update_function(save_csv_export) \
+        .update_function(save_parquet_export).hexdigest()
+    export_written = not state.is_fresh("export", export_key, data_path)
+    if export_written:
+        data_path = save_export(all_results, output_dir, fmt)
+        state.mark("export", export_key)
+
+    state.save()
+    return {
+        "results": all_results,
+        "stale": stale,
+        "sections": rebuilt,
+        "charts": chart_paths,
+        "report": saved_report,
+        "export": data_path,
+        "export_written": export_written,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Incremental NHP mega simulation pipeline.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="process-pool size (1 = serial, 0 = one per CPU core)")
+    parser.add_argument("--state-dir", default=STATE_DIR, help="persisted pipeline state")
+    parser.add_argument("--plan", action="store_true", help="show stale nodes and exit")
+    parser.add_argument("--graph", action="store_true", help="print the dependency graph and exit")
+    parser.add_argument("--force", action="store_true", help="recompute every node")
+    parser.add_argument("--export", choices=EXPORT_FORMATS, default="auto",
+                        help="data export format (auto = Parquet when pyarrow is installed, else CSV)")
+    parser.add_argument("--no-charts", action="store_true", help="numbers only: skip the charts")
+    add_profile_argument(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run (or explain) the incremental pipeline."""
+    args = parse_args(argv)
+    set_render_profile(args.render_profile)
+
+    if args.graph:
+        for node, children in build_graph().items():
+            print(f"{node} → {', '.join(children)}")
+        return
+
+    if args.plan:
+        state = PipelineState(args.state_dir)
+        stale = plan(state)
+        graph = build_graph()
+        if not stale:
+            print("  ✅ Everything up to date")
+        for cat, reasons in stale.items():
+            affected = downstream(graph, [f"category:{cat}"])
+            print(f"  ▶ category:{cat} ({', '.join(reasons)}) → {len(affected)} downstream nodes")
+        return
+
+    start_time = time.time()
+    print("▶ Running incremental pipeline...")
+    run = run_pipeline(args.state_dir, workers=args.workers, force=args.force, export=args.export,
+                       charts=not args.no_charts)
+    for cat, reasons in run["stale"].items():
+        print(f"  ♻️  Category {cat}: recomputed ({', '.join(reasons)})")
+    reused = len(CATEGORY_SWEEPS) - len(run["stale"])
+    print(f"  ✅ {reused} categories reused from {args.state_dir}")
+    print(f"  ✅ Report sections rebuilt: {', '.join(run['sections']) or 'none'}")
+    if run["report"] is None:
+        print("  ⏭  Report skipped (--no-charts keeps the saved report and its chart list)")
+    else:
+        print(f"  ✅ Report saved: {run['report']}")
+    print(f"  ✅ Export {'saved' if run['export_written'] else 'unchanged'}: {run['export']}")
+    print(f"  {run['results'].total_scenarios} scenarios | {len(run['charts'])} charts | "
+          f"{time.time() - start_time:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
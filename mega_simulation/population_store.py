@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Memory-Mapped Population Store
+On-disk device population for agent runs larger than RAM
+(``TARGET_DEVICES`` = 10^9 phones is ~12 GB of state).
+
+A store is a directory with a fixed binary schema. ``header.json`` records
+the schema version, size and weight. ``models.npz`` holds the fleet model
+table, and each agent field (``FIELDS``) is a raw little-endian column file
+``<field>.bin``. Columns are opened with ``numpy.memmap``, so an
+``AgentPopulation`` built on top of them reads and updates the disk pages
+in place.
+
+Work is split into fixed-size blocks (``blocks``). Every worker process
+maps the same files once at start-up, so blocks are shared zero-copy
+through the OS page cache rather than pickled. Each worker then runs its
+blocks through the whole month (``agents.run_block``). Block ``i`` always
+draws from ``default_rng([seed, i])``, so results are identical for any
+worker count and match an in-memory ``agents.simulate_agents`` run.
+
+Run with:
+    python mega_simulation/population_store.py create --devices 1000000000 --workers 8
+    python mega_simulation/population_store.py run --nights 30 --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import TARGET_DEVICES
+from mega_simulation.agents import (
+    DEFAULT_CHUNK, REPUTATION_START, AgentPopulation, AgentRun,
+    blocks, draw_block, draw_weights, reconcile, run_block,
+)
+from mega_simulation.data import REGIONS, Region
+from mega_simulation.fleet import ModelTable, build_model_table
+from mega_simulation.sweep import resolve_workers
+
+SCHEMA_VERSION: int = 1
+DEFAULT_STORE_DIR: str = "output/.population"
+HEADER_FILE: str = "header.json"
+MODELS_FILE: str = "models.npz"
+
+# Column name → little-endian dtype; fixed for SCHEMA_VERSION.
+FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("model", "u1"),
+    ("region", "u1"),
+    ("propensity", "u1"),
+    ("battery_health", "<f4"),
+    ("earnings", "<f4"),
+    ("reputation", "u1"),
+)
+INITIAL_VALUES: Dict[str, float] = {"battery_health": 1.0, "earnings": 0.0, "reputation": REPUTATION_START}
+
+
+@dataclass
+class PopulationStore:
+    """Handle to an on-disk population directory."""
+    path: str
+    size: int
+    weight: float
+    uptime: float
+    regions: List[str]
+    models: ModelTable
+
+    @property
+    def bytes_per_agent(self) -> int:
+        return sum(np.dtype(dt).itemsize for _, dt in FIELDS)
+
+    def column_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def column(self, name: str, mode: str = "r") -> np.memmap:
+        """Map one column (``mode`` as for ``numpy.memmap``)."""
+        dtype = dict(FIELDS)[name]
+        return np.memmap(self.column_path(name), dtype=dtype, mode=mode, shape=(self.size,))
+
+    def population(self, mode: str = "r") -> AgentPopulation:
+        """An ``AgentPopulation`` whose columns are the mapped files."""
+        return AgentPopulation(
+            **{name: self.column(name, mode) for name, _ in FIELDS},
+            weight=self.weight, models=self.models, regions=self.regions,
+        )
+
+    def chunks(self, chunk: int = DEFAULT_CHUNK) -> Iterator[slice]:
+        """Block slices over the population."""
+        return blocks(self.size, chunk)
+
+    def iter_columns(self, names: List[str], chunk: int = DEFAULT_CHUNK) -> Iterator[Dict[str, np.ndarray]]:
+        """Read-only column blocks, e.g. for aggregates over the whole store."""
+        maps = {name: self.column(name) for name in names}
+        for sl in self.chunks(chunk):
+            yield {name: np.asarray(m[sl]) for name, m in maps.items()}
+
+
+def _save_models(path: str, models: ModelTable) -> None:
+    arrays = {k: v for k, v in vars(models).items() if isinstance(v, np.ndarray)}
+    np.savez(path, companies=np.array(models.companies), fleet_year=models.fleet_year, **arrays)
+
+
+def _load_models(path: str) -> ModelTable:
+    with np.load(path) as f:
+        data = {k: f[k] for k in f.files}
+    return ModelTable(companies=[str(c) for c in data.pop("companies")],
+                      fleet_year=int(data.pop("fleet_year")), **data)
+
+
+def open_store(path: str = DEFAULT_STORE_DIR) -> PopulationStore:
+    """Open an existing store, checking its schema."""
+    with open(os.path.join(path, HEADER_FILE), encoding="utf-8") as f:
+        header = json.load(f)
+    if header.get("schema_version") != SCHEMA_VERSION or [list(x) for x in FIELDS] != header.get("fields"):
+        raise ValueError(f"{path}: schema {header.get('schema_version')} does not match version {SCHEMA_VERSION}")
+    store = PopulationStore(path=path, size=header["size"], weight=header["weight"], uptime=header["uptime"],
+                            regions=header["regions"], models=_load_models(os.path.join(path, MODELS_FILE)))
+    for name, dtype in FIELDS:
+        expected = store.size * np.dtype(dtype).itemsize
+        if os.path.getsize(store.column_path(name)) != expected:
+            raise ValueError(f"{store.column_path(name)}: expected {expected:,} bytes")
+    return store
+
+
+# ── Worker side: each process maps the store once ─────────────────────────
+
+_WORKER_STORE: Dict[str, PopulationStore] = {}
+
+
+def _init_worker(path: str) -> None:
+    _WORKER_STORE["store"] = open_store(path)
+
+
+def _fill_blocks(args: Tuple) -> int:
+    """Draw agents for a range of blocks into the mapped columns."""
+    first, last, chunk, seed, concentration, model_p, region_p = args
+    store = _WORKER_STORE["store"]
+    cols = {name: store.column(name, "r+") for name, _ in FIELDS}
+    for block in range(first, last):
+        sl = slice(block * chunk, min((block + 1) * chunk, store.size))
+        rng = np.random.default_rng([seed, block])
+        cols["model"][sl], cols["region"][sl], cols["propensity"][sl] = draw_block(
+            rng, sl.stop - sl.start, store.uptime, concentration, model_p, region_p)
+        for name, value in INITIAL_VALUES.items():
+            cols[name][sl] = value
+    for m in cols.values():
+        m.flush()
+    return last - first
+
+
+def _run_blocks(args: Tuple) -> Dict[str, np.ndarray]:
+    """Run a range of blocks through every night; returns summed block outputs."""
+    first, last, chunk, seed, nights, token_price, platform_cut, faulty_pct = args
+    store = _WORKER_STORE["store"]
+    pop = store.population("r+")
+    total: Dict[str, np.ndarray] = {}
+    for block in range(first, last):
+        sl = slice(block * chunk, min((block + 1) * chunk, store.size))
+        part = run_block(pop, sl, np.random.default_rng([seed, block]), nights,
+                         token_price, platform_cut, faulty_pct)
+        for k, v in part.items():
+            total[k] = total[k] + v if k in total else v
+    for name, _ in FIELDS:
+        col = getattr(pop, name)
+        if isinstance(col, np.memmap) and col.mode == "r+":
+            col.flush()
+    return total
+
+
+def _map_blocks(path: str, size: int, chunk: int, workers: int, task, extra: Tuple) -> List:
+    """Split the blocks into contiguous ranges and run ``task`` on each."""
+    n_blocks = -(-size // chunk)
+    per_task = max(1, -(-n_blocks // (workers * 4)))
+    tasks = [(lo, min(lo + per_task, n_blocks), chunk) + extra for lo in range(0, n_blocks, per_task)]
+    if workers <= 1 or len(tasks) <= 1:
+        _init_worker(path)
+        return [task(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                             initargs=(path,)) as pool:
+        return list(pool.map(task, tasks))
+
+
+def create_store(
+    path: str = DEFAULT_STORE_DIR,
+    total_devices: int = TARGET_DEVICES,
+    uptime: float = 0.25,
+    sample_size: Optional[int] = None,
+    models: Optional[ModelTable] = None,
+    regions: Mapping[str, Region] = REGIONS,
+    concentration: float = 4.0,
+    seed: int = 0,
+    chunk: int = DEFAULT_CHUNK,
+    workers: Optional[int] = 1,
+) -> PopulationStore:
+    """Write a new population to ``path``; draws match ``AgentPopulation.create``.
+
+    Args:
+        path: Store directory (created; existing columns are overwritten).
+        total_devices, uptime, sample_size, models, regions, concentration,
+            seed, chunk: As for ``AgentPopulation.create``.
+        workers: Processes filling blocks (None = all cores).
+
+    Returns:
+        The opened store.
+    """
+    if not 0.0 < uptime < 1.0:
+        raise ValueError(f"uptime must be in (0, 1), got {uptime}")
+    models = models if models is not None else build_model_table()
+    n = int(sample_size or total_devices)
+    os.makedirs(path, exist_ok=True)
+    _save_models(os.path.join(path, MODELS_FILE), models)
+    for name, dtype in FIELDS:
+        with open(os.path.join(path, f"{name}.bin"), "wb") as f:
+            f.truncate(n * np.dtype(dtype).itemsize)        # Sparse until written
+    header = {
+        "schema_version": SCHEMA_VERSION, "fields": [list(x) for x in FIELDS],
+        "size": n, "weight": total_devices / n, "uptime": uptime, "regions": list(regions),
+        "seed": seed, "chunk": chunk,
+    }
+    with open(os.path.join(path, HEADER_FILE), "w", encoding="utf-8") as f:
+        json.dump(header, f, indent=2)
+
+    model_p, region_p = draw_weights(models, regions)
+    _map_blocks(path, n, chunk, resolve_workers(workers), _fill_blocks,
+                (seed, concentration, model_p, region_p))
+    return open_store(path)
+
+
+def simulate_store(
+    store: PopulationStore,
+    nights: int = 30,
+    token_price: float = 0.20,
+    platform_cut: float = 0.15,
+    faulty_pct: float = 0.0,
+    seed: int = 1,
+    chunk: int = DEFAULT_CHUNK,
+    workers: Optional[int] = 1,
+) -> AgentRun:
+    """``agents.simulate_agents`` over a mapped store, in a worker pool.
+
+    Agent state on disk is updated in place. Totals are identical to an
+    in-memory run with the same seed and chunk, whatever ``workers`` is.
+    """
+    start = time.time()
+    parts = _map_blocks(store.path, store.size, chunk, resolve_workers(workers), _run_blocks,
+                        (seed, nights, token_price, platform_cut, faulty_pct))
+    run = AgentRun.empty(nights, token_price, platform_cut, len(store.regions))
+    for part in parts:
+        run.add(part, store.weight)
+    run.seconds = time.time() - start
+    return run
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Memory-mapped device population for agent runs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    create = sub.add_parser("create", help="draw a population into a store")
+    create.add_argument("--devices", type=float, default=TARGET_DEVICES)
+    create.add_argument("--sample", type=float, default=0, help="agents to store (0 = one per device)")
+    create.add_argument("--uptime", type=float, default=0.25)
+    create.add_argument("--seed", type=int, default=0)
+    run = sub.add_parser("run", help="simulate nights over a store and reconcile")
+    run.add_argument("--nights", type=int, default=30)
+    run.add_argument("--token-price", type=float, default=0.20)
+    run.add_argument("--platform-cut", type=float, default=0.15)
+    run.add_argument("--faulty-pct", type=float, default=0.0)
+    run.add_argument("--seed", type=int, default=1)
+    for p in (create, run):
+        p.add_argument("--path", default=DEFAULT_STORE_DIR)
+        p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+        p.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Create or run a stored population."""
+    args = parse_args(argv)
+    print("=" * 60)
+    print("  NHP POPULATION STORE — مخزن الأجهزة على القرص")
+    print("=" * 60)
+    start = time.time()
+    if args.command == "create":
+        devices = int(args.devices)
+        store = create_store(args.path, devices, args.uptime, int(args.sample) or None,
+                             seed=args.seed, chunk=args.chunk_size, workers=args.workers)
+        print(f"  ✅ {store.size:,} agents × {store.weight:,.1f} | "
+              f"{store.size * store.bytes_per_agent / 1e9:.2f} GB in {store.path} | {time.time() - start:.1f}s")
+        return
+
+    store = open_store(args.path)
+    run = simulate_store(store, args.nights, args.token_price, args.platform_cut, args.faulty_pct,
+                         seed=args.seed, chunk=args.chunk_size, workers=args.workers)
+    rate = store.size * args.nights / max(run.seconds, 1e-9)
+    print(f"  {store.size:,} agents | {args.nights} nights in {run.seconds:.1f}s ({rate / 1e6:,.0f}M agent-nights/s)")
+    table = reconcile(store.population(), run, store.uptime)
+    for r in table:
+        print(f"  {r['metric']:<26} {r['agents']:>18,.2f} {r['closed_form']:>18,.2f} {r['diff_pct']:>+8.3f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Stage Profiling
+Structured timing for every stage of a run, saved as a Chrome trace
+(``chrome://tracing``, https://ui.perfetto.dev) so a long sweep can be read
+as a timeline instead of one total.
+
+Code marks stages with ``span(name, cat)``. Without an active tracer a span
+does nothing, so the instrumented modules cost the same as before. Inside
+``tracing()`` every span becomes a complete event with:
+
+    rss_mb / max_rss_mb      resident memory at the end / process high-water mark
+    traced_peak_mb           tracemalloc peak within the span      (memory=True)
+    traced_net_kb            bytes still allocated at the end      (memory=True)
+    net_blocks               blocks still allocated at the end     (allocations=True)
+    top_allocations          the three lines that allocated the most (allocations=True)
+    tracer_overhead_ms       time nested spans spent in snapshots   (allocations=True)
+
+The allocation stats diff two tracemalloc snapshots per span, which can
+take far longer than the stage itself. Event durations stay wall time so
+the timeline nests; the console summary subtracts the overhead.
+
+Work done in a process pool is timed inside the worker (``remote``) and
+recorded by the parent (``collect``), so every worker gets its own track.
+
+``profiler()`` additionally captures a cProfile (``.prof``, for pstats or
+snakeviz) or pyinstrument (``.html``) profile of the hot paths.
+
+Run with:
+    python mega_simulation/run.py --trace output/trace/run.json --trace-memory --profiler cprofile
+    python mega_simulation/run.py --trace --trace-allocations
+"""
+import contextlib
+import json
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+PROFILERS: Tuple[str, ...] = ("cprofile", "pyinstrument")
+PROFILE_SUFFIX: Dict[str, str] = {"cprofile": ".prof", "pyinstrument": ".html"}
+TOP_ALLOCATIONS: int = 3
+
+_ACTIVE: Optional["Tracer"] = None
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (the high-water mark where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return max_rss_mb()
+
+
+def max_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _snapshot() -> Any:
+    """tracemalloc snapshot without the tracer's own allocations (snapshots, events)."""
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                                      tracemalloc.Filter(False, __file__)])
+
+
+@dataclass
+class _Frame:
+    """Bookkeeping for one open span."""
+    name: str
+    cat: str
+    args: Dict[str, Any]
+    start_ns: int
+    traced_start: int = 0
+    traced_peak: int = 0
+    snapshot: Any = None
+    overhead_ns: int = 0        # Snapshot time spent inside this span by nested spans
+
+
+@dataclass
+class Tracer:
+    """Collects spans and counters as Chrome trace events.
+
+    Args:
+        memory: Also trace allocations with tracemalloc. This is slower; the
+            trace records that it was on.
+        allocations: Also diff tracemalloc snapshots per span for the top
+            allocating lines (needs ``memory``). Much slower.
+        label: Process name shown for this process in the timeline.
+
+    Each thread has its own stack of open spans, so modules running on
+    concurrent threads (``run_all.py --jobs``) nest their spans on their
+    own tracks.
+    """
+    memory: bool = False
+    allocations: bool = False
+    label: str = "main"
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    origin_ns: int = field(default_factory=time.perf_counter_ns)
+    _local: threading.local = field(default_factory=threading.local, repr=False, compare=False)
+    _processes: Dict[int, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.allocations and not self.memory:
+            raise ValueError("allocations=True needs memory=True")
+        self._processes[os.getpid()] = self.label
+
+    @property
+    def _stack(self) -> List[_Frame]:
+        """Open spans of the calling thread, innermost last."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _us(self, ns: int) -> float:
+        return (ns - self.origin_ns) / 1000
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str = "stage", **args: Any) -> Iterator[Dict[str, Any]]:
+        """Time the enclosed block; yields the event's ``args`` for extra fields."""
+        frame = _Frame(name, cat, dict(args), time.perf_counter_ns())
+        stack = self._stack
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].traced_peak = max(stack[-1].traced_peak, peak)
+            tracemalloc.reset_peak()
+            frame.traced_start = frame.traced_peak = current
+        if self.allocations:
+            frame.snapshot = _snapshot()
+            start_ns, frame.start_ns = frame.start_ns, time.perf_counter_ns()
+            if stack:
+                stack[-1].overhead_ns += frame.start_ns - start_ns
+        stack.append(frame)
+        try:
+            yield frame.args
+        finally:
+            end_ns = time.perf_counter_ns()
+            stack.pop()
+            self._finish(frame, end_ns, stack[-1] if stack else None)
+
+    def _finish(self, frame: _Frame, end_ns: int, parent: Optional[_Frame]) -> None:
+        args = frame.args
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(frame.traced_peak, peak)
+            tracemalloc.reset_peak()
+            if parent is not None:
+                parent.traced_peak = max(parent.traced_peak, peak)
+            args["traced_peak_mb"] = round(peak / 2**20, 3)
+            args["traced_net_kb"] = round((current - frame.traced_start) / 1024, 1)
+        if self.allocations:
+            snapshot = _snapshot()
+            args["net_blocks"] = len(snapshot.traces) - len(frame.snapshot.traces)
+            args["top_allocations"] = [
+                f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size_diff / 1024:+,.0f} KB"
+                for stat in snapshot.compare_to(frame.snapshot, "lineno")[:TOP_ALLOCATIONS]
+            ]
+            args["tracer_overhead_ms"] = round(frame.overhead_ns / 1e6, 3)
+            if parent is not None:
+                parent.overhead_ns += frame.overhead_ns + time.perf_counter_ns() - end_ns
+        rss, max_rss = rss_mb(), max_rss_mb()
+        args["rss_mb"] = round(rss, 1)
+        args["max_rss_mb"] = round(max_rss, 1)
+        self.complete(frame.name, frame.cat, frame.start_ns, end_ns, args=args)
+        self.counter("memory", end_ns, rss_mb=round(rss, 1))
+
+    def complete(
+        self,
+        name: str,
+        cat: str,
+        start_ns: int,
+        end_ns: int,
+        pid: Optional[int] = None,
+        tid: Optional[int] = None,
+        args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Record a finished span (``perf_counter_ns`` timestamps, any process)."""
+        pid = os.getpid() if pid is None else pid
+        self._processes.setdefault(pid, f"worker {pid}")
+        self.events.append({
+            "name": name, "cat": cat, "ph": "X",
+            "ts": self._us(start_ns), "dur": (end_ns - start_ns) / 1000,
+            "pid": pid, "tid": threading.get_native_id() if tid is None else tid,
+            "args": args or {},
+        })
+
+    def counter(self, name: str, at_ns: int, **values: float) -> None:
+        """Record a counter sample (drawn as a track, e.g. memory over time)."""
+        self.events.append({"name": name, "ph": "C", "ts": self._us(at_ns),
+                            "pid": os.getpid(), "args": values})
+
+    def spans(self, cat: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Complete events in start order, optionally of one category."""
+        return sorted((e for e in self.events if e["ph"] == "X" and (cat is None or e["cat"] == cat)),
+                      key=lambda e: (e["ts"], -e["dur"]))
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """The trace in Chrome's JSON object format."""
+        names = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": label}}
+                 for pid, label in self._processes.items()]
+        return {
+            "traceEvents": names + self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {"memory": self.memory, "pid": os.getpid()},
+        }
+
+    def save(self, path: str) -> str:
+        """Write the Chrome trace JSON and return its path."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome(), f)
+        return path
+
+
+@contextlib.contextmanager
+def tracing(memory: bool = False, label: str = "main", allocations: bool = False) -> Iterator[Tracer]:
+    """Make a new tracer the active one for the enclosed block."""
+    global _ACTIVE
+    previous = _ACTIVE
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    _ACTIVE = Tracer(memory=memory, allocations=allocations, label=label)
+    try:
+        yield _ACTIVE
+    finally:
+        _ACTIVE = previous
+        if started:
+            tracemalloc.stop()
+
+
+def active_tracer() -> Optional[Tracer]:
+    return _ACTIVE
+
+
+def span(name: str, cat: str = "stage", **args: Any) -> Any:
+    """``Tracer.span`` on the active tracer; a no-op context when not tracing."""
+    if _ACTIVE is None:
+        return _NULL_SPAN
+    return _ACTIVE.span(name, cat, **args)
+
+
+class RemoteSpan(NamedTuple):
+    """A ``remote`` call's result plus the worker-side timing ``collect`` records."""
+    result: Any
+    pid: int
+    start_ns: int
+    end_ns: int
+    rss_mb: float
+
+
+class _Timed:
+    """Picklable wrapper that returns a ``RemoteSpan``."""
+
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.func = func
+        self.parent = os.getpid()
+
+    def __call__(self, *args: Any) -> RemoteSpan:
+        if os.getpid() != self.parent and tracemalloc.is_tracing():
+            # fork()ed workers inherit tracemalloc, but worker spans carry no
+            # allocation stats, so don't pay for it there
+            tracemalloc.stop()
+        start = time.perf_counter_ns()
+        result = self.func(*args)
+        return RemoteSpan(result, os.getpid(), start, time.perf_counter_ns(), round(rss_mb(), 1))
+
+
+def remote(func: Callable[..., Any]) -> Callable[..., Any]:
+    """``func`` for a process pool, timed in the worker while tracing.
+
+    ``perf_counter_ns`` is the system-wide monotonic clock on Linux, so
+    worker timestamps line up with the parent's.
+    """
+    return func if _ACTIVE is None else _Timed(func)
+
+
+def collect(value: Any, name: str, cat: str = "stage", **args: Any) -> Any:
+    """Result of a ``remote`` call; records its worker-side span while tracing."""
+    if not isinstance(value, RemoteSpan):
+        return value
+    if _ACTIVE is not None:
+        _ACTIVE.complete(name, cat, value.start_ns, value.end_ns, pid=value.pid, tid=value.pid,
+                         args={**args, "rss_mb": value.rss_mb})
+    return value.result
+
+
+def profile_path(trace_path: str, kind: str) -> str:
+    """Where ``profiler(kind)`` output goes next to a trace file."""
+    return os.path.splitext(trace_path)[0] + PROFILE_SUFFIX[kind]
+
+
+@contextlib.contextmanager
+def profiler(kind: Optional[str], path: str) -> Iterator[None]:
+    """Capture a cProfile or pyinstrument profile of the enclosed block into ``path``.
+
+    ``kind=None`` profiles nothing. pyinstrument is optional and imported
+    only when requested.
+    """
+    if kind is None:
+        yield
+        return
+    if kind not in PROFILERS:
+        raise ValueError(f"Unknown profiler {kind!r}; expected one of {PROFILERS}")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if kind == "cprofile":
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            prof.dump_stats(path)
+        return
+    try:
+        from pyinstrument import Profiler
+    except ImportError as e:
+        raise ImportError("pyinstrument profiling needs pyinstrument: pip install pyinstrument") from e
+    prof = Profiler()
+    prof.start()
+    try:
+        yield
+    finally:
+        prof.stop()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(prof.output_html())
+
+
+def summary_lines(tracer: Tracer) -> List[str]:
+    """One line per span, indented by nesting (per thread), for the console."""
+    lines: List[str] = []
+    local = [e for e in tracer.spans() if e["pid"] == os.getpid()]
+    for tid in dict.fromkeys(e["tid"] for e in local):
+        open_ends: List[float] = []
+        for e in (e for e in local if e["tid"] == tid):
+            while open_ends and e["ts"] >= open_ends[-1]:
+                open_ends.pop()
+            indent = "  " * len(open_ends)
+            args = e["args"]
+            memory = f"  traced peak {args['traced_peak_mb']:>8.1f} MB" if "traced_peak_mb" in args else ""
+            seconds = e["dur"] / 1e6 - args.get("tracer_overhead_ms", 0.0) / 1e3
+            lines.append(f"  {indent}{e['name']:<{36 - len(indent)}} {seconds:>8.3f}s  "
+                         f"RSS {args.get('rss_mb', 0):>7,.0f} MB{memory}")
+            open_ends.append(e["ts"] + e["dur"])
+    workers = [e for e in tracer.spans() if e["pid"] != os.getpid()]
+    if workers:
+        busy = sum(e["dur"] for e in workers) / 1e6
+        lines.append(f"  + {len(workers)} worker spans on {len({e['pid'] for e in workers})} "
+                     f"processes ({busy:.3f}s busy)")
+    return lines
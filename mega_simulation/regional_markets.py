@@ -3,18 +3,19 @@
 NHP Phase 9 — Regional Market Deep Dives
 6 regions analyzed: India, SEA, MENA, Africa, LATAM, Europe
 
-Run: python mega_simulation/regional_markets.py
+Run: python mega_simulation/regional_markets.py [--render-profile draft|web|print]
 """
-import sys, os, time
+import argparse, sys, os, time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from datetime import datetime
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
 
-CHART_DPI = 300
+from mega_simulation.render import (
+    ChartJob, add_profile_argument, asset_dir, pyplot, render_charts, report_path, save_figure,
+    set_render_profile,
+)
+
 
 def _wm(ax):
     ax.text(0.99, 0.01, "NHP Protocol v2.0", transform=ax.transAxes,
@@ -116,12 +117,19 @@ def simulate_regions():
     return results
 
 
-def generate_charts(results, out_dir):
+def generate_charts(results, out_dir, workers=1):
     os.makedirs(out_dir, exist_ok=True)
-    plt.style.use("seaborn-v0_8-darkgrid")
-    saved = []
+    return render_charts([
+        ChartJob(_chart_opportunity, (results, out_dir)),
+        ChartJob(_chart_market_size, (results, out_dir)),
+        ChartJob(_chart_income_pct, (results, out_dir)),
+        ChartJob(_chart_strategy_matrix, (results, out_dir)),
+    ], workers)
+
 
-    # 1. Opportunity Score
+def _chart_opportunity(results, out_dir):
+    """Chart 1: Opportunity Score."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
     names = [r["name"] for r in results]
     scores = [r["score"] for r in results]
@@ -134,10 +142,15 @@ def generate_charts(results, out_dir):
     ax.set_title("NHP Regional Opportunity Score", fontsize=14, fontweight="bold")
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "reg_01_opportunity.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # 2. Market Size + Revenue
+
+def _chart_market_size(results, out_dir):
+    """Chart 2: Market Size + Revenue."""
+    plt = pyplot()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    names = [r["name"] for r in results]
     devices = [r["nhp_devices"]/1e6 for r in results]
     revenue = [r["platform_monthly"]/1e6 for r in results]
     ax1.bar(names, devices, color="#3498DB", edgecolor="white")
@@ -154,10 +167,15 @@ def generate_charts(results, out_dir):
     fig.suptitle("Regional Market Size & Revenue", fontsize=14, fontweight="bold", y=1.02)
     plt.tight_layout()
     p = os.path.join(out_dir, "reg_02_market_size.png")
-    fig.savefig(p, dpi=CHART_DPI, bbox_inches="tight"); plt.close(fig); saved.append(p)
+    save_figure(fig, p, bbox_inches="tight"); plt.close(fig)
+    return p
 
-    # 3. Income as % of avg salary
+
+def _chart_income_pct(results, out_dir):
+    """Chart 3: Income as % of avg salary."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
+    names = [r["name"] for r in results]
     pcts = [r["pct_of_income"] for r in results]
     colors = ["#2ECC71" if p >= 3 else "#F39C12" if p >= 1 else "#E74C3C" for p in pcts]
     bars = ax.bar(names, pcts, color=colors, edgecolor="white")
@@ -168,9 +186,13 @@ def generate_charts(results, out_dir):
     ax.set_ylabel("% of Monthly Income")
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "reg_03_income_pct.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # 4. Strategy Matrix
+
+def _chart_strategy_matrix(results, out_dir):
+    """Chart 4: Strategy Matrix."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 7))
     wifi_pens = [r["wifi_penetration"]*100 for r in results]
     incomes = [r["pct_of_income"] for r in results]
@@ -184,9 +206,8 @@ def generate_charts(results, out_dir):
     ax.set_title("Regional Strategy Matrix (bubble size = smartphone base)", fontsize=14, fontweight="bold")
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "reg_04_strategy_matrix.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
-
-    return saved
+    save_figure(fig, p); plt.close(fig)
+    return p
 
 
 def generate_report(results, charts, total):
@@ -196,10 +217,10 @@ def generate_report(results, charts, total):
     L.append("# تحليل الأسواق الإقليمية لـ NHP")
     L.append(f"\n**📅 {now} | {total} scenarios | v2.0**\n---\n")
 
-    L.append(f"![Opportunity](../../assets/regional/{os.path.basename(charts[0])})\n")
-    L.append(f"![Market Size](../../assets/regional/{os.path.basename(charts[1])})\n")
-    L.append(f"![Income %](../../assets/regional/{os.path.basename(charts[2])})\n")
-    L.append(f"![Strategy](../../assets/regional/{os.path.basename(charts[3])})\n")
+    L.append(f"![Opportunity](../../{charts[0]})\n")
+    L.append(f"![Market Size](../../{charts[1]})\n")
+    L.append(f"![Income %](../../{charts[2]})\n")
+    L.append(f"![Strategy](../../{charts[3]})\n")
 
     for r in sorted(results, key=lambda x: x["score"], reverse=True):
         emoji = "🟢" if r["score"] >= 80 else "🟡" if r["score"] >= 60 else "🔴"
@@ -233,7 +254,10 @@ def generate_report(results, charts, total):
     return "\n".join(L)
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NHP Phase 9 — Regional Market Deep Dives")
+    add_profile_argument(parser)
+    set_render_profile(parser.parse_args(argv).render_profile)
     print("=" * 60)
     print("  NHP Phase 9 — Regional Market Deep Dives")
     print("=" * 60, "\n")
@@ -241,14 +265,15 @@ def main():
 
     results = simulate_regions()
     total = len(results) * 10  # 10 metrics per region
-    charts = generate_charts(results, "assets/regional")
+    charts = generate_charts(results, asset_dir("assets/regional"))
     for c in charts: print(f"  ✅ {c}")
 
     report = generate_report(results, charts, total)
-    os.makedirs("output", exist_ok=True)
-    with open("output/regional_markets.md", "w", encoding="utf-8") as f:
+    path = report_path("output/regional_markets.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
         f.write(report)
-    print(f"  ✅ output/regional_markets.md")
+    print(f"  ✅ {path}")
 
     elapsed = time.time() - start
     print(f"\n{'='*60}")
@@ -0,0 +1,382 @@
+"""
+NHP Mega Simulation — Render Scheduler
+Dispatches chart functions to a process pool and collects the saved file
+paths. Every chart function in the package takes its input data plus an
+output directory and returns the path it wrote, so one chart is simply a
+picklable ``ChartJob(function, args)``. Workers use the Agg backend and the
+shared chart style, and paths come back in submission order. Charts whose
+inputs are unchanged since the last run are served from the chart cache
+(see ``chart_cache.py``) instead of being re-rendered.
+
+matplotlib is imported on first use through ``pyplot()``, so the compute
+modules that import this one (and their chart functions) stay cheap to
+import for numbers-only callers.
+
+Output quality is a ``RenderProfile``: ``print`` (300 DPI, the published
+assets), ``web`` (150 DPI) or ``draft`` (72 DPI, fastest PNG compression)
+for iterating on parameters. Chart functions save through ``save_figure``,
+which applies the active profile; worker processes inherit it and the
+chart cache keys include it. Entry points pick their chart directory with
+``asset_dir`` and their report location with ``report_path``, which send
+every profile but ``print`` to ``assets/_<profile>/`` and
+``output/_<profile>/`` so previews never overwrite the published charts
+or the reports that embed them.
+
+Charts drawn many times with the same layout (one set per company) build
+their figure once per process through ``figure_template`` and then only
+update artist data (bar heights, label text and positions, titles) before
+each save.
+
+Inside ``render_session()`` every ``render_charts`` call shares one pool
+and chart cache, so several entry points run in one process (``run_all.py``)
+start the workers once.
+"""
+import argparse
+import contextlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, Hashable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from mega_simulation.chart_cache import ChartCache, Fingerprint, job_id
+from mega_simulation.profiling import collect, remote, span
+from mega_simulation.sweep import resolve_workers
+
+CHART_STYLE: str = "seaborn-v0_8-darkgrid"
+CHART_RC: Dict[str, Any] = {
+    "font.family": "DejaVu Sans",
+    "font.size": 10,
+}
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """Output quality of saved charts.
+
+    Args:
+        name: Profile name used on the command line.
+        dpi: Raster resolution of the saved PNG.
+        png_compress_level: zlib level for the PNG (1 = fastest, 9 =
+            smallest); ``None`` keeps Pillow's default.
+    """
+    name: str
+    dpi: int
+    png_compress_level: Optional[int] = None
+
+
+RENDER_PROFILES: Dict[str, RenderProfile] = {
+    "draft": RenderProfile("draft", 72, png_compress_level=1),
+    "web": RenderProfile("web", 150),
+    "print": RenderProfile("print", 300),
+}
+DEFAULT_PROFILE: str = "print"
+PUBLISHED_PROFILE: str = "print"        # The profile whose charts are the published assets
+ASSETS_ROOT: str = "assets"
+OUTPUT_ROOT: str = "output"
+
+_PROFILE: RenderProfile = RENDER_PROFILES[DEFAULT_PROFILE]
+
+
+def render_profile() -> RenderProfile:
+    """The profile charts in this process are saved with."""
+    return _PROFILE
+
+
+def set_render_profile(profile: Union[str, RenderProfile]) -> RenderProfile:
+    """Select the output profile for this process (and its render workers)."""
+    global _PROFILE
+    if isinstance(profile, str):
+        if profile not in RENDER_PROFILES:
+            raise ValueError(f"Unknown render profile {profile!r}; expected one of {tuple(RENDER_PROFILES)}")
+        profile = RENDER_PROFILES[profile]
+    _PROFILE = profile
+    return profile
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    """``--render-profile`` for an entry point's argument parser."""
+    parser.add_argument("--render-profile", choices=tuple(RENDER_PROFILES), default=DEFAULT_PROFILE,
+                        help="chart quality: draft (72 DPI, fast) / web (150 DPI) / print (300 DPI)")
+
+
+def _profile_path(path: str, root: str) -> str:
+    """``path`` under ``root``, moved to ``root/_<profile>/`` for unpublished profiles."""
+    name = _PROFILE.name
+    rel = os.path.relpath(path, root)
+    if name == PUBLISHED_PROFILE or rel.startswith(os.pardir):
+        return path
+    return os.path.normpath(os.path.join(root, f"_{name}", rel))
+
+
+def asset_dir(path: str) -> str:
+    """Chart directory for the active profile, given the published one.
+
+    ``assets/nsc`` stays as is under the ``print`` profile and becomes
+    ``assets/_draft/nsc`` under ``draft``. Paths outside ``assets/`` are
+    returned unchanged.
+    """
+    return _profile_path(path, ASSETS_ROOT)
+
+
+def report_path(path: str) -> str:
+    """Report file or directory for the active profile, given the published one.
+
+    ``output/nsc.md`` becomes ``output/_draft/nsc.md`` under ``draft``, one
+    level deeper, like the charts it links to. Paths outside ``output/``
+    are returned unchanged.
+    """
+    return _profile_path(path, OUTPUT_ROOT)
+
+
+def save_figure(fig: Any, path: str, **kwargs: Any) -> str:
+    """``fig.savefig`` at the active profile's resolution and compression."""
+    profile = _PROFILE
+    if profile.png_compress_level is not None:
+        kwargs.setdefault("pil_kwargs", {"compress_level": profile.png_compress_level})
+    fig.savefig(path, dpi=profile.dpi, **kwargs)
+    return path
+
+
+def pyplot() -> Any:
+    """``matplotlib.pyplot`` on the Agg backend, imported on first use."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+@dataclass
+class ChartJob:
+    """One chart render: ``func(*args, **kwargs)`` returning the saved path.
+
+    Args:
+        func: Module-level chart function (must be importable to pickle).
+        args: Positional arguments ``(data..., out_dir)``; by convention the
+            last one is the output directory.
+        kwargs: Keyword arguments.
+    """
+    func: Callable[..., str]
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return job_id(self.func)
+
+    @property
+    def out_dir(self) -> str:
+        return self.args[-1]
+
+    def cache_key(self) -> str:
+        """Hash of the chart code, the data it reads, its arguments, style and render profile."""
+        import matplotlib
+
+        fp = Fingerprint().update_function(self.func)
+        fp.update(self.args)
+        fp.update(self.kwargs)
+        fp.update({"style": CHART_STYLE, "rc": CHART_RC, "matplotlib": matplotlib.__version__,
+                   "profile": _PROFILE})
+        return fp.hexdigest()
+
+    def __call__(self) -> str:
+        return self.func(*self.args, **self.kwargs)
+
+
+@dataclass
+class FigureTemplate:
+    """A figure kept open for reuse, plus the artists its chart updates.
+
+    Args:
+        fig: The figure (never closed while the process lives).
+        axes: Its axes, in the order the chart function expects.
+        artists: Named artists or artist lists, e.g. ``{"bars": ...}``.
+    """
+    fig: Any
+    axes: Tuple[Any, ...]
+    artists: Dict[str, Any] = field(default_factory=dict)
+    subplotpars: Dict[str, float] = field(init=False)
+
+    def __post_init__(self) -> None:
+        pars = self.fig.subplotpars
+        self.subplotpars = {name: getattr(pars, name)
+                            for name in ("left", "right", "bottom", "top", "wspace", "hspace")}
+
+    def __getitem__(self, name: str) -> Any:
+        return self.artists[name]
+
+    def save(self, path: str, **kwargs: Any) -> str:
+        """Rescale to the updated data, re-run the layout and save."""
+        for ax in self.axes:
+            ax.relim()
+            ax.autoscale_view()
+        # tight_layout starts from the current margins, so start every save
+        # from the fresh figure's to get the same layout as a new figure
+        self.fig.subplots_adjust(**self.subplotpars)
+        # Same margins as fig.tight_layout(), but without leaving a layout
+        # engine on the figure, which costs savefig an extra dry-run draw
+        from matplotlib.layout_engine import TightLayoutEngine
+        TightLayoutEngine().execute(self.fig)
+        return save_figure(self.fig, path, **kwargs)
+
+
+_TEMPLATES: Dict[Hashable, FigureTemplate] = {}
+
+
+def figure_template(key: Hashable, build: Callable[[], FigureTemplate]) -> FigureTemplate:
+    """This process's template for ``key``, built by ``build()`` on first use.
+
+    Templates are built under the shared chart style (``apply_style``).
+    """
+    template = _TEMPLATES.get(key)
+    if template is None:
+        template = _TEMPLATES[key] = build()
+    return template
+
+
+def update_bars(bars: Sequence[Any], labels: Sequence[Any], values: Sequence[float],
+                texts: Sequence[str], offset: float) -> None:
+    """Set bar heights and move each value label to ``offset`` above its bar."""
+    for bar, label, value, text in zip(bars, labels, values, texts):
+        bar.set_height(value)
+        label.set_position((bar.get_x() + bar.get_width() / 2, value + offset))
+        label.set_text(text)
+
+
+def apply_style() -> None:
+    """Apply the shared chart style to the current process."""
+    plt = pyplot()
+    plt.style.use(CHART_STYLE)
+    plt.rcParams.update(CHART_RC)
+
+
+def _init_worker(profile: RenderProfile) -> None:
+    """Process-pool initializer: the parent's render profile and the chart style."""
+    set_render_profile(profile)
+    apply_style()
+
+
+def _run_job(job: ChartJob) -> str:
+    """Process-pool entry point (module-level so it pickles)."""
+    return job()
+
+
+def _render_serial(jobs: List[ChartJob]) -> List[str]:
+    apply_style()
+    paths = []
+    for job in jobs:
+        with span(job.name, "chart"):
+            paths.append(job())
+    return paths
+
+
+def _render(jobs: List[ChartJob], workers: Optional[int]) -> List[str]:
+    workers = min(resolve_workers(workers), len(jobs))
+    if workers <= 1:
+        return _render_serial(jobs)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(_PROFILE,)) as pool:
+        results = pool.map(remote(_run_job), jobs)
+        return [collect(result, job.name, "chart") for job, result in zip(jobs, results)]
+
+
+def _render_cached(
+    jobs: List[ChartJob],
+    store: Optional[ChartCache],
+    render: Callable[[List[ChartJob]], List[str]],
+) -> List[str]:
+    """``render`` the jobs that ``store`` has no current file for."""
+    paths: List[Optional[str]] = [None] * len(jobs)
+    keys: List[str] = []
+    if store is not None:
+        with span("chart cache lookup", "chart"):
+            keys = [job.cache_key() for job in jobs]
+            paths = [store.lookup(job.out_dir, job.name, key) for job, key in zip(jobs, keys)]
+
+    pending = [i for i, path in enumerate(paths) if path is None]
+    for i, path in zip(pending, render([jobs[i] for i in pending])):
+        paths[i] = path
+        if store is not None:
+            store.store(jobs[i].out_dir, jobs[i].name, keys[i], path)
+    if store is not None:
+        store.save()
+    return paths
+
+
+class RenderSession:
+    """One render pool and chart cache shared by every ``render_charts`` call.
+
+    Entry points rendering inside ``render_session()`` skip their own pool
+    start-up: the workers are forked once, keep matplotlib imported and
+    their figure templates built, and chart manifests are read once.
+    ``render_charts`` may be called from several threads at once; with a
+    single worker, renders run in this process one call at a time.
+
+    Args:
+        workers: Pool size; 1 renders in-process, ``None``/0 uses all cores.
+        cache: Use the chart cache (``False`` re-renders everything).
+    """
+
+    def __init__(self, workers: Optional[int] = 1, cache: bool = True) -> None:
+        self.workers = resolve_workers(workers)
+        self.cache = cache
+        self.store = ChartCache()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(_PROFILE,))
+            # Fork every worker now, from this thread, before callers start
+            # threads of their own
+            self._pool.submit(int).result()
+
+    def render(self, jobs: List[ChartJob]) -> List[str]:
+        if self._pool is None:
+            with self._lock:
+                return _render_serial(jobs)
+        futures = [self._pool.submit(remote(_run_job), job) for job in jobs]
+        return [collect(future.result(), job.name, "chart") for job, future in zip(jobs, futures)]
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_SESSION: Optional[RenderSession] = None
+
+
+@contextlib.contextmanager
+def render_session(workers: Optional[int] = 1, cache: bool = True) -> Iterator[RenderSession]:
+    """Route every ``render_charts`` call in the enclosed block to one ``RenderSession``."""
+    global _SESSION
+    previous = _SESSION
+    _SESSION = RenderSession(workers, cache)
+    try:
+        yield _SESSION
+    finally:
+        _SESSION.close()
+        _SESSION = previous
+
+
+def render_charts(
+    jobs: Sequence[ChartJob],
+    workers: Optional[int] = 1,
+    cache: bool = True,
+) -> List[str]:
+    """Render charts, optionally across a process pool.
+
+    Args:
+        jobs: Charts to render; output directories must already exist.
+        workers: Process count; 1 renders in-process, ``None``/0 uses all cores.
+            Ignored inside ``render_session()``, which brings its own pool.
+        cache: Skip charts whose cache key matches the output directory's
+            manifest and whose file still exists.
+
+    Returns:
+        Saved file paths, in the same order as ``jobs``.
+    """
+    jobs = list(jobs)
+    session = _SESSION
+    if session is not None:
+        return _render_cached(jobs, session.store if cache and session.cache else None, session.render)
+    return _render_cached(jobs, ChartCache() if cache else None, lambda pending: _render(pending, workers))
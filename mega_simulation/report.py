@@ -2,11 +2,13 @@
 NHP Mega Simulation — Bilingual Report Generator
 Produces a comprehensive Arabic/English report from all scenario results.
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, Iterable, List, Mapping, Optional, Sequence
 import os
 from datetime import datetime
 
 from mega_simulation.data import VARIANT_NAMES, VARIANT_NAMES_AR, VARIANT_EMOJIS
+from mega_simulation.results import CategoryResults, ResultStore
+from mega_simulation.sketch import StreamingSummary, percentile_label
 
 
 def _fmt(val: float) -> str:
@@ -23,16 +25,19 @@ def _num(val: float) -> str:
 
 
 def generate_mega_report(
-    all_results: Dict[str, List[Dict[str, Any]]],
+    all_results: ResultStore,
     total_scenarios: int,
     chart_paths: List[str],
+    sections: Optional[Dict[str, List[str]]] = None,
 ) -> str:
     """Build the full bilingual mega report.
 
     Args:
-        all_results: Dict of category letter -> results list.
+        all_results: Columnar results per category letter.
         total_scenarios: Total number of scenarios computed.
         chart_paths: Paths to generated charts.
+        sections: Already-rendered category sections to reuse (e.g. from
+            the incremental pipeline); missing categories are rendered.
 
     Returns:
         Complete report as markdown string.
@@ -51,173 +56,248 @@ def generate_mega_report(
     lines.append("---")
     lines.append("")
 
-    # ── Category A ───────────────────────────────────────────
+    # ── Categories A → M ─────────────────────────────────────
+    for cat, results in all_results.items():
+        if sections is not None and cat in sections:
+            lines.extend(sections[cat])
+        else:
+            lines.extend(report_section(cat, results))
+
+    # ── Charts ───────────────────────────────────────────────
+    lines.append("---")
+    lines.append("")
+    lines.append("## 📊 Generated Charts / الرسوم البيانية")
+    lines.append("")
+    for p in chart_paths:
+        lines.append(f"- ✅ `{p}`")
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+    lines.append(f"*NHP Mega Simulation v2.0 — {now}*")
+    lines.append("*الحوسبة في يد الجميع — Computing in Everyone's Hands*")
+
+    return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CATEGORY SECTIONS
+# ═══════════════════════════════════════════════════════════════
+
+def _section_a(results: CategoryResults) -> List[str]:
+    """Category A — Computing Power per Manufacturer."""
+    lines: List[str] = []
     lines.append("## A — Computing Power per Manufacturer / القوة الحسابية لكل مصنّع")
     lines.append("")
     lines.append("| Manufacturer / المصنّع | Variant | Active Devices | H100 Equiv | Total TOPS |")
     lines.append("|---|---|---|---|---|")
-    for r in all_results["A"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         lines.append(f"| {r['manufacturer']} | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"{_num(r['active_devices'])} | **{_num(r['h100_equivalent'])}** | {_num(r['total_tops'])} |")
     lines.append("")
+    return lines
 
-    # ── Category B — Summary (moderate only) ─────────────────
+
+def _section_b(results: CategoryResults) -> List[str]:
+    """Category B — NHP vs Cloud Providers (moderate variant only)."""
+    lines: List[str] = []
     lines.append("## B — NHP vs Cloud Providers / مقارنة مع مزودي السحابة")
     lines.append("*(Moderate variant — 40% coverage)*")
     lines.append("")
     lines.append("| Manufacturer | Cloud Provider | Annual Savings | Savings % |")
     lines.append("|---|---|---|---|")
-    for r in all_results["B"]:
-        if r["variant"] == "Moderate":
-            lines.append(f"| {r['manufacturer']} | {r['cloud_short']} | "
-                         f"**{_fmt(r['annual_savings'])}** | {r['savings_pct']:.0f}% |")
+    for r in results.where(variant="Moderate"):
+        lines.append(f"| {r['manufacturer']} | {r['cloud_short']} | "
+                     f"**{_fmt(r['annual_savings'])}** | {r['savings_pct']:.0f}% |")
     lines.append("")
+    return lines
+
 
-    # ── Category C ───────────────────────────────────────────
+def _section_c(results: CategoryResults) -> List[str]:
+    """Category C — User Income by Region."""
+    lines: List[str] = []
     lines.append("## C — User Income by Region / دخل المستخدم حسب المنطقة")
     lines.append("")
     lines.append("| Region / المنطقة | Variant | Monthly Net | Annual Net | % of Avg Income |")
     lines.append("|---|---|---|---|---|")
-    for r in all_results["C"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         lines.append(f"| {r['region']} ({r['region_ar']}) | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"${r['monthly_net']:.2f} | ${r['annual_net']:.2f} | {r['income_pct_of_avg']:.2f}% |")
     lines.append("")
+    return lines
+
 
-    # ── Category D ───────────────────────────────────────────
+def _section_d(results: CategoryResults) -> List[str]:
+    """Category D — Manufacturer AI Savings vs AWS."""
+    lines: List[str] = []
     lines.append("## D — Manufacturer AI Savings vs AWS / توفير المصنّع مقارنة بـ AWS")
     lines.append("")
     lines.append("| Manufacturer / المصنّع | Variant | Annual Savings | Coverage |")
     lines.append("|---|---|---|---|")
-    for r in all_results["D"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         lines.append(f"| {r['manufacturer']} | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"**{_fmt(r['annual_savings'])}** | {r['coverage_pct']:.0f}% |")
     lines.append("")
+    return lines
+
 
-    # ── Category E ───────────────────────────────────────────
+def _section_e(results: CategoryResults) -> List[str]:
+    """Category E — Environmental Impact."""
+    lines: List[str] = []
     lines.append("## E — Environmental Impact / الأثر البيئي")
     lines.append("")
     lines.append("| Manufacturer | Variant | CO₂ Saved (net) | Cars Removed | Phone CO₂ Added |")
     lines.append("|---|---|---|---|---|")
-    for r in all_results["E"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         lines.append(f"| {r['manufacturer']} | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"**{_num(r['co2_saved_net'])} tons** | {_num(r['cars_equivalent'])} | {_num(r['co2_added_phones'])} tons |")
     lines.append("")
+    return lines
 
-    # ── Category F ───────────────────────────────────────────
+
+def _section_f(results: CategoryResults) -> List[str]:
+    """Category F — Network Alliance Power."""
+    lines: List[str] = []
     lines.append("## F — Network Alliance Power / قوة التحالفات")
     lines.append("")
     lines.append("| Alliance / التحالف | Variant | Active Devices | H100 Equiv |")
     lines.append("|---|---|---|---|")
-    for r in all_results["F"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         lines.append(f"| {r['alliance']} | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"{_num(r['total_active_devices'])} | **{_num(r['h100_equivalent'])}** |")
     lines.append("")
+    return lines
 
-    # ── Category G ───────────────────────────────────────────
+
+def _section_g(results: CategoryResults) -> List[str]:
+    """Category G — AI Task Feasibility."""
+    lines: List[str] = []
     lines.append("## G — AI Task Feasibility / جدوى المهام الحسابية")
     lines.append("")
     lines.append("| Task / المهمة | Variant | Score | Capable? | Latency-Sensitive? | Tasks/Day |")
     lines.append("|---|---|---|---|---|---|")
-    for r in all_results["G"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         capable = "✅" if r["device_capable"] else "❌"
         latency = "⚡ Yes" if r["latency_sensitive"] else "No"
         lines.append(f"| {r['task_name']} ({r['task_name_ar']}) | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"**{r['feasibility_score']:.0f}/100** | {capable} | {latency} | {_num(r['tasks_per_day'])} |")
     lines.append("")
+    return lines
+
 
-    # ── Category H ───────────────────────────────────────────
+def _section_h(results: CategoryResults) -> List[str]:
+    """Category H — Battery Impact."""
+    lines: List[str] = []
     lines.append("## H — Battery Impact / تأثير البطارية")
     lines.append("")
     lines.append("| Device Tier | Variant | Life w/ NHP (yrs) | Life w/o NHP (yrs) | Reduction (months) |")
     lines.append("|---|---|---|---|---|")
-    for r in all_results["H"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         lines.append(f"| {r['tier']} | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"{r['battery_life_with_nhp_years']:.1f} | {r['battery_life_without_nhp_years']:.1f} | "
                      f"{r['life_reduction_months']:.1f} |")
     lines.append("")
+    return lines
+
 
-    # ── Category I ───────────────────────────────────────────
+def _section_i(results: CategoryResults) -> List[str]:
+    """Category I — Market Size."""
+    lines: List[str] = []
     lines.append("## I — Market Size / حجم السوق")
     lines.append("")
     lines.append("| Region / المنطقة | Variant | Total Smartphones | NHP Devices | Annual Revenue |")
     lines.append("|---|---|---|---|---|")
-    for r in all_results["I"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         lines.append(f"| {r['region']} ({r['region_ar']}) | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"{_num(r['total_smartphones'])} | {_num(r['nhp_devices'])} | {_fmt(r['annual_platform_revenue'])} |")
     lines.append("")
+    return lines
+
 
-    # ── Category J ───────────────────────────────────────────
+def _section_j(results: CategoryResults) -> List[str]:
+    """Category J — Token Economics."""
+    lines: List[str] = []
     lines.append("## J — Token Economics / اقتصاد التوكن")
     lines.append("")
     lines.append("| Scale | Variant | Monthly GPU Hours | Monthly Flow | Platform Rev/mo | Market Cap (est) |")
     lines.append("|---|---|---|---|---|---|")
-    for r in all_results["J"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         lines.append(f"| {r['scale_label']} | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"{_num(r['monthly_gpu_hours'])} | {_fmt(r['total_monthly_flow'])} | "
                      f"{_fmt(r['platform_revenue_monthly'])} | {_fmt(r['market_cap_conservative'])}–{_fmt(r['market_cap_aggressive'])} |")
     lines.append("")
+    return lines
+
 
-    # ── Category K ───────────────────────────────────────────
+def _section_k(results: CategoryResults) -> List[str]:
+    """Category K — Competitive Positioning."""
+    lines: List[str] = []
     lines.append("## K — Competitive Positioning / الموقع التنافسي")
     lines.append("")
     lines.append("| Competitor | Variant | NHP TOPS | Comp TOPS | Power Ratio | NHP Advantages |")
     lines.append("|---|---|---|---|---|---|")
-    for r in all_results["K"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         ratio_str = f"{r['power_ratio']:.1f}×" if r['power_ratio'] < 1000 else "1000×+"
         advs = ", ".join(r["nhp_advantages"]) if r["nhp_advantages"] else "—"
         lines.append(f"| {r['competitor']} | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"{_num(r['nhp_total_tops'])} | {_num(r['comp_total_tops'])} | **{ratio_str}** | {advs} |")
     lines.append("")
+    return lines
+
 
-    # ── Category L ───────────────────────────────────────────
+def _section_l(results: CategoryResults) -> List[str]:
+    """Category L — Breakeven Analysis."""
+    lines: List[str] = []
     lines.append("## L — Breakeven Analysis / تحليل نقطة التعادل")
     lines.append("")
     lines.append("| Manufacturer | Variant | Dev Cost | Monthly Savings | Breakeven (mo) | 5yr ROI |")
     lines.append("|---|---|---|---|---|---|")
-    for r in all_results["L"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         be = f"{r['breakeven_months']:.0f}" if r['breakeven_months'] < 999 else "∞"
         lines.append(f"| {r['manufacturer']} | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"{_fmt(r['development_cost'])} | {_fmt(r['monthly_savings'])} | "
                      f"**{be}** | {r['roi_5yr_pct']:.0f}% |")
     lines.append("")
+    return lines
 
-    # ── Category M ───────────────────────────────────────────
+
+def _section_m(results: CategoryResults) -> List[str]:
+    """Category M — Risk Analysis."""
+    lines: List[str] = []
     lines.append("## M — Risk Analysis / تحليل المخاطر")
     lines.append("")
     lines.append("| Risk / المخاطرة | Variant | Impact | Probability | Expected Loss | Severity |")
     lines.append("|---|---|---|---|---|---|")
-    for r in all_results["M"]:
+    for r in results:
         vi = VARIANT_NAMES.index(r["variant"])
         lines.append(f"| {r['risk_name']} ({r['risk_name_ar']}) | {VARIANT_EMOJIS[vi]} {r['variant']} | "
                      f"{r['impact_pct']:.0f}% | {r['probability_pct']:.0f}% | "
                      f"{_fmt(r['expected_loss'])} | {r['severity']} |")
     lines.append("")
+    return lines
 
-    # ── Charts ───────────────────────────────────────────────
-    lines.append("---")
-    lines.append("")
-    lines.append("## 📊 Generated Charts / الرسوم البيانية")
-    lines.append("")
-    for p in chart_paths:
-        lines.append(f"- ✅ `{p}`")
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-    lines.append(f"*NHP Mega Simulation v2.0 — {now}*")
-    lines.append("*الحوسبة في يد الجميع — Computing in Everyone's Hands*")
 
-    return "\n".join(lines)
+REPORT_SECTIONS: Dict[str, Callable[[CategoryResults], List[str]]] = {
+    "A": _section_a, "B": _section_b, "C": _section_c, "D": _section_d,
+    "E": _section_e, "F": _section_f, "G": _section_g, "H": _section_h,
+    "I": _section_i, "J": _section_j, "K": _section_k, "L": _section_l,
+    "M": _section_m,
+}
+
+
+def report_section(category: str, results: CategoryResults) -> List[str]:
+    """Markdown lines for one category's report section."""
+    return REPORT_SECTIONS[category](results)
 
 
 def save_mega_report(report_text: str, output_dir: str = "output") -> str:
@@ -237,14 +317,54 @@ def save_mega_report(report_text: str, output_dir: str = "output") -> str:
     return path
 
 
+def summary_section(
+    summaries: Mapping[str, Mapping[str, StreamingSummary]],
+    percentiles: Sequence[float] = (5, 50, 95),
+) -> List[str]:
+    """Aggregate table for streamed sweeps too large to list row by row.
+
+    Args:
+        summaries: Category -> column -> running summary (``sinks.SummarySink``).
+        percentiles: Percentile columns to show.
+
+    Returns:
+        Markdown lines.
+    """
+    lines: List[str] = []
+    lines.append("## Streaming Summary / ملخص المحاكاة المتدفقة")
+    lines.append("")
+    labels = [percentile_label(p).upper() for p in percentiles]
+    lines.append("| Category | Column | Rows | Mean | Min | " + " | ".join(labels) + " | Max |")
+    lines.append("|---|---|---|---|---|" + "---|" * len(labels) + "---|")
+    for cat, columns in summaries.items():
+        for name, s in columns.items():
+            qs = " | ".join(f"{s.quantile(p / 100.0):,.4g}" for p in percentiles)
+            lines.append(f"| {cat} | {name} | {_num(s.count)} | {s.mean:,.4g} | {s.min:,.4g} | {qs} | {s.max:,.4g} |")
+    lines.append("")
+    return lines
+
+
+def csv_fieldnames(schemas: Iterable[Iterable[str]]) -> List[str]:
+    """Sorted union of column names across category schemas (the CSV header)."""
+    all_keys: set = set()
+    for schema in schemas:
+        all_keys.update(schema)
+    return sorted(all_keys)
+
+
+def csv_row(r: Dict[str, Any]) -> Dict[str, Any]:
+    """One result row as written to the CSV (lists stringified)."""
+    return {k: str(v) if isinstance(v, list) else v for k, v in r.items()}
+
+
 def save_csv_export(
-    all_results: Dict[str, List[Dict[str, Any]]],
+    all_results: ResultStore,
     output_dir: str = "output",
 ) -> str:
     """Export all results as CSV for further analysis.
 
     Args:
-        all_results: Dict of category -> results.
+        all_results: Columnar results per category.
         output_dir: Output directory.
 
     Returns:
@@ -255,23 +375,14 @@ def save_csv_export(
     os.makedirs(output_dir, exist_ok=True)
     path = os.path.join(output_dir, "mega_scenarios_all.csv")
 
-    # Collect all unique keys
-    all_keys: set = set()
-    for cat_results in all_results.values():
-        for r in cat_results:
-            all_keys.update(r.keys())
-
-    all_keys_sorted = sorted(all_keys)
+    # Collect all unique keys from the category schemas
+    all_keys_sorted = csv_fieldnames(c.schema for c in all_results.values())
 
     with open(path, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=all_keys_sorted, extrasaction="ignore")
         writer.writeheader()
         for cat_results in all_results.values():
             for r in cat_results:
-                # Convert lists to strings for CSV
-                row = {}
-                for k, v in r.items():
-                    row[k] = str(v) if isinstance(v, list) else v
-                writer.writerow(row)
+                writer.writerow(csv_row(r))
 
     return path
@@ -0,0 +1,216 @@
+"""
+NHP Mega Simulation — Columnar Result Store
+Typed, column-oriented containers for scenario results. Each category keeps
+one NumPy array per field (its schema) instead of a list of per-scenario
+dicts, with hashed lookups by (manufacturer, variant, cloud, region) and
+friends for the chart and report layers.
+"""
+import hashlib
+from typing import Dict, Any, List, Iterator, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+Schema = Dict[str, np.dtype]
+
+# Lookup aliases: short key name -> candidate column names, first match wins.
+KEY_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "mfg": ("manufacturer",),
+    "cloud": ("cloud_short", "cloud_provider"),
+}
+
+
+def _infer_column(values: List[Any]) -> np.ndarray:
+    """Build a typed column from Python values (bool < int < float < str < object)."""
+    kinds = {type(v) for v in values}
+    if kinds <= {bool, np.bool_}:
+        return np.array(values, dtype=bool)
+    if kinds <= {int, np.int64} and bool not in kinds:
+        return np.array(values, dtype=np.int64)
+    if kinds <= {int, float, np.int64, np.float64} and bool not in kinds:
+        return np.array(values, dtype=np.float64)
+    if kinds <= {str, np.str_}:
+        return np.array(values, dtype=str)
+    col = np.empty(len(values), dtype=object)
+    col[:] = values
+    return col
+
+
+class CategoryResults:
+    """Columnar results for one scenario category.
+
+    Iterating yields per-scenario row dicts (built lazily from the columns),
+    so code written against ``List[Dict[str, Any]]`` keeps working, while
+    new code can use ``column()``, ``where()`` and ``lookup()`` directly.
+    """
+
+    def __init__(self, category: str, columns: Mapping[str, np.ndarray]) -> None:
+        lengths = {len(c) for c in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Category {category}: columns have different lengths {sorted(lengths)}")
+        self.category = category
+        self._columns: Dict[str, np.ndarray] = {k: np.asarray(v) for k, v in columns.items()}
+        self._length = lengths.pop() if lengths else 0
+        self._indexes: Dict[Tuple[str, ...], Dict[Tuple[Any, ...], int]] = {}
+        self._pylists: Optional[Dict[str, List[Any]]] = None
+
+    # ── Construction ─────────────────────────────────────────
+    @classmethod
+    def from_records(cls, category: str, records: Sequence[Dict[str, Any]]) -> "CategoryResults":
+        """Build from a list of result dicts (keys in first-seen order)."""
+        keys: List[str] = []
+        for r in records:
+            for k in r:
+                if k not in keys:
+                    keys.append(k)
+        return cls(category, {k: _infer_column([r.get(k) for r in records]) for k in keys})
+
+    @classmethod
+    def concat(cls, category: str, parts: Sequence["CategoryResults"]) -> "CategoryResults":
+        """Concatenate chunks that share one schema."""
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls(category, {})
+        schema = list(parts[0].schema)
+        for p in parts[1:]:
+            if list(p.schema) != schema:
+                raise ValueError(f"Category {category}: cannot concat chunks with different schemas")
+        return cls(category, {k: np.concatenate([p.column(k) for p in parts]) for k in schema})
+
+    # ── Schema & columns ─────────────────────────────────────
+    @property
+    def schema(self) -> Schema:
+        """Ordered mapping of column name to dtype."""
+        return {k: v.dtype for k, v in self._columns.items()}
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        return dict(self._columns)
+
+    def column(self, name: str) -> np.ndarray:
+        """Return one column array."""
+        return self._columns[name]
+
+    def _resolve(self, key: str) -> str:
+        if key in self._columns:
+            return key
+        for candidate in KEY_ALIASES.get(key, ()):
+            if candidate in self._columns:
+                return candidate
+        raise KeyError(f"Category {self.category} has no column for key '{key}'")
+
+    # ── Row access (List[Dict] compatibility) ────────────────
+    def _rows(self) -> Dict[str, List[Any]]:
+        if self._pylists is None:
+            self._pylists = {k: v.tolist() for k, v in self._columns.items()}
+        return self._pylists
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError(i)
+        return {k: v[i] for k, v in self._rows().items()}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        rows = self._rows()
+        for i in range(self._length):
+            yield {k: v[i] for k, v in rows.items()}
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Materialize all rows as dicts."""
+        return list(self)
+
+    # ── Filtering & indexed lookup ───────────────────────────
+    def mask(self, **criteria: Any) -> np.ndarray:
+        """Boolean mask of rows where every ``column == value``."""
+        m = np.ones(self._length, dtype=bool)
+        for key, value in criteria.items():
+            m &= self._columns[self._resolve(key)] == value
+        return m
+
+    def where(self, **criteria: Any) -> "CategoryResults":
+        """Rows matching all criteria, e.g. ``where(variant="Moderate")``."""
+        m = self.mask(**criteria)
+        return CategoryResults(self.category, {k: v[m] for k, v in self._columns.items()})
+
+    def lookup(self, **key: Any) -> Optional[Dict[str, Any]]:
+        """O(1) lookup of the first row matching a composite key.
+
+        The hash index for each distinct set of key columns is built once on
+        first use, e.g. ``lookup(manufacturer="Apple", variant="Moderate")``.
+        """
+        names = tuple(sorted(self._resolve(k) for k in key))
+        index = self._indexes.get(names)
+        if index is None:
+            index = {}
+            cols = [self._columns[n].tolist() for n in names]
+            for i, values in enumerate(zip(*cols)):
+                index.setdefault(values, i)
+            self._indexes[names] = index
+        values = tuple(key[k] for k in sorted(key, key=self._resolve))
+        i = index.get(values)
+        return None if i is None else self[i]
+
+    def value(self, field: str, default: Any = 0, **key: Any) -> Any:
+        """Single field of the row matching ``key`` (``default`` if absent)."""
+        row = self.lookup(**key)
+        return default if row is None else row[field]
+
+    def unique(self, column: str) -> List[Any]:
+        """Distinct values of a column in first-seen order."""
+        values = self._columns[self._resolve(column)].tolist()
+        return list(dict.fromkeys(values))
+
+    def max_by(self, field: str) -> Dict[str, Any]:
+        """Row with the largest ``field`` (first one on ties)."""
+        return self[int(np.argmax(self._columns[field]))]
+
+    def fingerprint(self) -> str:
+        """SHA-256 of the category label and every column (name, dtype, values)."""
+        h = hashlib.sha256(self.category.encode())
+        for name, col in self._columns.items():
+            h.update(f"|{name}|{col.dtype.str}|{len(col)}|".encode())
+            if col.dtype.hasobject:
+                h.update(repr(col.tolist()).encode())
+            else:
+                h.update(np.ascontiguousarray(col).tobytes())
+        return h.hexdigest()
+
+    def to_frame(self) -> Any:
+        """Return the category as a pandas DataFrame."""
+        import pandas as pd
+        return pd.DataFrame(self._columns)
+
+
+class ResultStore(Mapping[str, CategoryResults]):
+    """Category letter -> CategoryResults, in insertion order."""
+
+    def __init__(self, categories: Optional[Mapping[str, CategoryResults]] = None) -> None:
+        self._categories: Dict[str, CategoryResults] = dict(categories or {})
+
+    @classmethod
+    def from_records(cls, all_results: Mapping[str, Sequence[Dict[str, Any]]]) -> "ResultStore":
+        """Convert a legacy ``Dict[str, List[Dict]]`` result set."""
+        return cls({cat: results if isinstance(results, CategoryResults)
+                    else CategoryResults.from_records(cat, results)
+                    for cat, results in all_results.items()})
+
+    def __getitem__(self, category: str) -> CategoryResults:
+        return self._categories[category]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._categories)
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    @property
+    def total_scenarios(self) -> int:
+        return sum(len(c) for c in self._categories.values())
+
+    def schemas(self) -> Dict[str, Schema]:
+        """Per-category schema."""
+        return {cat: c.schema for cat, c in self._categories.items()}
@@ -1,38 +1,72 @@
 #!/usr/bin/env python3
 """
 NHP Mega Simulation — Entry Point
-Run with: python mega_simulation/run.py
+Run with: python mega_simulation/run.py [--workers N] [--no-cache] [--no-charts]
+                                        [--render-profile draft|web|print]
+                                        [--trace [PATH]] [--trace-memory] [--trace-allocations]
+                                        [--profiler cprofile|pyinstrument]
 
 Generates 580+ scenarios across 13 categories, produces charts,
-and saves a comprehensive bilingual report + CSV data export.
+and saves a comprehensive bilingual report + a Parquet (or CSV) data export.
 """
+import argparse
 import sys
 import os
 import time
+from typing import List, Optional
 
 # Ensure project root is in path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from mega_simulation.scenarios import run_all_categories
 from mega_simulation.charts import generate_all_charts
-from mega_simulation.report import generate_mega_report, save_mega_report, save_csv_export
-
-
-def main() -> None:
-    """Run the complete mega simulation pipeline."""
-    print("=" * 60)
-    print("  NHP MEGA SIMULATION — v2.0")
-    print("  Neural Handset Protocol — محاكاة شاملة")
-    print("=" * 60)
-    print()
-
+from mega_simulation.report import generate_mega_report, save_mega_report
+from mega_simulation.export import EXPORT_FORMATS, save_export
+from mega_simulation.render import add_profile_argument, report_path, set_render_profile
+from mega_simulation.profiling import PROFILERS, profile_path, profiler, span, summary_lines, tracing
+from mega_simulation.results import ResultStore
+
+DEFAULT_TRACE_PATH: str = "output/trace/run.json"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Run the NHP mega simulation.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="process-pool size for the scenario sweeps and chart "
+                             "rendering (1 = serial, 0 = one per CPU core)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-render every chart even if its inputs are unchanged")
+    parser.add_argument("--no-charts", action="store_true",
+                        help="numbers only: skip the charts (matplotlib is never imported)")
+    add_profile_argument(parser)
+    parser.add_argument("--export", choices=EXPORT_FORMATS, default="auto",
+                        help="data export format (auto = Parquet when pyarrow is installed, else CSV)")
+    parser.add_argument("--trace", nargs="?", const=DEFAULT_TRACE_PATH, default=None, metavar="PATH",
+                        help=f"save a Chrome trace of every stage (default path: {DEFAULT_TRACE_PATH})")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="add tracemalloc memory stats to every traced stage (slower; implies --trace)")
+    parser.add_argument("--trace-allocations", action="store_true",
+                        help="also list each stage's top allocating lines (much slower; implies --trace-memory)")
+    parser.add_argument("--profiler", choices=PROFILERS, default=None,
+                        help="also capture a hot-path profile next to the trace")
+    args = parser.parse_args(argv)
+    args.trace_memory = args.trace_memory or args.trace_allocations
+    if (args.trace_memory or args.profiler) and args.trace is None:
+        args.trace = DEFAULT_TRACE_PATH
+    return args
+
+
+def simulate(args: argparse.Namespace) -> ResultStore:
+    """Steps 1-4: categories, charts, report and data export."""
     start_time = time.time()
 
     # ── Step 1: Run all scenario categories ──────────────────
     print("▶ Running all 13 scenario categories...")
-    all_results = run_all_categories()
+    with span("categories"):
+        all_results = run_all_categories(workers=args.workers)
 
-    total_scenarios = sum(len(v) for v in all_results.values())
+    total_scenarios = all_results.total_scenarios
     print(f"  ✅ Total scenarios computed: {total_scenarios}")
     print()
 
@@ -42,22 +76,32 @@ def main() -> None:
     print()
 
     # ── Step 2: Generate charts ──────────────────────────────
-    print("▶ Generating charts...")
-    chart_paths = generate_all_charts(all_results)
-    for p in chart_paths:
-        print(f"  ✅ {p}")
-    print()
+    chart_paths: List[str] = []
+    if not args.no_charts:
+        print("▶ Generating charts...")
+        with span("charts"):
+            chart_paths = generate_all_charts(all_results, workers=args.workers,
+                                              cache=not args.no_cache)
+        for p in chart_paths:
+            print(f"  ✅ {p}")
+        print()
 
     # ── Step 3: Generate and save report ─────────────────────
-    print("▶ Generating bilingual report...")
-    report_text = generate_mega_report(all_results, total_scenarios, chart_paths)
-    report_path = save_mega_report(report_text)
-    print(f"  ✅ Report saved: {report_path}")
-
-    # ── Step 4: CSV export ───────────────────────────────────
-    print("▶ Exporting CSV data...")
-    csv_path = save_csv_export(all_results)
-    print(f"  ✅ CSV saved: {csv_path}")
+    # The report lists the charts, so a numbers-only run leaves it alone
+    if args.no_charts:
+        print("▶ Report skipped (--no-charts keeps the saved report and its chart list)")
+    else:
+        print("▶ Generating bilingual report...")
+        with span("report"):
+            report_text = generate_mega_report(all_results, total_scenarios, chart_paths)
+            saved_report = save_mega_report(report_text, report_path("output"))
+        print(f"  ✅ Report saved: {saved_report}")
+
+    # ── Step 4: Data export ──────────────────────────────────
+    print("▶ Exporting data...")
+    with span("export"):
+        export_path = save_export(all_results, fmt=args.export)
+    print(f"  ✅ Export saved: {export_path}")
 
     elapsed = time.time() - start_time
     print()
@@ -65,6 +109,34 @@ def main() -> None:
     print(f"  MEGA SIMULATION COMPLETE")
     print(f"  {total_scenarios} scenarios | {len(chart_paths)} charts | {elapsed:.1f}s")
     print("=" * 60)
+    return all_results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the complete mega simulation pipeline."""
+    args = parse_args(argv)
+    set_render_profile(args.render_profile)
+    print("=" * 60)
+    print("  NHP MEGA SIMULATION — v2.0")
+    print("  Neural Handset Protocol — محاكاة شاملة")
+    print("=" * 60)
+    print()
+
+    if args.trace is None:
+        all_results = simulate(args)
+    else:
+        profile = profile_path(args.trace, args.profiler) if args.profiler else ""
+        with tracing(memory=args.trace_memory, allocations=args.trace_allocations,
+                     label="run.py") as tracer:
+            with profiler(args.profiler, profile), span("run.py"):
+                all_results = simulate(args)
+        print()
+        print("⏱ STAGE TIMINGS / توقيت المراحل:")
+        for line in summary_lines(tracer):
+            print(line)
+        print(f"  ✅ Trace saved: {tracer.save(args.trace)} (open in https://ui.perfetto.dev)")
+        if args.profiler:
+            print(f"  ✅ Profile saved: {profile}")
 
     # ── Print summary stats ──────────────────────────────────
     print()
@@ -72,23 +144,19 @@ def main() -> None:
     print()
 
     # Best moderate results
-    a_mod = [r for r in all_results["A"] if r["variant"] == "Moderate"]
-    top_mfg = max(a_mod, key=lambda r: r["h100_equivalent"])
+    top_mfg = all_results["A"].where(variant="Moderate").max_by("h100_equivalent")
     print(f"  💪 Top fleet (moderate): {top_mfg['manufacturer']} = "
           f"{top_mfg['h100_equivalent']:,.0f} H100 equiv")
 
-    f_mod = [r for r in all_results["F"] if r["variant"] == "Moderate"]
-    top_alliance = max(f_mod, key=lambda r: r["h100_equivalent"])
+    top_alliance = all_results["F"].where(variant="Moderate").max_by("h100_equivalent")
     print(f"  🤝 Top alliance (moderate): {top_alliance['alliance']} = "
           f"{top_alliance['h100_equivalent']:,.0f} H100 equiv")
 
-    d_mod = [r for r in all_results["D"] if r["variant"] == "Moderate"]
-    top_saver = max(d_mod, key=lambda r: r["annual_savings"])
+    top_saver = all_results["D"].where(variant="Moderate").max_by("annual_savings")
     print(f"  💰 Top savings (moderate): {top_saver['manufacturer']} = "
           f"${top_saver['annual_savings']/1e6:.1f}M/year")
 
-    j_mod = [r for r in all_results["J"] if r["variant"] == "Moderate"]
-    top_token = max(j_mod, key=lambda r: r["platform_revenue_monthly"])
+    top_token = all_results["J"].where(variant="Moderate").max_by("platform_revenue_monthly")
     print(f"  🪙 Max platform revenue (moderate): "
           f"${top_token['platform_revenue_monthly']/1e6:.1f}M/month @ {top_token['scale_label']}")
 
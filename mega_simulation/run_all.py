@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Unified Runner
+Runs any subset of the simulation entry points (v1 scenarios, the mega
+simulation, the company reports and phases 4-16) in one process:
+
+  • modules, data tables and matplotlib are imported once,
+  • one render pool serves every module's charts; its workers are forked
+    once and keep their matplotlib state and figure templates warm,
+  • one chart cache serves every output directory,
+  • independent modules can run concurrently (``--jobs``): their compute
+    overlaps with chart rendering in the shared pool, and each module's
+    console output is printed as one block when it finishes.
+
+Each module writes the same files as its own script.
+
+Run with:
+    python mega_simulation/run_all.py
+    python mega_simulation/run_all.py --modules settlement critique regional --jobs 3 --workers 4
+    python mega_simulation/run_all.py --list
+"""
+import argparse
+import importlib
+import io
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.profiling import span, summary_lines, tracing
+from mega_simulation.render import add_profile_argument, render_session, set_render_profile
+
+DEFAULT_TRACE_PATH: str = "output/trace/run_all.json"
+
+
+# ═══════════════════════════════════════════════════════════════
+# MODULE REGISTRY
+# ═══════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class Module:
+    """One entry point the runner can run.
+
+    Args:
+        name: Name used with ``--modules``.
+        target: ``"module:function"``, imported on first use.
+        title: One-line description for ``--list`` and the summary.
+        profile: The entry point takes ``--render-profile``.
+        concurrent: Safe to run alongside other modules. The v1 scenarios
+            draw with pyplot in this process, so they run on their own.
+    """
+    name: str
+    target: str
+    title: str
+    profile: bool = True
+    concurrent: bool = True
+
+    def entry_point(self) -> Callable[..., None]:
+        module, function = self.target.split(":")
+        return getattr(importlib.import_module(module), function)
+
+
+MODULES: Dict[str, Module] = {m.name: m for m in (
+    Module("classic", "main:main", "v1.0 — Five core scenarios", profile=False, concurrent=False),
+    Module("mega", "mega_simulation.run:main", "v2.0 — Mega simulation, 13 categories"),
+    Module("companies", "mega_simulation.generate_company_reports:main", "Phase 3 — Per-company reports"),
+    Module("settlement", "mega_simulation.settlement_comparison:main", "Phase 4 — Settlement system comparison"),
+    Module("developer", "mega_simulation.developer_ecosystem:main", "Phase 5 — Developer ecosystem & token demand"),
+    Module("network", "mega_simulation.network_security_compliance:main",
+           "Phase 6 — Network, TEE security & compliance"),
+    Module("visionary", "mega_simulation.visionary_scenarios:main", "Phase 7 — Visionary scenarios"),
+    Module("critique", "mega_simulation.critique_scenarios:main", "Phase 8 — Critique response scenarios"),
+    Module("regional", "mega_simulation.regional_markets:main", "Phase 9 — Regional market deep dives"),
+    Module("coverage", "mega_simulation.complete_coverage:main", "Phases 10-16 — Complete coverage"),
+)}
+
+
+# ═══════════════════════════════════════════════════════════════
+# EXECUTION
+# ═══════════════════════════════════════════════════════════════
+
+class _ThreadOutput:
+    """``sys.stdout`` stand-in that sends each capturing thread's writes to its own buffer."""
+
+    def __init__(self, stream: Any) -> None:
+        self.stream = stream
+        self._local = threading.local()
+
+    def capture(self) -> io.StringIO:
+        self._local.buffer = io.StringIO()
+        return self._local.buffer
+
+    def write(self, text: str) -> int:
+        return getattr(self._local, "buffer", self.stream).write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+
+@dataclass
+class ModuleRun:
+    """Outcome of one module."""
+    module: Module
+    seconds: float
+    error: str = ""
+    output: str = ""
+
+
+def run_module(module: Module, render_profile: str, output: Optional[_ThreadOutput] = None) -> ModuleRun:
+    """Run one entry point, catching its failure so the other modules still run.
+
+    Args:
+        module: Module to run.
+        render_profile: Passed on as ``--render-profile``.
+        output: Capture the module's console output (concurrent runs).
+    """
+    buffer = output.capture() if output is not None else None
+    start = time.perf_counter()
+    error = ""
+    with span(module.name, "module"):
+        try:
+            main = module.entry_point()
+            if module.profile:
+                main(["--render-profile", render_profile])
+            else:
+                main()
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                error = f"exited with status {e.code}"
+        except Exception:
+            error = traceback.format_exc()
+    return ModuleRun(module, time.perf_counter() - start, error,
+                     buffer.getvalue() if buffer is not None else "")
+
+
+def run_modules(modules: List[Module], jobs: int, render_profile: str) -> Iterator[ModuleRun]:
+    """Run the modules, up to ``jobs`` of them at a time, yielding each as it finishes.
+
+    Modules that are not ``concurrent`` run first, one at a time.
+    """
+    for module in modules:
+        if not module.concurrent or jobs <= 1:
+            yield run_module(module, render_profile)
+    concurrent = [m for m in modules if m.concurrent] if jobs > 1 else []
+    if not concurrent:
+        return
+    output = _ThreadOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="module") as pool:
+            futures = [pool.submit(run_module, m, render_profile, output) for m in concurrent]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        sys.stdout = output.stream
+
+
+# ═══════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Run NHP simulation modules in one process.")
+    parser.add_argument("--modules", nargs="+", choices=tuple(MODULES), default=list(MODULES),
+                        metavar="NAME", help=f"modules to run (default: all): {', '.join(MODULES)}")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="modules to run at the same time")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processes in the shared render pool (1 = render in-process, 0 = one per CPU core)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-render every chart even if its inputs are unchanged")
+    add_profile_argument(parser)
+    parser.add_argument("--trace", nargs="?", const=DEFAULT_TRACE_PATH, default=None, metavar="PATH",
+                        help=f"save a Chrome trace with one track per module thread (default path: {DEFAULT_TRACE_PATH})")
+    parser.add_argument("--list", action="store_true", help="list the modules and exit")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> List[ModuleRun]:
+    """Run the selected modules (in registry order) on one render session."""
+    modules = [m for name, m in MODULES.items() if name in args.modules]
+    runs: List[ModuleRun] = []
+    with render_session(args.workers, cache=not args.no_cache):
+        for result in run_modules(modules, args.jobs, args.render_profile):
+            if result.output:
+                print(result.output, end="")
+            status = "✅" if not result.error else "❌"
+            print(f"\n{status} [{result.module.name}] {result.seconds:.1f}s\n")
+            if result.error:
+                print(result.error)
+            runs.append(result)
+    return runs
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the selected simulation modules and summarize them."""
+    args = parse_args(argv)
+    if args.list:
+        for m in MODULES.values():
+            print(f"  {m.name:<12} {m.title}")
+        return
+    set_render_profile(args.render_profile)
+    print("=" * 60)
+    print("  NHP UNIFIED RUNNER — " + ", ".join(args.modules))
+    print("  تشغيل جميع المحاكاة في عملية واحدة")
+    print("=" * 60)
+    print()
+
+    start = time.time()
+    if args.trace is None:
+        runs = run(args)
+    else:
+        with tracing(label="run_all.py") as tracer, span("run_all.py"):
+            runs = run(args)
+
+    print("=" * 60)
+    print("  UNIFIED RUN COMPLETE")
+    for r in sorted(runs, key=lambda r: list(MODULES).index(r.module.name)):
+        print(f"  {'✅' if not r.error else '❌'} {r.module.name:<12} {r.seconds:>6.1f}s  {r.module.title}")
+    print(f"  {len(runs)} modules | jobs {args.jobs} | {time.time() - start:.1f}s")
+    print("=" * 60)
+    if args.trace is not None:
+        for line in summary_lines(tracer):
+            print(line)
+        print(f"  ✅ Trace saved: {tracer.save(args.trace)} (open in https://ui.perfetto.dev)")
+    failed = [r.module.name for r in runs if r.error]
+    if failed:
+        sys.exit(f"Failed modules: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,89 +1,83 @@
 """
 NHP Mega Simulation — Scenario Orchestrator
-Generates all 580+ scenarios by iterating over parameter matrices.
-Each function returns a list of result dicts for its category.
+Generates all 580+ scenarios from declarative parameter grids: each
+category is a vectorized compute function plus named axes, evaluated by
+the sweep engine into columnar results (CategoryResults).
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from mega_simulation.data import (
     MANUFACTURERS, CLOUD_PROVIDERS, REGIONS, TASK_TYPES, COMPETITORS,
     VARIANT_NAMES, UPTIME_VARIANTS, COVERAGE_VARIANTS,
     TOKEN_PRICE_VARIANTS, DC_REPLACED_VARIANTS, OVERHEAD_VARIANTS,
     GROWTH_VARIANTS, SIMULATION_YEARS,
 )
-from mega_simulation.engine import (
-    compute_fleet_power, compute_cost_comparison, compute_user_income,
-    compute_environmental, compute_combined_network, compute_task_feasibility,
-    compute_battery_impact, compute_market_size, compute_token_economics,
-    compute_competitive, compute_breakeven, compute_risk,
+from mega_simulation.engine import compute_fleet_power
+from mega_simulation.vectorized import (
+    compute_fleet_power_batch, compute_cost_comparison_batch, compute_user_income_batch,
+    compute_environmental_batch, compute_combined_network_batch, compute_task_feasibility_batch,
+    compute_battery_impact_batch, compute_market_size_batch, compute_token_economics_batch,
+    compute_competitive_batch, compute_breakeven_batch, compute_risk_batch,
 )
-from itertools import combinations
+from mega_simulation.profiling import span
+from mega_simulation.results import CategoryResults, ResultStore
+from mega_simulation.sweep import Axis, Sweep, DEFAULT_CHUNK_SIZE, run_sweep, run_sweeps
 
 
-def run_category_a() -> List[Dict[str, Any]]:
+def _variant_axis(**linked: List[Any]) -> Axis:
+    """The shared Optimistic → Catastrophic axis with its per-variant parameters."""
+    return Axis("variant", VARIANT_NAMES, linked=linked, emit=("variant",))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CATEGORY DECLARATIONS (compute function + named axes)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def sweep_a() -> Sweep:
     """A: Computing Power per Manufacturer (28 scenarios)."""
-    results: List[Dict[str, Any]] = []
-    for mfg in MANUFACTURERS.values():
-        for i, uptime in enumerate(UPTIME_VARIANTS):
-            r = compute_fleet_power(mfg, uptime)
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "A"
-            results.append(r)
-    return results
+    return Sweep(
+        "A", compute_fleet_power_batch, args=("mfg", "uptime"),
+        axes=[Axis("mfg", list(MANUFACTURERS.values())), _variant_axis(uptime=UPTIME_VARIANTS)],
+    )
 
 
-def run_category_b() -> List[Dict[str, Any]]:
+def sweep_b() -> Sweep:
     """B: NHP vs Cloud Providers cost (140 scenarios)."""
-    results: List[Dict[str, Any]] = []
-    for mfg in MANUFACTURERS.values():
-        for cloud in CLOUD_PROVIDERS.values():
-            for i, cov in enumerate(COVERAGE_VARIANTS):
-                r = compute_cost_comparison(mfg, cloud, cov)
-                r["variant"] = VARIANT_NAMES[i]
-                r["category"] = "B"
-                results.append(r)
-    return results
-
-
-def run_category_c() -> List[Dict[str, Any]]:
+    return Sweep(
+        "B", compute_cost_comparison_batch, args=("mfg", "cloud", "coverage"),
+        axes=[Axis("mfg", list(MANUFACTURERS.values())),
+              Axis("cloud", list(CLOUD_PROVIDERS.values())),
+              _variant_axis(coverage=COVERAGE_VARIANTS)],
+    )
+
+
+def sweep_c() -> Sweep:
     """C: User Income by Region (40 scenarios)."""
-    results: List[Dict[str, Any]] = []
-    for region in REGIONS.values():
-        for i, tp in enumerate(TOKEN_PRICE_VARIANTS):
-            r = compute_user_income(region, tp)
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "C"
-            results.append(r)
-    return results
+    return Sweep(
+        "C", compute_user_income_batch, args=("region", "token_price"),
+        axes=[Axis("region", list(REGIONS.values())), _variant_axis(token_price=TOKEN_PRICE_VARIANTS)],
+    )
 
 
-def run_category_d() -> List[Dict[str, Any]]:
+def sweep_d() -> Sweep:
     """D: Manufacturer-Specific Savings — top cloud only (28 scenarios)."""
-    results: List[Dict[str, Any]] = []
-    aws = CLOUD_PROVIDERS["aws_a100"]
-    for mfg in MANUFACTURERS.values():
-        for i, cov in enumerate(COVERAGE_VARIANTS):
-            r = compute_cost_comparison(mfg, aws, cov)
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "D"
-            results.append(r)
-    return results
-
-
-def run_category_e() -> List[Dict[str, Any]]:
+    return Sweep(
+        "D", compute_cost_comparison_batch, args=("mfg", "cloud", "coverage"),
+        axes=[Axis("mfg", list(MANUFACTURERS.values())), _variant_axis(coverage=COVERAGE_VARIANTS)],
+        constants={"cloud": CLOUD_PROVIDERS["aws_a100"]},
+    )
+
+
+def sweep_e() -> Sweep:
     """E: Environmental Impact per Manufacturer (28 scenarios)."""
-    results: List[Dict[str, Any]] = []
-    for mfg in MANUFACTURERS.values():
-        for i, (uptime, dc) in enumerate(zip(UPTIME_VARIANTS, DC_REPLACED_VARIANTS)):
-            r = compute_environmental(mfg, uptime, dc)
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "E"
-            results.append(r)
-    return results
+    return Sweep(
+        "E", compute_environmental_batch, args=("mfg", "uptime", "dc_replaced"),
+        axes=[Axis("mfg", list(MANUFACTURERS.values())),
+              _variant_axis(uptime=UPTIME_VARIANTS, dc_replaced=DC_REPLACED_VARIANTS)],
+    )
 
 
-def run_category_f() -> List[Dict[str, Any]]:
+def sweep_f() -> Sweep:
     """F: Network Effects — combined manufacturer fleets (20 scenarios)."""
-    results: List[Dict[str, Any]] = []
     mfg_list = list(MANUFACTURERS.values())
 
     # Key alliances: each single, top-2, top-3, all
@@ -94,19 +88,14 @@ def run_category_f() -> List[Dict[str, Any]]:
         mfg_list[:5],                      # Top 5
         mfg_list,                          # All 7
     ]
+    return Sweep(
+        "F", compute_combined_network_batch, args=("alliance", "uptime"),
+        axes=[Axis("alliance", combos), _variant_axis(uptime=UPTIME_VARIANTS)],
+    )
 
-    for combo in combos:
-        for i, uptime in enumerate(UPTIME_VARIANTS):
-            r = compute_combined_network(combo, uptime)
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "F"
-            results.append(r)
-    return results
 
-
-def run_category_g() -> List[Dict[str, Any]]:
+def sweep_g() -> Sweep:
     """G: Task Type Feasibility (24 scenarios)."""
-    results: List[Dict[str, Any]] = []
     # Use Samsung moderate fleet as reference
     sam = MANUFACTURERS["samsung"]
     ref_power = compute_fleet_power(sam, 0.25)
@@ -114,89 +103,82 @@ def run_category_g() -> List[Dict[str, Any]]:
     active = ref_power["active_devices"]
     avg_tops = fleet_tops / active if active > 0 else 0
 
-    for task in TASK_TYPES.values():
-        for i, overhead in enumerate(OVERHEAD_VARIANTS):
-            r = compute_task_feasibility(task, fleet_tops, active, avg_tops, overhead)
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "G"
-            results.append(r)
-    return results
+    return Sweep(
+        "G", compute_task_feasibility_batch,
+        args=("task", "fleet_tops", "active_devices", "avg_tops", "overhead"),
+        axes=[Axis("task", list(TASK_TYPES.values())), _variant_axis(overhead=OVERHEAD_VARIANTS)],
+        constants={"fleet_tops": fleet_tops, "active_devices": active, "avg_tops": avg_tops},
+    )
+
 
+def _scale_battery_hours(grid: Dict[str, Any]) -> Dict[str, Any]:
+    """Scale tier hours by variant aggressiveness."""
+    return {"nightly_hours": grid["hours"] * grid["hour_scale"]}
 
-def run_category_h() -> List[Dict[str, Any]]:
+
+def sweep_h() -> Sweep:
     """H: Battery & Device Impact (12 scenarios)."""
-    results: List[Dict[str, Any]] = []
     tiers = [
         ("Flagship (heavy use)", 7.0),
         ("Mid-range (moderate use)", 7.0),
         ("Budget (light use)", 5.0),
     ]
-    for tier_name, hours in tiers:
-        for i, variant in enumerate(VARIANT_NAMES):
-            # Scale hours by variant aggressiveness
-            scaled_hours = hours * [1.0, 0.8, 0.5, 0.3][i]
-            r = compute_battery_impact(tier_name, scaled_hours)
-            r["variant"] = variant
-            r["category"] = "H"
-            results.append(r)
-    return results
-
-
-def run_category_i() -> List[Dict[str, Any]]:
+    return Sweep(
+        "H", compute_battery_impact_batch, args=("tier", "nightly_hours"),
+        axes=[Axis("tier", [t for t, _ in tiers], linked={"hours": [h for _, h in tiers]}),
+              _variant_axis(hour_scale=[1.0, 0.8, 0.5, 0.3])],
+        prepare=_scale_battery_hours,
+    )
+
+
+def sweep_i() -> Sweep:
     """I: Market Size TAM/SAM/SOM (40 scenarios)."""
-    results: List[Dict[str, Any]] = []
     penetration_rates = [0.10, 0.05, 0.02, 0.005]  # Per variant
-    for region in REGIONS.values():
-        for i, pen in enumerate(penetration_rates):
-            r = compute_market_size(region, pen)
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "I"
-            results.append(r)
-    return results
+    return Sweep(
+        "I", compute_market_size_batch, args=("region", "penetration"),
+        axes=[Axis("region", list(REGIONS.values())), _variant_axis(penetration=penetration_rates)],
+    )
 
 
-def run_category_j() -> List[Dict[str, Any]]:
+def sweep_j() -> Sweep:
     """J: Token Economics (20 scenarios)."""
-    results: List[Dict[str, Any]] = []
     scales = [1_000_000, 10_000_000, 100_000_000, 500_000_000, 1_000_000_000]
-    for total_devices in scales:
-        for i, (uptime, tp) in enumerate(zip(UPTIME_VARIANTS, TOKEN_PRICE_VARIANTS)):
-            r = compute_token_economics(total_devices, uptime, tp)
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "J"
-            r["scale_label"] = f"{total_devices:,} devices"
-            results.append(r)
-    return results
+    return Sweep(
+        "J", compute_token_economics_batch, args=("total_devices", "uptime", "token_price"),
+        axes=[Axis("total_devices", scales,
+                   linked={"scale_label": [f"{n:,} devices" for n in scales]}, emit=("scale_label",)),
+              _variant_axis(uptime=UPTIME_VARIANTS, token_price=TOKEN_PRICE_VARIANTS)],
+    )
 
 
-def run_category_k() -> List[Dict[str, Any]]:
+def sweep_k() -> Sweep:
     """K: Competitive Positioning (16 scenarios)."""
-    results: List[Dict[str, Any]] = []
-    for comp in COMPETITORS.values():
-        for i, uptime in enumerate(UPTIME_VARIANTS):
-            nhp_devices = 300_000_000  # Samsung fleet as reference
-            r = compute_competitive(nhp_devices, 20.0, uptime, comp)
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "K"
-            results.append(r)
-    return results
-
-
-def run_category_l() -> List[Dict[str, Any]]:
+    return Sweep(
+        "K", compute_competitive_batch, args=("nhp_devices", "nhp_avg_tops", "uptime", "competitor"),
+        axes=[Axis("competitor", list(COMPETITORS.values())), _variant_axis(uptime=UPTIME_VARIANTS)],
+        constants={"nhp_devices": 300_000_000,  # Samsung fleet as reference
+                   "nhp_avg_tops": 20.0},
+    )
+
+
+def sweep_l() -> Sweep:
     """L: Breakeven Analysis (28 scenarios)."""
-    results: List[Dict[str, Any]] = []
-    aws = CLOUD_PROVIDERS["aws_a100"]
     dev_costs = [50_000_000, 30_000_000, 20_000_000, 10_000_000]
-    for mfg in MANUFACTURERS.values():
-        for i, (cov, dev_cost) in enumerate(zip(COVERAGE_VARIANTS, dev_costs)):
-            r = compute_breakeven(mfg, aws, dev_cost, 2_000_000, cov)
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "L"
-            results.append(r)
-    return results
+    return Sweep(
+        "L", compute_breakeven_batch, args=("mfg", "cloud", "dev_cost", "ops_cost", "coverage"),
+        axes=[Axis("mfg", list(MANUFACTURERS.values())),
+              _variant_axis(coverage=COVERAGE_VARIANTS, dev_cost=dev_costs)],
+        constants={"cloud": CLOUD_PROVIDERS["aws_a100"], "ops_cost": 2_000_000},
+    )
+
 
+def _scale_risk_severity(grid: Dict[str, Any]) -> Dict[str, Any]:
+    """Scale impact and probability by variant severity."""
+    return {"scaled_impact": grid["impact"] * grid["severity"],
+            "scaled_probability": grid["probability"] * grid["severity"]}
 
-def run_category_m() -> List[Dict[str, Any]]:
+
+def sweep_m() -> Sweep:
     """M: Risk Analysis (40 scenarios)."""
     base_annual_savings: float = 64_000_000  # Moderate Samsung savings
 
@@ -212,47 +194,135 @@ def run_category_m() -> List[Dict[str, Any]]:
         ("Token price collapse", "انهيار سعر التوكن", 0.55, 0.30, "Financial"),
         ("Data privacy lawsuit", "دعوى قضائية بخصوص الخصوصية", 0.75, 0.15, "Legal"),
     ]
-
-    results: List[Dict[str, Any]] = []
     severities = [1.0, 0.7, 0.4, 0.2]
 
-    for risk_name, risk_ar, impact, prob, category in risks:
-        for i, sev in enumerate(severities):
-            r = compute_risk(
-                risk_name, risk_ar,
-                base_annual_savings,
-                impact * sev,
-                prob * sev,
-                category,
-            )
-            r["variant"] = VARIANT_NAMES[i]
-            r["category"] = "M"
-            results.append(r)
-    return results
+    return Sweep(
+        "M", compute_risk_batch,
+        args=("risk_name", "risk_name_ar", "base_value", "scaled_impact", "scaled_probability", "risk_category"),
+        axes=[Axis("risk_name", [r[0] for r in risks],
+                   linked={"risk_name_ar": [r[1] for r in risks], "impact": [r[2] for r in risks],
+                           "probability": [r[3] for r in risks], "risk_category": [r[4] for r in risks]}),
+              _variant_axis(severity=severities)],
+        constants={"base_value": base_annual_savings},
+        prepare=_scale_risk_severity,
+    )
+
+
+CATEGORY_SWEEPS = {
+    "A": sweep_a, "B": sweep_b, "C": sweep_c, "D": sweep_d, "E": sweep_e,
+    "F": sweep_f, "G": sweep_g, "H": sweep_h, "I": sweep_i, "J": sweep_j,
+    "K": sweep_k, "L": sweep_l, "M": sweep_m,
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CATEGORY RUNNERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def run_category(category: str) -> CategoryResults:
+    """Evaluate one declared category through the sweep engine."""
+    return run_sweep(CATEGORY_SWEEPS[category]())
+
+
+def run_category_a() -> CategoryResults:
+    """A: Computing Power per Manufacturer (28 scenarios)."""
+    return run_category("A")
+
+
+def run_category_b() -> CategoryResults:
+    """B: NHP vs Cloud Providers cost (140 scenarios)."""
+    return run_category("B")
+
+
+def run_category_c() -> CategoryResults:
+    """C: User Income by Region (40 scenarios)."""
+    return run_category("C")
+
+
+def run_category_d() -> CategoryResults:
+    """D: Manufacturer-Specific Savings — top cloud only (28 scenarios)."""
+    return run_category("D")
+
+
+def run_category_e() -> CategoryResults:
+    """E: Environmental Impact per Manufacturer (28 scenarios)."""
+    return run_category("E")
+
+
+def run_category_f() -> CategoryResults:
+    """F: Network Effects — combined manufacturer fleets (20 scenarios)."""
+    return run_category("F")
+
+
+def run_category_g() -> CategoryResults:
+    """G: Task Type Feasibility (24 scenarios)."""
+    return run_category("G")
+
+
+def run_category_h() -> CategoryResults:
+    """H: Battery & Device Impact (12 scenarios)."""
+    return run_category("H")
+
+
+def run_category_i() -> CategoryResults:
+    """I: Market Size TAM/SAM/SOM (40 scenarios)."""
+    return run_category("I")
+
+
+def run_category_j() -> CategoryResults:
+    """J: Token Economics (20 scenarios)."""
+    return run_category("J")
+
+
+def run_category_k() -> CategoryResults:
+    """K: Competitive Positioning (16 scenarios)."""
+    return run_category("K")
+
+
+def run_category_l() -> CategoryResults:
+    """L: Breakeven Analysis (28 scenarios)."""
+    return run_category("L")
+
+
+def run_category_m() -> CategoryResults:
+    """M: Risk Analysis (40 scenarios)."""
+    return run_category("M")
+
+
+CATEGORY_RUNNERS = {
+    "A": run_category_a, "B": run_category_b, "C": run_category_c, "D": run_category_d,
+    "E": run_category_e, "F": run_category_f, "G": run_category_g, "H": run_category_h,
+    "I": run_category_i, "J": run_category_j, "K": run_category_k, "L": run_category_l,
+    "M": run_category_m,
+}
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # MASTER RUNNER
 # ═══════════════════════════════════════════════════════════════════════════
 
-def run_all_categories() -> Dict[str, List[Dict[str, Any]]]:
+def run_all_categories(
+    workers: Optional[int] = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> ResultStore:
     """Run all 13 scenario categories and return results.
 
+    Args:
+        workers: Process-pool size. 1 (default) evaluates A → M serially in
+            this process; ``None``/0 uses one worker per CPU core.
+        chunk_size: Grid rows per task; large categories are split into
+            several chunks so they spread across workers.
+
     Returns:
-        Dict mapping category letter to list of result dicts.
+        ResultStore mapping category letter to its columnar results,
+        always in A → M order regardless of completion order.
     """
-    return {
-        "A": run_category_a(),
-        "B": run_category_b(),
-        "C": run_category_c(),
-        "D": run_category_d(),
-        "E": run_category_e(),
-        "F": run_category_f(),
-        "G": run_category_g(),
-        "H": run_category_h(),
-        "I": run_category_i(),
-        "J": run_category_j(),
-        "K": run_category_k(),
-        "L": run_category_l(),
-        "M": run_category_m(),
-    }
+    if workers == 1:
+        results = {}
+        for cat, run in CATEGORY_RUNNERS.items():
+            with span(f"Category {cat}", "category"):
+                results[cat] = run()
+        return ResultStore(results)
+    sweeps = {cat: declare() for cat, declare in CATEGORY_SWEEPS.items()}
+    with span(f"Categories A-M ({workers or 'all'} workers)", "category"):
+        return ResultStore(run_sweeps(sweeps, chunk_size=chunk_size, workers=workers))
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Follow-the-Night Scheduler
+Routes a global AI demand curve onto the devices that are on a charger
+right now, using the availability matrix (``availability.py``):
+
+  • Demand comes from each region's daytime activity, split into
+    latency-sensitive and batch work by the ``TASK_TYPES`` market mix.
+  • Latency-sensitive work (``TaskType.latency_sensitive``) is served
+    within its time slot by regions whose round trip fits the latency
+    budget, nearest first. What cannot be placed misses its SLA.
+  • Batch work goes to every region's leftover capacity through one
+    global FIFO queue with a completion deadline.
+
+The queue is solved without a per-slot Python loop. The fluid Lindley
+recursion Q_t = max(0, Q_{t-1} + A_t - C_t) is computed with cumulative
+sums and running minima, and each slot's queueing delay comes from a
+``searchsorted`` of cumulative arrivals into cumulative departures. A
+minute-level year takes seconds.
+
+Run with:
+    python mega_simulation/scheduler.py --year 2026 --step 1 --utilization 0.6
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.availability import (
+    AvailabilityMatrix, RegionAvailability, availability_matrix, timezone_availability, utc_offset_minutes,
+)
+from mega_simulation.data import H100_TOPS, TASK_TYPES
+from mega_simulation.dispatch_sim import tops_classes
+from mega_simulation.results import CategoryResults
+
+# Round-trip proxy between regions: a base cost plus a cost per hour of
+# (circular) UTC-offset distance.
+BASE_RTT_MS: float = 20.0
+RTT_MS_PER_HOUR: float = 15.0
+
+
+@dataclass
+class SchedulerConfig:
+    """Scheduler inputs."""
+    utilization: float = 0.6            # Mean demand / mean fleet capacity
+    latency_budget_ms: float = 100.0    # Max round trip for latency-sensitive work
+    batch_deadline_h: float = 12.0      # Batch work SLA
+    tops_efficiency: float = 0.30       # Sustained share of peak TOPS on a phone
+    peak_local_h: float = 14.0          # Local hour of peak demand
+    demand_swing: float = 0.6           # Day/night demand amplitude (0 = flat)
+
+
+@dataclass
+class ScheduleResult:
+    """Per-slot schedule; work is in H100-hours per slot."""
+    start: np.datetime64
+    step_minutes: int
+    capacity: np.ndarray
+    ls_demand: np.ndarray
+    ls_served: np.ndarray
+    batch_demand: np.ndarray
+    batch_served: np.ndarray
+    queue: np.ndarray               # Batch backlog at the end of each slot
+    batch_delay_h: np.ndarray       # Queueing delay of work arriving in each slot (inf = never)
+    batch_deadline_h: float
+
+    @property
+    def stranded(self) -> np.ndarray:
+        """Capacity left idle in each slot (float noise clamped at zero)."""
+        return np.maximum(self.capacity - self.ls_served - self.batch_served, 0.0)
+
+    def utc_hours(self) -> np.ndarray:
+        minute = (self.start - self.start.astype("datetime64[D]")).astype(int)
+        return (np.arange(self.capacity.size) * self.step_minutes + minute) // 60 % 24
+
+    def hourly(self) -> CategoryResults:
+        """Per-UTC-hour averages over the year (rates in H100 equivalents)."""
+        hour = self.utc_hours()
+        slot_h = self.step_minutes / 60.0
+        on_time = np.where(self.batch_delay_h <= self.batch_deadline_h, self.batch_demand, 0.0)
+        finite = np.isfinite(self.batch_delay_h)
+        delay_work = np.where(finite, self.batch_delay_h, 0.0) * self.batch_demand
+
+        def per_hour(values: np.ndarray) -> np.ndarray:
+            return np.bincount(hour, weights=values, minlength=24)
+
+        slots = np.bincount(hour, minlength=24) * slot_h
+        capacity = per_hour(self.capacity)
+        ls_demand = per_hour(self.ls_demand)
+        batch_demand = per_hour(self.batch_demand)
+        stranded = per_hour(self.stranded)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columns = {
+                "utc_hour": np.arange(24),
+                "capacity_h100": capacity / slots,
+                "ls_demand_h100": ls_demand / slots,
+                "batch_demand_h100": batch_demand / slots,
+                "ls_sla_pct": np.where(ls_demand > 0, per_hour(self.ls_served) / ls_demand * 100, 100.0),
+                "batch_sla_pct": np.where(batch_demand > 0, per_hour(on_time) / batch_demand * 100, 100.0),
+                "mean_delay_h": np.where(batch_demand > 0,
+                                         per_hour(delay_work) / per_hour(np.where(finite, self.batch_demand, 0.0)), 0.0),
+                "stranded_h100": stranded / slots,
+                "stranded_pct": np.where(capacity > 0, stranded / capacity * 100, 0.0),
+            }
+        return CategoryResults("schedule", columns)
+
+    def summary(self) -> Dict[str, float]:
+        """Year totals."""
+        on_time = self.batch_demand[self.batch_delay_h <= self.batch_deadline_h].sum()
+        finite = np.isfinite(self.batch_delay_h) & (self.batch_demand > 0)
+        order = np.argsort(self.batch_delay_h[finite])
+        weights = np.cumsum(self.batch_demand[finite][order])
+        p95 = (self.batch_delay_h[finite][order][np.searchsorted(weights, 0.95 * weights[-1])]
+               if weights.size else 0.0)
+        return {
+            "utilization_pct": (self.ls_served.sum() + self.batch_served.sum()) / self.capacity.sum() * 100,
+            "ls_sla_pct": self.ls_served.sum() / self.ls_demand.sum() * 100,
+            "batch_sla_pct": on_time / self.batch_demand.sum() * 100,
+            "mean_delay_h": float(np.average(self.batch_delay_h[finite], weights=self.batch_demand[finite])),
+            "p95_delay_h": float(p95),
+            "max_queue_h100h": float(self.queue.max()),
+            "stranded_pct": self.stranded.sum() / self.capacity.sum() * 100,
+        }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CAPACITY & DEMAND
+# ═══════════════════════════════════════════════════════════════════════════
+
+def h100_per_million_devices(tops_efficiency: float) -> float:
+    """H100 equivalents delivered by one million available phones."""
+    tops, weights = tops_classes()
+    return 1e6 * float(tops @ weights) * tops_efficiency / H100_TOPS
+
+
+def latency_sensitive_share() -> float:
+    """Share of demand that is latency-sensitive, by task market size."""
+    total = sum(t.market_size_billions for t in TASK_TYPES.values())
+    return sum(t.market_size_billions for t in TASK_TYPES.values() if t.latency_sensitive) / total
+
+
+def rtt_matrix(regions: Sequence[RegionAvailability]) -> np.ndarray:
+    """``(R, R)`` round-trip proxy (ms) from UTC-offset distance."""
+    offsets = np.asarray([r.utc_offset_h for r in regions])
+    diff = np.abs(offsets[:, None] - offsets[None, :]) % 24
+    return BASE_RTT_MS + RTT_MS_PER_HOUR * np.minimum(diff, 24 - diff)
+
+
+def demand_weights(
+    matrix: AvailabilityMatrix,
+    regions: Sequence[RegionAvailability],
+    config: SchedulerConfig,
+) -> np.ndarray:
+    """``(slots, R)`` relative demand: device count × local daytime activity."""
+    times = matrix.times()
+    weights = np.empty((len(matrix), len(regions)))
+    for j, region in enumerate(regions):
+        local_h = ((times.astype(np.int64) + utc_offset_minutes(region, times)) % 1440) / 60.0
+        activity = 1.0 + config.demand_swing * np.cos(2 * np.pi * (local_h - config.peak_local_h) / 24.0)
+        weights[:, j] = region.devices_m * activity
+    return weights
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCHEDULING
+# ═══════════════════════════════════════════════════════════════════════════
+
+def place_latency_sensitive(
+    demand: np.ndarray,
+    capacity: np.ndarray,
+    rtt: np.ndarray,
+    budget_ms: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Serve each region's in-slot demand from reachable regions, nearest first.
+
+    Loops over region pairs only; every step is vectorized over all slots.
+
+    Returns:
+        ``(served per demand region, capacity left per region)``.
+    """
+    left = capacity.copy()
+    pending = demand.copy()
+    for r in range(demand.shape[1]):
+        for s in np.argsort(rtt[r], kind="stable"):
+            if rtt[r, s] > budget_ms:
+                break
+            take = np.minimum(pending[:, r], left[:, s])
+            pending[:, r] -= take
+            left[:, s] -= take
+    return demand - pending, left
+
+
+def fifo_queue(arrivals: np.ndarray, capacity: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Fluid FIFO queue solved with cumulative sums.
+
+    Returns:
+        ``(served per slot, backlog at slot end, delay in slots per arrival
+        slot)``; the delay is ``inf`` for work still queued at the end and
+        0 for slots with no arrivals.
+    """
+    s = np.cumsum(arrivals - capacity)
+    queue = s - np.minimum(np.minimum.accumulate(s), 0.0)
+    served = arrivals + np.concatenate([[0.0], queue[:-1]]) - queue
+    cum_served = np.cumsum(served)
+    cum_arrived = np.cumsum(arrivals)
+    # Slot in which the middle of each slot's arrivals leaves the queue
+    target = cum_arrived - arrivals / 2 - 1e-9 * max(cum_arrived[-1], 1.0)
+    done = np.searchsorted(cum_served, target, side="left")
+    delay = (done - np.arange(arrivals.size)).astype(float)
+    delay[done >= arrivals.size] = np.inf
+    delay[arrivals <= 0] = 0.0
+    return served, queue, delay
+
+
+def simulate_schedule(
+    matrix: AvailabilityMatrix,
+    regions: Sequence[RegionAvailability],
+    config: SchedulerConfig = SchedulerConfig(),
+) -> ScheduleResult:
+    """Schedule a year of demand onto the availability matrix.
+
+    Args:
+        matrix: Availability matrix for ``regions``.
+        regions: Region definitions (same column order as ``matrix``).
+        config: Scheduler inputs.
+
+    Returns:
+        Per-slot capacity, demand, service, backlog and delays.
+    """
+    slot_h = matrix.step_minutes / 60.0
+    capacity = matrix.available_m() * (h100_per_million_devices(config.tops_efficiency) * slot_h)
+
+    weights = demand_weights(matrix, regions, config)
+    demand = weights * (config.utilization * capacity.sum() / weights.sum())
+    ls_share = latency_sensitive_share()
+
+    ls_served, left = place_latency_sensitive(
+        demand * ls_share, capacity, rtt_matrix(regions), config.latency_budget_ms)
+    batch_demand = demand.sum(axis=1) * (1 - ls_share)
+    batch_served, queue, delay_slots = fifo_queue(batch_demand, left.sum(axis=1))
+
+    return ScheduleResult(
+        start=matrix.start,
+        step_minutes=matrix.step_minutes,
+        capacity=capacity.sum(axis=1),
+        ls_demand=demand.sum(axis=1) * ls_share,
+        ls_served=ls_served.sum(axis=1),
+        batch_demand=batch_demand,
+        batch_served=batch_served,
+        queue=queue,
+        batch_delay_h=delay_slots * slot_h,
+        batch_deadline_h=config.batch_deadline_h,
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    defaults = SchedulerConfig()
+    parser = argparse.ArgumentParser(description="Follow-the-night scheduler over the availability matrix.")
+    parser.add_argument("--year", type=int, default=2026)
+    parser.add_argument("--step", type=int, default=1, help="slot length in minutes")
+    parser.add_argument("--utilization", type=float, default=defaults.utilization)
+    parser.add_argument("--latency-budget-ms", type=float, default=defaults.latency_budget_ms)
+    parser.add_argument("--deadline-h", type=float, default=defaults.batch_deadline_h)
+    parser.add_argument("--csv", default=None, help="write the per-hour table to this CSV")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the scheduler for the Phase 7 regions and print per-hour results."""
+    from mega_simulation.visionary_scenarios import TIMEZONE_REGIONS
+
+    args = parse_args(argv)
+    config = SchedulerConfig(utilization=args.utilization, latency_budget_ms=args.latency_budget_ms,
+                             batch_deadline_h=args.deadline_h)
+    regions = timezone_availability(TIMEZONE_REGIONS)
+    matrix = availability_matrix(regions, args.year, args.step)
+
+    start_time = time.time()
+    result = simulate_schedule(matrix, regions, config)
+    hourly = result.hourly()
+    elapsed = time.time() - start_time
+
+    print("=" * 60)
+    print("  NHP FOLLOW-THE-NIGHT SCHEDULER — جدولة تتبع الليل")
+    print(f"  {args.year} | {len(matrix):,} slots of {args.step} min | {len(regions)} regions")
+    print("=" * 60)
+    print(f"  {'UTC':>5} {'Capacity':>10} {'Demand':>10} {'LS SLA':>7} {'Batch SLA':>9} {'Delay':>7} {'Stranded':>9}")
+    for r in hourly:
+        demand = r["ls_demand_h100"] + r["batch_demand_h100"]
+        print(f"  {r['utc_hour']:02d}:00 {r['capacity_h100']:>10,.0f} {demand:>10,.0f} {r['ls_sla_pct']:>6.1f}% "
+              f"{r['batch_sla_pct']:>8.1f}% {r['mean_delay_h']:>6.2f}h {r['stranded_pct']:>8.1f}%")
+    s = result.summary()
+    print(f"\n  Utilization {s['utilization_pct']:.1f}% | LS SLA {s['ls_sla_pct']:.1f}% | "
+          f"batch SLA {s['batch_sla_pct']:.1f}% | delay mean {s['mean_delay_h']:.2f}h, p95 {s['p95_delay_h']:.2f}h | "
+          f"stranded {s['stranded_pct']:.1f}%")
+    if args.csv:
+        os.makedirs(os.path.dirname(args.csv) or ".", exist_ok=True)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(hourly.schema))
+            writer.writeheader()
+            writer.writerows(hourly)
+        print(f"\n  ✅ CSV saved: {args.csv}")
+    print(f"\n  Scheduled in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
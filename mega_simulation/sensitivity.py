@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Global Sensitivity Analysis
+Ranks the inputs that drive the breakeven and cost-comparison results
+(``breakeven_months``, ``roi_5yr_pct``, ``annual_savings``) for one
+manufacturer/cloud pair:
+
+  • Sobol indices — a Saltelli design built on a Sobol low-discrepancy
+    sequence (Joe–Kuo direction numbers). It gives first-order (S1) and
+    total (ST) indices with bootstrap confidence intervals.
+  • Morris screening — elementary effects over random one-at-a-time
+    trajectories (mu, mu*, sigma), a cheap first pass.
+
+Every design row is one scenario. The design is split into chunks that go
+through the batched engine (``vectorized.py``), optionally on a process
+pool, so ~10^6 model evaluations take a few seconds.
+
+Run with:
+    python mega_simulation/sensitivity.py --model breakeven --samples 131072 --workers 0
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.data import MANUFACTURERS, CLOUD_PROVIDERS
+from mega_simulation.results import CategoryResults
+from mega_simulation.sweep import DEFAULT_CHUNK_SIZE, resolve_workers
+from mega_simulation.vectorized import (
+    Columns, RecordArray, compute_breakeven_batch, compute_cost_comparison_batch,
+)
+
+# Breakeven later than this (or never) is counted as the horizon, so the
+# output variance stays finite.
+BREAKEVEN_HORIZON_MONTHS: float = 120.0
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SOBOL SEQUENCE
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Joe & Kuo (2008) direction numbers (new-joe-kuo-6.21201), dimensions 2-21:
+# (degree s, polynomial coefficients a, initial m_1..m_s)
+_JOE_KUO: Tuple[Tuple[int, int, Tuple[int, ...]], ...] = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+)
+MAX_SOBOL_DIM: int = len(_JOE_KUO) + 1
+_BITS: int = 32
+
+
+def _direction_numbers(dim: int) -> np.ndarray:
+    """``(dim, _BITS)`` direction numbers scaled to ``_BITS``-bit integers."""
+    if not 1 <= dim <= MAX_SOBOL_DIM:
+        raise ValueError(f"Sobol dimension must be 1..{MAX_SOBOL_DIM}, got {dim}")
+    v = np.zeros((dim, _BITS), dtype=np.uint64)
+    shifts = _BITS - 1 - np.arange(_BITS)
+    v[0] = np.left_shift(np.uint64(1), shifts.astype(np.uint64))
+    for j, (s, a, m_init) in enumerate(_JOE_KUO[:dim - 1], start=1):
+        m = list(m_init)
+        for i in range(s, _BITS):
+            new = m[i - s] ^ (m[i - s] << s)
+            for k in range(1, s):
+                if (a >> (s - 1 - k)) & 1:
+                    new ^= m[i - k] << k
+            m.append(new)
+        v[j] = [m[i] << int(shifts[i]) for i in range(_BITS)]
+    return v
+
+
+def sobol_sequence(n: int, dim: int, skip: int = 1) -> np.ndarray:
+    """First ``n`` points of a ``dim``-dimensional Sobol sequence in [0, 1).
+
+    Args:
+        n: Number of points.
+        dim: Dimensions (up to ``MAX_SOBOL_DIM``).
+        skip: Leading points to drop (the first point is all zeros).
+
+    Returns:
+        ``(n, dim)`` float array.
+    """
+    v = _direction_numbers(dim)
+    index = np.arange(skip, skip + n, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+    points = np.zeros((n, dim), dtype=np.uint64)
+    for bit in range(_BITS):
+        mask = ((gray >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+        points[mask] ^= v[:, bit]
+    return points.astype(float) / float(1 << _BITS)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DESIGNS & ESTIMATORS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def saltelli_design(n: int, k: int) -> np.ndarray:
+    """Saltelli sample matrix in the unit cube.
+
+    Rows are stacked as ``[A; B; AB_1; ...; AB_k]`` (``n * (k + 2)`` rows),
+    where ``AB_i`` is ``A`` with column ``i`` taken from ``B``. Powers of two
+    for ``n`` give the best-balanced Sobol points.
+    """
+    base = sobol_sequence(n, 2 * k)
+    a, b = base[:, :k], base[:, k:]
+    ab = np.repeat(a[None, :, :], k, axis=0)
+    for i in range(k):
+        ab[i, :, i] = b[:, i]
+    return np.concatenate([a, b, ab.reshape(k * n, k)])
+
+
+def _sobol_estimates(
+    f_a: np.ndarray, f_b: np.ndarray, f_ab: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Saltelli (2010) first-order and Jansen total indices."""
+    variance = np.var(np.concatenate([f_a, f_b]))
+    if variance == 0:
+        zeros = np.zeros(f_ab.shape[0])
+        return zeros, zeros
+    s1 = np.mean(f_b * (f_ab - f_a), axis=1) / variance
+    st = 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variance
+    return s1, st
+
+
+def sobol_indices(
+    y: np.ndarray,
+    k: int,
+    resamples: int = 100,
+    seed: int = 0,
+) -> Dict[str, np.ndarray]:
+    """First-order and total Sobol indices from outputs of ``saltelli_design``.
+
+    Args:
+        y: Model output per design row.
+        k: Number of factors.
+        resamples: Bootstrap resamples for the 95% confidence half-widths
+            (0 disables them).
+        seed: Bootstrap seed.
+
+    Returns:
+        Dict with ``s1``, ``s1_conf``, ``st``, ``st_conf`` arrays of length ``k``.
+    """
+    n = y.size // (k + 2)
+    f_a, f_b, f_ab = y[:n], y[n:2 * n], y[2 * n:].reshape(k, n)
+    s1, st = _sobol_estimates(f_a, f_b, f_ab)
+    s1_conf = st_conf = np.zeros(k)
+    if resamples > 1:
+        s1_boot = np.zeros((resamples, k))
+        st_boot = np.zeros((resamples, k))
+        rng = np.random.default_rng(seed)
+        for r in range(resamples):
+            idx = rng.integers(0, n, n)
+            s1_boot[r], st_boot[r] = _sobol_estimates(f_a[idx], f_b[idx], f_ab[:, idx])
+        s1_conf = 1.96 * s1_boot.std(axis=0, ddof=1)
+        st_conf = 1.96 * st_boot.std(axis=0, ddof=1)
+    return {"s1": s1, "s1_conf": s1_conf, "st": st, "st_conf": st_conf}
+
+
+def morris_design(
+    trajectories: int,
+    k: int,
+    levels: int = 4,
+    seed: int = 0,
+) -> np.ndarray:
+    """Morris (1991) one-at-a-time trajectories in the unit cube.
+
+    Returns:
+        ``(trajectories, k + 1, k)`` array; consecutive rows of a trajectory
+        differ in exactly one factor by ``levels / (2 * (levels - 1))``.
+    """
+    rng = np.random.default_rng(seed)
+    delta = levels / (2.0 * (levels - 1))
+    grid = np.arange(levels) / (levels - 1)
+    grid = grid[grid <= 1 - delta + 1e-12]
+    steps = 2.0 * np.tril(np.ones((k + 1, k)), -1) - 1.0  # (2B - J)
+    base = rng.choice(grid, size=(trajectories, 1, k))
+    signs = rng.choice([-1.0, 1.0], size=(trajectories, 1, k))
+    x = base + delta / 2.0 * (steps[None] * signs + 1.0)
+    order = np.argsort(rng.random((trajectories, k)), axis=1)
+    return np.take_along_axis(x, order[:, None, :], axis=2)
+
+
+def morris_effects(x: np.ndarray, y: np.ndarray) -> Dict[str, np.ndarray]:
+    """Elementary-effect statistics from outputs of ``morris_design``.
+
+    Args:
+        x: ``(r, k + 1, k)`` design.
+        y: ``(r, k + 1)`` (or flat) model outputs.
+
+    Returns:
+        Dict with ``mu``, ``mu_star`` and ``sigma`` arrays of length ``k``,
+        in output units per full factor range.
+    """
+    r, rows, k = x.shape
+    y = y.reshape(r, rows)
+    dx = np.diff(x, axis=1)                          # (r, k, k)
+    factor = np.argmax(np.abs(dx), axis=2)           # factor moved at each step
+    step = np.take_along_axis(dx, factor[:, :, None], axis=2)[:, :, 0]
+    effects = np.zeros((r, k))
+    np.put_along_axis(effects, factor, np.diff(y, axis=1) / step, axis=1)
+    return {
+        "mu": effects.mean(axis=0),
+        "mu_star": np.abs(effects).mean(axis=0),
+        "sigma": effects.std(axis=0, ddof=1) if r > 1 else np.zeros(k),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MODELS
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class Factor:
+    """Uncertain input, sampled uniformly on ``[low, high]``."""
+    name: str
+    low: float
+    high: float
+
+    def scale(self, unit: np.ndarray) -> np.ndarray:
+        return self.low + (self.high - self.low) * unit
+
+
+def _scaled_records(mfg: RecordArray, cloud: RecordArray, x: Dict[str, np.ndarray]) -> Tuple[RecordArray, RecordArray]:
+    """Apply request-volume and cloud-price multipliers to the records."""
+    mfg = mfg.replace(daily_ai_requests=mfg.daily_ai_requests * x["requests_scale"])
+    cloud = cloud.replace(hourly_cost=cloud.hourly_cost * x["cloud_price_scale"])
+    return mfg, cloud
+
+
+def _breakeven_model(mfg: RecordArray, cloud: RecordArray, x: Dict[str, np.ndarray]) -> Columns:
+    mfg, cloud = _scaled_records(mfg, cloud, x)
+    columns = compute_breakeven_batch(mfg, cloud, x["development_cost"], x["monthly_ops_cost"], x["coverage"])
+    columns["breakeven_months"] = np.minimum(columns["breakeven_months"], BREAKEVEN_HORIZON_MONTHS)
+    return columns
+
+
+def _cost_model(mfg: RecordArray, cloud: RecordArray, x: Dict[str, np.ndarray]) -> Columns:
+    mfg, cloud = _scaled_records(mfg, cloud, x)
+    return compute_cost_comparison_batch(mfg, cloud, x["coverage"])
+
+
+@dataclass
+class SensitivityModel:
+    """Engine function, the outputs to analyse and its uncertain factors."""
+    evaluate: Callable[[RecordArray, RecordArray, Dict[str, np.ndarray]], Columns]
+    outputs: Tuple[str, ...]
+    factors: Tuple[Factor, ...]
+
+
+_SHARED_FACTORS: Tuple[Factor, ...] = (
+    Factor("coverage", 0.05, 0.70),
+    Factor("requests_scale", 0.5, 1.5),      # daily AI request volume
+    Factor("cloud_price_scale", 0.5, 1.5),   # cloud GPU hourly price
+)
+
+MODELS: Dict[str, SensitivityModel] = {
+    "breakeven": SensitivityModel(
+        _breakeven_model, ("breakeven_months", "roi_5yr_pct"),
+        _SHARED_FACTORS + (Factor("development_cost", 10_000_000, 50_000_000),
+                           Factor("monthly_ops_cost", 500_000, 3_000_000)),
+    ),
+    "cost": SensitivityModel(_cost_model, ("annual_savings",), _SHARED_FACTORS),
+}
+
+
+def _evaluate_task(task: Tuple[str, str, str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Process-pool entry point (module-level so it pickles)."""
+    model_name, mfg_key, cloud_key, unit = task
+    model = MODELS[model_name]
+    x = {f.name: f.scale(unit[:, i]) for i, f in enumerate(model.factors)}
+    columns = model.evaluate(
+        RecordArray.from_records([MANUFACTURERS[mfg_key]]),
+        RecordArray.from_records([CLOUD_PROVIDERS[cloud_key]]),
+        x,
+    )
+    return {name: np.asarray(columns[name], dtype=float) for name in model.outputs}
+
+
+def evaluate_design(
+    model_name: str,
+    mfg_key: str,
+    cloud_key: str,
+    unit: np.ndarray,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+) -> Dict[str, np.ndarray]:
+    """Evaluate unit-cube design rows in chunks, optionally on a process pool.
+
+    Returns:
+        Output name -> values, one per design row.
+    """
+    tasks = [(model_name, mfg_key, cloud_key, unit[start:start + chunk_size])
+             for start in range(0, len(unit), chunk_size)]
+    workers = min(resolve_workers(workers), len(tasks))
+    if workers <= 1:
+        parts = [_evaluate_task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_evaluate_task, tasks))
+    return {name: np.concatenate([p[name] for p in parts]) for name in MODELS[model_name].outputs}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ANALYSES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _label(model_name: str, mfg_key: str, cloud_key: str) -> Dict[str, Any]:
+    return {"model": model_name, "manufacturer": MANUFACTURERS[mfg_key].name,
+            "cloud_provider": CLOUD_PROVIDERS[cloud_key].short}
+
+
+def analyze_sobol(
+    model_name: str,
+    mfg_key: str = "samsung",
+    cloud_key: str = "aws_h100",
+    samples: int = 2 ** 14,
+    resamples: int = 100,
+    seed: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+) -> CategoryResults:
+    """Sobol first-order and total indices for one manufacturer/cloud pair.
+
+    Args:
+        model_name: Key of ``MODELS``.
+        mfg_key: Key of ``MANUFACTURERS``.
+        cloud_key: Key of ``CLOUD_PROVIDERS``.
+        samples: Saltelli base samples N (``N * (k + 2)`` evaluations).
+        resamples: Bootstrap resamples for confidence intervals.
+        seed: Bootstrap seed.
+        chunk_size: Design rows per engine batch.
+        workers: Process count; ``None``/0 uses all cores.
+
+    Returns:
+        One row per (output, factor) with s1, s1_conf, st, st_conf.
+    """
+    model = MODELS[model_name]
+    k = len(model.factors)
+    y = evaluate_design(model_name, mfg_key, cloud_key, saltelli_design(samples, k), chunk_size, workers)
+    rows: List[Dict[str, Any]] = []
+    for output in model.outputs:
+        indices = sobol_indices(y[output], k, resamples, seed)
+        for i, f in enumerate(model.factors):
+            rows.append({**_label(model_name, mfg_key, cloud_key), "output": output, "factor": f.name,
+                         **{key: float(values[i]) for key, values in indices.items()}})
+    return CategoryResults.from_records("sobol", rows)
+
+
+def analyze_morris(
+    model_name: str,
+    mfg_key: str = "samsung",
+    cloud_key: str = "aws_h100",
+    trajectories: int = 1000,
+    levels: int = 4,
+    seed: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+) -> CategoryResults:
+    """Morris elementary-effect screening for one manufacturer/cloud pair.
+
+    Returns:
+        One row per (output, factor) with mu, mu_star and sigma.
+    """
+    model = MODELS[model_name]
+    k = len(model.factors)
+    x = morris_design(trajectories, k, levels, seed)
+    y = evaluate_design(model_name, mfg_key, cloud_key, x.reshape(-1, k), chunk_size, workers)
+    rows: List[Dict[str, Any]] = []
+    for output in model.outputs:
+        effects = morris_effects(x, y[output])
+        for i, f in enumerate(model.factors):
+            rows.append({**_label(model_name, mfg_key, cloud_key), "output": output, "factor": f.name,
+                         **{key: float(values[i]) for key, values in effects.items()}})
+    return CategoryResults.from_records("morris", rows)
+
+
+def save_sensitivity_csv(results: Sequence[CategoryResults], path: str) -> str:
+    """Write analysis tables to one CSV, tagged by a ``method`` column."""
+    keys: List[str] = []
+    for table in results:
+        keys.extend(k for k in table.schema if k not in keys)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["method"] + keys)
+        writer.writeheader()
+        for table in results:
+            for row in table:
+                writer.writerow({"method": table.category, **row})
+    return path
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Sobol / Morris sensitivity of breakeven and cost results.")
+    parser.add_argument("--model", choices=sorted(MODELS) + ["all"], default="all")
+    parser.add_argument("--method", choices=("sobol", "morris", "both"), default="both")
+    parser.add_argument("--manufacturer", choices=sorted(MANUFACTURERS), default="samsung")
+    parser.add_argument("--cloud", choices=sorted(CLOUD_PROVIDERS), default="aws_h100")
+    parser.add_argument("--samples", type=int, default=2 ** 14, help="Saltelli base samples N")
+    parser.add_argument("--resamples", type=int, default=100, help="bootstrap resamples for confidence")
+    parser.add_argument("--trajectories", type=int, default=1000, help="Morris trajectories")
+    parser.add_argument("--levels", type=int, default=4, help="Morris grid levels")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="process-pool size (1 = serial, 0 = one per CPU core)")
+    parser.add_argument("--csv", default=None, help="write the index tables to this CSV")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the sensitivity analyses and print ranked factors."""
+    args = parse_args(argv)
+    models = sorted(MODELS) if args.model == "all" else [args.model]
+    pair = (args.manufacturer, args.cloud)
+    common = {"seed": args.seed, "chunk_size": args.chunk_size, "workers": args.workers}
+
+    print("=" * 60)
+    print("  NHP SENSITIVITY ANALYSIS — تحليل الحساسية")
+    print(f"  {MANUFACTURERS[args.manufacturer].name} × {CLOUD_PROVIDERS[args.cloud].short}")
+    print("=" * 60)
+    start_time = time.time()
+    evaluations = 0
+
+    tables: List[CategoryResults] = []
+    for name in models:
+        k = len(MODELS[name].factors)
+        if args.method in ("sobol", "both"):
+            table = analyze_sobol(name, *pair, samples=args.samples, resamples=args.resamples, **common)
+            evaluations += args.samples * (k + 2)
+            tables.append(table)
+            for output in MODELS[name].outputs:
+                print(f"\n▶ Sobol — {output}  (S1 ± 95% / ST ± 95%)")
+                for r in sorted(table.where(output=output), key=lambda r: -r["st"]):
+                    print(f"  {r['factor']:20s} {r['s1']:7.3f} ± {r['s1_conf']:.3f}   "
+                          f"{r['st']:7.3f} ± {r['st_conf']:.3f}")
+        if args.method in ("morris", "both"):
+            table = analyze_morris(name, *pair, trajectories=args.trajectories, levels=args.levels, **common)
+            evaluations += args.trajectories * (k + 1)
+            tables.append(table)
+            for output in MODELS[name].outputs:
+                print(f"\n▶ Morris — {output}  (mu* / sigma)")
+                for r in sorted(table.where(output=output), key=lambda r: -r["mu_star"]):
+                    print(f"  {r['factor']:20s} {r['mu_star']:>16,.2f} {r['sigma']:>16,.2f}")
+
+    if args.csv:
+        print(f"\n  ✅ CSV saved: {save_sensitivity_csv(tables, args.csv)}")
+    print(f"\n  {evaluations:,} model evaluations | {time.time() - start_time:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
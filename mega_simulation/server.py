@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Engine API Server
+Local HTTP/JSON service answering single ``engine.py`` questions, e.g.
+"breakeven for Xiaomi at 37% coverage vs GCP H100":
+
+    GET /v1/breakeven?mfg=xiaomi&cloud=gcloud_h100&coverage=0.37
+
+Queries never run the scalar engine one by one. Concurrent requests for
+the same endpoint are coalesced by a micro-batcher into one call of the
+matching ``vectorized.py`` batch function, flushed after ``max_delay_ms``
+or as soon as ``max_batch`` rows are waiting. Identical queries share one
+in-flight computation, and finished rows are kept in an LRU cache. The
+registries (manufacturers, clouds, regions, …) are preloaded once as
+``RecordArray``s, so a batch is a gather plus a few NumPy kernels. The
+server imports neither matplotlib nor the scenario layer.
+
+Routes:
+    GET  /health                   liveness
+    GET  /v1                       endpoints, parameters, registry keys
+    GET  /v1/stats                 request / batch / cache counters
+    GET  /v1/<endpoint>?k=v&...    one result object
+    POST /v1/<endpoint>            JSON object → object, JSON list → list
+
+Run with:
+    python mega_simulation/server.py serve --port 8765
+    python mega_simulation/server.py bench --connections 64 --requests 50000
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.data import CLOUD_PROVIDERS, COMPETITORS, MANUFACTURERS, REGIONS, TASK_TYPES
+from mega_simulation.vectorized import (
+    Columns, RecordArray,
+    compute_fleet_power_batch, compute_cost_comparison_batch, compute_user_income_batch,
+    compute_environmental_batch, compute_combined_network_batch, compute_task_feasibility_batch,
+    compute_market_size_batch, compute_token_economics_batch, compute_competitive_batch,
+    compute_breakeven_batch,
+)
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8765
+DEFAULT_MAX_BATCH: int = 4096
+DEFAULT_MAX_DELAY_MS: float = 1.0
+DEFAULT_CACHE_SIZE: int = 100_000
+MAX_BODY_BYTES: int = 1 << 20
+MAX_QUANTITY: float = 1e12          # Upper bound for counts, TOPS and dollar amounts
+
+
+class QueryError(ValueError):
+    """Invalid endpoint or parameters (HTTP 400/404)."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENDPOINTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Registry:
+    """A preloaded data registry: lookup by key or display name, gather by index."""
+
+    def __init__(self, records: Mapping[str, Any]) -> None:
+        self.keys = list(records)
+        self.records = RecordArray.from_records(list(records.values()))
+        self._index: Dict[str, int] = {}
+        for i, (key, record) in enumerate(records.items()):
+            self._index[key.lower()] = i
+            self._index[str(getattr(record, "name", key)).lower()] = i
+        self._values = list(records.values())
+
+    def index(self, name: str, param: str) -> int:
+        try:
+            return self._index[name.strip().lower()]
+        except KeyError:
+            raise QueryError(f"Unknown {param} {name!r}; choose from {', '.join(self.keys)}") from None
+
+    def take(self, indices: List[int]) -> RecordArray:
+        return self.records.take(indices)
+
+    def __getitem__(self, i: int) -> Any:
+        return self._values[i]
+
+
+@dataclass(frozen=True)
+class Param:
+    """One query parameter: a registry key, a list of keys, or a number."""
+    name: str
+    registry: Optional[Registry] = None
+    default: Optional[float] = None
+    many: bool = False              # Comma-separated registry keys (alliances)
+    low: float = 0.0                # Inclusive numeric bounds
+    high: float = MAX_QUANTITY
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """A batch compute function and the parameters it takes, in call order."""
+    name: str
+    compute: Callable[..., Columns]
+    params: Tuple[Param, ...]
+    doc: str
+
+    def parse(self, raw: Mapping[str, Any]) -> Tuple[Any, ...]:
+        """Validate one query into a hashable argument tuple."""
+        unknown = set(raw) - {p.name for p in self.params}
+        if unknown:
+            raise QueryError(f"{self.name}: unknown parameter(s) {', '.join(sorted(unknown))}")
+        args: List[Any] = []
+        for p in self.params:
+            value = raw.get(p.name, p.default)
+            if value is None:
+                raise QueryError(f"{self.name}: missing parameter {p.name!r}")
+            if p.registry is not None and p.many:
+                names = value if isinstance(value, list) else str(value).split(",")
+                args.append(tuple(p.registry.index(str(n), p.name) for n in names if str(n).strip()))
+                if not args[-1]:
+                    raise QueryError(f"{self.name}: {p.name!r} needs at least one key")
+            elif p.registry is not None:
+                args.append(p.registry.index(str(value), p.name))
+            else:
+                try:
+                    number = float(value)
+                except (TypeError, ValueError):
+                    raise QueryError(f"{self.name}: {p.name!r} must be a number, got {value!r}") from None
+                if not math.isfinite(number):
+                    raise QueryError(f"{self.name}: {p.name!r} must be finite")
+                if not p.low <= number <= p.high:
+                    raise QueryError(f"{self.name}: {p.name!r} must be between {p.low:g} and {p.high:g}, "
+                                     f"got {number:g}")
+                args.append(number)
+        return tuple(args)
+
+    def columns(self, rows: List[Tuple[Any, ...]]) -> List[Any]:
+        """Transpose argument tuples into the batch function's columns."""
+        columns: List[Any] = []
+        for p, values in zip(self.params, zip(*rows)):
+            if p.registry is not None and p.many:
+                columns.append([[p.registry[i] for i in keys] for keys in values])
+            elif p.registry is not None:
+                columns.append(p.registry.take(list(values)))
+            else:
+                columns.append(np.array(values, dtype=float))
+        return columns
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "doc": self.doc,
+            "params": {p.name: ({"keys": p.registry.keys, "many": p.many} if p.registry is not None
+                                else {"default": p.default, "min": p.low, "max": p.high})
+                       for p in self.params},
+        }
+
+
+def build_endpoints() -> Dict[str, Endpoint]:
+    """Every engine query the server answers, keyed by URL name."""
+    mfg, cloud = Registry(MANUFACTURERS), Registry(CLOUD_PROVIDERS)
+    region, task, competitor = Registry(REGIONS), Registry(TASK_TYPES), Registry(COMPETITORS)
+    endpoints = [
+        Endpoint("fleet_power", compute_fleet_power_batch,
+                 (Param("mfg", mfg), Param("uptime", default=0.25, high=1.0)),
+                 "Active devices, TOPS and H100 equivalents of a fleet"),
+        Endpoint("cost_comparison", compute_cost_comparison_batch,
+                 (Param("mfg", mfg), Param("cloud", cloud), Param("coverage", default=0.40, high=1.0)),
+                 "NHP vs cloud GPU cost for a manufacturer's AI workload"),
+        Endpoint("user_income", compute_user_income_batch,
+                 (Param("region", region), Param("token_price", default=0.10)),
+                 "Monthly / annual user income net of electricity"),
+        Endpoint("environmental", compute_environmental_batch,
+                 (Param("mfg", mfg), Param("uptime", default=0.25, high=1.0),
+                  Param("dc_replaced", default=0.10, high=1.0)),
+                 "CO2 saved by replacing data-centre compute"),
+        Endpoint("combined_network", compute_combined_network_batch,
+                 (Param("mfgs", mfg, many=True), Param("uptime", default=0.25, high=1.0)),
+                 "Fleet power of an alliance (mfgs=samsung,xiaomi,...)"),
+        Endpoint("task_feasibility", compute_task_feasibility_batch,
+                 (Param("task", task), Param("fleet_tops"), Param("active_devices"),
+                  Param("avg_tops_per_device"), Param("overhead", default=0.20, high=1.0)),
+                 "Whether the fleet can serve a task type, and how fast"),
+        Endpoint("market_size", compute_market_size_batch,
+                 (Param("region", region), Param("penetration_rate", default=0.10, high=1.0)),
+                 "Addressable devices and income pool of a region"),
+        Endpoint("token_economics", compute_token_economics_batch,
+                 (Param("total_devices"), Param("uptime", default=0.25, high=1.0),
+                  Param("token_price", default=0.10), Param("platform_cut", default=0.15, high=1.0)),
+                 "Network GPU-hours, revenue and platform cut"),
+        Endpoint("competitive", compute_competitive_batch,
+                 (Param("nhp_devices"), Param("nhp_avg_tops"), Param("nhp_uptime", default=0.25, high=1.0),
+                  Param("competitor", competitor)),
+                 "NHP vs a decentralized-compute competitor"),
+        Endpoint("breakeven", compute_breakeven_batch,
+                 (Param("mfg", mfg), Param("cloud", cloud), Param("development_cost", default=50_000_000.0),
+                  Param("monthly_ops_cost", default=2_000_000.0), Param("coverage", default=0.40, high=1.0)),
+                 "Months until NHP integration pays for itself"),
+    ]
+    return {e.name: e for e in endpoints}
+
+
+def _rows(columns: Columns, n: int) -> List[Dict[str, Any]]:
+    """Split batch columns into JSON-ready row dicts (non-finite floats → null)."""
+    lists: Dict[str, List[Any]] = {}
+    for key, col in columns.items():
+        col = np.broadcast_to(np.asarray(col), (n,))
+        if col.dtype.kind == "f" and not np.isfinite(col).all():
+            lists[key] = [v if math.isfinite(v) else None for v in col.tolist()]
+        else:
+            lists[key] = col.tolist()
+    keys = list(lists)
+    return [dict(zip(keys, values)) for values in zip(*lists.values())]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BATCHING + CACHE
+# ═══════════════════════════════════════════════════════════════════════════
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+
+    def get(self, key: Any) -> Optional[Any]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        if self.capacity <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.capacity:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@dataclass
+class ServiceStats:
+    requests: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0              # Answered by an identical in-flight query
+    batches: int = 0
+    rows: int = 0                   # Rows computed by batch functions
+    max_batch: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        out = dict(self.__dict__)
+        out["mean_batch"] = self.rows / self.batches if self.batches else 0.0
+        out["hit_rate"] = self.cache_hits / self.requests if self.requests else 0.0
+        return out
+
+
+class EngineService:
+    """Coalesces concurrent queries into vectorized batches behind an LRU cache.
+
+    Args:
+        max_batch: Rows that trigger an immediate flush.
+        max_delay_ms: Longest a query waits for others to join its batch.
+        cache_size: LRU capacity in result rows (0 disables caching).
+    """
+
+    def __init__(
+        self,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay_ms: float = DEFAULT_MAX_DELAY_MS,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.endpoints = build_endpoints()
+        self.max_batch = max_batch
+        self.max_delay_s = max_delay_ms / 1000.0
+        self.cache = LRUCache(cache_size)
+        self.stats = ServiceStats()
+        self._pending: Dict[str, List[Tuple[Tuple[Any, ...], asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._inflight: Dict[Tuple[str, Tuple[Any, ...]], asyncio.Future] = {}
+
+    def endpoint(self, name: str) -> Endpoint:
+        try:
+            return self.endpoints[name]
+        except KeyError:
+            raise QueryError(f"Unknown endpoint {name!r}; choose from {', '.join(self.endpoints)}", 404) from None
+
+    async def query(self, name: str, raw: Mapping[str, Any]) -> Dict[str, Any]:
+        """Answer one query (cached, coalesced with identical ones, or batched)."""
+        endpoint = self.endpoint(name)
+        args = endpoint.parse(raw)
+        key = (name, args)
+        self.stats.requests += 1
+        hit = self.cache.get(key)
+        if hit is not None:
+            self.stats.cache_hits += 1
+            return hit
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        pending = self._pending.setdefault(name, [])
+        pending.append((args, future))
+        if len(pending) >= self.max_batch:
+            self._flush(name)
+        elif name not in self._timers:
+            self._timers[name] = asyncio.get_running_loop().call_later(self.max_delay_s, self._flush, name)
+        return await asyncio.shield(future)
+
+    def _flush(self, name: str) -> None:
+        """Evaluate every pending query of one endpoint in one batch call."""
+        timer = self._timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(name, [])
+        if not pending:
+            return
+        endpoint = self.endpoints[name]
+        rows = [args for args, _ in pending]
+        try:
+            results = _rows(endpoint.compute(*endpoint.columns(rows)), len(rows))
+        except Exception as e:      # A bad batch must not take the server down
+            self.stats.errors += 1
+            for args, future in pending:
+                self._inflight.pop((name, args), None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.stats.batches += 1
+        self.stats.rows += len(rows)
+        self.stats.max_batch = max(self.stats.max_batch, len(rows))
+        for (args, future), result in zip(pending, results):
+            self.cache.put((name, args), result)
+            self._inflight.pop((name, args), None)
+            if not future.done():
+                future.set_result(result)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# HTTP
+# ═══════════════════════════════════════════════════════════════════════════
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    head = (f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+async def _route(service: EngineService, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+    url = urlsplit(target)
+    path = url.path.rstrip("/")
+    if path == "/health":
+        return 200, {"status": "ok"}
+    if path == "/v1":
+        return 200, {name: e.describe() for name, e in service.endpoints.items()}
+    if path == "/v1/stats":
+        return 200, {**service.stats.as_dict(), "cache_entries": len(service.cache)}
+    if not path.startswith("/v1/"):
+        raise QueryError(f"Unknown path {url.path!r}", 404)
+    name = path[len("/v1/"):]
+    if method == "GET":
+        return 200, await service.query(name, dict(parse_qsl(url.query)))
+    if method != "POST":
+        raise QueryError(f"Method {method} not allowed", 405)
+    try:
+        payload = json.loads(body or b"{}")
+    except json.JSONDecodeError as e:
+        raise QueryError(f"Invalid JSON body: {e}") from None
+    if isinstance(payload, list):
+        return 200, list(await asyncio.gather(*(service.query(name, q) for q in payload)))
+    if not isinstance(payload, dict):
+        raise QueryError("Body must be a JSON object or a list of objects")
+    return 200, await service.query(name, payload)
+
+
+async def handle_connection(service: EngineService, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+    """Serve HTTP/1.1 requests on one keep-alive connection."""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                writer.write(_response(400, {"error": "Malformed request line"}, False))
+                return
+            headers = {k.strip().lower(): v.strip()
+                       for k, _, v in (line.partition(":") for line in lines[1:] if line)}
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            length = int(headers.get("content-length", 0) or 0)
+            if length > MAX_BODY_BYTES:
+                writer.write(_response(413, {"error": "Body too large"}, False))
+                return
+            body = await reader.readexactly(length) if length else b""
+            try:
+                status, payload = await _route(service, method, target, body)
+            except QueryError as e:
+                service.stats.errors += 1
+                status, payload = e.status, {"error": str(e)}
+            except Exception as e:
+                service.stats.errors += 1
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    finally:
+        writer.close()
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, **service_kwargs: Any) -> None:
+    """Run the server until cancelled; prints the bound address first."""
+    service = EngineService(**service_kwargs)
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(service, r, w), host, port, backlog=1024)
+    bound = server.sockets[0].getsockname()
+    print(f"listening on http://{bound[0]}:{bound[1]}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LOAD GENERATOR
+# ═══════════════════════════════════════════════════════════════════════════
+
+def breakeven_query(rng: random.Random, distinct: int) -> str:
+    """A random breakeven query; ``distinct`` > 0 limits coverages (cache hits)."""
+    coverage = rng.randrange(distinct) / distinct if distinct else rng.random()
+    return (f"/v1/breakeven?mfg={rng.choice(list(MANUFACTURERS))}"
+            f"&cloud={rng.choice(list(CLOUD_PROVIDERS))}&coverage={0.05 + 0.9 * coverage:.6f}")
+
+
+@dataclass
+class LoadReport:
+    requests: int
+    seconds: float
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def qps(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.latencies_ms, q)) if self.latencies_ms else float("nan")
+
+
+async def load_test(
+    host: str,
+    port: int,
+    requests: int = 50_000,
+    connections: int = 64,
+    distinct: int = 0,
+    seed: int = 0,
+) -> LoadReport:
+    """Closed-loop load: ``connections`` keep-alive clients, one request in flight each."""
+    rng = random.Random(seed)
+    targets = [breakeven_query(rng, distinct) for _ in range(requests)]
+    report = LoadReport(requests=requests, seconds=0.0)
+    cursor = iter(range(requests))
+
+    async def client() -> None:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in cursor:
+                sent = time.perf_counter()
+                writer.write(f"GET {targets[i]} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.split(b"Content-Length: ", 1)[1].split(b"\r\n", 1)[0])
+                await reader.readexactly(length)
+                report.latencies_ms.append((time.perf_counter() - sent) * 1000.0)
+                if not head.startswith(b"HTTP/1.1 200"):
+                    report.errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+async def _fetch_json(host: str, port: int, path: str) -> Any:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    data = await reader.read()
+    writer.close()
+    return json.loads(data.split(b"\r\n\r\n", 1)[1])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="NHP engine HTTP/JSON server and load generator.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    s = sub.add_parser("serve", help="run the server")
+    s.add_argument("--host", default=DEFAULT_HOST)
+    s.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    s.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    s.add_argument("--max-delay-ms", type=float, default=DEFAULT_MAX_DELAY_MS)
+    s.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE)
+    b = sub.add_parser("bench", help="load-test a server (spawns one unless --port is given)")
+    b.add_argument("--host", default=DEFAULT_HOST)
+    b.add_argument("--port", type=int, default=None)
+    b.add_argument("--requests", type=int, default=50_000)
+    b.add_argument("--connections", type=int, default=64)
+    b.add_argument("--distinct", type=int, default=0,
+                   help="distinct coverages per mfg × cloud (0 = every query unique, no cache hits)")
+    b.add_argument("--seed", type=int, default=0)
+    b.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="for the spawned server")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Serve, or run the bundled load generator against a (spawned) server."""
+    args = parse_args(argv)
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, max_batch=args.max_batch,
+                              max_delay_ms=args.max_delay_ms, cache_size=args.cache_size))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    proc = None
+    port = args.port
+    if port is None:
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", "--host", args.host,
+                                 "--port", "0", "--cache-size", str(args.cache_size)],
+                                stdout=subprocess.PIPE, text=True)
+        port = int(proc.stdout.readline().rsplit(":", 1)[1])
+    try:
+        report = asyncio.run(load_test(args.host, port, args.requests, args.connections,
+                                       args.distinct, args.seed))
+        stats = asyncio.run(_fetch_json(args.host, port, "/v1/stats"))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    print("=" * 60)
+    print("  NHP ENGINE SERVER LOAD TEST — اختبار الحمل")
+    print(f"  {args.requests:,} breakeven queries | {args.connections} connections | "
+          f"{'unique' if not args.distinct else f'{args.distinct} coverages'}")
+    print("=" * 60)
+    print(f"  Throughput:   {report.qps:>10,.0f} req/s ({report.seconds:.2f}s)")
+    print(f"  Latency p50:  {report.percentile(50):>10.2f} ms")
+    print(f"  Latency p99:  {report.percentile(99):>10.2f} ms")
+    print(f"  Mean batch:   {stats['mean_batch']:>10.1f} rows ({stats['batches']:,} batches)")
+    print(f"  Cache hits:   {stats['hit_rate']:>10.1%}  coalesced {stats['coalesced']:,}")
+    print(f"  Errors:       {report.errors:>10,}")
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
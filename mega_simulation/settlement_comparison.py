@@ -11,30 +11,32 @@ Compares 7 settlement systems across:
 - Scalability
 - Net user income after fees
 
-Run: python mega_simulation/settlement_comparison.py
+Run: python mega_simulation/settlement_comparison.py [--render-profile draft|web|print]
 """
+import argparse
 import sys
 import os
 import time
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 from dataclasses import dataclass, field
 from datetime import datetime
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
 import numpy as np
 
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
 from mega_simulation.data import (
     REGIONS, VARIANT_NAMES, VARIANT_COLORS, VARIANT_EMOJIS,
     TOKEN_PRICE_VARIANTS, NIGHTLY_HOURS, DEVICE_EXTRA_WATT,
 )
-
-CHART_DPI: int = 300
+from mega_simulation.render import (
+    ChartJob, add_profile_argument, asset_dir, pyplot, render_charts, report_path, save_figure,
+    set_render_profile,
+)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -368,32 +370,34 @@ def _fmt(v: float) -> str:
     return f"${v:.2f}"
 
 
-def _wm(ax: plt.Axes) -> None:
+def _wm(ax: "Axes") -> None:
     ax.text(0.99, 0.01, "NHP Protocol v2.0", transform=ax.transAxes,
             fontsize=7, color="gray", alpha=0.4, ha="right", va="bottom")
 
 
-def generate_settlement_charts(results: Dict[str, List[Dict[str, Any]]], out_dir: str) -> List[str]:
+def generate_settlement_charts(
+    results: Dict[str, List[Dict[str, Any]]],
+    out_dir: str,
+    workers: Optional[int] = 1,
+) -> List[str]:
     """Generate all settlement comparison charts."""
     os.makedirs(out_dir, exist_ok=True)
-    plt.style.use("seaborn-v0_8-darkgrid")
-    saved: List[str] = []
-
-    # Chart 1: Overall Score Comparison
-    saved.append(_chart_scores(results["scoring"], out_dir))
-    # Chart 2: Net Income by System (moderate)
-    saved.append(_chart_income_comparison(results["income_comparison"], out_dir))
-    # Chart 3: Fee Impact
-    saved.append(_chart_fee_impact(results["scoring"], out_dir))
-    # Chart 4: Manufacturer Acceptance vs User Difficulty
-    saved.append(_chart_acceptance_difficulty(results["scoring"], out_dir))
-    # Chart 5: Regional Availability
-    saved.append(_chart_regional(results["scoring"], out_dir))
-
-    return saved
+    return render_charts([
+        # Chart 1: Overall Score Comparison
+        ChartJob(_chart_scores, (results["scoring"], out_dir)),
+        # Chart 2: Net Income by System (moderate)
+        ChartJob(_chart_income_comparison, (results["income_comparison"], out_dir)),
+        # Chart 3: Fee Impact
+        ChartJob(_chart_fee_impact, (results["scoring"], out_dir)),
+        # Chart 4: Manufacturer Acceptance vs User Difficulty
+        ChartJob(_chart_acceptance_difficulty, (results["scoring"], out_dir)),
+        # Chart 5: Regional Availability
+        ChartJob(_chart_regional, (results["scoring"], out_dir)),
+    ], workers)
 
 
 def _chart_scores(scoring: List[Dict[str, Any]], out: str) -> str:
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(14, 7))
     scoring_sorted = sorted(scoring, key=lambda x: x["overall_score"], reverse=True)
     names = [s["system"].split("(")[0].strip()[:20] for s in scoring_sorted]
@@ -420,12 +424,13 @@ def _chart_scores(scoring: List[Dict[str, Any]], out: str) -> str:
     _wm(ax)
     plt.tight_layout()
     path = os.path.join(out, "settlement_01_scores.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
 def _chart_income_comparison(income_data: List[Dict[str, Any]], out: str) -> str:
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(14, 7))
     # Moderate variant, USA region
     mod_us = [r for r in income_data if r["variant"] == "Moderate" and r["region"] == "USA"]
@@ -454,12 +459,13 @@ def _chart_income_comparison(income_data: List[Dict[str, Any]], out: str) -> str
     _wm(ax)
     plt.tight_layout()
     path = os.path.join(out, "settlement_02_income.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
 def _chart_fee_impact(scoring: List[Dict[str, Any]], out: str) -> str:
+    plt = pyplot()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
     names = [s["system"].split("(")[0].strip()[:15] for s in scoring]
     fees_pct = [s["tx_fee_pct"] for s in scoring]
@@ -485,12 +491,13 @@ def _chart_fee_impact(scoring: List[Dict[str, Any]], out: str) -> str:
 
     plt.tight_layout()
     path = os.path.join(out, "settlement_03_fees.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
 def _chart_acceptance_difficulty(scoring: List[Dict[str, Any]], out: str) -> str:
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(10, 8))
     diff_map = {"Easy": 1, "Medium": 2, "Hard": 3}
     acc_map = {"High": 3, "Medium": 2, "Low": 1}
@@ -527,12 +534,13 @@ def _chart_acceptance_difficulty(scoring: List[Dict[str, Any]], out: str) -> str
     _wm(ax)
     plt.tight_layout()
     path = os.path.join(out, "settlement_04_acceptance.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
 
 def _chart_regional(scoring: List[Dict[str, Any]], out: str) -> str:
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
     names = [s["system"].split("(")[0].strip()[:18] for s in scoring]
     avail = [s["available_count"] for s in scoring]
@@ -556,7 +564,7 @@ def _chart_regional(scoring: List[Dict[str, Any]], out: str) -> str:
     _wm(ax)
     plt.tight_layout()
     path = os.path.join(out, "settlement_05_regional.png")
-    fig.savefig(path, dpi=CHART_DPI)
+    save_figure(fig, path)
     plt.close(fig)
     return path
 
@@ -592,7 +600,7 @@ def generate_settlement_report(
     # Overall Scores
     lines.append("## 1. Overall Ranking / الترتيب العام")
     lines.append("")
-    lines.append(f"![Overall Scores](../../assets/settlement/{os.path.basename(chart_paths[0])})")
+    lines.append(f"![Overall Scores](../../{chart_paths[0]})")
     lines.append("")
     scoring = sorted(results["scoring"], key=lambda x: x["overall_score"], reverse=True)
     lines.append("| Rank | System / النظام | Category | Score | UX | Manufacturer | Regulatory |")
@@ -610,7 +618,7 @@ def generate_settlement_report(
     # Income Comparison
     lines.append("## 2. Net User Income Comparison / مقارنة دخل المستخدم الصافي")
     lines.append("")
-    lines.append(f"![Income Comparison](../../assets/settlement/{os.path.basename(chart_paths[1])})")
+    lines.append(f"![Income Comparison](../../{chart_paths[1]})")
     lines.append("")
 
     mod = [r for r in results["income_comparison"] if r["variant"] == "Moderate" and r["region"] == "USA"]
@@ -624,13 +632,13 @@ def generate_settlement_report(
     # Fees
     lines.append("## 3. Fee & Speed Analysis / تحليل الرسوم والسرعة")
     lines.append("")
-    lines.append(f"![Fees & Speed](../../assets/settlement/{os.path.basename(chart_paths[2])})")
+    lines.append(f"![Fees & Speed](../../{chart_paths[2]})")
     lines.append("")
 
     # Acceptance Matrix
     lines.append("## 4. Manufacturer Acceptance vs User Difficulty / قبول المصنّع مقابل صعوبة المستخدم")
     lines.append("")
-    lines.append(f"![Acceptance Matrix](../../assets/settlement/{os.path.basename(chart_paths[3])})")
+    lines.append(f"![Acceptance Matrix](../../{chart_paths[3]})")
     lines.append("")
 
     lines.append("| System | User Difficulty | Mfg Acceptance | Bank? | Wallet? | KYC? | Steps |")
@@ -645,7 +653,7 @@ def generate_settlement_report(
     # Regional
     lines.append("## 5. Regional Availability / التوفر الجغرافي")
     lines.append("")
-    lines.append(f"![Regional Availability](../../assets/settlement/{os.path.basename(chart_paths[4])})")
+    lines.append(f"![Regional Availability](../../{chart_paths[4]})")
     lines.append("")
 
     # Key Insight
@@ -676,8 +684,11 @@ def generate_settlement_report(
 # MAIN
 # ═══════════════════════════════════════════════════════════════════════════
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
     """Run complete settlement system comparison."""
+    parser = argparse.ArgumentParser(description="NHP Phase 4 — Settlement System Comparison")
+    add_profile_argument(parser)
+    set_render_profile(parser.parse_args(argv).render_profile)
     print("=" * 60)
     print("  NHP Phase 4 — Settlement System Comparison")
     print("  مقارنة أنظمة التسوية والدفع")
@@ -697,7 +708,7 @@ def main() -> None:
 
     # Generate charts
     print("▶ Generating charts...")
-    chart_dir = "assets/settlement"
+    chart_dir = asset_dir("assets/settlement")
     charts = generate_settlement_charts(results, chart_dir)
     for c in charts:
         print(f"  ✅ {c}")
@@ -706,11 +717,11 @@ def main() -> None:
     # Generate report
     print("▶ Generating report...")
     report = generate_settlement_report(results, charts, total)
-    os.makedirs("output", exist_ok=True)
-    report_path = "output/settlement_comparison.md"
-    with open(report_path, "w", encoding="utf-8") as f:
+    path = report_path("output/settlement_comparison.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
         f.write(report)
-    print(f"  ✅ {report_path}")
+    print(f"  ✅ {path}")
 
     elapsed = time.time() - start
     print()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+NHP Mega Simulation — Streaming Result Sinks
+Sweeps as a stream of result batches instead of one ``ResultStore`` that
+holds every scenario.
+
+``sweep.iter_results`` produces ``(key, CategoryResults)`` chunks in grid
+order. ``stream_sweeps`` hands each chunk to every subscribed sink and then
+closes them:
+
+    CollectSink    the full ``ResultStore`` (what ``run_sweeps`` returns)
+    ParquetSink    appends each chunk to the partitioned Parquet dataset
+    CsvSink        appends each chunk to the union-of-keys CSV
+    SummarySink    running count / mean / std / quantiles per numeric column
+    DistinctSink   one row per distinct key, e.g. the chart inputs
+
+Without a ``CollectSink``, peak memory is a few chunks (``chunk_size`` rows
+each) plus the sinks' own state, which is bounded by the number of columns
+or groups and not by the number of scenarios.
+
+Run with:
+    python mega_simulation/sinks.py --xl-prices 1000000 --export parquet --charts assets/stream
+"""
+import abc
+import argparse
+import contextlib
+import csv
+import os
+import resource
+import sys
+import time
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mega_simulation.data import REGIONS
+from mega_simulation.export import EXPORT_FORMATS, ParquetDatasetWriter, clear_category, export_path, has_pyarrow
+from mega_simulation.profiling import tracing
+from mega_simulation.render import add_profile_argument, set_render_profile
+from mega_simulation.report import csv_fieldnames, csv_row
+from mega_simulation.results import CategoryResults, ResultStore
+from mega_simulation.sketch import StreamingSummary
+from mega_simulation.sweep import Axis, Sweep, DEFAULT_CHUNK_SIZE, evaluate_chunk, iter_results
+from mega_simulation.vectorized import compute_user_income_batch
+
+# Key columns -> value columns kept per category by ``DistinctSink``.
+DistinctSpec = Tuple[Sequence[str], Sequence[str]]
+
+
+class ResultSink(abc.ABC):
+    """Consumer of streamed result chunks.
+
+    ``write`` is called once per chunk, in grid order, and ``close`` once
+    at the end; whatever ``close`` returns is the sink's result. A sink
+    without ``write`` cannot be created.
+    """
+
+    @abc.abstractmethod
+    def write(self, key: str, chunk: CategoryResults) -> None:
+        """Consume one chunk of ``key``'s results."""
+
+    def close(self) -> Any:
+        return None
+
+
+class CollectSink(ResultSink):
+    """Concatenates every chunk, i.e. the non-streaming ``ResultStore``."""
+
+    def __init__(self) -> None:
+        self._parts: Dict[str, List[CategoryResults]] = {}
+        self._labels: Dict[str, str] = {}
+
+    def write(self, key: str, chunk: CategoryResults) -> None:
+        self._parts.setdefault(key, []).append(chunk)
+        self._labels[key] = chunk.category
+
+    def close(self) -> ResultStore:
+        return ResultStore({key: CategoryResults.concat(self._labels[key], parts)
+                            for key, parts in self._parts.items()})
+
+
+class ParquetSink(ResultSink):
+    """Streams chunks into the category/variant-partitioned Parquet dataset."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._writer = ParquetDatasetWriter(root)
+        self._cleared: set = set()
+
+    def write(self, key: str, chunk: CategoryResults) -> None:
+        if chunk.category not in self._cleared:
+            clear_category(self.root, chunk.category)
+            self._cleared.add(chunk.category)
+        self._writer.write(chunk.category, chunk.columns)
+
+    def close(self) -> str:
+        self._writer.close()
+        return self.root
+
+
+class CsvSink(ResultSink):
+    """Streams chunks into one CSV with a fixed header (see ``report.save_csv_export``)."""
+
+    def __init__(self, path: str, fieldnames: Sequence[str]) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=list(fieldnames), extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, key: str, chunk: CategoryResults) -> None:
+        self._writer.writerows(csv_row(r) for r in chunk)
+
+    def close(self) -> str:
+        self._file.close()
+        return self.path
+
+
+class SummarySink(ResultSink):
+    """Running aggregates of every numeric column, per category.
+
+    Args:
+        columns: Columns to summarize (default: every int/float column).
+        relative_accuracy: Quantile sketch accuracy.
+    """
+
+    def __init__(self, columns: Optional[Sequence[str]] = None, relative_accuracy: float = 0.01) -> None:
+        self.columns = None if columns is None else tuple(columns)
+        self.relative_accuracy = relative_accuracy
+        self._summaries: Dict[str, Dict[str, StreamingSummary]] = {}
+
+    def write(self, key: str, chunk: CategoryResults) -> None:
+        summaries = self._summaries.setdefault(key, {})
+        for name, col in chunk.columns.items():
+            if self.columns is not None and name not in self.columns:
+                continue
+            if col.dtype.kind not in "iuf":
+                continue
+            if name not in summaries:
+                summaries[name] = StreamingSummary(self.relative_accuracy)
+            summaries[name].add(col)
+
+    def close(self) -> Dict[str, Dict[str, StreamingSummary]]:
+        return self._summaries
+
+
+class DistinctSink(ResultSink):
+    """Keeps the first row of every distinct key combination.
+
+    That is the row ``CategoryResults.value`` / ``lookup`` would return, so
+    lookups on the reduced results match lookups on the full results.
+    State is one row per group, whatever the chunk count.
+
+    Args:
+        specs: Result key -> (key columns, value columns). Chunks of other
+            keys are ignored.
+    """
+
+    def __init__(self, specs: Mapping[str, DistinctSpec]) -> None:
+        self.specs = {key: (tuple(keys), tuple(values)) for key, (keys, values) in specs.items()}
+        self._seen: Dict[str, set] = {}
+        self._parts: Dict[str, List[CategoryResults]] = {}
+        self._labels: Dict[str, str] = {}
+
+    def write(self, key: str, chunk: CategoryResults) -> None:
+        spec = self.specs.get(key)
+        if spec is None or not len(chunk):
+            return
+        keys, values = spec
+        codes = np.zeros(len(chunk), dtype=np.int64)
+        for name in keys:
+            uniques, inverse = np.unique(chunk.column(name), return_inverse=True)
+            codes = codes * len(uniques) + inverse
+        _, first = np.unique(codes, return_index=True)
+        first.sort()
+
+        seen = self._seen.setdefault(key, set())
+        fresh = []
+        for i, group in zip(first, zip(*[chunk.column(name)[first].tolist() for name in keys])):
+            if group not in seen:
+                seen.add(group)
+                fresh.append(i)
+        if fresh:
+            rows = np.array(fresh)
+            self._parts.setdefault(key, []).append(CategoryResults(
+                chunk.category, {name: chunk.column(name)[rows] for name in (*keys, *values)}))
+            self._labels[key] = chunk.category
+
+    def close(self) -> ResultStore:
+        return ResultStore({key: CategoryResults.concat(self._labels[key], parts)
+                            for key, parts in self._parts.items()})
+
+
+def export_sink(sweeps: Mapping[str, Sweep], output_dir: str = "output", fmt: str = "auto") -> ResultSink:
+    """Parquet or CSV sink for this module's streamed data export.
+
+    It writes the same dataset or CSV path and format that
+    ``export.save_export`` would write for the whole ``ResultStore``.
+
+    The CSV header is the union of every sweep's schema, read from a
+    one-row probe of each sweep before streaming starts.
+    """
+    path = export_path(output_dir, fmt)
+    if fmt == "parquet" or (fmt == "auto" and has_pyarrow()):
+        return ParquetSink(path)
+    return CsvSink(path, csv_fieldnames(evaluate_chunk(s, 0, min(1, s.size)).schema for s in sweeps.values()))
+
+
+def stream_sweeps(
+    sweeps: Mapping[str, Sweep],
+    sinks: Sequence[ResultSink],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+) -> List[Any]:
+    """Evaluate sweeps chunk by chunk and feed every chunk to every sink.
+
+    Args:
+        sweeps: Result key -> sweep declaration.
+        sinks: Subscribers; each sees every chunk in grid order.
+        chunk_size: Grid rows per chunk (bounds peak memory).
+        workers: Process count; 1 runs in-process, ``None``/0 uses all cores.
+
+    Returns:
+        Each sink's ``close()`` result, in ``sinks`` order.
+    """
+    for key, chunk in iter_results(sweeps, chunk_size, workers):
+        for sink in sinks:
+            sink.write(key, chunk)
+    return [sink.close() for sink in sinks]
+
+
+def xl_income_sweep(prices: int) -> Sweep:
+    """C-XL: every region × ``prices`` token prices from $0.01 to $0.50/GPU-hour."""
+    return Sweep(
+        "C-XL", compute_user_income_batch, args=("region", "token_price"),
+        axes=[Axis("region", list(REGIONS.values())),
+              Axis("token_price", np.linspace(0.01, 0.50, prices), emit=("token_price",))],
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRY POINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Stream sweeps through export, summary and chart sinks.")
+    parser.add_argument("--categories", nargs="+", default=None, help="scenario categories (default: all)")
+    parser.add_argument("--xl-prices", type=int, default=0,
+                        help="add the C-XL sweep with 10 × N rows (regions × token prices)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="sweep processes (0 = one per CPU core)")
+    parser.add_argument("--export", choices=(*EXPORT_FORMATS, "none"), default="auto")
+    parser.add_argument("--output-dir", default="output/stream", help="data export directory")
+    parser.add_argument("--charts", default=None, help="render the Phase 2 charts from the reduced data here")
+    parser.add_argument("--report", default=None, help="write the streaming summary section to this file")
+    add_profile_argument(parser)
+    parser.add_argument("--trace", default=None, metavar="PATH",
+                        help="save a Chrome trace with one span per chunk (see profiling.py)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Stream the sweeps and report rows, sink results and peak memory."""
+    from mega_simulation.report import summary_section
+    from mega_simulation.scenarios import CATEGORY_SWEEPS
+
+    args = parse_args(argv)
+    set_render_profile(args.render_profile)
+    categories = args.categories or list(CATEGORY_SWEEPS)
+    sweeps = {cat: CATEGORY_SWEEPS[cat]() for cat in categories}
+    if args.xl_prices:
+        sweeps["C-XL"] = xl_income_sweep(args.xl_prices)
+
+    sinks: List[ResultSink] = [SummarySink()]
+    if args.charts:
+        from mega_simulation.charts import CHART_DATA
+        sinks.append(DistinctSink(CHART_DATA))
+    if args.export != "none":
+        sinks.append(export_sink(sweeps, args.output_dir, args.export))
+
+    print("=" * 60)
+    print("  NHP STREAMING SWEEPS — المحاكاة المتدفقة")
+    print(f"  {sum(s.size for s in sweeps.values()):,} rows | {len(sweeps)} sweeps | "
+          f"chunks of {args.chunk_size:,} | export: {args.export}")
+    print("=" * 60)
+    start = time.time()
+    with tracing(label="sinks.py") if args.trace else contextlib.nullcontext() as tracer:
+        summaries, *rest = stream_sweeps(sweeps, sinks, args.chunk_size, args.workers)
+    elapsed = time.time() - start
+
+    for key, sweep in sweeps.items():
+        print(f"  {key:<5} {sweep.size:>12,} rows  {len(summaries.get(key, {})):>3} columns summarized")
+    if args.export != "none":
+        print(f"  ✅ Export saved: {rest[-1]}")
+    if args.charts:
+        from mega_simulation.charts import generate_all_charts
+        reduced = rest[0]
+        paths = generate_all_charts(reduced, args.charts, cache=False)
+        print(f"  ✅ {len(paths)} charts from {reduced.total_scenarios} reduced rows: {args.charts}")
+    if args.report:
+        os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write("\n".join(summary_section(summaries)))
+        print(f"  ✅ Summary saved: {args.report}")
+    if args.trace:
+        print(f"  ✅ Trace saved: {tracer.save(args.trace)}")
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  {elapsed:.1f}s | peak RSS {peak_mb:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
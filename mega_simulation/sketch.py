@@ -0,0 +1,229 @@
+"""
+NHP Mega Simulation — Streaming Quantile Sketches
+Bounded-memory running summaries for very large batches of values
+(Monte Carlo draws, big sweeps). ``QuantileSketch`` keeps log-spaced bucket
+counts (DDSketch-style): every quantile it returns is within
+``relative_accuracy`` of a true sample value, sketches are mergeable across
+chunks and processes, and memory is capped at ``max_buckets`` per sign no
+matter how many values are added. ``StreamingSummary`` adds exact count,
+mean, standard deviation, min and max on top.
+"""
+import math
+from typing import Dict, Any, Sequence
+
+import numpy as np
+
+DEFAULT_PERCENTILES: Sequence[float] = (1, 5, 25, 50, 75, 95, 99)
+
+
+def percentile_label(p: float) -> str:
+    """Column name for a percentile, e.g. 5 → 'p5', 2.5 → 'p2_5'."""
+    return "p" + f"{p:g}".replace(".", "_")
+
+
+class _Buckets:
+    """Dense int64 counts for a contiguous range of bucket keys."""
+
+    def __init__(self) -> None:
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.offset = 0
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def _cover(self, lo: int, hi: int) -> None:
+        if self.counts.size == 0:
+            self.offset = lo
+            self.counts = np.zeros(hi - lo + 1, dtype=np.int64)
+            return
+        new_lo = min(lo, self.offset)
+        new_hi = max(hi, self.offset + self.counts.size - 1)
+        if new_lo == self.offset and new_hi == self.offset + self.counts.size - 1:
+            return
+        grown = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+        start = self.offset - new_lo
+        grown[start:start + self.counts.size] = self.counts
+        self.counts, self.offset = grown, new_lo
+
+    def _collapse(self, max_buckets: int) -> None:
+        """Fold the lowest keys (smallest magnitudes) into one bucket."""
+        extra = self.counts.size - max_buckets
+        if extra > 0:
+            self.counts[extra] += self.counts[:extra].sum()
+            self.counts = self.counts[extra:].copy()
+            self.offset += extra
+
+    def add(self, keys: np.ndarray, max_buckets: int) -> None:
+        if keys.size == 0:
+            return
+        lo, hi = int(keys.min()), int(keys.max())
+        self._cover(lo, hi)
+        self.counts += np.bincount(keys - self.offset, minlength=self.counts.size)
+        self._collapse(max_buckets)
+
+    def merge(self, other: "_Buckets", max_buckets: int) -> None:
+        if other.counts.size == 0:
+            return
+        self._cover(other.offset, other.offset + other.counts.size - 1)
+        start = other.offset - self.offset
+        self.counts[start:start + other.counts.size] += other.counts
+        self._collapse(max_buckets)
+
+
+class QuantileSketch:
+    """Mergeable relative-error quantile sketch over a stream of floats.
+
+    Args:
+        relative_accuracy: Maximum relative error of returned quantiles.
+        max_buckets: Bucket cap per sign (memory bound).
+        min_value: Magnitudes at or below this are counted as zero.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        max_buckets: int = 2048,
+        min_value: float = 1e-12,
+    ) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._pos = _Buckets()
+        self._neg = _Buckets()
+        self.zero_count = 0
+        self.pos_inf = 0
+        self.neg_inf = 0
+
+    @property
+    def count(self) -> int:
+        return self._pos.total + self._neg.total + self.zero_count + self.pos_inf + self.neg_inf
+
+    def _keys(self, magnitudes: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def _value(self, key: int) -> float:
+        return 2.0 * self.gamma ** key / (self.gamma + 1.0)
+
+    def add(self, values: Any) -> None:
+        """Add a batch of values (NaNs are ignored, ±inf counted separately)."""
+        v = np.asarray(values, dtype=float).ravel()
+        v = v[~np.isnan(v)]
+        inf = np.isinf(v)
+        if inf.any():
+            self.pos_inf += int((v[inf] > 0).sum())
+            self.neg_inf += int((v[inf] < 0).sum())
+            v = v[~inf]
+        small = np.abs(v) <= self.min_value
+        self.zero_count += int(small.sum())
+        v = v[~small]
+        self._pos.add(self._keys(v[v > 0]), self.max_buckets)
+        self._neg.add(self._keys(-v[v < 0]), self.max_buckets)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Fold another sketch with the same accuracy into this one."""
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different relative accuracy")
+        self._pos.merge(other._pos, self.max_buckets)
+        self._neg.merge(other._neg, self.max_buckets)
+        self.zero_count += other.zero_count
+        self.pos_inf += other.pos_inf
+        self.neg_inf += other.neg_inf
+
+    def quantile(self, q: float) -> float:
+        """Approximate ``q``-quantile (0 ≤ q ≤ 1); NaN when empty."""
+        total = self.count
+        if total == 0:
+            return float("nan")
+        rank = q * (total - 1)
+
+        seen = self.neg_inf
+        if rank < seen:
+            return float("-inf")
+        # Negative buckets, most negative (largest magnitude key) first
+        neg = self._neg.counts[::-1]
+        if neg.size:
+            cum = np.cumsum(neg)
+            if rank < seen + cum[-1]:
+                i = int(np.searchsorted(cum, rank - seen, side="right"))
+                return -self._value(self._neg.offset + neg.size - 1 - i)
+            seen += int(cum[-1])
+        seen += self.zero_count
+        if rank < seen:
+            return 0.0
+        pos = self._pos.counts
+        if pos.size:
+            cum = np.cumsum(pos)
+            if rank < seen + cum[-1]:
+                i = int(np.searchsorted(cum, rank - seen, side="right"))
+                return self._value(self._pos.offset + i)
+        return float("inf")
+
+
+class StreamingSummary:
+    """Running count / mean / std / min / max plus a quantile sketch."""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048) -> None:
+        self.sketch = QuantileSketch(relative_accuracy, max_buckets)
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def add(self, values: Any) -> None:
+        """Add a batch; moments use the finite values only."""
+        v = np.asarray(values, dtype=float).ravel()
+        self.sketch.add(v)
+        finite = v[np.isfinite(v)]
+        if finite.size:
+            n = finite.size
+            mean = float(finite.mean())
+            m2 = float(((finite - mean) ** 2).sum())
+            self._combine(n, mean, m2)
+        if v.size and not np.isnan(v).all():
+            self.min = min(self.min, float(np.nanmin(v)))
+            self.max = max(self.max, float(np.nanmax(v)))
+
+    def _combine(self, n: int, mean: float, m2: float) -> None:
+        """Chan et al. parallel update of count / mean / M2."""
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    def merge(self, other: "StreamingSummary") -> None:
+        self.sketch.merge(other.sketch)
+        if other.count:
+            self._combine(other.count, other.mean, other._m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Sketch quantile, clamped to the exact observed range."""
+        value = self.sketch.quantile(q)
+        if self.count and not np.isnan(value):
+            value = min(max(value, self.min), self.max)
+        return value
+
+    def as_row(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """Flat summary: draws, mean, std, min, percentiles…, max."""
+        row: Dict[str, float] = {
+            "draws": self.sketch.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.min,
+        }
+        for p in percentiles:
+            row[percentile_label(p)] = self.quantile(p / 100.0)
+        row["max"] = self.max
+        return row
@@ -0,0 +1,250 @@
+"""
+NHP Mega Simulation — Parameter-Grid Sweep Engine
+A category is declared as a vectorized compute function plus named axes
+(e.g. manufacturer × cloud × coverage). The engine expands the cartesian
+product lazily, in fixed-size chunks, and evaluates every chunk through the
+batch functions in ``vectorized.py``. Nothing proportional to the full grid
+is materialized until the caller asks for it.
+
+Example — ten regions × 100,000 token prices (one million rows):
+
+    sweep = Sweep(
+        category="C-XL",
+        compute=compute_user_income_batch,
+        args=("region", "token_price"),
+        axes=[Axis("region", list(REGIONS.values())),
+              Axis("token_price", np.linspace(0.01, 0.50, 100_000))],
+    )
+    for chunk in iter_chunks(sweep, chunk_size=250_000):
+        ...
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, is_dataclass
+from typing import Dict, Any, Callable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from mega_simulation.profiling import collect, remote, span
+from mega_simulation.results import CategoryResults
+from mega_simulation.vectorized import RecordArray, Columns
+
+DEFAULT_CHUNK_SIZE: int = 262_144
+
+
+@dataclass
+class Axis:
+    """One named dimension of a sweep grid.
+
+    Args:
+        name: Grid column name the axis values are exposed under.
+        values: Axis points — numbers, strings, registry dataclasses or lists.
+        linked: Extra columns that move together with ``values``
+            (e.g. the uptime that belongs to each variant name).
+        emit: Grid columns copied verbatim into the result rows.
+    """
+    name: str
+    values: Sequence[Any]
+    linked: Dict[str, Sequence[Any]] = field(default_factory=dict)
+    emit: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        for key, col in self.linked.items():
+            if len(col) != len(self.values):
+                raise ValueError(f"Axis '{self.name}': linked column '{key}' has "
+                                 f"{len(col)} values, expected {len(self.values)}")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def columns(self) -> Dict[str, Any]:
+        """Axis value column plus linked columns, ready to be indexed."""
+        cols: Dict[str, Any] = {self.name: _as_column(self.values)}
+        for key, col in self.linked.items():
+            cols[key] = _as_column(col)
+        return cols
+
+
+@dataclass
+class Sweep:
+    """Declarative scenario category: a batch compute function over a grid.
+
+    Args:
+        category: Category label written to every row.
+        compute: Batch function from ``vectorized.py`` (or compatible).
+        args: Grid/constant names passed positionally to ``compute``.
+        axes: Grid dimensions, outermost first (rows come out in nested-loop order).
+        kwargs: ``compute`` keyword -> grid/constant name.
+        constants: Fixed values available to ``args``/``kwargs``.
+        prepare: Optional hook deriving extra grid columns from a chunk.
+    """
+    category: str
+    compute: Callable[..., Columns]
+    args: Tuple[str, ...]
+    axes: List[Axis]
+    kwargs: Dict[str, str] = field(default_factory=dict)
+    constants: Dict[str, Any] = field(default_factory=dict)
+    prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(len(a) for a in self.axes)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64))
+
+
+def _as_column(values: Sequence[Any]) -> Any:
+    """Registry dataclasses become a RecordArray, everything else an ndarray."""
+    if isinstance(values, RecordArray):
+        return values
+    if isinstance(values, np.ndarray):
+        return values
+    values = list(values)
+    if values and is_dataclass(values[0]):
+        return RecordArray.from_records(values)
+    if values and isinstance(values[0], (list, tuple, dict)):
+        col = np.empty(len(values), dtype=object)
+        col[:] = values
+        return col
+    return np.asarray(values)
+
+
+def take_rows(column: Any, idx: np.ndarray) -> Any:
+    """Rows ``idx`` of an axis column (ndarray or ``RecordArray``)."""
+    if isinstance(column, RecordArray):
+        return column.take(idx)
+    return column[idx]
+
+
+def chunk_bounds(sweep: Sweep, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """Split the flat grid index range into ``[start, stop)`` chunks."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    return [(start, min(start + chunk_size, sweep.size))
+            for start in range(0, sweep.size, chunk_size)]
+
+
+def evaluate_chunk(sweep: Sweep, start: int, stop: int) -> CategoryResults:
+    """Evaluate grid rows ``start..stop`` (flat, C-order) of a sweep."""
+    flat = np.arange(start, stop, dtype=np.int64)
+    positions = np.unravel_index(flat, sweep.shape) if sweep.axes else ()
+
+    grid: Dict[str, Any] = dict(sweep.constants)
+    for axis, pos in zip(sweep.axes, positions):
+        for key, col in axis.columns().items():
+            grid[key] = take_rows(col, pos)
+    if sweep.prepare is not None:
+        grid.update(sweep.prepare(grid))
+
+    columns: Dict[str, Any] = dict(sweep.compute(
+        *[grid[name] for name in sweep.args],
+        **{kw: grid[name] for kw, name in sweep.kwargs.items()},
+    ))
+    for axis in sweep.axes:
+        for key in axis.emit:
+            columns[key] = grid[key]
+    columns["category"] = np.full(len(flat), sweep.category)
+    return CategoryResults(sweep.category, columns)
+
+
+def iter_chunks(sweep: Sweep, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[CategoryResults]:
+    """Lazily yield the sweep results chunk by chunk."""
+    for start, stop in chunk_bounds(sweep, chunk_size):
+        yield evaluate_chunk(sweep, start, stop)
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """Worker count: ``None``/``0`` means one per CPU core."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _evaluate_task(task: Tuple[Sweep, int, int]) -> CategoryResults:
+    """Process-pool entry point (must be module-level to pickle)."""
+    sweep, start, stop = task
+    return evaluate_chunk(sweep, start, stop)
+
+
+def _task_name(key: str, task: Tuple[Sweep, int, int]) -> str:
+    """Trace label of one chunk, e.g. ``C-XL [262144:524288)``."""
+    return f"{key} [{task[1]}:{task[2]})"
+
+
+def iter_results(
+    sweeps: Mapping[str, Sweep],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+) -> Iterator[Tuple[str, CategoryResults]]:
+    """Yield ``(key, chunk)`` for every chunk of every sweep, in order.
+
+    This is the producer side of the streaming sinks (``sinks.py``). With a
+    pool, at most ``2 × workers`` chunks are in flight at once, so memory is
+    bounded by the chunk size and not by the grid size.
+
+    Args:
+        sweeps: Result key (category letter) -> sweep declaration.
+        chunk_size: Grid rows per task.
+        workers: Process count; 1 runs in-process, ``None``/0 uses all cores.
+    """
+    workers = resolve_workers(workers)
+    tasks = [(key, (sweep, start, stop))
+             for key, sweep in sweeps.items()
+             for start, stop in chunk_bounds(sweep, chunk_size)]
+
+    if workers == 1 or len(tasks) <= 1:
+        for key, task in tasks:
+            with span(_task_name(key, task), "sweep", rows=task[2] - task[1]):
+                chunk = _evaluate_task(task)
+            yield key, chunk
+        return
+    workers = min(workers, len(tasks))
+    evaluate = remote(_evaluate_task)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window: deque = deque()
+        for key, task in tasks:
+            window.append((key, task, pool.submit(evaluate, task)))
+            if len(window) >= 2 * workers:
+                key, task, future = window.popleft()
+                yield key, collect(future.result(), _task_name(key, task), "sweep", rows=task[2] - task[1])
+        while window:
+            key, task, future = window.popleft()
+            yield key, collect(future.result(), _task_name(key, task), "sweep", rows=task[2] - task[1])
+
+
+def run_sweeps(
+    sweeps: Mapping[str, Sweep],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+) -> Dict[str, CategoryResults]:
+    """Evaluate several sweeps, optionally sharded across a process pool.
+
+    Every sweep is split into grid chunks and all chunks of all sweeps are
+    scheduled on one pool, so a single large category still spreads over
+    every core. Results are collected in submission order and merged back
+    per key, so the output is identical to the serial run.
+
+    Args:
+        sweeps: Result key (category letter) -> sweep declaration.
+        chunk_size: Grid rows per task.
+        workers: Process count; 1 runs in-process, ``None``/0 uses all cores.
+
+    Returns:
+        Dict mapping each key to its concatenated results, in input order.
+    """
+    parts: Dict[str, List[CategoryResults]] = {key: [] for key in sweeps}
+    for key, chunk in iter_results(sweeps, chunk_size, workers):
+        parts[key].append(chunk)
+    return {key: CategoryResults.concat(sweeps[key].category, parts[key]) for key in sweeps}
+
+
+def run_sweep(
+    sweep: Sweep,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+) -> CategoryResults:
+    """Evaluate the full grid and concatenate the chunks."""
+    return run_sweeps({sweep.category: sweep}, chunk_size, workers)[sweep.category]
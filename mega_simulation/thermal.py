@@ -0,0 +1,204 @@
+"""
+NHP Mega Simulation — Thermal Throttling Model
+Time-stepped heat balance of a phone running NHP work on its charger
+through the night, replacing the static "3 °C per watt" estimate.
+
+Each device is one lumped thermal mass:
+
+    C · dT/dt = P(t) − (T − T_ambient) / R
+
+with P(t) = charging heat + duty × TDP × performance. Above
+``throttle_temp_c`` the SoC drops to its hardware-throttled level
+(``sustained_tops``). On top of that, NHP runs an adaptive duty-cycle
+controller (PI on temperature) that backs the workload off just below
+the throttle point, so the phone never relies on hardware throttling.
+
+Every quantity is an array. Device classes and ambient temperatures are
+broadcast against each other and integrated together, one exact
+exponential step per ``dt_s``, so thousands of device × climate
+combinations take well under a second. The headline output is sustained
+effective TOPS-hours per night; the critique report (Phase 8) is the
+only consumer so far, and the fleet and agent engines still count peak
+``tops``.
+"""
+from dataclasses import dataclass
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from mega_simulation.data import NIGHTLY_HOURS
+
+CHARGING_HEAT_W: float = 0.5    # Charger + battery losses while topped up
+
+
+@dataclass(frozen=True)
+class CoolingSpec:
+    """Lumped thermal parameters of one cooling solution."""
+    r_c_per_w: float        # Thermal resistance to ambient (°C per W)
+    c_j_per_c: float        # Heat capacity of the phone (J per °C)
+
+    @property
+    def tau_s(self) -> float:
+        return self.r_c_per_w * self.c_j_per_c
+
+
+COOLING: Dict[str, CoolingSpec] = {
+    "Vapor Chamber": CoolingSpec(r_c_per_w=3.6, c_j_per_c=190.0),
+    "Heat Pipe": CoolingSpec(r_c_per_w=4.2, c_j_per_c=175.0),
+    "Graphite Sheet": CoolingSpec(r_c_per_w=5.0, c_j_per_c=160.0),
+    "None": CoolingSpec(r_c_per_w=6.0, c_j_per_c=150.0),
+}
+
+
+@dataclass(frozen=True)
+class ThermalController:
+    """NHP duty-cycle controller: PI on (setpoint − temperature).
+
+    Gains follow IMC tuning from each device's own thermal model
+    (steady-state °C per unit duty and time constant τ = R·C), so every
+    cooling class settles with the same first-order closed-loop response.
+    """
+    margin_c: float = 1.0       # Setpoint below the throttle temperature
+    response: float = 0.25      # Closed-loop time constant as a share of τ
+    min_duty: float = 0.0
+
+
+@dataclass
+class ThermalResult:
+    """Per-combination nightly outcome (arrays share the broadcast shape)."""
+    tops: np.ndarray
+    tops_hours: np.ndarray          # Effective TOPS-hours over the night
+    mean_duty: np.ndarray           # Mean NHP duty cycle (0-1)
+    peak_temp_c: np.ndarray
+    final_temp_c: np.ndarray
+    throttled_h: np.ndarray         # Hours spent above the throttle temperature
+    energy_wh: np.ndarray           # Heat dissipated (incl. charging losses)
+    hours: float
+
+    @property
+    def sustained_tops(self) -> np.ndarray:
+        """Average effective TOPS over the night."""
+        return self.tops_hours / self.hours
+
+    @property
+    def efficiency(self) -> np.ndarray:
+        """Sustained share of peak TOPS (0-1)."""
+        return self.sustained_tops / self.tops
+
+
+def cooling_arrays(names: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Thermal resistance and capacity arrays for cooling solution names."""
+    try:
+        specs = [COOLING[n] for n in names]
+    except KeyError as e:
+        raise ValueError(f"Unknown cooling {e.args[0]!r}; choose from {', '.join(COOLING)}") from None
+    return (np.array([s.r_c_per_w for s in specs]),
+            np.array([s.c_j_per_c for s in specs]))
+
+
+def simulate_nightly(
+    tops,
+    sustained_tops,
+    tdp_watt,
+    throttle_temp_c,
+    ambient_c,
+    r_c_per_w,
+    c_j_per_c,
+    hours: float = NIGHTLY_HOURS,
+    dt_s: float = 10.0,
+    controller: ThermalController = ThermalController(),
+    charging_heat_w: float = CHARGING_HEAT_W,
+) -> ThermalResult:
+    """Integrate the lumped thermal model over one night.
+
+    All device arguments are array-likes broadcast against each other,
+    e.g. device classes as ``(D, 1)`` and ambients as ``(1, A)``.
+
+    Args:
+        tops: Peak TOPS.
+        sustained_tops: TOPS in the hardware-throttled state.
+        tdp_watt: Power at full load and full clocks.
+        throttle_temp_c: Temperature at which the SoC throttles.
+        ambient_c: Room temperature; the phone starts there.
+        r_c_per_w, c_j_per_c: Cooling parameters (see ``cooling_arrays``).
+        hours: Length of the night.
+        dt_s: Integration step; each step is solved exactly for constant
+            power, so large steps stay stable.
+        controller: NHP duty-cycle controller.
+        charging_heat_w: Background heat from the charger and battery.
+
+    Returns:
+        ThermalResult with arrays of the broadcast shape.
+    """
+    tops, sustained, tdp, limit, ambient, r, c = (
+        a.astype(float) for a in np.broadcast_arrays(
+            tops, sustained_tops, tdp_watt, throttle_temp_c, ambient_c, r_c_per_w, c_j_per_c))
+    decay = np.exp(-dt_s / (r * c))
+    throttled_perf = sustained / tops
+    setpoint = limit - controller.margin_c
+    gain = r * tdp                                  # Steady-state °C per unit duty
+    kp = 1.0 / (gain * controller.response)
+    ki = kp / (r * c) * dt_s
+
+    temp = ambient.copy()
+    integral = np.ones_like(temp)
+    peak = temp.copy()
+    tops_s = np.zeros_like(temp)
+    duty_s = np.zeros_like(temp)
+    heat_s = np.zeros_like(temp)
+    throttled_steps = np.zeros_like(temp)
+    steps = int(round(hours * 3600 / dt_s))
+    for _ in range(steps):
+        error = setpoint - temp
+        integral = np.clip(integral + ki * error, controller.min_duty, 1.0)
+        duty = np.clip(kp * error + integral, controller.min_duty, 1.0)
+        hot = temp >= limit
+        perf = np.where(hot, throttled_perf, 1.0)
+        power = charging_heat_w + tdp * duty * perf
+        equilibrium = ambient + power * r
+        temp = equilibrium + (temp - equilibrium) * decay
+        np.maximum(peak, temp, out=peak)
+        tops_s += tops * duty * perf
+        duty_s += duty
+        heat_s += power
+        throttled_steps += hot
+
+    to_h = dt_s / 3600.0
+    return ThermalResult(
+        tops=tops,
+        tops_hours=tops_s * to_h,
+        mean_duty=duty_s / steps,
+        peak_temp_c=peak,
+        final_temp_c=temp,
+        throttled_h=throttled_steps * to_h,
+        energy_wh=heat_s * to_h,
+        hours=steps * to_h,
+    )
+
+
+def simulate_profiles(
+    profiles: Sequence[Dict],
+    ambient_c=None,
+    **kwargs,
+) -> ThermalResult:
+    """Run device profile dicts (``THERMAL_SCENARIOS`` rows) through the model.
+
+    Profiles need ``tops``, ``max_sustained_tops``, ``tdp_watt``,
+    ``throttle_temp_c``, ``ambient_c`` and ``cooling``. With ``ambient_c``
+    given, every profile is crossed with every ambient temperature and the
+    result has shape ``(len(profiles), len(ambient_c))``; otherwise each
+    profile runs at its own ambient.
+    """
+    def column(key: str) -> np.ndarray:
+        values = np.array([p[key] for p in profiles], dtype=float)
+        return values if ambient_c is None else values[:, None]
+
+    r, c = cooling_arrays([p["cooling"] for p in profiles])
+    if ambient_c is None:
+        ambient = column("ambient_c")
+    else:
+        r, c = r[:, None], c[:, None]
+        ambient = np.asarray(ambient_c, dtype=float)[None, :]
+    return simulate_nightly(
+        column("tops"), column("max_sustained_tops"), column("tdp_watt"),
+        column("throttle_temp_c"), ambient, r, c, **kwargs)
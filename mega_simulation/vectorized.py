@@ -0,0 +1,882 @@
+"""
+NHP Mega Simulation — Vectorized Computation Engine
+Array-in / array-out counterparts of every ``compute_*`` function in
+``engine.py``. Numeric parameters accept scalars or NumPy arrays and are
+broadcast against each other; registry dataclasses (Manufacturer, Region, ...)
+accept a single instance, a sequence of instances or a ``RecordArray``.
+Each function returns a dict of equally-shaped columns with the same keys
+as the scalar reference implementation in ``engine.py``.
+
+Run: python mega_simulation/vectorized.py   (scalar ↔ batch parity check;
+     also run by python mega_simulation/benchmarks.py --groups parity)
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import math
+from dataclasses import fields, is_dataclass
+from typing import Dict, Any, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from mega_simulation.data import (
+    Manufacturer, CloudProvider, Region, TaskType, Competitor,
+    H100_TOPS, DEVICE_EXTRA_WATT, NIGHTLY_HOURS,
+    GPU_REQUEST_TIME_SEC, CO2_PER_KWH_KG, DC_CO2_TONS_YEAR,
+    CO2_PER_CAR_TONS, BATTERY_CYCLE_PER_NIGHT_PCT, BATTERY_TOTAL_CYCLES,
+)
+
+ArrayLike = Union[float, int, Sequence[float], np.ndarray]
+Columns = Dict[str, np.ndarray]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RECORD ARRAYS (structure-of-arrays view over registry dataclasses)
+# ═══════════════════════════════════════════════════════════════════════════
+
+class RecordArray:
+    """Structure-of-arrays view over a sequence of registry dataclasses.
+
+    Attribute access returns the whole column, so ``mfgs.active_devices``
+    works the same way for a single ``Manufacturer`` (scalar) and for a
+    ``RecordArray`` of manufacturers (1-D array).
+    """
+
+    def __init__(self, columns: Columns, length: int) -> None:
+        self._columns = columns
+        self._length = length
+
+    @classmethod
+    def from_records(cls, records: Sequence[Any]) -> "RecordArray":
+        """Build columns from a non-empty sequence of dataclass instances."""
+        records = list(records)
+        if not records:
+            raise ValueError("RecordArray needs at least one record")
+        columns: Columns = {}
+        for f in fields(records[0]):
+            values = [getattr(r, f.name) for r in records]
+            if isinstance(values[0], (list, tuple, dict)):
+                col = np.empty(len(values), dtype=object)
+                col[:] = values
+            else:
+                col = np.asarray(values)
+            columns[f.name] = col
+        return cls(columns, len(records))
+
+    def take(self, indices: ArrayLike) -> "RecordArray":
+        """Gather rows by integer index (used to expand sweep grids)."""
+        idx = np.asarray(indices, dtype=np.intp)
+        return RecordArray({k: v[idx] for k, v in self._columns.items()}, idx.size)
+
+    def replace(self, **columns: ArrayLike) -> "RecordArray":
+        """Copy with some columns replaced; lengths broadcast (1 ↔ n)."""
+        merged = {**self._columns, **{k: np.asarray(v) for k, v in columns.items()}}
+        length = np.broadcast_shapes(*[(len(v),) for v in merged.values()])[0]
+        return RecordArray(merged, length)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        try:
+            return self.__dict__["_columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __len__(self) -> int:
+        return self._length
+
+
+def as_records(value: Any) -> Any:
+    """Return a dataclass instance unchanged, anything sequence-like as a RecordArray."""
+    if is_dataclass(value) or isinstance(value, RecordArray):
+        return value
+    return RecordArray.from_records(value)
+
+
+def _shape(*args: Any) -> Tuple[int, ...]:
+    """Broadcast shape of numeric arrays and RecordArray lengths."""
+    shapes = []
+    for a in args:
+        if isinstance(a, RecordArray):
+            shapes.append((len(a),))
+        else:
+            shapes.append(np.shape(a))
+    return np.broadcast_shapes(*shapes)
+
+
+def _full(value: Any, shape: Tuple[int, ...]) -> np.ndarray:
+    """Broadcast a scalar or array column to the batch shape."""
+    return np.broadcast_to(np.asarray(value), shape)
+
+
+def _int(value: Any) -> np.ndarray:
+    """Vectorized ``int()`` — truncation toward zero."""
+    return np.trunc(value).astype(np.int64)
+
+
+def _safe_div(num: Any, den: Any, default: float) -> np.ndarray:
+    """``num / den`` where ``den > 0``, ``default`` elsewhere."""
+    num, den = np.broadcast_arrays(np.asarray(num, dtype=float), np.asarray(den, dtype=float))
+    out = np.full(num.shape, default, dtype=float)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# A. COMPUTING POWER
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_fleet_power_batch(
+    mfg: Union[Manufacturer, Sequence[Manufacturer], RecordArray],
+    uptime: ArrayLike,
+) -> Columns:
+    """Vectorized ``engine.compute_fleet_power``.
+
+    Args:
+        mfg: Manufacturer profile(s).
+        uptime: Fraction of devices active.
+
+    Returns:
+        Dict of columns with fleet TOPS, H100 equivalents, active devices.
+    """
+    mfg = as_records(mfg)
+    uptime = np.asarray(uptime, dtype=float)
+    shape = _shape(mfg, uptime)
+
+    flagship_count = _int(mfg.active_devices * mfg.flagship_pct)
+    midrange_count = mfg.active_devices - flagship_count
+
+    active_flagship = _int(flagship_count * uptime)
+    active_midrange = _int(midrange_count * uptime)
+
+    flagship_tops = active_flagship * mfg.flagship_tops
+    midrange_tops = active_midrange * mfg.midrange_tops
+    total_tops = flagship_tops + midrange_tops
+    h100_equiv = total_tops / H100_TOPS
+
+    return {
+        "manufacturer": _full(mfg.name, shape),
+        "total_devices": _full(mfg.active_devices, shape),
+        "active_devices": _full(active_flagship + active_midrange, shape),
+        "active_flagship": _full(active_flagship, shape),
+        "active_midrange": _full(active_midrange, shape),
+        "total_tops": _full(total_tops, shape),
+        "h100_equivalent": _full(h100_equiv, shape),
+        "uptime_pct": _full(uptime * 100, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# B / D. COST COMPARISON & MANUFACTURER SAVINGS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_cost_comparison_batch(
+    mfg: Union[Manufacturer, Sequence[Manufacturer], RecordArray],
+    cloud: Union[CloudProvider, Sequence[CloudProvider], RecordArray],
+    coverage: ArrayLike,
+) -> Columns:
+    """Vectorized ``engine.compute_cost_comparison``.
+
+    Args:
+        mfg: Manufacturer profile(s).
+        cloud: Cloud provider(s) to compare against.
+        coverage: Fraction of requests served by NHP.
+
+    Returns:
+        Dict of columns with daily/monthly/annual costs and savings.
+    """
+    mfg = as_records(mfg)
+    cloud = as_records(cloud)
+    coverage = np.asarray(coverage, dtype=float)
+    shape = _shape(mfg, cloud, coverage)
+
+    total_daily_gpu_sec = mfg.daily_ai_requests * GPU_REQUEST_TIME_SEC
+    total_daily_gpu_hr = total_daily_gpu_sec / 3600.0
+
+    cloud_per_gpu_hr = cloud.hourly_cost / cloud.gpus_per_instance
+
+    daily_cloud_cost = total_daily_gpu_hr * cloud_per_gpu_hr
+    daily_nhp_covered = daily_cloud_cost * coverage
+
+    monthly_savings = daily_nhp_covered * 30.0
+    annual_savings = monthly_savings * 12.0
+    annual_cloud_total = daily_cloud_cost * 365.0
+
+    savings_pct = _safe_div(annual_savings, annual_cloud_total, 0.0) * 100
+
+    provider = np.char.add(np.char.add(np.char.add(np.asarray(cloud.name, dtype=str), " ("),
+                                       np.asarray(cloud.gpu_model, dtype=str)), ")")
+
+    return {
+        "manufacturer": _full(mfg.name, shape),
+        "cloud_provider": _full(provider, shape),
+        "cloud_short": _full(cloud.short, shape),
+        "coverage_pct": _full(coverage * 100, shape),
+        "daily_cloud_total": _full(daily_cloud_cost, shape),
+        "daily_nhp_savings": _full(daily_nhp_covered, shape),
+        "monthly_savings": _full(monthly_savings, shape),
+        "annual_savings": _full(annual_savings, shape),
+        "annual_cloud_total": _full(annual_cloud_total, shape),
+        "savings_pct": _full(savings_pct, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# C. USER INCOME BY REGION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_user_income_batch(
+    region: Union[Region, Sequence[Region], RecordArray],
+    token_price: ArrayLike,
+) -> Columns:
+    """Vectorized ``engine.compute_user_income``.
+
+    Args:
+        region: Regional parameters.
+        token_price: Revenue per GPU-hour.
+
+    Returns:
+        Dict of columns with gross/net income and % of regional average.
+    """
+    region = as_records(region)
+    token_price = np.asarray(token_price, dtype=float)
+    shape = _shape(region, token_price)
+
+    daily_kwh = (DEVICE_EXTRA_WATT * NIGHTLY_HOURS) / 1000.0
+    daily_electricity = daily_kwh * np.asarray(region.electricity_cost_kwh, dtype=float)
+    daily_gross = NIGHTLY_HOURS * token_price
+    daily_net = daily_gross - daily_electricity
+
+    monthly_net = daily_net * 30.0
+    annual_net = monthly_net * 12.0
+    monthly_electricity = daily_electricity * 30.0
+
+    income_pct_of_avg = _safe_div(monthly_net, region.avg_monthly_income, 0.0) * 100
+
+    return {
+        "region": _full(region.name, shape),
+        "region_ar": _full(region.name_ar, shape),
+        "token_price": _full(token_price, shape),
+        "electricity_cost_kwh": _full(region.electricity_cost_kwh, shape),
+        "monthly_gross": _full(daily_gross * 30.0, shape),
+        "monthly_electricity": _full(monthly_electricity, shape),
+        "monthly_net": _full(monthly_net, shape),
+        "annual_net": _full(annual_net, shape),
+        "income_pct_of_avg": _full(income_pct_of_avg, shape),
+        "avg_monthly_income": _full(region.avg_monthly_income, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# E. ENVIRONMENTAL IMPACT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_environmental_batch(
+    mfg: Union[Manufacturer, Sequence[Manufacturer], RecordArray],
+    uptime: ArrayLike,
+    dc_replaced: ArrayLike,
+) -> Columns:
+    """Vectorized ``engine.compute_environmental``.
+
+    Args:
+        mfg: Manufacturer profile(s).
+        uptime: Fraction of devices active.
+        dc_replaced: Number of data centers replaced.
+
+    Returns:
+        Dict of columns with CO2 saved, phone-side CO2 added, net impact, cars.
+    """
+    mfg = as_records(mfg)
+    uptime = np.asarray(uptime, dtype=float)
+    dc_replaced = np.asarray(dc_replaced, dtype=float)
+    shape = _shape(mfg, uptime, dc_replaced)
+
+    co2_saved = DC_CO2_TONS_YEAR * dc_replaced
+
+    active_devices = _int(mfg.active_devices * uptime)
+    daily_kwh_all = active_devices * (DEVICE_EXTRA_WATT * NIGHTLY_HOURS) / 1000.0
+    annual_kwh_all = daily_kwh_all * 365.0
+    co2_added_tons = (annual_kwh_all * CO2_PER_KWH_KG) / 1000.0
+    net_co2_saved = co2_saved - co2_added_tons
+    cars_equivalent = _int(net_co2_saved / CO2_PER_CAR_TONS)
+
+    return {
+        "manufacturer": _full(mfg.name, shape),
+        "dc_replaced": _full(dc_replaced, shape),
+        "co2_saved_gross": _full(co2_saved, shape),
+        "co2_added_phones": _full(co2_added_tons, shape),
+        "co2_saved_net": _full(net_co2_saved, shape),
+        "cars_equivalent": _full(cars_equivalent, shape),
+        "active_devices": _full(active_devices, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# F. NETWORK EFFECTS (COMBINED FLEETS)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_combined_network_batch(
+    alliances: Sequence[Sequence[Manufacturer]],
+    uptime: ArrayLike,
+) -> Columns:
+    """Vectorized ``engine.compute_combined_network``.
+
+    Args:
+        alliances: One manufacturer list per row (broadcast against ``uptime``).
+        uptime: Fraction of devices active.
+
+    Returns:
+        Dict of columns with combined fleet stats, one row per alliance.
+    """
+    uptime = np.asarray(uptime, dtype=float)
+
+    # Rows repeating the same member list (grids tiled from a few alliances,
+    # Monte Carlo draws) share one alliance entry, and members are gathered
+    # by index from one record per manufacturer instead of being rebuilt.
+    distinct: Dict[Tuple[int, ...], int] = {}
+    groups: List[List[Manufacturer]] = []
+    alliance_codes = np.empty(len(alliances), dtype=np.intp)
+    for i, alliance in enumerate(alliances):
+        key = tuple(map(id, alliance))
+        code = distinct.get(key)
+        if code is None:
+            code = distinct[key] = len(groups)
+            groups.append(list(alliance))
+        alliance_codes[i] = code
+    registry: Dict[int, int] = {}
+    records: List[Manufacturer] = []
+    for m in (m for g in groups for m in g):
+        if id(m) not in registry:
+            registry[id(m)] = len(records)
+            records.append(m)
+    record_idx = np.array([registry[id(m)] for g in groups for m in g], dtype=np.intp)
+
+    codes, uptime = np.broadcast_arrays(alliance_codes, uptime)
+    shape = codes.shape
+    codes = codes.ravel()
+    flat_uptime = uptime.ravel()
+    n_rows = codes.size
+
+    # Expand every (row, member) pair through the distinct alliances, evaluate
+    # the fleets in one pass and sum back per row — bincount accumulates in
+    # member order like the loop.
+    sizes = np.array([len(g) for g in groups], dtype=np.intp)
+    starts = np.cumsum(sizes) - sizes
+    counts = sizes[codes]
+    row_idx = np.repeat(np.arange(n_rows), counts)
+    pair_start = np.repeat(np.cumsum(counts) - counts, counts)
+    member_idx = starts[codes][row_idx] + (np.arange(row_idx.size) - pair_start)
+
+    if records:
+        fleet = compute_fleet_power_batch(RecordArray.from_records(records).take(record_idx[member_idx]),
+                                          flat_uptime[row_idx])
+        total_devices = np.bincount(row_idx, weights=fleet["active_devices"], minlength=n_rows).astype(np.int64)
+        total_tops = np.bincount(row_idx, weights=fleet["total_tops"], minlength=n_rows)
+    else:
+        total_devices = np.zeros(n_rows, dtype=np.int64)
+        total_tops = np.zeros(n_rows, dtype=float)
+
+    names = np.array([" + ".join(m.short for m in g) for g in groups], dtype=str)[codes]
+
+    return {
+        "alliance": names.reshape(shape),
+        "manufacturers_count": counts.astype(np.int64).reshape(shape),
+        "total_active_devices": total_devices.reshape(shape),
+        "total_tops": total_tops.reshape(shape),
+        "h100_equivalent": (total_tops / H100_TOPS).reshape(shape),
+        "uptime_pct": (flat_uptime * 100).reshape(shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# G. TASK TYPE FEASIBILITY
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_task_feasibility_batch(
+    task: Union[TaskType, Sequence[TaskType], RecordArray],
+    fleet_tops: ArrayLike,
+    active_devices: ArrayLike,
+    avg_tops_per_device: ArrayLike,
+    overhead: ArrayLike,
+) -> Columns:
+    """Vectorized ``engine.compute_task_feasibility``.
+
+    Args:
+        task: AI task type profile(s).
+        fleet_tops: Total fleet TOPS available.
+        active_devices: Number of active devices.
+        avg_tops_per_device: Average TOPS per device.
+        overhead: NHP coordination overhead (0-1).
+
+    Returns:
+        Dict of columns with feasibility score, tasks/sec, revenue estimate.
+    """
+    task = as_records(task)
+    fleet_tops = np.asarray(fleet_tops, dtype=float)
+    avg_tops_per_device = np.asarray(avg_tops_per_device, dtype=float)
+    overhead = np.asarray(overhead, dtype=float)
+    shape = _shape(task, fleet_tops, active_devices, avg_tops_per_device, overhead)
+
+    effective_tops = fleet_tops * (1 - overhead) * task.parallelizable
+    device_capable = avg_tops_per_device >= task.min_tops_required
+
+    gpu_seconds = np.asarray(task.gpu_seconds_per_task, dtype=float)
+    tasks_per_second = _safe_div(effective_tops, task.min_tops_required * gpu_seconds / 1.0, 0.0)
+    tasks_per_second = np.where(gpu_seconds > 0, tasks_per_second, 0.0)
+
+    tasks_per_day = tasks_per_second * 86400
+    tasks_per_month = tasks_per_day * 30
+
+    revenue_per_task = np.maximum(0.0001, gpu_seconds * 0.01)
+    monthly_revenue = tasks_per_month * revenue_per_task
+    annual_revenue = monthly_revenue * 12
+
+    feasibility_score = np.minimum(100, (
+        np.where(device_capable, 30, 0) +
+        (30 * task.parallelizable) +
+        np.where(task.latency_sensitive, 5, 20) +
+        (20 * (1 - overhead))
+    ))
+
+    return {
+        "task_name": _full(task.name, shape),
+        "task_name_ar": _full(task.name_ar, shape),
+        "device_capable": _full(device_capable, shape),
+        "effective_tops": _full(effective_tops, shape),
+        "tasks_per_second": _full(tasks_per_second, shape),
+        "tasks_per_day": _full(tasks_per_day, shape),
+        "feasibility_score": _full(feasibility_score, shape),
+        "annual_revenue_estimate": _full(annual_revenue, shape),
+        "latency_sensitive": _full(task.latency_sensitive, shape),
+        "parallelizable_pct": _full(np.asarray(task.parallelizable) * 100, shape),
+        "overhead_pct": _full(overhead * 100, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# H. BATTERY IMPACT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_battery_impact_batch(
+    tier_name: Union[str, Sequence[str], np.ndarray],
+    nightly_hours: ArrayLike = NIGHTLY_HOURS,
+) -> Columns:
+    """Vectorized ``engine.compute_battery_impact``.
+
+    Args:
+        tier_name: Device tier label(s).
+        nightly_hours: Hours of GPU operation per night.
+
+    Returns:
+        Dict of columns with battery cycle analysis.
+    """
+    tier_name = np.asarray(tier_name, dtype=str)
+    shape = _shape(tier_name, nightly_hours)
+
+    cycles_per_night = BATTERY_CYCLE_PER_NIGHT_PCT / 100.0
+    cycles_per_year = cycles_per_night * 365
+    years_of_battery = BATTERY_TOTAL_CYCLES / (cycles_per_year + 365 * 0.3)
+    years_without_nhp = BATTERY_TOTAL_CYCLES / (365 * 0.3)
+    reduction_months = (years_without_nhp - years_of_battery) * 12
+
+    return {
+        "tier": _full(tier_name, shape),
+        "cycles_per_night": _full(cycles_per_night, shape),
+        "extra_cycles_per_year": _full(cycles_per_year, shape),
+        "battery_life_with_nhp_years": _full(years_of_battery, shape),
+        "battery_life_without_nhp_years": _full(years_without_nhp, shape),
+        "life_reduction_months": _full(reduction_months, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# I. MARKET SIZE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_market_size_batch(
+    region: Union[Region, Sequence[Region], RecordArray],
+    penetration_rate: ArrayLike,
+) -> Columns:
+    """Vectorized ``engine.compute_market_size``.
+
+    Args:
+        region: Regional parameters.
+        penetration_rate: NHP adoption rate among smartphone users.
+
+    Returns:
+        Dict of columns with device counts and revenue projections.
+    """
+    region = as_records(region)
+    penetration_rate = np.asarray(penetration_rate, dtype=float)
+    shape = _shape(region, penetration_rate)
+
+    total_smartphones = _int(np.asarray(region.population_millions, dtype=np.int64) * 1_000_000
+                             * region.smartphone_penetration)
+    nhp_devices = _int(total_smartphones * penetration_rate)
+
+    avg_device_monthly_rev = NIGHTLY_HOURS * 0.20 * 30 * 0.15
+    monthly_platform_revenue = nhp_devices * avg_device_monthly_rev
+    annual_platform_revenue = monthly_platform_revenue * 12
+
+    return {
+        "region": _full(region.name, shape),
+        "region_ar": _full(region.name_ar, shape),
+        "total_smartphones": _full(total_smartphones, shape),
+        "nhp_devices": _full(nhp_devices, shape),
+        "penetration_pct": _full(penetration_rate * 100, shape),
+        "monthly_platform_revenue": _full(monthly_platform_revenue, shape),
+        "annual_platform_revenue": _full(annual_platform_revenue, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# J. TOKEN ECONOMICS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_token_economics_batch(
+    total_devices: ArrayLike,
+    uptime: ArrayLike,
+    token_price: ArrayLike,
+    platform_cut: ArrayLike = 0.15,
+) -> Columns:
+    """Vectorized ``engine.compute_token_economics``.
+
+    Args:
+        total_devices: Number of devices in network.
+        uptime: Fraction active.
+        token_price: USD per token (1 token = 1 GPU-hour).
+        platform_cut: NHP's fee percentage.
+
+    Returns:
+        Dict of columns with token flow analysis.
+    """
+    total_devices = np.asarray(total_devices, dtype=np.int64)
+    uptime = np.asarray(uptime, dtype=float)
+    token_price = np.asarray(token_price, dtype=float)
+    platform_cut = np.asarray(platform_cut, dtype=float)
+    shape = _shape(total_devices, uptime, token_price, platform_cut)
+
+    active_devices = _int(total_devices * uptime)
+    daily_gpu_hours = active_devices * NIGHTLY_HOURS
+    monthly_gpu_hours = daily_gpu_hours * 30
+
+    total_token_flow_monthly = monthly_gpu_hours * token_price
+    platform_revenue_monthly = total_token_flow_monthly * platform_cut
+    user_payouts_monthly = total_token_flow_monthly * (1 - platform_cut)
+
+    implied_annual_flow = total_token_flow_monthly * 12
+    market_cap_conservative = implied_annual_flow * 5
+    market_cap_aggressive = implied_annual_flow * 20
+
+    return {
+        "total_devices": _full(total_devices, shape),
+        "active_devices": _full(active_devices, shape),
+        "token_price": _full(token_price, shape),
+        "monthly_gpu_hours": _full(monthly_gpu_hours, shape),
+        "total_monthly_flow": _full(total_token_flow_monthly, shape),
+        "platform_revenue_monthly": _full(platform_revenue_monthly, shape),
+        "user_payouts_monthly": _full(user_payouts_monthly, shape),
+        "implied_annual_flow": _full(implied_annual_flow, shape),
+        "market_cap_conservative": _full(market_cap_conservative, shape),
+        "market_cap_aggressive": _full(market_cap_aggressive, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# K. COMPETITIVE POSITIONING
+# ═══════════════════════════════════════════════════════════════════════════
+
+_ADVANTAGE_LABELS: List[str] = [
+    "Manufacturer partnership", "TEE security", "Blockchain neutral", "Larger device base",
+]
+
+
+def compute_competitive_batch(
+    nhp_devices: ArrayLike,
+    nhp_avg_tops: ArrayLike,
+    nhp_uptime: ArrayLike,
+    competitor: Union[Competitor, Sequence[Competitor], RecordArray],
+) -> Columns:
+    """Vectorized ``engine.compute_competitive``.
+
+    Args:
+        nhp_devices: NHP active device count.
+        nhp_avg_tops: Average TOPS per NHP device.
+        nhp_uptime: NHP uptime fraction.
+        competitor: Competitor profile(s).
+
+    Returns:
+        Dict of columns with power comparison; ``nhp_advantages`` is an
+        object column of lists.
+    """
+    competitor = as_records(competitor)
+    nhp_devices = np.asarray(nhp_devices, dtype=np.int64)
+    nhp_avg_tops = np.asarray(nhp_avg_tops, dtype=float)
+    nhp_uptime = np.asarray(nhp_uptime, dtype=float)
+    shape = _shape(nhp_devices, nhp_avg_tops, nhp_uptime, competitor)
+
+    nhp_active = _int(nhp_devices * nhp_uptime)
+    nhp_total_tops = nhp_active * nhp_avg_tops
+    comp_devices = np.asarray(competitor.device_base_estimate, dtype=np.int64)
+    comp_total_tops = comp_devices * competitor.avg_tops_per_node
+
+    power_ratio = _safe_div(nhp_total_tops, comp_total_tops, float("inf"))
+    device_ratio = _safe_div(nhp_active, comp_devices, float("inf"))
+
+    # Encode the four advantage flags as a 4-bit code and look the lists up.
+    code = (
+        _full(np.logical_not(competitor.mfg_partnership), shape).astype(np.intp) * 1 +
+        _full(np.logical_not(competitor.tee_protection), shape).astype(np.intp) * 2 +
+        _full(np.asarray(competitor.network_locked, dtype=bool), shape).astype(np.intp) * 4 +
+        _full(nhp_devices > comp_devices, shape).astype(np.intp) * 8
+    )
+    table = np.empty(16, dtype=object)
+    table[:] = [[label for bit, label in enumerate(_ADVANTAGE_LABELS) if c & (1 << bit)]
+                for c in range(16)]
+
+    return {
+        "competitor": _full(competitor.name, shape),
+        "nhp_active_devices": _full(nhp_active, shape),
+        "comp_devices": _full(comp_devices, shape),
+        "nhp_total_tops": _full(nhp_total_tops, shape),
+        "comp_total_tops": _full(comp_total_tops, shape),
+        "power_ratio": _full(power_ratio, shape),
+        "device_ratio": _full(device_ratio, shape),
+        "nhp_advantages": table[code],
+        "comp_device_type": _full(competitor.device_type, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# L. BREAKEVEN ANALYSIS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_breakeven_batch(
+    mfg: Union[Manufacturer, Sequence[Manufacturer], RecordArray],
+    cloud: Union[CloudProvider, Sequence[CloudProvider], RecordArray],
+    development_cost: ArrayLike = 50_000_000.0,
+    monthly_ops_cost: ArrayLike = 2_000_000.0,
+    coverage: ArrayLike = 0.40,
+) -> Columns:
+    """Vectorized ``engine.compute_breakeven``.
+
+    Args:
+        mfg: Manufacturer profile(s).
+        cloud: Cloud provider(s) being replaced.
+        development_cost: One-time NHP integration cost.
+        monthly_ops_cost: Monthly NHP operational cost.
+        coverage: Fraction of requests NHP covers.
+
+    Returns:
+        Dict of columns with breakeven timeline and ROI.
+    """
+    cost = compute_cost_comparison_batch(mfg, cloud, coverage)
+    mfg = as_records(mfg)
+    cloud = as_records(cloud)
+    development_cost = np.asarray(development_cost)
+    monthly_ops_cost = np.asarray(monthly_ops_cost)
+    shape = _shape(cost["monthly_savings"], development_cost, monthly_ops_cost)
+
+    monthly_savings = cost["monthly_savings"]
+    net_monthly_benefit = monthly_savings - monthly_ops_cost
+
+    breakeven_months = _safe_div(development_cost, net_monthly_benefit, float("inf"))
+
+    five_year_savings = (monthly_savings * 60) - development_cost - (monthly_ops_cost * 60)
+    roi_5yr_pct = _safe_div(five_year_savings, development_cost, 0.0) * 100
+
+    return {
+        "manufacturer": _full(mfg.name, shape),
+        "cloud_provider": _full(cloud.short, shape),
+        "development_cost": _full(development_cost, shape),
+        "monthly_ops_cost": _full(monthly_ops_cost, shape),
+        "monthly_savings": _full(monthly_savings, shape),
+        "net_monthly_benefit": _full(net_monthly_benefit, shape),
+        "breakeven_months": _full(breakeven_months, shape),
+        "five_year_net": _full(five_year_savings, shape),
+        "roi_5yr_pct": _full(roi_5yr_pct, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# M. RISK ANALYSIS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def compute_risk_batch(
+    risk_name: Union[str, Sequence[str], np.ndarray],
+    risk_name_ar: Union[str, Sequence[str], np.ndarray],
+    base_value: ArrayLike,
+    impact_pct: ArrayLike,
+    probability: ArrayLike,
+    category: Union[str, Sequence[str], np.ndarray],
+) -> Columns:
+    """Vectorized ``engine.compute_risk``.
+
+    Args:
+        risk_name: English name(s) of the risk.
+        risk_name_ar: Arabic name(s) of the risk.
+        base_value: The metric being risked.
+        impact_pct: How much the risk reduces the value (0-1).
+        probability: Likelihood of the risk materializing (0-1).
+        category: Risk category label(s).
+
+    Returns:
+        Dict of columns with expected loss and severity.
+    """
+    base_value = np.asarray(base_value)
+    impact_pct = np.asarray(impact_pct, dtype=float)
+    probability = np.asarray(probability, dtype=float)
+    shape = _shape(np.asarray(risk_name), np.asarray(risk_name_ar), base_value,
+                   impact_pct, probability, np.asarray(category))
+
+    potential_loss = base_value * impact_pct
+    expected_loss = potential_loss * probability
+
+    severity = np.select(
+        [expected_loss > base_value * 0.3,
+         expected_loss > base_value * 0.15,
+         expected_loss > base_value * 0.05],
+        ["🔴 Critical", "🟠 High", "🟡 Medium"],
+        default="🟢 Low",
+    )
+
+    return {
+        "risk_name": _full(risk_name, shape),
+        "risk_name_ar": _full(risk_name_ar, shape),
+        "category": _full(category, shape),
+        "base_value": _full(base_value, shape),
+        "impact_pct": _full(impact_pct * 100, shape),
+        "probability_pct": _full(probability * 100, shape),
+        "potential_loss": _full(potential_loss, shape),
+        "expected_loss": _full(expected_loss, shape),
+        "severity": _full(severity, shape),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PARITY CHECK (scalar reference ↔ batch)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _values_match(expected: Any, actual: Any) -> bool:
+    """Compare one scalar-engine value with one batch cell."""
+    if isinstance(expected, list):
+        return list(actual) == expected
+    if isinstance(expected, bool) or isinstance(expected, str):
+        return expected == actual
+    if isinstance(expected, (int, float)):
+        actual = float(actual)
+        if math.isinf(expected) or math.isinf(actual):
+            return expected == actual
+        return math.isclose(expected, actual, rel_tol=1e-12, abs_tol=1e-9)
+    return expected == actual
+
+
+def _batch_args(rows: List[Tuple[Any, ...]]) -> List[Any]:
+    """Transpose per-row argument tuples into batch columns."""
+    columns: List[Any] = []
+    for values in zip(*rows):
+        first = values[0]
+        if is_dataclass(first) or isinstance(first, (list, str)):
+            columns.append(list(values))
+        else:
+            columns.append(np.asarray(values))
+    return columns
+
+
+def check_parity(name: str, scalar_fn: Any, batch_fn: Any, rows: List[Tuple[Any, ...]]) -> List[str]:
+    """Evaluate ``rows`` through both engines and list every mismatch.
+
+    Args:
+        name: Label used in mismatch messages.
+        scalar_fn: Reference function from ``engine.py``.
+        batch_fn: Vectorized counterpart from this module.
+        rows: Positional argument tuples, one per scenario.
+
+    Returns:
+        Human-readable mismatch descriptions (empty when in parity).
+    """
+    batch = batch_fn(*_batch_args(rows))
+    problems: List[str] = []
+    for i, args in enumerate(rows):
+        expected = scalar_fn(*args)
+        if set(expected) != set(batch):
+            problems.append(f"{name}: key mismatch {sorted(set(expected) ^ set(batch))}")
+            break
+        for key, value in expected.items():
+            cell = batch[key].reshape(-1)[i]
+            if not _values_match(value, cell):
+                problems.append(f"{name}[{i}].{key}: scalar={value!r} batch={cell!r}")
+    return problems
+
+
+def parity_cases() -> List[Tuple[str, Any, Any, List[Tuple[Any, ...]]]]:
+    """Every registry × variant combination, as ``(name, scalar_fn, batch_fn, rows)``."""
+    from itertools import product
+    from mega_simulation import engine
+    from mega_simulation.data import (
+        MANUFACTURERS, CLOUD_PROVIDERS, REGIONS, TASK_TYPES, COMPETITORS,
+        UPTIME_VARIANTS, COVERAGE_VARIANTS, TOKEN_PRICE_VARIANTS,
+        DC_REPLACED_VARIANTS, OVERHEAD_VARIANTS,
+    )
+
+    mfgs = list(MANUFACTURERS.values())
+    clouds = list(CLOUD_PROVIDERS.values())
+    regions = list(REGIONS.values())
+    uptimes = UPTIME_VARIANTS + [0.0, 1.0]
+    alliances = [mfgs[:k] for k in range(1, len(mfgs) + 1)]
+    fleet_tops = [0.0, 1.5e9, 3.0e10]
+    dev_costs = [0.0, 10_000_000.0, 50_000_000.0]
+    ops_costs = [0.0, 2_000_000.0, 50_000_000.0]
+
+    cases = [
+        ("fleet_power", engine.compute_fleet_power, compute_fleet_power_batch,
+         list(product(mfgs, uptimes))),
+        ("cost_comparison", engine.compute_cost_comparison, compute_cost_comparison_batch,
+         list(product(mfgs, clouds, COVERAGE_VARIANTS + [0.0, 1.0]))),
+        ("user_income", engine.compute_user_income, compute_user_income_batch,
+         list(product(regions, TOKEN_PRICE_VARIANTS + [0.0]))),
+        ("environmental", engine.compute_environmental, compute_environmental_batch,
+         list(product(mfgs, uptimes, DC_REPLACED_VARIANTS + [0.0]))),
+        ("combined_network", engine.compute_combined_network, compute_combined_network_batch,
+         list(product(alliances, uptimes))),
+        ("task_feasibility", engine.compute_task_feasibility, compute_task_feasibility_batch,
+         [(t, ft, 1_000_000, avg, oh) for t, ft, avg, oh in
+          product(TASK_TYPES.values(), fleet_tops, [4.0, 12.0, 30.0], OVERHEAD_VARIANTS)]),
+        ("battery_impact", engine.compute_battery_impact, compute_battery_impact_batch,
+         list(product(["Flagship", "Budget"], [2.1, 5.0, 7.0]))),
+        ("market_size", engine.compute_market_size, compute_market_size_batch,
+         list(product(regions, [0.10, 0.05, 0.02, 0.005]))),
+        ("token_economics", engine.compute_token_economics, compute_token_economics_batch,
+         list(product([1_000_000, 1_000_000_000], uptimes, TOKEN_PRICE_VARIANTS, [0.0, 0.15]))),
+        ("competitive", engine.compute_competitive, compute_competitive_batch,
+         list(product([0, 300_000, 300_000_000], [20.0], uptimes, COMPETITORS.values()))),
+        ("breakeven", engine.compute_breakeven, compute_breakeven_batch,
+         list(product(mfgs, clouds, dev_costs, ops_costs, COVERAGE_VARIANTS))),
+        ("risk", engine.compute_risk, compute_risk_batch,
+         [("Risk", "مخاطرة", base, imp, prob, "Technical") for base, imp, prob in
+          product([0.0, 64_000_000.0], [0.1, 0.5, 0.9], [0.05, 0.3, 0.9])]),
+    ]
+    return cases
+
+
+def verify_parity() -> int:
+    """Run every registry × variant combination through both engines.
+
+    Returns:
+        Number of scenario rows checked.
+
+    Raises:
+        AssertionError: If any column differs from the scalar reference.
+    """
+    checked = 0
+    problems: List[str] = []
+    for name, scalar_fn, batch_fn, rows in parity_cases():
+        problems.extend(check_parity(name, scalar_fn, batch_fn, rows))
+        checked += len(rows)
+
+    if problems:
+        raise AssertionError("Vectorized engine out of parity:\n  " + "\n  ".join(problems[:20]))
+    return checked
+
+
+if __name__ == "__main__":
+    n = verify_parity()
+    print(f"✅ Vectorized engine matches engine.py on {n} scenario rows")
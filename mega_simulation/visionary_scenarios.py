@@ -15,21 +15,22 @@ Ideas nobody has thought of yet. The "wow factor" simulations.
  9. 🌍 Financial Inclusion — NHP as gateway to digital economy
 10. 🔮 2030 Projection — What NHP looks like at scale
 
-Run: python mega_simulation/visionary_scenarios.py
+Run: python mega_simulation/visionary_scenarios.py [--render-profile draft|web|print]
 """
-import sys, os, time, math
+import argparse, sys, os, time, math
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from typing import Dict, Any, List
 from datetime import datetime
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker
 import numpy as np
 
-CHART_DPI = 300
+from mega_simulation.availability import availability_matrix, timezone_availability
+from mega_simulation.render import (
+    ChartJob, add_profile_argument, asset_dir, pyplot, render_charts, report_path, save_figure,
+    set_render_profile,
+)
+
 H100_TOPS = 2000.0
 
 def _wm(ax):
@@ -55,22 +56,28 @@ def _n(v):
 TIMEZONE_REGIONS = [
     {"name": "East Asia", "name_ar": "شرق آسيا", "utc": 8, "devices_m": 800, "night_start": 22, "night_end": 6},
     {"name": "South Asia", "name_ar": "جنوب آسيا", "utc": 5.5, "devices_m": 500, "night_start": 23, "night_end": 6},
-    {"name": "Middle East", "name_ar": "الشرق الأوسط", "utc": 3, "devices_m": 100, "night_start": 23, "night_end": 6},
-    {"name": "Europe", "name_ar": "أوروبا", "utc": 1, "devices_m": 200, "night_start": 23, "night_end": 7},
+    {"name": "Middle East", "name_ar": "الشرق الأوسط", "utc": 3, "devices_m": 100, "night_start": 23, "night_end": 6,
+     "days_off": (4, 5)},
+    {"name": "Europe", "name_ar": "أوروبا", "utc": 1, "devices_m": 200, "night_start": 23, "night_end": 7, "dst": "eu"},
     {"name": "Africa", "name_ar": "أفريقيا", "utc": 2, "devices_m": 150, "night_start": 22, "night_end": 6},
-    {"name": "East Americas", "name_ar": "شرق الأمريكتين", "utc": -5, "devices_m": 300, "night_start": 23, "night_end": 7},
-    {"name": "West Americas", "name_ar": "غرب الأمريكتين", "utc": -8, "devices_m": 200, "night_start": 23, "night_end": 7},
-    {"name": "Oceania", "name_ar": "أوقيانوسيا", "utc": 10, "devices_m": 30, "night_start": 22, "night_end": 6},
+    {"name": "East Americas", "name_ar": "شرق الأمريكتين", "utc": -5, "devices_m": 300, "night_start": 23, "night_end": 7,
+     "dst": "us"},
+    {"name": "West Americas", "name_ar": "غرب الأمريكتين", "utc": -8, "devices_m": 200, "night_start": 23, "night_end": 7,
+     "dst": "us"},
+    {"name": "Oceania", "name_ar": "أوقيانوسيا", "utc": 10, "devices_m": 30, "night_start": 22, "night_end": 6, "dst": "au"},
 ]
-
-def simulate_timezone_arbitrage():
-    """Calculate 24/7 global coverage from nighttime-only devices."""
-    hourly_devices = [0.0] * 24
-    for tz in TIMEZONE_REGIONS:
-        for h in range(24):
-            local_h = (h + tz["utc"]) % 24
-            if tz["night_start"] <= local_h or local_h < tz["night_end"]:
-                hourly_devices[h] += tz["devices_m"]
+AVAILABILITY_YEAR = 2026
+
+def simulate_timezone_arbitrage(year=AVAILABILITY_YEAR, step_minutes=1):
+    """Calculate 24/7 global coverage from nighttime-only devices.
+
+    Built on the minute-resolution availability matrix (availability.py):
+    hourly figures are yearly means per UTC hour, ``always_on_m`` is the
+    lowest availability of any slot in the year.
+    """
+    matrix = availability_matrix(timezone_availability(TIMEZONE_REGIONS), year, step_minutes)
+    hourly_devices = matrix.by_utc_hour().sum(axis=1).tolist()
+    total = matrix.total_m()
     min_devices = min(hourly_devices)
     max_devices = max(hourly_devices)
     avg_devices = sum(hourly_devices) / 24
@@ -80,7 +87,7 @@ def simulate_timezone_arbitrage():
         "avg_devices_m": avg_devices,
         "coverage_pct": (min_devices / max_devices * 100) if max_devices > 0 else 0,
         "total_fleet_m": sum(tz["devices_m"] for tz in TIMEZONE_REGIONS),
-        "always_on_m": min_devices,  # Devices available at ANY hour
+        "always_on_m": float(total.min()),  # Devices available at ANY minute of the year
     }
 
 # ═══════════════════════════════════════════════════════
@@ -236,12 +243,21 @@ def simulate_tipping_points():
 # CHARTS
 # ═══════════════════════════════════════════════════════
 
-def generate_charts(tz, ewaste, geo, edu, tipping, out_dir):
+def generate_charts(tz, ewaste, geo, edu, tipping, out_dir, workers=1):
     os.makedirs(out_dir, exist_ok=True)
-    plt.style.use("seaborn-v0_8-darkgrid")
-    saved = []
-
-    # 1. Follow the Moon — 24h coverage
+    return render_charts([
+        ChartJob(_chart_follow_the_moon, (tz, out_dir)),
+        ChartJob(_chart_ewaste, (ewaste, out_dir)),
+        ChartJob(_chart_sovereignty, (geo, out_dir)),
+        ChartJob(_chart_education, (edu, out_dir)),
+        ChartJob(_chart_tipping_points, (tipping, out_dir)),
+        ChartJob(_chart_2030_projection, (out_dir,)),
+    ], workers)
+
+
+def _chart_follow_the_moon(tz, out_dir):
+    """Chart 1: Follow the Moon — 24h coverage."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(14, 6))
     hours = list(range(24))
     devices = tz["hourly_devices_m"]
@@ -258,9 +274,13 @@ def generate_charts(tz, ewaste, geo, edu, tipping, out_dir):
     ax.legend(fontsize=10)
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "vis_01_follow_the_moon.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # 2. E-Waste: Old phone income
+
+def _chart_ewaste(ewaste, out_dir):
+    """Chart 2: E-Waste: Old phone income."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
     models = [e["model"][:18] for e in ewaste]
     incomes = [e["monthly_income"] for e in ewaste]
@@ -277,9 +297,13 @@ def generate_charts(tz, ewaste, geo, edu, tipping, out_dir):
     ax.legend()
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "vis_02_ewaste.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # 3. Geopolitical sovereignty
+
+def _chart_sovereignty(geo, out_dir):
+    """Chart 3: Geopolitical sovereignty."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
     regions = [r["name"] for r in geo]
     h100s = [r["h100_equiv"] for r in geo]
@@ -297,9 +321,13 @@ def generate_charts(tz, ewaste, geo, edu, tipping, out_dir):
     ax.legend()
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "vis_03_sovereignty.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # 4. Education savings
+def _chart_education(edu, out_dir):
+    """Chart 4: Education savings."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
     countries = [e["country"] for e in edu]
     c_cost = [e["cloud_total"]/1e6 for e in edu]
@@ -317,9 +345,13 @@ def generate_charts(tz, ewaste, geo, edu, tipping, out_dir):
     ax.legend()
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "vis_04_education.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
+
 
-    # 5. Tipping points
+def _chart_tipping_points(tipping, out_dir):
+    """Chart 5: Tipping points."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(14, 7))
     devices_log = [m["devices"] for m in tipping]
     labels = [m["label"] for m in tipping]
@@ -337,9 +369,13 @@ def generate_charts(tz, ewaste, geo, edu, tipping, out_dir):
     ax.set_ylabel("Devices (Millions, log scale)")
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "vis_05_tipping_points.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
+    save_figure(fig, p); plt.close(fig)
+    return p
 
-    # 6. 2030 projection
+
+def _chart_2030_projection(out_dir):
+    """Chart 6: 2030 projection."""
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(12, 7))
     years = [2026, 2027, 2028, 2029, 2030]
     scenarios = {
@@ -357,9 +393,8 @@ def generate_charts(tz, ewaste, geo, edu, tipping, out_dir):
     ax.set_yscale("log")
     _wm(ax); plt.tight_layout()
     p = os.path.join(out_dir, "vis_06_2030_projection.png")
-    fig.savefig(p, dpi=CHART_DPI); plt.close(fig); saved.append(p)
-
-    return saved
+    save_figure(fig, p); plt.close(fig)
+    return p
 
 
 # ═══════════════════════════════════════════════════════
@@ -375,7 +410,7 @@ def generate_report(tz, ewaste, geo, disasters, edu, tipping, charts, total):
 
     # 1. Follow the Moon
     L.append("## 🌙 1. Follow the Moon — 24/7 تغطية عالمية\n")
-    L.append(f"![Follow the Moon](../../assets/visionary/{os.path.basename(charts[0])})\n")
+    L.append(f"![Follow the Moon](../../{charts[0]})\n")
     L.append("**The insight:** NHP doesn't need any single phone to run 24/7. Because it's always nighttime *somewhere*, the global network provides continuous compute.\n")
     L.append(f"- Total fleet: **{tz['total_fleet_m']:.0f}M phones**")
     L.append(f"- Always available (any hour): **{tz['always_on_m']:.0f}M phones** ({tz['coverage_pct']:.0f}% coverage)")
@@ -385,7 +420,7 @@ def generate_report(tz, ewaste, geo, disasters, edu, tipping, charts, total):
 
     # 2. E-Waste
     L.append("## 📱 2. E-Waste Revolution — ثورة النفايات الإلكترونية\n")
-    L.append(f"![E-Waste](../../assets/visionary/{os.path.basename(charts[1])})\n")
+    L.append(f"![E-Waste](../../{charts[1]})\n")
     L.append("**The insight:** 5.3 billion phones are discarded every year. With NHP, old phones become passive income generators instead of landfill.\n")
     L.append("| Model | TOPS | Used Price | Monthly Income | Payback | Fleet H100 Equiv |")
     L.append("|---|---|---|---|---|---|")
@@ -397,7 +432,7 @@ def generate_report(tz, ewaste, geo, disasters, edu, tipping, charts, total):
 
     # 3. Geopolitical sovereignty
     L.append("## ⚔️ 3. Compute Sovereignty — استقلال الحوسبة\n")
-    L.append(f"![Sovereignty](../../assets/visionary/{os.path.basename(charts[2])})\n")
+    L.append(f"![Sovereignty](../../{charts[2]})\n")
     L.append("**The insight:** Countries dependent on US/China cloud providers are one sanction away from losing all AI capability. NHP makes compute sovereign.\n")
     L.append("| Region | Cloud Dependency | Phones | Local H100 Equiv | Risk | Potential Savings |")
     L.append("|---|---|---|---|---|---|")
@@ -415,7 +450,7 @@ def generate_report(tz, ewaste, geo, disasters, edu, tipping, charts, total):
 
     # 5. Education
     L.append("## 🎓 5. Education Equalizer — مُعادِل التعليم\n")
-    L.append(f"![Education](../../assets/visionary/{os.path.basename(charts[3])})\n")
+    L.append(f"![Education](../../{charts[3]})\n")
     L.append("| Country | Students | Cloud Cost/yr | NHP Cost/yr | Savings | GPU hrs/student |")
     L.append("|---|---|---|---|---|---|")
     for e in edu:
@@ -424,7 +459,7 @@ def generate_report(tz, ewaste, geo, disasters, edu, tipping, charts, total):
 
     # 6. Tipping Points
     L.append("## 📈 6. Tipping Points — نقاط التحول\n")
-    L.append(f"![Tipping Points](../../assets/visionary/{os.path.basename(charts[4])})\n")
+    L.append(f"![Tipping Points](../../{charts[4]})\n")
     L.append("| Milestone | Devices | H100 Equiv | Revenue/mo | What Happens |")
     L.append("|---|---|---|---|---|")
     for m in tipping:
@@ -454,7 +489,7 @@ def generate_report(tz, ewaste, geo, disasters, edu, tipping, charts, total):
     L.append("- **Estimate**: 500M unbanked users × $30/month = **$180B/year** injected into emerging economies\n")
 
     L.append("## 🔮 10. NHP in 2030 — Vision / رؤية 2030\n")
-    L.append(f"![2030 Projection](../../assets/visionary/{os.path.basename(charts[5])})\n")
+    L.append(f"![2030 Projection](../../{charts[5]})\n")
     L.append("| Metric | Conservative | Moderate | Optimistic |")
     L.append("|---|---|---|---|")
     L.append("| Active devices (2030) | 300M | 1B | 3B |")
@@ -476,7 +511,10 @@ def generate_report(tz, ewaste, geo, disasters, edu, tipping, charts, total):
 # MAIN
 # ═══════════════════════════════════════════════════════
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NHP Phase 7 — Visionary Scenarios")
+    add_profile_argument(parser)
+    set_render_profile(parser.parse_args(argv).render_profile)
     print("=" * 60)
     print("  NHP Phase 7 — Visionary Scenarios")
     print("  سيناريوهات رؤيوية ما خطرت على بال حدا")
@@ -510,16 +548,17 @@ def main():
     total = 24 + len(ewaste) + len(geo) + len(DISASTER_SCENARIOS) + len(edu) + len(tipping) + 4  # +4 for sections 7-10
 
     print(f"\n▶ Generating charts...")
-    charts = generate_charts(tz, ewaste, geo, edu, tipping, "assets/visionary")
+    charts = generate_charts(tz, ewaste, geo, edu, tipping, asset_dir("assets/visionary"))
     for c in charts:
         print(f"  ✅ {c}")
 
     print(f"\n▶ Generating report...")
     report = generate_report(tz, ewaste, geo, DISASTER_SCENARIOS, edu, tipping, charts, total)
-    os.makedirs("output", exist_ok=True)
-    with open("output/visionary_scenarios.md", "w", encoding="utf-8") as f:
+    path = report_path("output/visionary_scenarios.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
         f.write(report)
-    print("  ✅ output/visionary_scenarios.md")
+    print(f"  ✅ {path}")
 
     elapsed = time.time() - start
     print(f"\n{'='*60}")